@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de la API del visor (in-process)
+Ejecuta data_viewer_api.app sobre un transporte ASGI en memoria (sin red ni
+uvicorn) con una mezcla realista de consultas: filtros, búsqueda de texto,
+ordenamientos, páginas profundas, estadísticas y exportación CSV.
+
+Reporta latencia p50/p95/p99, throughput y RSS máximo, y guarda los resultados
+en JSON (data/benchmarks/) para comparar entre commits.
+
+Uso:
+    python scripts/benchmark_viewer.py --requests 2000 --concurrency 16
+    python scripts/benchmark_viewer.py --csv data/synthetic/tarifarios_100k.csv
+    python scripts/benchmark_viewer.py --baseline data/benchmarks/viewer_<...>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configurar logger
+logger.remove()
+logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>")
+
+# Directorios
+PROJECT_ROOT = Path(__file__).parent.parent
+RESULTS_DIR = PROJECT_ROOT / "data" / "benchmarks"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Escenarios y su peso en la mezcla (proporción aproximada de un uso real del visor)
+SCENARIO_WEIGHTS = {
+    "tarifarios_pagina": 20,
+    "tarifarios_filtros": 20,
+    "tarifarios_texto": 15,
+    "tarifarios_orden": 15,
+    "tarifarios_profunda": 10,
+    "stats": 8,
+    "filters": 8,
+    "export_csv": 4,
+}
+
+LIMIT = 20
+SORT_COLUMNS = ["Banco", "Concepto", "Tipo", "Moneda", "Tasa_Porcentaje_MN", "Monto_Fijo_MN"]
+
+
+def percentil(valores: List[float], p: float) -> Optional[float]:
+    """Percentil por interpolación lineal (valores en milisegundos)."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+
+def rss_maximo_mb() -> Optional[float]:
+    """RSS máximo del proceso en MB (None si la plataforma no lo informa)."""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryMix:
+    """Genera requests de cada escenario con valores tomados del propio dataset."""
+
+    def __init__(self, filtros: Dict[str, List[str]], terminos: List[str], total_items: int, seed: int):
+        self.filtros = filtros
+        self.terminos = terminos or ["comision"]
+        self.total_pages = max(1, (total_items + LIMIT - 1) // LIMIT)
+        self.random = random.Random(seed)
+        self.escenarios = list(SCENARIO_WEIGHTS)
+        self.pesos = list(SCENARIO_WEIGHTS.values())
+
+    def _valor(self, clave: str) -> Optional[str]:
+        valores = self.filtros.get(clave) or []
+        return self.random.choice(valores) if valores else None
+
+    def siguiente(self) -> Tuple[str, str, Dict[str, Any]]:
+        """Devuelve (escenario, ruta, parámetros)."""
+        r = self.random
+        escenario = r.choices(self.escenarios, weights=self.pesos)[0]
+
+        if escenario == "tarifarios_pagina":
+            return escenario, "/api/v1/tarifarios", {"skip": r.randrange(min(self.total_pages, 5)) * LIMIT, "limit": LIMIT}
+        if escenario == "tarifarios_filtros":
+            params = {"limit": LIMIT, "banco": self._valor("bancos")}
+            if r.random() < 0.6:
+                params["tipo"] = self._valor("tipos")
+            if r.random() < 0.4:
+                params["moneda"] = self._valor("monedas")
+            if r.random() < 0.3:
+                params["tasa_mn_gte"] = r.choice([0, 1, 5, 10])
+            return escenario, "/api/v1/tarifarios", {k: v for k, v in params.items() if v is not None}
+        if escenario == "tarifarios_texto":
+            return escenario, "/api/v1/tarifarios", {"q": r.choice(self.terminos), "limit": LIMIT}
+        if escenario == "tarifarios_orden":
+            return escenario, "/api/v1/tarifarios", {
+                "sort_by": r.choice(SORT_COLUMNS),
+                "sort_order": r.choice(["asc", "desc"]),
+                "skip": r.randrange(min(self.total_pages, 10)) * LIMIT,
+                "limit": LIMIT,
+            }
+        if escenario == "tarifarios_profunda":
+            # Últimas páginas del listado completo ordenado
+            pagina = r.randrange(max(0, self.total_pages - 5), self.total_pages)
+            return escenario, "/api/v1/tarifarios", {"skip": pagina * LIMIT, "limit": LIMIT, "sort_by": r.choice(SORT_COLUMNS)}
+        if escenario == "stats":
+            return escenario, "/api/v1/stats", {}
+        if escenario == "filters":
+            return escenario, "/api/v1/filters", {}
+        return escenario, "/api/v1/export/csv", {"banco": self._valor("bancos")}
+
+
+async def ejecutar(app, total_requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """Lanza `concurrency` clientes concurrentes hasta completar `total_requests`."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        filtros = (await client.get("/api/v1/filters")).json()
+        stats = (await client.get("/api/v1/stats")).json()
+        terminos = ["efectivo", "disposicion", "mantenimiento", "tarjeta", "transferencia", "interes", "seguro"]
+        mix = QueryMix(filtros, terminos, stats.get("total_registros", 0), seed)
+
+        latencias: Dict[str, List[float]] = {escenario: [] for escenario in SCENARIO_WEIGHTS}
+        errores: Dict[str, int] = {escenario: 0 for escenario in SCENARIO_WEIGHTS}
+        bytes_recibidos = 0
+        pendientes = total_requests
+
+        async def cliente():
+            nonlocal pendientes, bytes_recibidos
+            while pendientes > 0:
+                pendientes -= 1
+                escenario, ruta, params = mix.siguiente()
+                inicio = time.perf_counter()
+                respuesta = await client.get(ruta, params=params)
+                cuerpo = await respuesta.aread()
+                latencias[escenario].append((time.perf_counter() - inicio) * 1000)
+                bytes_recibidos += len(cuerpo)
+                if respuesta.status_code >= 400:
+                    errores[escenario] += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(concurrency)))
+        duracion = time.perf_counter() - inicio
+
+    def resumen(valores: List[float]) -> Dict[str, Any]:
+        return {
+            "requests": len(valores),
+            "p50_ms": percentil(valores, 50),
+            "p95_ms": percentil(valores, 95),
+            "p99_ms": percentil(valores, 99),
+            "max_ms": max(valores) if valores else None,
+        }
+
+    todas = [v for valores in latencias.values() for v in valores]
+    return {
+        "duracion_s": duracion,
+        "throughput_rps": len(todas) / duracion if duracion else None,
+        "bytes_recibidos": bytes_recibidos,
+        "total": resumen(todas),
+        "escenarios": {
+            escenario: {**resumen(valores), "errores": errores[escenario]}
+            for escenario, valores in latencias.items() if valores
+        },
+    }
+
+
+def comparar(resultado: Dict[str, Any], baseline_path: Path) -> None:
+    """Muestra la variación de p95 y throughput respecto de una corrida anterior."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    logger.info(f"Comparación con {baseline_path.name} (commit {baseline.get('commit')})")
+
+    def delta(actual, anterior) -> str:
+        if not actual or not anterior:
+            return "n/d"
+        return f"{(actual - anterior) / anterior * 100:+.1f}%"
+
+    for escenario, actual in resultado["escenarios"].items():
+        anterior = baseline.get("escenarios", {}).get(escenario, {})
+        logger.info(f"  {escenario:<22} p95 {actual['p95_ms']:8.2f} ms ({delta(actual['p95_ms'], anterior.get('p95_ms'))})")
+    logger.info(f"  throughput: {resultado['throughput_rps']:.1f} rps "
+                f"({delta(resultado['throughput_rps'], baseline.get('throughput_rps'))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga in-process de la API del visor')
+    parser.add_argument('--csv', type=Path, help='Dataset a servir (por defecto data/output/tarifarios_bancarios.csv)')
+    parser.add_argument('--requests', type=int, default=1000, help='Total de requests medidos')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clientes concurrentes')
+    parser.add_argument('--warmup', type=int, default=50, help='Requests de calentamiento (no se miden)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de la mezcla de consultas')
+    parser.add_argument('--cache', action='store_true', help='Mantener activa la caché de respuestas')
+    parser.add_argument('--baseline', type=Path, help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--output', type=Path, help='Ruta del JSON de resultados')
+    args = parser.parse_args()
+
+    # La configuración del visor se lee al importar la app
+    if args.csv:
+        os.environ["VIEWER_CSV_PATH"] = str(args.csv.resolve())
+    if not args.cache:
+        os.environ["VIEWER_CACHE_SIZE"] = "0"
+    os.environ.setdefault("VIEWER_SHARED_STORE", "0")
+
+    inicio = time.perf_counter()
+    from src.api.data_viewer_api import app
+    from src.api.endpoints import viewer_endpoints
+    carga_s = time.perf_counter() - inicio
+    total_registros = viewer_endpoints.service.info()["total_registros"]
+    logger.info(f"Dataset: {viewer_endpoints.CSV_PATH} ({total_registros} filas, carga {carga_s:.2f}s)")
+
+    if args.warmup:
+        asyncio.run(ejecutar(app, args.warmup, args.concurrency, args.seed + 1))
+    resultado = asyncio.run(ejecutar(app, args.requests, args.concurrency, args.seed))
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "dataset": str(viewer_endpoints.CSV_PATH),
+        "dataset_version": viewer_endpoints.service.info()["version"],
+        "total_registros": total_registros,
+        "carga_s": carga_s,
+        "concurrency": args.concurrency,
+        "cache": args.cache,
+        "peak_rss_mb": rss_maximo_mb(),
+        **resultado,
+    }
+
+    total = resultado["total"]
+    logger.info(f"{total['requests']} requests en {resultado['duracion_s']:.2f}s "
+                f"-> {resultado['throughput_rps']:.1f} rps, RSS máx {resultado['peak_rss_mb'] or 0:.0f} MB")
+    logger.info(f"Latencia total: p50 {total['p50_ms']:.2f} ms | p95 {total['p95_ms']:.2f} ms | p99 {total['p99_ms']:.2f} ms")
+    for escenario, datos in resultado["escenarios"].items():
+        logger.info(f"  {escenario:<22} n={datos['requests']:<5} p50 {datos['p50_ms']:8.2f} | "
+                    f"p95 {datos['p95_ms']:8.2f} | p99 {datos['p99_ms']:8.2f} ms | errores {datos['errores']}")
+
+    salida = args.output or RESULTS_DIR / f"viewer_{datetime.now():%Y%m%d_%H%M%S}_{resultado['commit'] or 'local'}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.success(f"Resultados guardados en {salida}")
+
+    if args.baseline:
+        comparar(resultado, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
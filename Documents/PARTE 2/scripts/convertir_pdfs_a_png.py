@@ -2,6 +2,11 @@
 """
 Script para convertir PDFs a imágenes PNG en paralelo
 Optimizado para Intel i9-13900H (20 threads)
+
+Sólo convierte los PDFs nuevos o que cambiaron desde la última conversión
+(según el manifiesto de descargas); --forzar convierte todos. Un documento
+publicado con varios nombres (mismo sha256) se convierte una sola vez, con
+su nombre canónico.
 """
 import sys
 from pathlib import Path
@@ -12,10 +17,26 @@ from tqdm import tqdm
 from loguru import logger
 import time
 
+# Agregar el directorio padre al path para poder importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.utils.download_manifest import DownloadManifest, ETAPA_PNG
+from src.utils.raw_store import es_blob
+
 # Configuración
 MAX_WORKERS = 16  # Usar 16 hilos (dejar 4 threads libres)
 DPI = 300  # Calidad de imagen (300 DPI = buena calidad)
 OUTPUT_DIR = Path("data/images")
+PROCESSED_DIR = Path("data/images_processed")  # PNGs que el OCR ya procesó
+
+
+def tiene_imagenes(pdf_path: Path) -> bool:
+    """True si el PDF ya tiene PNGs en data/images o en data/images_processed"""
+    banco = pdf_path.parent.name
+    return any(
+        next((carpeta / banco / pdf_path.stem).glob("*.png"), None) is not None
+        for carpeta in (OUTPUT_DIR, PROCESSED_DIR)
+    )
+
 
 def convertir_pdf_a_png(pdf_path: Path) -> dict:
     """
@@ -43,6 +64,10 @@ def convertir_pdf_a_png(pdf_path: Path) -> dict:
         output_folder = OUTPUT_DIR / banco / pdf_name
         output_folder.mkdir(parents=True, exist_ok=True)
 
+        # Si el PDF cambió, las páginas anteriores pueden sobrar
+        for png_anterior in output_folder.glob("pagina_*.png"):
+            png_anterior.unlink()
+
         # Convertir PDF a imágenes
         # poppler_path: Descomentar y ajustar si poppler no está en PATH
         imagenes = convert_from_path(
@@ -88,14 +113,37 @@ def main():
         logger.error(f"❌ Directorio {raw_dir} no existe")
         return
 
-    # Obtener lista de PDFs
-    pdfs = list(raw_dir.rglob("*.pdf"))
+    # Obtener lista de PDFs (por nombre; los blobs son el mismo contenido)
+    todos = [pdf for pdf in raw_dir.rglob("*.pdf") if not es_blob(raw_dir, pdf)]
 
-    if not pdfs:
+    if not todos:
         logger.error("❌ No se encontraron PDFs en data/raw/")
         return
 
-    logger.info(f"📄 Total de PDFs encontrados: {len(pdfs)}")
+    logger.info(f"📄 Total de PDFs encontrados: {len(todos)}")
+
+    # Saltar los PDFs ya convertidos cuyo contenido no cambió
+    manifest = DownloadManifest(raw_dir)
+    forzar = "--forzar" in sys.argv
+    pdfs = []
+    duplicados = 0
+    for pdf in todos:
+        if not manifest.es_canonica(pdf):
+            duplicados += 1
+        elif forzar or not tiene_imagenes(pdf) or manifest.etapa_desactualizada(pdf, ETAPA_PNG):
+            pdfs.append(pdf)
+        else:
+            # Convertido antes de registrar la etapa: queda registrado con su contenido actual
+            manifest.marcar_etapa(pdf, ETAPA_PNG)
+
+    logger.info(f"♻️  Sin cambios (se saltan): {len(todos) - len(pdfs) - duplicados}")
+    logger.info(f"🔁 Duplicados de otro PDF (se saltan): {duplicados}")
+    logger.info(f"📄 PDFs a convertir: {len(pdfs)}")
+
+    if not pdfs:
+        manifest.guardar()
+        logger.success("✅ Todos los PDFs ya estaban convertidos")
+        return
 
     # Crear directorio de salida
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -112,8 +160,12 @@ def main():
             for future in as_completed(futures):
                 resultado = future.result()
                 resultados.append(resultado)
+                if resultado["exito"]:
+                    manifest.marcar_etapa(futures[future], ETAPA_PNG)
                 pbar.update(1)
 
+    manifest.guardar()
+
     # Estadísticas finales
     logger.info("\n" + "=" * 70)
     logger.info("📊 RESUMEN DE CONVERSIÓN")
@@ -144,6 +196,8 @@ def main():
     import json
     reporte = {
         "total_pdfs": len(pdfs),
+        "sin_cambios": len(todos) - len(pdfs) - duplicados,
+        "duplicados": duplicados,
         "exitosos": len(exitosos),
         "fallidos": len(fallidos),
         "total_paginas": total_paginas,
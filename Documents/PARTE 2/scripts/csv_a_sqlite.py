@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script para construir la base SQLite del visor (VIEWER_BACKEND=sqlite) desde
+tarifarios_bancarios.csv: tabla con índices, búsqueda FTS5, cubo de
+agregación y estadísticas precalculadas.
+
+El visor la construye solo al iniciar si falta o está desactualizada; este
+script sirve para hacerlo antes del despliegue con datasets grandes.
+
+Uso:
+    python scripts/csv_a_sqlite.py
+    python scripts/csv_a_sqlite.py --csv data/synthetic/tarifarios_sinteticos.csv --force
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import settings
+from src.services.sqlite_backend import BUILD_CHUNK_ROWS, build_database, sqlite_path
+
+# Configurar logger
+logger.remove()
+logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>")
+
+CSV_FILE = PROJECT_ROOT / "data" / "output" / "tarifarios_bancarios.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye la base SQLite del visor desde el CSV de tarifarios")
+    parser.add_argument("--csv", type=Path, default=CSV_FILE, help="CSV de origen")
+    parser.add_argument("--db", type=Path, default=None,
+                        help="Archivo de la base (por defecto, el de DATABASE_URL)")
+    parser.add_argument("--chunk-rows", type=int, default=BUILD_CHUNK_ROWS, help="Filas por bloque al cargar")
+    parser.add_argument("--force", action="store_true", help="Reconstruir aunque el CSV no haya cambiado")
+    args = parser.parse_args()
+
+    if not args.csv.exists():
+        logger.error(f"No existe {args.csv}")
+        sys.exit(1)
+
+    db_path = args.db or sqlite_path(settings.DATABASE_URL, settings.BASE_DIR)
+    version = build_database(args.csv, db_path, chunk_rows=args.chunk_rows, force=args.force)
+    logger.success(f"Base lista: {db_path} (versión {version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,81 +11,64 @@ from datetime import datetime
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.scrapers import (
-    BBVAScraper,
-    BCPScraper,
-    InterbankScraper,
-    BancoNacionScraper,
-    ScotiabankScraper
-)
-from src.utils.downloader import PDFDownloader
-from src.models import BancoEnum
-from loguru import logger
-
-
-def descargar_banco(banco_enum, scraper_class, downloader):
-    """Descarga PDFs de un banco específico"""
-    print(f"\n{'='*70}")
-    print(f"🏦 DESCARGANDO: {banco_enum.value}")
-    print(f"{'='*70}")
+from src.scrapers import ScrapingScheduler
+
 
+def al_descargar(url, resultado):
+    """Muestra cada PDF apenas termina (los bancos se descargan a la vez)"""
+    if resultado.sin_cambios:
+        print(f"  ♻️  [{url.banco.value}] Sin cambios: {resultado.ruta_archivo}")
+    elif resultado.exito:
+        print(f"  ✅ [{url.banco.value}] Guardado en: {resultado.ruta_archivo}")
+    else:
+        print(f"  ❌ [{url.banco.value}] {url.texto[:60]}: {resultado.error}")
+
+
+def resumir_banco(resultado_banco):
+    """Arma el resumen de un banco a partir de su BancoRefreshResult y lo imprime"""
+    scraping = resultado_banco.scraping
     resultados = {
-        "banco": banco_enum.value,
-        "urls_encontradas": 0,
+        "banco": scraping.banco.value,
+        "urls_encontradas": scraping.total_urls,
         "descargas_exitosas": 0,
+        "sin_cambios": 0,
         "descargas_fallidas": 0,
+        "duracion_segundos": round(resultado_banco.duracion_total_segundos, 2),
+        "errores": scraping.errores,
         "urls": []
     }
 
-    try:
-        # Scrapear URLs
-        with scraper_class() as scraper:
-            logger.info(f"Scrapeando URLs de {banco_enum.value}...")
-            urls = scraper.obtener_urls()
-            resultados["urls_encontradas"] = len(urls)
-
-            print(f"✅ URLs encontradas: {len(urls)}")
-
-            if not urls:
-                print("⚠️  No hay URLs para descargar\n")
-                return resultados
-
-            # Descargar cada PDF
-            print(f"\n📥 Iniciando descarga de {len(urls)} PDFs...")
-
-            for i, url in enumerate(urls, 1):
-                print(f"\n[{i}/{len(urls)}] Descargando: {url.texto[:60]}...")
-
-                resultado = downloader.descargar(url)
-
-                if resultado.exito:
-                    resultados["descargas_exitosas"] += 1
-                    print(f"  ✅ Guardado en: {resultado.ruta_archivo}")
-                else:
-                    resultados["descargas_fallidas"] += 1
-                    print(f"  ❌ Error: {resultado.error}")
-
-                # Guardar info de la URL
-                resultados["urls"].append({
-                    "url": url.url,
-                    "texto": url.texto,
-                    "tipo_producto": url.tipo_producto,
-                    "descargado": resultado.exito,
-                    "archivo": resultado.ruta_archivo if resultado.exito else None,
-                    "error": resultado.error if not resultado.exito else None
-                })
-
-            print(f"\n{'='*70}")
-            print(f"📊 RESUMEN {banco_enum.value}")
-            print(f"{'='*70}")
-            print(f"  URLs encontradas:      {resultados['urls_encontradas']}")
-            print(f"  Descargas exitosas:    {resultados['descargas_exitosas']} ✅")
-            print(f"  Descargas fallidas:    {resultados['descargas_fallidas']} ❌")
-            print(f"{'='*70}\n")
-
-    except Exception as e:
-        logger.error(f"Error procesando {banco_enum.value}: {e}")
-        print(f"❌ Error: {e}\n")
+    for url, resultado in zip(scraping.urls_encontradas, resultado_banco.descargas):
+        if resultado.exito:
+            resultados["descargas_exitosas"] += 1
+            if resultado.sin_cambios:
+                resultados["sin_cambios"] += 1
+        else:
+            resultados["descargas_fallidas"] += 1
+
+        # Guardar info de la URL
+        resultados["urls"].append({
+            "url": url.url,
+            "texto": url.texto,
+            "tipo_producto": url.tipo_producto,
+            "descargado": resultado.exito,
+            "sin_cambios": resultado.sin_cambios,
+            "sha256": resultado.metadata.hash_sha256,
+            "archivo": resultado.ruta_archivo if resultado.exito else None,
+            "error": resultado.error if not resultado.exito else None
+        })
+
+    print(f"\n{'='*70}")
+    print(f"📊 RESUMEN {scraping.banco.value}")
+    print(f"{'='*70}")
+    if scraping.errores:
+        print(f"  ❌ Error: {'; '.join(scraping.errores)}")
+    print(f"  URLs encontradas:      {resultados['urls_encontradas']}")
+    print(f"  Descargas exitosas:    {resultados['descargas_exitosas']} ✅")
+    print(f"  Sin cambios:           {resultados['sin_cambios']} ♻️")
+    print(f"  Descargas fallidas:    {resultados['descargas_fallidas']} ❌")
+    print(f"  Tiempo:                {resultados['duracion_segundos']:.1f}s")
+    print(f"{'='*70}")
 
     return resultados
 
@@ -95,27 +78,17 @@ def main():
     print("📥 DESCARGA DE TARIFARIOS BANCARIOS")
     print("="*70)
 
-    # Inicializar downloader
-    downloader = PDFDownloader()
-
     # Resumen global
     resumen_global = {
         "fecha": datetime.now().isoformat(),
         "bancos": []
     }
 
-    # Descargar cada banco
-    bancos = [
-        (BancoEnum.BBVA, BBVAScraper),
-        (BancoEnum.BCP, BCPScraper),
-        (BancoEnum.INTERBANK, InterbankScraper),
-        (BancoEnum.BANCO_NACION, BancoNacionScraper),
-        (BancoEnum.SCOTIABANK, ScotiabankScraper),
-    ]
-
-    for banco_enum, scraper_class in bancos:
-        resultado = descargar_banco(banco_enum, scraper_class, downloader)
-        resumen_global["bancos"].append(resultado)
+    # Todos los bancos a la vez: el tiempo total es el del banco más lento
+    scheduler = ScrapingScheduler(al_descargar=al_descargar)
+    for resultado_banco in scheduler.ejecutar():
+        resumen_global["bancos"].append(resumir_banco(resultado_banco))
+    resumen_global["duracion_total_segundos"] = round(scheduler.duracion_total, 2)
 
     # Resumen final
     print("\n" + "="*70)
@@ -125,17 +98,21 @@ def main():
     total_urls = 0
     total_exitosas = 0
     total_fallidas = 0
+    total_sin_cambios = 0
 
     for banco in resumen_global["bancos"]:
         total_urls += banco["urls_encontradas"]
         total_exitosas += banco["descargas_exitosas"]
         total_fallidas += banco["descargas_fallidas"]
+        total_sin_cambios += banco["sin_cambios"]
 
-        print(f"  {banco['banco']:20s}: {banco['descargas_exitosas']:3d}/{banco['urls_encontradas']:3d} ✅")
+        print(f"  {banco['banco']:20s}: {banco['descargas_exitosas']:3d}/{banco['urls_encontradas']:3d} ✅  ({banco['duracion_segundos']:.1f}s)")
 
     print(f"  {'─'*50}")
     print(f"  {'TOTAL':20s}: {total_exitosas:3d}/{total_urls:3d} PDFs descargados")
+    print(f"  {'Sin cambios':20s}: {total_sin_cambios:3d}")
     print(f"  {'Fallidos':20s}: {total_fallidas:3d}")
+    print(f"  {'Tiempo total':20s}: {scheduler.duracion_total:.1f}s")
     print("="*70)
 
     # Guardar reporte JSON
@@ -148,9 +125,6 @@ def main():
     print(f"\n💾 Reporte guardado en: {reporte_path}")
     print("\n✅ Descarga completada!\n")
 
-    # Cerrar downloader
-    downloader.cerrar()
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Generador de datasets sintéticos de tarifarios para pruebas de escala
+Aprende las distribuciones de los CSVs de salida (data/output) y genera
+datasets de 10k a 10M filas en CSV, Parquet y JSONs normalizados por batch
+(el mismo formato que lee json_a_csv.py), para medir visor, exportadores y
+carga a MySQL con volúmenes de producción.
+
+Qué se aprende:
+- Documentos (Banco + producto) con sus conceptos, tipos, monedas, periodicidad
+  y textos: se re-muestrean completos para conservar las mezclas categóricas.
+- Patrón de nulos de las columnas Tasa_*/Monto_* por Tipo (y Moneda).
+- Rango de valores de cada columna numérica por Moneda (cuantiles empíricos).
+
+Uso:
+    python scripts/generar_dataset_sintetico.py --rows 100k
+    python scripts/generar_dataset_sintetico.py --rows 10m --formats csv parquet
+    python scripts/generar_dataset_sintetico.py --rows 50k --formats json --docs-per-batch 20
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Configurar logger
+logger.remove()
+logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>")
+
+# Directorios
+PROJECT_ROOT = Path(__file__).parent.parent
+SOURCE_DIR = PROJECT_ROOT / "data" / "output"
+OUTPUT_DIR = PROJECT_ROOT / "data" / "synthetic"
+
+# Esquema del CSV final (mismo orden que json_a_csv.py)
+CSV_COLUMNS = [
+    "Banco", "Producto_Codigo", "Producto_Nombre", "Concepto", "Descripcion_Breve", "Tipo",
+    "Tasa_Porcentaje_MN", "Tasa_Porcentaje_ME", "Monto_Fijo_MN", "Monto_Fijo_ME",
+    "Monto_Minimo_MN", "Monto_Maximo_MN", "Monto_Minimo_ME", "Monto_Maximo_ME",
+    "Moneda", "Fecha_Vigencia", "Fecha_Extraccion", "Periodicidad", "Oportunidad_Cobro", "Observaciones",
+]
+NUMERIC_COLUMNS = [col for col in CSV_COLUMNS if col.startswith(("Tasa_", "Monto_"))]
+TEXT_COLUMNS = [col for col in CSV_COLUMNS if col not in NUMERIC_COLUMNS]
+
+# Campos de valores del JSON normalizado por columna numérica
+JSON_VALUE_FIELDS = {
+    "Tasa_Porcentaje": "tasa_porcentaje",
+    "Monto_Fijo": "monto_fijo",
+    "Monto_Minimo": "monto_minimo",
+    "Monto_Maximo": "monto_maximo",
+}
+
+# Cuantiles guardados por columna y moneda
+QUANTILES = np.linspace(0, 1, 101)
+
+# Filas generadas por bloque (acota la memoria con 10M filas)
+CHUNK_ROWS = 200_000
+
+SIN_VALOR = "__nulo__"
+
+
+def parse_cantidad(valor: str) -> int:
+    """Acepta 10000, 10k, 2.5m, 10M."""
+    valor = valor.strip().lower().replace("_", "")
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(valor[-1], 1)
+    if multiplicador > 1:
+        valor = valor[:-1]
+    return int(float(valor) * multiplicador)
+
+
+def cargar_fuentes(paths: List[Path]) -> pd.DataFrame:
+    """Une los CSVs con el esquema completo; los demás (examen, solo tasas) se ignoran."""
+    partes = []
+    for path in paths:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        faltantes = set(CSV_COLUMNS) - set(df.columns)
+        if faltantes:
+            logger.warning(f"⏭️  {path.name}: esquema distinto (faltan {len(faltantes)} columnas), se omite")
+            continue
+        logger.info(f"📄 {path.name}: {len(df)} filas")
+        partes.append(df[CSV_COLUMNS])
+    if not partes:
+        raise SystemExit("No hay CSVs de origen con el esquema de tarifarios")
+
+    df = pd.concat(partes, ignore_index=True)
+    for col in NUMERIC_COLUMNS:
+        # Textos como "Libre" no son montos: quedan nulos
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+class TarifarioProfile:
+    """Distribuciones aprendidas del dataset real."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.textos = {col: self.df[col].astype(object).where(self.df[col].notna(), None).to_numpy() for col in TEXT_COLUMNS}
+        tipo = self.df["Tipo"].fillna(SIN_VALOR).astype(str).to_numpy()
+        moneda = self.df["Moneda"].fillna(SIN_VALOR).astype(str).to_numpy()
+        self.tipo, self.moneda = tipo, moneda
+
+        # Documentos: filas de un mismo producto de un banco
+        claves = self.df["Banco"].astype(str) + "\x1f" + self.df["Producto_Codigo"].astype(str)
+        codigos, _ = pd.factorize(claves)
+        orden = np.argsort(codigos, kind="stable")
+        limites = np.searchsorted(codigos[orden], np.arange(codigos.max() + 2))
+        self.documentos = [orden[limites[i]:limites[i + 1]] for i in range(len(limites) - 1)]
+        self.filas_por_documento = np.array([len(d) for d in self.documentos])
+
+        # Patrones de nulos por (Tipo, Moneda), con respaldo por Tipo
+        presentes = self.df[NUMERIC_COLUMNS].notna().to_numpy()
+        self.patrones: Dict[Tuple[str, Optional[str]], Tuple[np.ndarray, np.ndarray]] = {}
+        for clave, filas in self._grupos(tipo, moneda).items():
+            self.patrones[clave] = self._distribucion_patrones(presentes[filas])
+        for t in np.unique(tipo):
+            self.patrones[(t, None)] = self._distribucion_patrones(presentes[tipo == t])
+
+        # Cuantiles de cada columna numérica por Moneda, con respaldo global
+        self.cuantiles: Dict[Tuple[str, Optional[str]], np.ndarray] = {}
+        for col in NUMERIC_COLUMNS:
+            valores = self.df[col].to_numpy(dtype=np.float64)
+            validos = ~np.isnan(valores)
+            if validos.any():
+                self.cuantiles[(col, None)] = np.quantile(valores[validos], QUANTILES)
+            for m in np.unique(moneda):
+                seleccion = validos & (moneda == m)
+                if seleccion.sum() >= 5:
+                    self.cuantiles[(col, m)] = np.quantile(valores[seleccion], QUANTILES)
+
+    @staticmethod
+    def _grupos(tipo: np.ndarray, moneda: np.ndarray) -> Dict[Tuple[str, str], np.ndarray]:
+        grupos: Dict[Tuple[str, str], List[int]] = {}
+        for i, clave in enumerate(zip(tipo, moneda)):
+            grupos.setdefault(clave, []).append(i)
+        return {clave: np.array(filas) for clave, filas in grupos.items()}
+
+    @staticmethod
+    def _distribucion_patrones(presentes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Patrones distintos (filas booleanas) y su probabilidad."""
+        patrones, conteos = np.unique(presentes, axis=0, return_counts=True)
+        return patrones, conteos / conteos.sum()
+
+    def resumen(self) -> None:
+        logger.info(f"   Documentos: {len(self.documentos)} "
+                    f"(filas por documento: mediana {int(np.median(self.filas_por_documento))}, "
+                    f"máx {self.filas_por_documento.max()})")
+        logger.info(f"   Patrones de nulos por Tipo/Moneda: {sum(1 for k in self.patrones if k[1] is not None)} grupos")
+        logger.info(f"   Rangos numéricos aprendidos: {len(self.cuantiles)} columna/moneda")
+
+    # --- Generación ---
+
+    def generar(self, total_filas: int, seed: int, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Genera `total_filas` filas por bloques. Cada documento de origen se
+        replica como un producto nuevo (código con sufijo -S<n>), así que las
+        claves Banco/Producto/Concepto/Moneda siguen siendo únicas.
+        """
+        rng = np.random.default_rng(seed)
+        probabilidades = self.filas_por_documento / self.filas_por_documento.sum()
+        replica = 0
+        generadas = 0
+
+        while generadas < total_filas:
+            objetivo = min(chunk_rows, total_filas - generadas)
+            filas_origen, replicas = [], []
+            acumuladas = 0
+            while acumuladas < objetivo:
+                lote = rng.choice(len(self.documentos), size=max(16, (objetivo - acumuladas) // 10), p=probabilidades)
+                for doc in lote:
+                    filas = self.documentos[doc][:objetivo - acumuladas]
+                    filas_origen.append(filas)
+                    replicas.append(np.full(len(filas), replica, dtype=np.int64))
+                    replica += 1
+                    acumuladas += len(filas)
+                    if acumuladas >= objetivo:
+                        break
+
+            origen = np.concatenate(filas_origen)
+            yield self._bloque(origen, np.concatenate(replicas), rng)
+            generadas += len(origen)
+
+    def _bloque(self, origen: np.ndarray, replicas: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+        datos = {col: self.textos[col][origen] for col in TEXT_COLUMNS}
+        codigos = self.textos["Producto_Codigo"][origen]
+        datos["Producto_Codigo"] = np.array(
+            [f"{codigo or 'N/A'}-S{n}" for codigo, n in zip(codigos, replicas)], dtype=object
+        )
+
+        # Patrón de nulos según el Tipo/Moneda de la fila de origen
+        presentes = np.zeros((len(origen), len(NUMERIC_COLUMNS)), dtype=bool)
+        tipo, moneda = self.tipo[origen], self.moneda[origen]
+        for (t, m), filas in self._grupos(tipo, moneda).items():
+            patrones, p = self.patrones.get((t, m)) or self.patrones[(t, None)]
+            presentes[filas] = patrones[rng.choice(len(patrones), size=len(filas), p=p)]
+
+        # Valores por cuantiles de la moneda de la fila
+        for j, col in enumerate(NUMERIC_COLUMNS):
+            valores = np.full(len(origen), np.nan)
+            for m in np.unique(moneda):
+                filas = np.flatnonzero(presentes[:, j] & (moneda == m))
+                cuantiles = self.cuantiles.get((col, m))
+                if cuantiles is None:
+                    cuantiles = self.cuantiles.get((col, None))
+                if cuantiles is None or not len(filas):
+                    continue
+                valores[filas] = np.round(np.interp(rng.random(len(filas)), QUANTILES, cuantiles), 2)
+            datos[col] = valores
+
+        return pd.DataFrame(datos, columns=CSV_COLUMNS)
+
+
+# --- Escritores ---
+
+def escribir_csv(bloques: Iterator[pd.DataFrame], path: Path) -> int:
+    total = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        for i, bloque in enumerate(bloques):
+            bloque.to_csv(f, index=False, header=(i == 0))
+            total += len(bloque)
+    return total
+
+
+def escribir_parquet(bloques: Iterator[pd.DataFrame], path: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        pa.field(col, pa.float64() if col in NUMERIC_COLUMNS else pa.string()) for col in CSV_COLUMNS
+    ])
+    total = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for bloque in bloques:
+            writer.write_table(pa.Table.from_pandas(bloque, schema=schema, preserve_index=False))
+            total += len(bloque)
+    return total
+
+
+def _valores_moneda(fila: dict, sufijo: str) -> Optional[dict]:
+    valores = {
+        campo: (None if pd.isna(fila[f"{prefijo}_{sufijo}"]) else float(fila[f"{prefijo}_{sufijo}"]))
+        for prefijo, campo in JSON_VALUE_FIELDS.items()
+    }
+    return valores if any(v is not None for v in valores.values()) else None
+
+
+def _item_normalizado(fila: dict) -> dict:
+    """Fila CSV -> item del JSON normalizado (inverso de json_a_csv.extract_items_from_json)."""
+    return {
+        "clasificacion": {"tipo": fila["Tipo"]},
+        "concepto": {
+            "nombre": fila["Concepto"],
+            "descripcion_breve": fila["Descripcion_Breve"] or "",
+            "descripcion_detallada": fila["Observaciones"] or "",
+        },
+        "valores": {"moneda": fila["Moneda"] or "", "mn": _valores_moneda(fila, "MN"), "me": _valores_moneda(fila, "ME")},
+        "aplicacion": {
+            "vigencia": fila["Fecha_Vigencia"] or "",
+            "periodicidad": fila["Periodicidad"] or "",
+            "oportunidad_cobro": fila["Oportunidad_Cobro"] or "",
+        },
+    }
+
+
+def escribir_json_batches(bloques: Iterator[pd.DataFrame], directorio: Path, docs_por_batch: int) -> int:
+    """Un directorio por banco con batch_XXXXX.json de `docs_por_batch` documentos cada uno."""
+    total = 0
+    pendientes: Dict[str, List[dict]] = {}
+    numero: Dict[str, int] = {}
+
+    def volcar(banco: str) -> None:
+        numero[banco] = numero.get(banco, 0) + 1
+        destino = directorio / banco / f"batch_{numero[banco]:05d}.json"
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump({"documentos": pendientes.pop(banco)}, f, ensure_ascii=False)
+
+    for bloque in bloques:
+        total += len(bloque)
+        bloque = bloque.astype(object).where(bloque.notna(), None)
+        for (banco, codigo), grupo in bloque.groupby(["Banco", "Producto_Codigo"], sort=False, dropna=False):
+            filas = grupo.to_dict(orient="records")
+            documento = {
+                "metadata": {
+                    "producto_codigo": codigo,
+                    "producto_nombre": filas[0]["Producto_Nombre"],
+                    "fecha_extraccion": filas[0]["Fecha_Extraccion"] or "",
+                },
+                "items": [_item_normalizado(fila) for fila in filas],
+            }
+            banco = str(banco)
+            pendientes.setdefault(banco, []).append(documento)
+            if len(pendientes[banco]) >= docs_por_batch:
+                volcar(banco)
+
+    for banco in list(pendientes):
+        volcar(banco)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar datasets sintéticos de tarifarios para pruebas de escala')
+    parser.add_argument('--rows', default="100k", help='Filas a generar (p. ej. 10k, 1m, 10m)')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'parquet', 'json'], default=['csv'],
+                        help='Formatos de salida')
+    parser.add_argument('--source', type=Path, nargs='*',
+                        help='CSVs de origen (por defecto todos los de data/output)')
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR, help='Directorio de salida')
+    parser.add_argument('--docs-per-batch', type=int, default=20, help='Documentos por JSON normalizado')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla (misma semilla = mismo dataset)')
+    args = parser.parse_args()
+
+    total_filas = parse_cantidad(args.rows)
+    if not 10_000 <= total_filas <= 10_000_000:
+        logger.warning(f"⚠️  {total_filas} filas está fuera del rango pensado (10k - 10M)")
+
+    logger.info("=" * 70)
+    logger.info("🧪 GENERADOR DE DATASET SINTÉTICO")
+    logger.info("=" * 70)
+    fuentes = args.source or sorted(SOURCE_DIR.glob("*.csv"))
+    perfil = TarifarioProfile(cargar_fuentes(fuentes))
+    perfil.resumen()
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    nombre = f"tarifarios_{args.rows.lower()}"
+    for formato in args.formats:
+        # Cada formato regenera los bloques con la misma semilla: mismo contenido, memoria acotada
+        bloques = perfil.generar(total_filas, seed=args.seed)
+        if formato == "csv":
+            destino = args.output_dir / f"{nombre}.csv"
+            filas = escribir_csv(bloques, destino)
+        elif formato == "parquet":
+            destino = args.output_dir / f"{nombre}.parquet"
+            filas = escribir_parquet(bloques, destino)
+        else:
+            destino = args.output_dir / f"normalized_json_{args.rows.lower()}"
+            filas = escribir_json_batches(bloques, destino, args.docs_per_batch)
+        logger.success(f"✅ {formato.upper()}: {filas:,} filas -> {destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Genera dataset final con: Banco, Producto, Tasa, Moneda, Fecha de registro, Obse
 """
 import json
 import csv
+import os
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
@@ -12,6 +13,12 @@ from loguru import logger
 import sys
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.columnar_snapshot import columnar_path_for, write_columnar_snapshot
+from src.services.history_store import DEFAULT_HISTORY_PATH, HistoryStore
+from src.services.viewer_snapshot import file_version
+
 # Configurar logger
 logger.remove()
 logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>")
@@ -24,6 +31,7 @@ OUTPUT_DIR = PROJECT_ROOT / "data" / "output"
 # Configuración
 OUTPUT_CSV = OUTPUT_DIR / "tarifarios_bancarios.csv"
 OUTPUT_EXCEL = OUTPUT_DIR / "tarifarios_bancarios.xlsx"
+OUTPUT_FEATHER = columnar_path_for(OUTPUT_CSV)
 
 
 def extract_items_from_json(json_file: Path, banco_name: str) -> List[Dict[str, Any]]:
@@ -235,14 +243,35 @@ def main():
         'Observaciones'
     ]
 
-    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8-sig') as f:
+    # Escribir a un temporal y renombrar: el visor nunca lee un CSV a medio escribir
+    tmp_csv = OUTPUT_CSV.with_suffix('.csv.tmp')
+    with open(tmp_csv, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(all_items)
+    os.replace(tmp_csv, OUTPUT_CSV)
 
     logger.success(f"✅ CSV guardado: {OUTPUT_CSV}")
     logger.info(f"   Tamaño: {OUTPUT_CSV.stat().st_size / 1024:.2f} KB")
 
+    # Releer el CSV para que los nulos del Feather y del historial coincidan con los del visor
+    df_csv = pd.read_csv(OUTPUT_CSV)
+    version = file_version(OUTPUT_CSV)
+
+    # Guardar snapshot tipado (Feather) que el visor abre con memory-map.
+    logger.info(f"\n💾 Guardando snapshot Feather: {OUTPUT_FEATHER}")
+    try:
+        write_columnar_snapshot(df_csv, OUTPUT_FEATHER, source_version=version)
+        logger.success(f"✅ Feather guardado: {OUTPUT_FEATHER}")
+    except ImportError:
+        logger.warning("⚠️  pyarrow no está instalado; el visor leerá el CSV")
+
+    # Registrar el snapshot en el historial: sólo se escriben las filas que cambiaron
+    logger.info(f"\n🕓 Registrando snapshot en el historial: {DEFAULT_HISTORY_PATH}")
+    resumen = HistoryStore(DEFAULT_HISTORY_PATH).record(df_csv, version=version)
+    logger.success(f"✅ Historial: {resumen['altas']} altas, {resumen['modificaciones']} modificaciones, "
+                   f"{resumen['bajas']} bajas")
+
     # Guardar Excel con formato mejorado
     logger.info(f"\n💾 Guardando Excel: {OUTPUT_EXCEL}")
 
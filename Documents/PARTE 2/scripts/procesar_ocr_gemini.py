@@ -18,6 +18,11 @@ import threading
 
 import google.generativeai as genai
 
+# Agregar el directorio padre al path para poder importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.utils.download_manifest import DownloadManifest, ETAPA_OCR
+from src.utils.raw_store import copiar_salida_a_duplicados, es_blob
+
 # Cargar variables de entorno
 env_path = Path(__file__).parent.parent / "config" / ".env"
 load_dotenv(env_path)
@@ -33,6 +38,9 @@ MAX_WORKERS = 3  # Hilos paralelos para procesamiento
 # Lock para operaciones thread-safe
 progress_lock = threading.Lock()
 
+# Manifiesto de descargas: nombres con el mismo contenido (duplicados)
+manifest = DownloadManifest(INPUT_DIR)
+
 PROMPT_OCR = """You are a professional OCR system specialized in extracting banking tariff documents. Your task is to extract text, numbers, and tables from this multi-page PDF with MAXIMUM precision and cleanliness.
 
 CRITICAL REQUIREMENTS:
@@ -103,6 +111,7 @@ def save_progress(progress: dict):
         progress["last_updated"] = datetime.now().isoformat()
         with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
             json.dump(progress, f, indent=2, ensure_ascii=False)
+    manifest.guardar()
 
 
 def is_already_processed(pdf_path: Path, progress: dict) -> bool:
@@ -123,6 +132,12 @@ def is_already_processed(pdf_path: Path, progress: dict) -> bool:
     if processed_path.exists():
         return True
 
+    # Otro nombre del mismo documento en el mismo banco ya se procesó
+    for duplicado in manifest.duplicados(pdf_path):
+        duplicado = INPUT_DIR / duplicado
+        if duplicado.parent == pdf_path.parent and get_output_path(duplicado).exists():
+            return True
+
     return False
 
 
@@ -186,6 +201,10 @@ def process_pdf(pdf_path: Path, model, progress: dict) -> dict:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(markdown_result)
 
+        # Otros bancos con el mismo documento reciben el mismo Markdown
+        manifest.marcar_etapa(pdf_path, ETAPA_OCR)
+        copiar_salida_a_duplicados(manifest, pdf_path, output_path, OUTPUT_DIR, ETAPA_OCR)
+
         # Mover PDF a carpeta de procesados
         move_to_processed(pdf_path)
 
@@ -229,8 +248,9 @@ def main():
     logger.info(f"📊 PDFs ya procesados: {len(progress['processed'])}")
     logger.info(f"📊 PDFs con error previo: {len(progress['failed'])}")
 
-    # Obtener lista de PDFs
-    all_pdfs = list(INPUT_DIR.rglob("*.pdf"))
+    # Obtener lista de PDFs (por nombre, un solo nombre por documento repetido)
+    all_pdfs = [pdf for pdf in INPUT_DIR.rglob("*.pdf")
+                if not es_blob(INPUT_DIR, pdf) and manifest.es_canonica(pdf)]
     logger.info(f"📄 Total PDFs encontrados: {len(all_pdfs)}")
 
     # Filtrar PDFs ya procesados
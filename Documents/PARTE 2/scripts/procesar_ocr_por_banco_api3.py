@@ -113,26 +113,11 @@ def main_por_banco():
     pdf_folders = sorted(pdf_folders)
     logger.info(f"📄 PDFs de {banco_seleccionado}: {len(pdf_folders)}")
 
-    # Filtrar ya procesados
-    pdfs_pendientes = []
-    for folder in pdf_folders:
-        pdf_relative = f"{folder.parent.name}/{folder.name}"
+    # Los procesados antes del manifiesto quedan registrados con su contenido actual
+    registrar_legado(pdf_folders, progress)
 
-        # Verificar si ya está en el registro de progreso
-        if pdf_relative in progress["processed_pdfs"]:
-            continue
-
-        # Verificar si ya existe el archivo .md
-        output_path = OUTPUT_DIR / folder.parent.name / f"{folder.name}.md"
-        if output_path.exists():
-            continue
-
-        # Verificar si la carpeta ya está en images_processed
-        processed_path = PROCESSED_DIR / folder.parent.name / folder.name
-        if processed_path.exists():
-            continue
-
-        pdfs_pendientes.append(folder)
+    # Filtrar ya procesados (salvo los que cambiaron desde su OCR)
+    pdfs_pendientes = [folder for folder in pdf_folders if pdf_pendiente(folder, progress)]
 
     logger.info(f"📄 PDFs pendientes de {banco_seleccionado}: {len(pdfs_pendientes)}")
 
@@ -191,7 +176,7 @@ def main_por_banco():
 
                     with progress_lock:
                         if resultado["exito"]:
-                            progress["processed_pdfs"].append(pdf_relative)
+                            registrar_procesado(pdf_folder, progress)
                         else:
                             progress["failed_pdfs"].append({
                                 "pdf": pdf_relative,
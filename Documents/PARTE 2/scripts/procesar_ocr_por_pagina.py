@@ -22,6 +22,11 @@ from langchain_core.messages import HumanMessage
 import base64
 import io
 
+# Agregar el directorio padre al path para poder importar src
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.utils.raw_store import copiar_salida_a_duplicados
+from src.utils.download_manifest import DownloadManifest, ETAPA_OCR
+
 # Variable global para manejo de Ctrl+C
 shutdown_requested = False
 
@@ -42,12 +47,16 @@ INPUT_DIR = Path("data/images")  # Carpeta con PNGs
 OUTPUT_DIR = Path("data/ocr")
 PROCESSED_DIR = Path("data/images_processed")  # PNGs ya procesados
 PROGRESS_FILE = Path("data/processed/progress_ocr_paginas.json")
+RAW_DIR = Path("data/raw")  # PDFs originales y manifiesto de descargas
 MAX_WORKERS = 1  # 1 hilo (rate limit: 15 req/min)
 DELAY_BETWEEN_PAGES = 3  # Segundos entre páginas (15 req/min = 1 cada 4s)
 
 # Lock para operaciones thread-safe
 progress_lock = threading.Lock()
 
+# Sabe si un PDF cambió desde su último OCR (se guarda junto con el progreso)
+manifest = DownloadManifest(RAW_DIR)
+
 PROMPT_OCR_PAGINA = """You are a professional OCR system specialized in extracting banking tariff documents with MAXIMUM precision.
 
 CRITICAL INSTRUCTIONS:
@@ -100,6 +109,72 @@ def save_progress(progress: dict):
         progress["last_updated"] = datetime.now().isoformat()
         with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
             json.dump(progress, f, indent=2, ensure_ascii=False)
+        manifest.guardar()
+
+
+def pdf_original(pdf_folder: Path) -> Path:
+    """PDF de data/raw del que salieron los PNGs de `pdf_folder`"""
+    return RAW_DIR / pdf_folder.parent.name / f"{pdf_folder.name}.pdf"
+
+
+def ya_procesado(pdf_folder: Path, progress: dict) -> bool:
+    """True si la carpeta de PNGs ya pasó por OCR según el progreso o las salidas en disco"""
+    pdf_relative = f"{pdf_folder.parent.name}/{pdf_folder.name}"
+    return (
+        # Ya está en el registro de progreso
+        pdf_relative in progress["processed_pdfs"]
+        # Ya existe el archivo .md
+        or (OUTPUT_DIR / pdf_folder.parent.name / f"{pdf_folder.name}.md").exists()
+        # La carpeta ya está en images_processed
+        or (PROCESSED_DIR / pdf_folder.parent.name / pdf_folder.name).exists()
+    )
+
+
+def pdf_pendiente(pdf_folder: Path, progress: dict) -> bool:
+    """
+    True si la carpeta de PNGs necesita OCR: no fue procesada o el PDF
+    original cambió desde su último OCR (según el manifiesto de descargas).
+    Los duplicados de otro PDF no se procesan: reciben su resultado.
+    Sólo consulta; no escribe el manifiesto ni copia archivos.
+    """
+    if not manifest.es_canonica(pdf_original(pdf_folder)):
+        return False
+    if manifest.etapa_desactualizada(pdf_original(pdf_folder), ETAPA_OCR):
+        return True
+    return not ya_procesado(pdf_folder, progress)
+
+
+def registrar_legado(pdf_folders: list, progress: dict) -> int:
+    """
+    Registra en el manifiesto la etapa OCR de los PDFs procesados antes de
+    que existiera (con su contenido actual) y copia su .md a los duplicados.
+    Se llama una vez, antes de filtrar los pendientes. Retorna cuántos registró.
+    """
+    registrados = 0
+    for pdf_folder in pdf_folders:
+        pdf = pdf_original(pdf_folder)
+        if (manifest.es_canonica(pdf) and not manifest.etapa_desactualizada(pdf, ETAPA_OCR)
+                and ya_procesado(pdf_folder, progress)):
+            manifest.marcar_etapa(pdf, ETAPA_OCR)
+            copiar_a_duplicados(pdf_folder)
+            registrados += 1
+    manifest.guardar()
+    return registrados
+
+
+def copiar_a_duplicados(pdf_folder: Path):
+    """Copia el .md del PDF a los nombres con el mismo contenido en otros bancos"""
+    origen = OUTPUT_DIR / pdf_folder.parent.name / f"{pdf_folder.name}.md"
+    copiar_salida_a_duplicados(manifest, pdf_original(pdf_folder), origen, OUTPUT_DIR, ETAPA_OCR)
+
+
+def registrar_procesado(pdf_folder: Path, progress: dict):
+    """Agrega el PDF al progreso y registra en el manifiesto qué contenido se procesó"""
+    pdf_relative = f"{pdf_folder.parent.name}/{pdf_folder.name}"
+    if pdf_relative not in progress["processed_pdfs"]:
+        progress["processed_pdfs"].append(pdf_relative)
+    manifest.marcar_etapa(pdf_original(pdf_folder), ETAPA_OCR)
+    copiar_a_duplicados(pdf_folder)
 
 
 def get_pdf_folders() -> list:
@@ -414,26 +489,11 @@ def main():
     pdf_folders = get_pdf_folders()
     logger.info(f"📄 Total PDFs encontrados: {len(pdf_folders)}")
 
-    # Filtrar ya procesados
-    pdfs_pendientes = []
-    for folder in pdf_folders:
-        pdf_relative = f"{folder.parent.name}/{folder.name}"
-
-        # Verificar si ya está en el registro de progreso
-        if pdf_relative in progress["processed_pdfs"]:
-            continue
-
-        # Verificar si ya existe el archivo .md
-        output_path = OUTPUT_DIR / folder.parent.name / f"{folder.name}.md"
-        if output_path.exists():
-            continue
-
-        # Verificar si la carpeta ya está en images_processed
-        processed_path = PROCESSED_DIR / folder.parent.name / folder.name
-        if processed_path.exists():
-            continue
+    # Los procesados antes del manifiesto quedan registrados con su contenido actual
+    registrar_legado(pdf_folders, progress)
 
-        pdfs_pendientes.append(folder)
+    # Filtrar ya procesados (salvo los que cambiaron desde su OCR)
+    pdfs_pendientes = [folder for folder in pdf_folders if pdf_pendiente(folder, progress)]
 
     logger.info(f"📄 PDFs pendientes: {len(pdfs_pendientes)}")
 
@@ -494,7 +554,7 @@ def main():
 
                     with progress_lock:
                         if resultado["exito"]:
-                            progress["processed_pdfs"].append(pdf_relative)
+                            registrar_procesado(pdf_folder, progress)
                         else:
                             progress["failed_pdfs"].append({
                                 "pdf": pdf_relative,
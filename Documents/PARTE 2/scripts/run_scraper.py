@@ -9,15 +9,8 @@ from pathlib import Path
 # Agregar src al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.models import BancoEnum
-from src.scrapers import (
-    BBVAScraper,
-    BCPScraper,
-    InterbankScraper,
-    ScotiabankScraper,
-    BancoNacionScraper
-)
-from src.utils import PDFDownloader, setup_logger
+from src.scrapers import ScrapingScheduler
+from src.utils import setup_logger
 from loguru import logger
 
 # Configurar logger
@@ -30,46 +23,34 @@ def main():
     logger.info("SCRAPER DE TARIFARIOS BANCARIOS - Modo CLI")
     logger.info("=" * 60)
 
-    scrapers = {
-        BancoEnum.BBVA: BBVAScraper,
-        BancoEnum.BCP: BCPScraper,
-        BancoEnum.INTERBANK: InterbankScraper,
-        BancoEnum.SCOTIABANK: ScotiabankScraper,
-        BancoEnum.BANCO_NACION: BancoNacionScraper
-    }
-
     todas_urls = []
-    downloader = PDFDownloader()
-
-    for banco, scraper_class in scrapers.items():
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Procesando: {banco.value}")
-        logger.info(f"{'='*60}")
-
-        try:
-            # Scraping
-            with scraper_class() as scraper:
-                urls = scraper.obtener_urls()
-
-            logger.info(f"URLs encontradas: {len(urls)}")
-
-            if urls:
-                # Descargar
-                exitosos = 0
-                for url in urls:
-                    resultado = downloader.descargar(url)
-                    if resultado.exito:
-                        exitosos += 1
-                        todas_urls.append(url.dict())
-
-                logger.success(f"Descargados: {exitosos}/{len(urls)}")
-            else:
-                logger.warning(f"No se encontraron PDFs para {banco.value}")
-
-        except Exception as e:
-            logger.error(f"Error procesando {banco.value}: {e}")
+
+    # Todos los bancos en paralelo; el scheduler registra el tiempo de cada uno
+    for resultado in ScrapingScheduler().ejecutar():
+        banco = resultado.scraping.banco
+        urls = resultado.scraping.urls_encontradas
+
+        if resultado.scraping.errores:
+            logger.error(f"Error procesando {banco.value}: {'; '.join(resultado.scraping.errores)}")
             continue
 
+        if not urls:
+            logger.warning(f"No se encontraron PDFs para {banco.value}")
+            continue
+
+        exitosos = 0
+        sin_cambios = 0
+        for url, descarga in zip(urls, resultado.descargas):
+            if descarga.exito:
+                exitosos += 1
+                sin_cambios += descarga.sin_cambios
+                todas_urls.append(url.dict())
+
+        logger.success(
+            f"{banco.value}: {exitosos}/{len(urls)} descargados ({sin_cambios} sin cambios) "
+            f"en {resultado.duracion_total_segundos:.1f}s"
+        )
+
     # Guardar resumen
     resumen_path = Path("data") / "urls_scrapeadas.json"
     resumen_path.parent.mkdir(exist_ok=True)
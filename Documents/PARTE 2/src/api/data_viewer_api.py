@@ -6,6 +6,10 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
+from src.api.endpoints import history_endpoints
+from src.api.endpoints.cached_responses import response_cache
+from src.api.metrics import register_function, register_labeled_function, setup_metrics
+
 from src.api.endpoints import viewer_endpoints
 
 # --- Creación de la App ---
@@ -18,6 +22,32 @@ app = FastAPI(
 # --- Rutas de la API ---
 # Incluir los endpoints definidos en el router
 app.include_router(viewer_endpoints.router)
+app.include_router(history_endpoints.router)
+
+# --- Telemetría (/metrics) ---
+setup_metrics(app, "visor")
+register_function("viewer_dataset_rows", "Filas del dataset servido", "gauge",
+                  lambda: viewer_endpoints.snapshot_info()["total_registros"])
+register_labeled_function("viewer_dataset_info", "Versión del dataset servido (valor siempre 1)", "gauge",
+                          ("backend", "version"),
+                          lambda: {(viewer_endpoints.VIEWER_BACKEND, viewer_endpoints.snapshot_info()["version"]): 1})
+register_function("viewer_cache_hits_total", "Respuestas servidas desde la caché", "counter",
+                  lambda: response_cache.hits)
+register_function("viewer_cache_misses_total", "Respuestas que hubo que construir", "counter",
+                  lambda: response_cache.misses)
+register_function("viewer_cache_entries", "Respuestas guardadas en la caché", "gauge",
+                  lambda: len(response_cache))
+
+# --- Ciclo de vida del dataset ---
+
+@app.on_event("startup")
+async def start_dataset():
+    """Memoria: vigila el CSV y recarga el snapshot. SQLite: construye la base y abre el pool."""
+    await viewer_endpoints.startup()
+
+@app.on_event("shutdown")
+async def stop_dataset():
+    await viewer_endpoints.shutdown()
 
 # --- Configuración de Archivos Estáticos y Plantillas ---
 
@@ -0,0 +1,63 @@
+"""
+Respuestas JSON cacheadas, comprimidas y con ETag para el router del visor
+(con cualquiera de sus backends).
+"""
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from src.services.json_encoding import dumps
+from src.services.response_cache import CachedResponse, ResponseCache, etag_coincide, negociar_encoding
+
+# Cabecera con la versión del dataset que respondió el request
+VERSION_HEADER = "X-Dataset-Version"
+
+# --- Caché de respuestas ---
+# Clave: endpoint + versión del dataset + parámetros normalizados
+response_cache = ResponseCache(maxsize=int(os.environ.get("VIEWER_CACHE_SIZE", 256)))
+
+
+def _codificar(model: type[BaseModel], data: Dict, validate: bool) -> bytes:
+    if validate:
+        return model.model_validate(data).model_dump_json().encode("utf-8")
+    return dumps(data)
+
+
+def _responder(request: Request, entry: CachedResponse, version: str) -> Response:
+    encoding = negociar_encoding(request.headers.get("accept-encoding"), len(entry.body))
+    body, etag = entry.variant(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",  # el navegador revalida siempre con If-None-Match
+        "Vary": "Accept-Encoding",
+        VERSION_HEADER: version,
+    }
+    if etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_json_response_async(request: Request,
+                                     endpoint: str,
+                                     version: str,
+                                     params: Dict[str, Any],
+                                     model: type[BaseModel],
+                                     build: Callable[[], Awaitable[Dict]],
+                                     validate: bool = True) -> Response:
+    """
+    Sirve una respuesta JSON desde la caché (o la construye con `build` y la
+    guarda), comprimida según Accept-Encoding, y responde 304 si el cliente ya
+    tiene la misma representación (If-None-Match).
+
+    Con `validate=False` el resultado de `build` (ya compatible con JSON) se
+    codifica directo con orjson, sin pasar por `model`.
+    """
+    key = response_cache.make_key(endpoint, version, params)
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = response_cache.put(key, _codificar(model, await build(), validate))
+    return _responder(request, entry, version)
@@ -0,0 +1,58 @@
+"""
+Endpoints del historial de tarifarios: snapshots registrados por cada
+exportación, diff entre dos snapshots e historial de una fila.
+Funcionan igual con cualquier backend del visor.
+"""
+import os
+from fastapi import APIRouter, HTTPException, Query
+from pathlib import Path
+from typing import List, Optional
+
+from src.core.viewer_models import HistorySnapshotsResponse, RowHistoryResponse, SnapshotDiffResponse
+from src.services.history_store import DEFAULT_HISTORY_PATH, HistoryStore, UnknownSnapshotError
+
+# --- Configuración del Router ---
+router = APIRouter(
+    prefix="/api/v1/history",
+    tags=["Historial de Tarifarios"],
+)
+
+# --- Instancia del Historial ---
+# VIEWER_HISTORY_PATH permite leer el historial de otro dataset
+history = HistoryStore(Path(os.environ.get("VIEWER_HISTORY_PATH", DEFAULT_HISTORY_PATH)))
+
+# --- Endpoints ---
+
+@router.get("/snapshots", response_model=HistorySnapshotsResponse)
+def get_snapshots():
+    """Lista los snapshots registrados, del más antiguo al más reciente."""
+    return {"snapshots": history.snapshots()}
+
+@router.get("/diff", response_model=SnapshotDiffResponse)
+def get_diff(
+    desde: str = Query(..., description="Versión del snapshot de origen"),
+    hasta: Optional[str] = Query(None, description="Versión del snapshot de destino (por defecto, el último)"),
+    banco: Optional[List[str]] = Query(None, description="Filtrar por banco; admite varios valores"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Filas que se agregaron, modificaron o quitaron entre dos snapshots, con
+    los valores antes y después de cada campo cambiado.
+    """
+    try:
+        return history.diff(desde, hasta, banco=banco, skip=skip, limit=limit)
+    except UnknownSnapshotError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+@router.get("/tarifarios/{row_id}", response_model=RowHistoryResponse)
+def get_row_history(
+    row_id: str,
+    fields: Optional[List[str]] = Query(None, description="Columnas a incluir en cada estado (separadas por coma o repetidas), p. ej. Tasa_Porcentaje_MN,Tasa_Porcentaje_ME"),
+):
+    """Historial de una fila por su id estable: su estado después de cada snapshot en que cambió."""
+    campos = [campo.strip() for valor in fields or [] for campo in valor.split(",") if campo.strip()]
+    data = history.row_history(row_id, campos or None)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"No hay historial para el item {row_id}")
+    return data
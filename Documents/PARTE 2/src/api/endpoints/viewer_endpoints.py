@@ -1,11 +1,44 @@
 """
 Endpoints de la API para el visor de tarifarios.
+
+Las rutas sólo usan la interfaz ViewerBackend: VIEWER_BACKEND elige el
+snapshot en memoria ("memory") o la base SQLite de DATABASE_URL ("sqlite").
+Cada request abre una vista y toma de ella la versión con la que responde y
+cachea.
 """
-from fastapi import APIRouter, Query, Response
+import os
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
-from src.core.viewer_models import PaginatedTarifariosResponse, StatsResponse, FilterOptionsResponse
+from src.api.endpoints.cached_responses import VERSION_HEADER, cached_json_response_async, response_cache
+from src.config import settings
+from src.core.viewer_models import (
+    AggregateStatsResponse,
+    CompareRequest,
+    CompareResponse,
+    CubeDimension,
+    DistributionResponse,
+    EquivalentesResponse,
+    ExportFormat,
+    PaginatedTarifariosResponse,
+    QueryRequest,
+    QueryResponse,
+    Quantile,
+    StatsResponse,
+    FilterOptionsResponse,
+    SnapshotInfoResponse,
+    TarifarioItem,
+)
+from src.services.pagination import ExpiredCursorError, InvalidCursorError
+from src.services.query_language import QuerySyntaxError
+from src.services.distribution_cube import HISTOGRAM_BINS
+from src.services.exporter import EXPORT_FORMATS, parquet_disponible
+from src.services.json_encoding import InvalidFieldsError
+from src.services.similarity_index import SIMILARITY_TOP_K
+from src.services.sqlite_backend import SQLITE_POOL_SIZE, SQLiteViewerBackend, sqlite_path
+from src.services.viewer_backend import ViewerBackend
 from src.services.viewer_service import ViewerService
 
 # --- Configuración del Router ---
@@ -15,19 +48,57 @@ router = APIRouter(
 )
 
 # --- Instancia del Servicio ---
-# Apuntar a la ruta correcta del CSV de salida
-CSV_PATH = Path(__file__).resolve().parent.parent.parent.parent / "data" / "output" / "tarifarios_bancarios.csv"
-service = ViewerService(csv_path=CSV_PATH)
+# Apuntar a la ruta correcta del CSV de salida (VIEWER_CSV_PATH permite servir otro dataset)
+DEFAULT_CSV_PATH = Path(__file__).resolve().parent.parent.parent.parent / "data" / "output" / "tarifarios_bancarios.csv"
+CSV_PATH = Path(os.environ.get("VIEWER_CSV_PATH", DEFAULT_CSV_PATH))
+
+# Almacenamiento del visor: "memory" (snapshot en memoria) o "sqlite" (DATABASE_URL)
+VIEWER_BACKEND = os.environ.get("VIEWER_BACKEND", "memory")
+
+# Store compartido en disco: con varios workers todos mapean el mismo snapshot
+# (VIEWER_SHARED_STORE=0 lo desactiva y cada proceso carga su propia copia)
+STORE_ROOT = CSV_PATH.parent / ".viewer_store"
+SHARED_STORE = os.environ.get("VIEWER_SHARED_STORE", "1") != "0"
+
+# Segundos entre revisiones del CSV para recarga en caliente (0 desactiva el watcher)
+RELOAD_INTERVAL = float(os.environ.get("VIEWER_RELOAD_INTERVAL", 5))
+
+service: ViewerBackend
+if VIEWER_BACKEND == "sqlite":
+    # El CSV de salida sigue siendo la fuente: la base se reconstruye cuando cambia
+    service = SQLiteViewerBackend(
+        csv_path=CSV_PATH,
+        db_path=sqlite_path(settings.DATABASE_URL, settings.BASE_DIR),
+        pool_size=int(os.environ.get("VIEWER_SQLITE_POOL", SQLITE_POOL_SIZE)),
+    )
+else:
+    service = ViewerService(csv_path=CSV_PATH, store_root=STORE_ROOT if SHARED_STORE else None,
+                            reload_interval=RELOAD_INTERVAL)
+
+
+async def startup() -> None:
+    """Prepara el dataset: vigila el CSV (memoria) o construye la base y abre el pool (SQLite)."""
+    await service.open()
+
+
+async def shutdown() -> None:
+    await service.close()
+
+def snapshot_info() -> Dict:
+    """Versión y filas del dataset servido (para /snapshot y las métricas)."""
+    return service.info()
 
 # --- Endpoints ---
 
-@router.get("/export/csv")
-def export_to_csv(
-    banco: Optional[str] = Query(None),
-    tipo: Optional[str] = Query(None),
-    moneda: Optional[str] = Query(None),
+@router.get("/export/{formato}")
+async def export_data(
+    formato: ExportFormat,
+    banco: Optional[List[str]] = Query(None),
+    tipo: Optional[List[str]] = Query(None),
+    moneda: Optional[List[str]] = Query(None),
     producto: Optional[str] = Query(None),
     concepto: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
     tasa_mn_gte: Optional[float] = Query(None),
     tasa_mn_lte: Optional[float] = Query(None),
     tasa_me_gte: Optional[float] = Query(None),
@@ -35,62 +106,253 @@ def export_to_csv(
     sort_by: Optional[str] = Query(None),
     sort_order: str = Query('asc')
 ):
-    """Exporta los datos filtrados a un archivo CSV."""
+    """
+    Exporta los datos filtrados en CSV, NDJSON o Parquet.
+    La respuesta se envía por bloques, sin armar el archivo completo en memoria.
+    """
     kwargs = locals()
-    filtered_df = service._get_filtered_df(**kwargs)
-    
-    csv_data = filtered_df.to_csv(index=False, encoding='utf-8-sig')
-    
-    return Response(
-        content=csv_data,
-        media_type="text/csv",
+    kwargs.pop("formato")
+    if formato == ExportFormat.PARQUET and not parquet_disponible():
+        raise HTTPException(status_code=501, detail="Exportación Parquet no disponible: instalar pyarrow")
+
+    async with service.view() as vista:
+        try:
+            bloques = await vista.export(formato.value, **kwargs)
+        except ExpiredCursorError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        version = vista.version
+    media_type, extension = EXPORT_FORMATS[formato.value]
+
+    return StreamingResponse(
+        bloques,
+        media_type=media_type,
         headers={
-            "Content-Disposition": "attachment; filename=tarifarios_filtrados.csv"
+            "Content-Disposition": f"attachment; filename=tarifarios_filtrados.{extension}",
+            VERSION_HEADER: version,
         }
     )
 
 @router.get("/tarifarios", response_model=PaginatedTarifariosResponse)
-def get_all_tarifarios(
-    skip: int = 0,
-    limit: int = 20,
-    banco: Optional[str] = Query(None, description="Filtrar por banco"),
-    tipo: Optional[str] = Query(None, description="Filtrar por tipo (TASA, COMISION, etc.)"),
-    moneda: Optional[str] = Query(None, description="Filtrar por moneda (MN, ME, AMBAS)"),
+async def get_all_tarifarios(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (next_cursor de la página anterior); si se envía, se ignora skip"),
+    banco: Optional[List[str]] = Query(None, description="Filtrar por banco (se puede repetir para varios bancos)"),
+    tipo: Optional[List[str]] = Query(None, description="Filtrar por tipo (TASA, COMISION, etc.); admite varios valores"),
+    moneda: Optional[List[str]] = Query(None, description="Filtrar por moneda (MN, ME, AMBAS); admite varios valores"),
     producto: Optional[str] = Query(None, description="Buscar texto en el nombre del producto"),
     concepto: Optional[str] = Query(None, description="Buscar texto en el concepto"),
+    q: Optional[str] = Query(None, description="Buscar texto en producto, concepto y descripción"),
     tasa_mn_gte: Optional[float] = Query(None, description="Tasa MN mayor o igual que"),
     tasa_mn_lte: Optional[float] = Query(None, description="Tasa MN menor o igual que"),
     tasa_me_gte: Optional[float] = Query(None, description="Tasa ME mayor o igual que"),
     tasa_me_lte: Optional[float] = Query(None, description="Tasa ME menor o igual que"),
     sort_by: Optional[str] = Query(None, description="Columna por la cual ordenar"),
-    sort_order: str = Query('asc', description="Orden de clasificación ('asc' o 'desc')")
+    sort_order: str = Query('asc', description="Orden de clasificación ('asc' o 'desc')"),
+    fields: Optional[List[str]] = Query(None, description="Columnas a incluir en cada item (separadas por coma o repetidas); el id siempre se incluye"),
 ):
-    """Obtiene una lista paginada y filtrada de todos los items del tarifario."""
-    data = service.get_tarifarios(
+    """
+    Obtiene una lista paginada y filtrada de todos los items del tarifario.
+    Los items se codifican directo desde las columnas del snapshot (sin
+    revalidar cada fila contra TarifarioItem).
+    """
+    params = dict(
         skip=skip, 
         limit=limit, 
+        cursor=cursor,
         banco=banco, 
         tipo=tipo, 
         moneda=moneda, 
         producto=producto, 
         concepto=concepto,
+        q=q,
         tasa_mn_gte=tasa_mn_gte,
         tasa_mn_lte=tasa_mn_lte,
         tasa_me_gte=tasa_me_gte,
         tasa_me_lte=tasa_me_lte,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        fields=fields,
     )
+    async with service.view() as vista:
+        async def build() -> Dict:
+            try:
+                data = await vista.get_tarifarios(**params)
+            except ExpiredCursorError as e:
+                raise HTTPException(status_code=410, detail=str(e))
+            except (InvalidCursorError, InvalidFieldsError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            data["dataset_version"] = vista.version
+            return data
+
+        return await cached_json_response_async(request, "tarifarios", vista.version, params,
+                                                PaginatedTarifariosResponse, build, validate=False)
+
+@router.post("/query", response_model=QueryResponse)
+async def query_tarifarios(request: Request, payload: QueryRequest):
+    """
+    Filtra con una expresión: AND/OR/NOT, paréntesis, = != < <= > >=,
+    BETWEEN, IN, IS [NOT] NULL y CONTAINS, sobre cualquier columna. Ejemplo:
+    `tipo = "COMISION" AND (monto_fijo_mn BETWEEN 5 AND 20 OR monto_fijo_me IS NOT NULL)`.
+    """
+    params = payload.model_dump()
+    async with service.view() as vista:
+        async def build() -> Dict:
+            try:
+                data = await vista.query_tarifarios(**params)
+            except (QuerySyntaxError, InvalidFieldsError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            data["dataset_version"] = vista.version
+            return data
+
+        return await cached_json_response_async(request, "query", vista.version, params, QueryResponse, build,
+                                                validate=False)
+
+@router.get("/tarifarios/{row_id}", response_model=TarifarioItem)
+async def get_tarifario(request: Request, row_id: str):
+    """Obtiene un item del tarifario por su id estable."""
+    async with service.view() as vista:
+        async def build() -> Dict:
+            item = await vista.get_tarifario(row_id)
+            if item is None:
+                raise HTTPException(status_code=404, detail=f"No existe el item {row_id}")
+            return item
+
+        return await cached_json_response_async(request, "tarifario", vista.version, {"id": row_id}, TarifarioItem,
+                                                build, validate=False)
+
+@router.post("/compare", response_model=CompareResponse)
+async def compare_tarifarios(payload: CompareRequest, response: Response):
+    """
+    Compara items (de cualquier página o banco) por sus ids estables. Devuelve
+    los atributos alineados y los ids que ya no existen en el snapshot actual.
+    """
+    async with service.view() as vista:
+        data = await vista.compare(payload.ids)
+        data["dataset_version"] = vista.version
+        response.headers[VERSION_HEADER] = vista.version
     return data
 
+@router.get("/equivalentes", response_model=EquivalentesResponse)
+async def get_equivalentes(
+    request: Request,
+    id: Optional[str] = Query(None, description="Id de la fila de referencia"),
+    q: Optional[str] = Query(None, description="Texto libre, p. ej. 'disposición de efectivo' (si no se envía id)"),
+    k: int = Query(3, ge=1, le=SIMILARITY_TOP_K, description="Máximo de filas por banco"),
+    banco: Optional[List[str]] = Query(None, description="Limitar a estos bancos; admite varios valores"),
+):
+    """
+    Busca la misma comisión o tasa en los demás bancos: las k filas más
+    parecidas por banco según Concepto y Descripcion_Breve.
+    """
+    if not id and not (q and q.strip()):
+        raise HTTPException(status_code=400, detail="Indicar id o q")
+    params = dict(id=id, q=q, k=k, banco=banco)
+    async with service.view() as vista:
+        async def build() -> Dict:
+            data = await vista.get_equivalentes(row_id=id, q=q, k=k, bancos=banco)
+            if data is None:
+                raise HTTPException(status_code=404, detail=f"No existe el item {id}")
+            data["dataset_version"] = vista.version
+            return data
+
+        return await cached_json_response_async(request, "equivalentes", vista.version, params,
+                                                EquivalentesResponse, build, validate=False)
+
 @router.get("/stats", response_model=StatsResponse)
-def get_statistics():
+async def get_statistics(request: Request):
     """Obtiene estadísticas generales del conjunto de datos."""
-    stats = service.get_stats()
-    return stats
+    async with service.view() as vista:
+        async def build() -> Dict:
+            stats = await vista.get_stats()
+            stats["dataset_version"] = vista.version
+            return stats
+
+        return await cached_json_response_async(request, "stats", vista.version, {}, StatsResponse, build)
+
+@router.get("/stats/aggregate", response_model=AggregateStatsResponse)
+async def get_aggregate_statistics(
+    request: Request,
+    banco: Optional[List[str]] = Query(None, description="Filtrar por banco; admite varios valores"),
+    tipo: Optional[List[str]] = Query(None, description="Filtrar por tipo; admite varios valores"),
+    moneda: Optional[List[str]] = Query(None, description="Filtrar por moneda; admite varios valores"),
+    periodicidad: Optional[List[str]] = Query(None, description="Filtrar por periodicidad; admite varios valores"),
+    group_by: Optional[List[CubeDimension]] = Query(None, description="Dimensiones por las que agrupar"),
+):
+    """
+    Conteo, promedio, mínimo y máximo de cada columna Tasa_*/Monto_* para los
+    filtros dados, calculados combinando celdas del cubo precalculado.
+    """
+    params = dict(banco=banco, tipo=tipo, moneda=moneda, periodicidad=periodicidad,
+                  group_by=[dim.value for dim in group_by or []])
+    async with service.view() as vista:
+        async def build() -> Dict:
+            data = await vista.get_aggregate_stats(
+                group_by=[dim.columna for dim in group_by or []],
+                Banco=banco, Tipo=tipo, Moneda=moneda, Periodicidad=periodicidad,
+            )
+            data["dataset_version"] = vista.version
+            return data
+
+        return await cached_json_response_async(request, "stats/aggregate", vista.version, params,
+                                                AggregateStatsResponse, build)
+
+@router.get("/stats/distribution", response_model=DistributionResponse)
+async def get_distribution(
+    request: Request,
+    columna: str = Query(..., description="Columna numérica (Tasa_*/Monto_*)"),
+    banco: Optional[List[str]] = Query(None, description="Filtrar por banco; admite varios valores"),
+    tipo: Optional[List[str]] = Query(None, description="Filtrar por tipo; admite varios valores"),
+    moneda: Optional[List[str]] = Query(None, description="Filtrar por moneda; admite varios valores"),
+    periodicidad: Optional[List[str]] = Query(None, description="Filtrar por periodicidad; admite varios valores"),
+    group_by: Optional[List[CubeDimension]] = Query(None, description="Dimensiones por las que agrupar"),
+    bins: int = Query(20, ge=1, le=HISTOGRAM_BINS, description="Cantidad máxima de tramos del histograma"),
+    quantiles: Optional[List[Quantile]] = Query(None, description="Cuantiles a calcular (0 a 1); admite varios valores"),
+):
+    """
+    Histograma y cuantiles de una columna Tasa_*/Monto_*, combinando los
+    histogramas precalculados por celda del snapshot (sin recorrer filas).
+    """
+    params = dict(columna=columna, banco=banco, tipo=tipo, moneda=moneda, periodicidad=periodicidad,
+                  group_by=[dim.value for dim in group_by or []], bins=bins, quantiles=quantiles)
+    async with service.view() as vista:
+        async def build() -> Dict:
+            try:
+                data = await vista.get_distribution(
+                    columna,
+                    group_by=[dim.columna for dim in group_by or []],
+                    bins=bins,
+                    quantiles=quantiles,
+                    Banco=banco, Tipo=tipo, Moneda=moneda, Periodicidad=periodicidad,
+                )
+            except InvalidFieldsError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            data["dataset_version"] = vista.version
+            return data
+
+        return await cached_json_response_async(request, "stats/distribution", vista.version, params,
+                                                DistributionResponse, build)
 
 @router.get("/filters", response_model=FilterOptionsResponse)
-def get_filter_options():
+async def get_filter_options(request: Request):
     """Obtiene los valores únicos para poblar los controles de filtro en la UI."""
-    options = service.get_filter_options()
-    return options
+    async with service.view() as vista:
+        return await cached_json_response_async(request, "filters", vista.version, {}, FilterOptionsResponse,
+                                                vista.get_filter_options)
+
+@router.get("/snapshot", response_model=SnapshotInfoResponse)
+async def get_snapshot_info():
+    """Informa la versión del dataset que está sirviendo la API."""
+    return snapshot_info()
+
+@router.post("/reload", response_model=SnapshotInfoResponse)
+async def reload_dataset(force: bool = Query(False, description="Recargar aunque el contenido no haya cambiado")):
+    """
+    Relee el CSV y publica una versión nueva (snapshot con sus índices, o
+    base SQLite con su pool). Los requests en curso terminan sobre la anterior.
+    """
+    if await service.reload(force=force):
+        # Las respuestas de versiones anteriores ya no se volverán a pedir
+        response_cache.clear(keep_versions=[service.info()["version"]])
+    return service.info()
@@ -7,15 +7,20 @@ from typing import List
 from loguru import logger
 
 from ..config import settings
-from ..models import BancoEnum, TarifarioURL, ScrapingResult
+from ..models import BancoEnum, BancoRefreshResult, TarifarioURL, ScrapingResult
 from ..scrapers import (
     BBVAScraper,
     BCPScraper,
     InterbankScraper,
     ScotiabankScraper,
-    BancoNacionScraper
+    BancoNacionScraper,
+    ScrapingScheduler,
+    scrapers_registrados
 )
-from ..utils import PDFDownloader, setup_logger
+from ..scrapers.browser import cerrar_motor
+from ..utils import setup_logger
+from ..utils.metrics import SCRAPE_DURATION, SCRAPE_URLS, track_job
+from .metrics import setup_metrics
 
 # Configurar logger
 setup_logger()
@@ -27,6 +32,9 @@ app = FastAPI(
     description="API para scraping y descarga de tarifarios bancarios del Perú"
 )
 
+# Telemetría: latencias por ruta, requests en curso y duración de los trabajos en /metrics
+setup_metrics(app, "scraper")
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -38,6 +46,7 @@ async def startup_event():
 async def shutdown_event():
     """Evento de cierre"""
     logger.info("Cerrando aplicación")
+    cerrar_motor()
 
 
 @app.get("/")
@@ -87,8 +96,9 @@ async def scrape_banco(banco: BancoEnum):
         import time
         inicio = time.time()
 
-        with scraper_class() as scraper:
+        with track_job(SCRAPE_DURATION, banco.value), scraper_class() as scraper:
             urls = scraper.obtener_urls()
+        SCRAPE_URLS.inc(len(urls), banco=banco.value)
 
         duracion = time.time() - inicio
 
@@ -108,6 +118,40 @@ async def scrape_banco(banco: BancoEnum):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _resumen_banco(resultado: BancoRefreshResult) -> dict:
+    """Respuesta de /download para un banco ya scrapeado y descargado"""
+    urls = resultado.scraping.urls_encontradas
+    if not urls:
+        return {
+            "banco": resultado.scraping.banco.value,
+            "total_urls": 0,
+            "descargados": 0,
+            "errores": [],
+            "mensaje": "No se encontraron PDFs para descargar"
+        }
+
+    resultados_exitosos = []
+    sin_cambios = 0
+    errores = []
+
+    for url, descarga in zip(urls, resultado.descargas):
+        if descarga.exito:
+            resultados_exitosos.append(descarga.metadata)
+            sin_cambios += descarga.sin_cambios
+        else:
+            errores.append(f"{url.texto}: {descarga.error}")
+
+    return {
+        "banco": resultado.scraping.banco.value,
+        "total_urls": len(urls),
+        "descargados": len(resultados_exitosos),
+        "sin_cambios": sin_cambios,
+        "errores": errores,
+        "duracion_segundos": round(resultado.duracion_total_segundos, 2),
+        "metadata": [meta.dict() for meta in resultados_exitosos]
+    }
+
+
 @app.post("/download/{banco}")
 async def descargar_pdfs_banco(banco: BancoEnum):
     """
@@ -116,51 +160,18 @@ async def descargar_pdfs_banco(banco: BancoEnum):
     try:
         logger.info(f"Iniciando descarga de tarifarios de {banco.value}")
 
-        # Scraping
-        scrapers = {
-            BancoEnum.BBVA: BBVAScraper,
-            BancoEnum.BCP: BCPScraper,
-            BancoEnum.INTERBANK: InterbankScraper,
-            BancoEnum.SCOTIABANK: ScotiabankScraper,
-            BancoEnum.BANCO_NACION: BancoNacionScraper
-        }
-
-        scraper_class = scrapers.get(banco)
+        scraper_class = {s.BANCO: s for s in scrapers_registrados()}.get(banco)
         if not scraper_class:
             raise HTTPException(status_code=400, detail=f"Banco no soportado: {banco}")
 
-        with scraper_class() as scraper:
-            urls = scraper.obtener_urls()
-
-        if not urls:
-            return {
-                "banco": banco.value,
-                "total_urls": 0,
-                "descargados": 0,
-                "errores": [],
-                "mensaje": "No se encontraron PDFs para descargar"
-            }
-
-        # Descargar
-        downloader = PDFDownloader()
-        resultados_exitosos = []
-        errores = []
-
-        for url in urls:
-            resultado = downloader.descargar(url)
-            if resultado.exito:
-                resultados_exitosos.append(resultado.metadata)
-            else:
-                errores.append(f"{url.texto}: {resultado.error}")
-
-        return {
-            "banco": banco.value,
-            "total_urls": len(urls),
-            "descargados": len(resultados_exitosos),
-            "errores": errores,
-            "metadata": [meta.dict() for meta in resultados_exitosos]
-        }
+        # Scraping en un hilo (no bloquea el event loop) y descarga en paralelo
+        resultado, = await ScrapingScheduler([scraper_class]).ejecutar_async()
+        if resultado.scraping.errores:
+            raise RuntimeError("; ".join(resultado.scraping.errores))
+        return _resumen_banco(resultado)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error en descarga: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -173,16 +184,17 @@ async def descargar_todos():
     """
     resultados = {}
 
-    for banco in BancoEnum:
-        try:
-            resultado = await descargar_pdfs_banco(banco)
-            resultados[banco.value] = resultado
-        except Exception as e:
-            logger.error(f"Error descargando {banco.value}: {e}")
+    # Todos los bancos a la vez: la respuesta tarda lo que el banco más lento
+    for resultado in await ScrapingScheduler().ejecutar_async():
+        banco = resultado.scraping.banco
+        if resultado.scraping.errores:
+            logger.error(f"Error descargando {banco.value}: {resultado.scraping.errores}")
             resultados[banco.value] = {
-                "error": str(e),
+                "error": "; ".join(resultado.scraping.errores),
                 "descargados": 0
             }
+        else:
+            resultados[banco.value] = _resumen_banco(resultado)
 
     return {
         "resultados": resultados,
@@ -0,0 +1,96 @@
+"""
+Telemetría HTTP compartida por las dos apps FastAPI (API de scraping y visor).
+
+`setup_metrics(app, nombre)` agrega un middleware ASGI que mide, por ruta
+(la plantilla, p. ej. /api/v1/tarifarios/{row_id}, para no crear una serie
+por id), la latencia, el tamaño de la respuesta y el código de estado, más
+los requests en curso; y expone todo en GET /metrics.
+"""
+import time
+from typing import Callable, Dict
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from src.utils.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    SIZE_BUCKETS,
+    Counter,
+    FunctionMetric,
+    Gauge,
+    Histogram,
+)
+
+# Valor de la etiqueta `route` cuando ninguna ruta coincide (404)
+SIN_RUTA = "sin_ruta"
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests HTTP atendidos", ("app", "method", "route", "status"),
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latencia de los requests HTTP hasta el último byte de la respuesta",
+    ("app", "method", "route"),
+))
+HTTP_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Tamaño del cuerpo de las respuestas HTTP (sin cabeceras)",
+    ("app", "method", "route"), buckets=SIZE_BUCKETS,
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests HTTP en curso", ("app",),
+))
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: cuenta bytes de cuerpo enviados, así también mide respuestas en streaming."""
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = {"status": 500, "bytes": 0}
+
+        async def send_midiendo(message):
+            if message["type"] == "http.response.start":
+                estado["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                estado["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(app=self.app_name)
+        try:
+            await self.app(scope, receive, send_midiendo)
+        finally:
+            HTTP_IN_FLIGHT.dec(app=self.app_name)
+            # El router deja la ruta que atendió el request en el mismo scope
+            ruta = getattr(scope.get("route"), "path", None) or SIN_RUTA
+            etiquetas = {"app": self.app_name, "method": scope["method"], "route": ruta}
+            HTTP_REQUESTS.inc(status=str(estado["status"]), **etiquetas)
+            HTTP_LATENCY.observe(time.perf_counter() - inicio, **etiquetas)
+            HTTP_RESPONSE_SIZE.observe(estado["bytes"], **etiquetas)
+
+
+def register_function(nombre: str, ayuda: str, tipo: str, funcion: Callable[[], float]) -> None:
+    """Registra una métrica sin etiquetas calculada en cada scrape (p. ej. filas del dataset)."""
+    REGISTRY.register(FunctionMetric(nombre, ayuda, tipo, lambda: {(): funcion()}))
+
+
+def register_labeled_function(nombre: str, ayuda: str, tipo: str, etiquetas: tuple,
+                              funcion: Callable[[], Dict[tuple, float]]) -> None:
+    """Como register_function, para una métrica con etiquetas."""
+    REGISTRY.register(FunctionMetric(nombre, ayuda, tipo, funcion, etiquetas))
+
+
+def setup_metrics(app: FastAPI, app_name: str) -> None:
+    """Instrumenta `app` y agrega GET /metrics en formato de texto de Prometheus."""
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -5,8 +5,15 @@ document.addEventListener('DOMContentLoaded', () => {
     const limit = 20;
     let currentSort = { by: 'Banco', order: 'asc' };
     let currentItems = [];
+    // Ids estables de las filas seleccionadas: sobreviven al cambio de página
     let comparisonList = [];
 
+    // Columnas que muestra la tabla: el resto se pide al abrir el detalle
+    const tableFields = [
+        'Banco', 'Producto_Nombre', 'Concepto', 'Tipo', 'Moneda',
+        'Tasa_Porcentaje_MN', 'Monto_Fijo_MN', 'Tasa_Porcentaje_ME', 'Monto_Fijo_ME'
+    ];
+
     // --- DOM Elements ---
     const elements = {
         bancoFilter: document.getElementById('banco-filter'),
@@ -38,6 +45,18 @@ document.addEventListener('DOMContentLoaded', () => {
                 return null;
             }
             return response.json();
+        },
+        async post(endpoint, body) {
+            const response = await fetch(endpoint, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(body)
+            });
+            if (!response.ok) {
+                console.error(`Error posting ${endpoint}: ${response.statusText}`);
+                return null;
+            }
+            return response.json();
         }
     };
 
@@ -71,7 +90,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         elements.tableBody.innerHTML = items.map((item, index) => `
             <tr>
-                <td><input class="form-check-input compare-checkbox" type="checkbox" data-item-index="${index}"></td>
+                <td><input class="form-check-input compare-checkbox" type="checkbox" data-item-index="${index}" ${comparisonList.includes(item.id) ? 'checked' : ''}></td>
                 <td>${item.Banco}</td>
                 <td>${item.Producto_Nombre || ''}</td>
                 <td>${item.Concepto || ''}</td>
@@ -152,6 +171,7 @@ document.addEventListener('DOMContentLoaded', () => {
             limit,
             sort_by: currentSort.by,
             sort_order: currentSort.order,
+            fields: tableFields.join(','),
         });
 
         const filters = {
@@ -246,11 +266,13 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    elements.tableBody.addEventListener('click', (e) => {
+    elements.tableBody.addEventListener('click', async (e) => {
         // Logic for Details Button
         if (e.target.classList.contains('view-details-btn')) {
             const index = e.target.dataset.index;
-            const item = currentItems[index];
+            if (!currentItems[index]) return;
+            // La tabla sólo trae algunas columnas: pedir la fila completa
+            const item = await api.get(`/api/v1/tarifarios/${currentItems[index].id}`);
             if (!item) return;
 
             const modal = new bootstrap.Modal(document.getElementById('details-modal'));
@@ -277,17 +299,17 @@ document.addEventListener('DOMContentLoaded', () => {
         if (e.target.classList.contains('compare-checkbox')) {
             const index = parseInt(e.target.dataset.itemIndex, 10);
             const item = currentItems[index];
-            if (!item) return;
+            if (!item || !item.id) return;
 
             const isChecked = e.target.checked;
             if (isChecked) {
                 // Add to list if not already there
-                if (!comparisonList.some(compItem => JSON.stringify(compItem) === JSON.stringify(item))) {
-                    comparisonList.push(item);
+                if (!comparisonList.includes(item.id)) {
+                    comparisonList.push(item.id);
                 }
             } else {
                 // Remove from list
-                comparisonList = comparisonList.filter(compItem => JSON.stringify(compItem) !== JSON.stringify(item));
+                comparisonList = comparisonList.filter(id => id !== item.id);
             }
             updateCompareButton();
         }
@@ -306,34 +328,38 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    elements.compareBtn.addEventListener('click', () => {
+    elements.compareBtn.addEventListener('click', async () => {
         if (comparisonList.length < 2) return;
-        renderComparisonModal();
+        // El servidor resuelve los ids, así se pueden comparar filas de distintas páginas
+        const comparison = await api.post('/api/v1/compare', { ids: comparisonList });
+        if (!comparison) return;
+        // Descartar ids que ya no existen en el dataset recargado
+        comparisonList = comparison.ids;
+        updateCompareButton();
+        renderComparisonModal(comparison);
         const modal = new bootstrap.Modal(document.getElementById('comparison-modal'));
         modal.show();
     });
 
-    function renderComparisonModal() {
+    function renderComparisonModal({ items, filas }) {
         const modalBody = document.getElementById('comparison-modal-body');
-        const attributes = Object.keys(currentItems[0] || {});
         
         let tableHtml = '<div class="table-responsive"><table class="table table-bordered table-hover">';
 
         // Header row
         tableHtml += '<thead><tr><th class="table-light">Atributo</th>';
-        comparisonList.forEach(item => {
-            tableHtml += `<th class="table-light">${item.Producto_Nombre || item.Concepto}</th>`;
+        items.forEach(item => {
+            tableHtml += `<th class="table-light">${item.Banco}<br><small>${item.Producto_Nombre || item.Concepto}</small></th>`;
         });
         tableHtml += '</tr></thead>';
 
         // Body rows
         tableHtml += '<tbody>';
-        attributes.forEach(attr => {
-            if (attr === 'Producto_Codigo') return; // Skip irrelevant fields
-            tableHtml += `<tr><td class="fw-bold table-light">${attr.replace(/_/g, ' ')}</td>`;
-            comparisonList.forEach(item => {
-                const value = item[attr] !== null && item[attr] !== undefined ? item[attr] : '-';
-                tableHtml += `<td>${value}</td>`;
+        filas.forEach(({ atributo, valores, mejor }) => {
+            tableHtml += `<tr><td class="fw-bold table-light">${atributo.replace(/_/g, ' ')}</td>`;
+            valores.forEach((valor, i) => {
+                const value = valor !== null && valor !== undefined ? valor : '-';
+                tableHtml += `<td class="${i === mejor ? 'table-success' : ''}">${value}</td>`;
             });
             tableHtml += '</tr>';
         });
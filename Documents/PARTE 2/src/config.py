@@ -33,6 +33,9 @@ class Settings(BaseSettings):
     REQUEST_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
     DELAY_BETWEEN_REQUESTS: float = 1.0
+    DOWNLOAD_CONCURRENCY: int = 16  # descargas de PDFs en paralelo (AsyncPDFDownloader)
+    DOWNLOAD_PER_HOST: int = 4  # conexiones simultáneas por host
+    BROWSER_MAX_PAGES: int = 4  # páginas simultáneas del navegador compartido (Interbank, Scotiabank)
 
     # OCR
     TESSERACT_CMD: Optional[str] = None
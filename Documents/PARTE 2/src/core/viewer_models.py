@@ -1,11 +1,31 @@
 """
 Modelos Pydantic para la API del visor de datos.
 """
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, List, Optional, Dict, Union
+
+class ExportFormat(str, Enum):
+    """Formatos soportados por el endpoint de exportación."""
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+class CubeDimension(str, Enum):
+    """Dimensiones por las que se pueden agrupar las estadísticas agregadas."""
+    BANCO = "banco"
+    TIPO = "tipo"
+    MONEDA = "moneda"
+    PERIODICIDAD = "periodicidad"
+
+    @property
+    def columna(self) -> str:
+        """Nombre de la columna del dataset."""
+        return self.value.capitalize()
 
 class TarifarioItem(BaseModel):
     """Modelo para un único item del tarifario en la respuesta de la API."""
+    id: Optional[str] = None
     Banco: str
     Producto_Codigo: Optional[str]
     Producto_Nombre: Optional[str]
@@ -27,12 +47,62 @@ class TarifarioItem(BaseModel):
     Oportunidad_Cobro: Optional[str]
     Observaciones: Optional[str]
 
+class EquivalentItem(TarifarioItem):
+    """Item equivalente en otro banco, con su similitud (coseno TF-IDF, 0 a 1)."""
+    similitud: float
+
+class BancoEquivalentes(BaseModel):
+    """Filas equivalentes de un banco, de mayor a menor similitud."""
+    banco: str
+    items: List[EquivalentItem]
+
+class EquivalentesResponse(BaseModel):
+    """Modelo para la búsqueda de comisiones equivalentes entre bancos."""
+    id: Optional[str] = None
+    q: Optional[str] = None
+    bancos: List[BancoEquivalentes]
+    dataset_version: Optional[str] = None
+
+class CompareRequest(BaseModel):
+    """Ids de las filas a comparar."""
+    ids: List[str] = Field(..., min_length=1, max_length=50)
+
+class CompareRow(BaseModel):
+    """Un atributo con sus valores alineados por id (mismo orden que `ids`)."""
+    atributo: str
+    valores: List[Optional[Union[str, float]]]
+    mejor: Optional[int] = None
+
+class CompareResponse(BaseModel):
+    """Modelo para la comparación de filas entre bancos."""
+    ids: List[str]
+    no_encontrados: List[str]
+    items: List[TarifarioItem]
+    filas: List[CompareRow]
+    dataset_version: Optional[str] = None
+
 class PaginatedTarifariosResponse(BaseModel):
     """Modelo para la respuesta paginada de tarifarios."""
     total_items: int
     items: List[TarifarioItem]
     total_pages: int
-    current_page: int
+    current_page: Optional[int]
+    next_cursor: Optional[str] = None
+    dataset_version: Optional[str] = None
+
+class QueryRequest(BaseModel):
+    """Consulta con expresión de filtro (ver src/services/query_language.py)."""
+    where: str = Field(..., examples=['banco IN ("BCP", "Interbank") AND monto_fijo_mn BETWEEN 5 AND 20'])
+    skip: int = Field(0, ge=0)
+    limit: int = Field(20, ge=1)
+    sort_by: Optional[str] = None
+    sort_order: str = 'asc'
+    fields: Optional[List[str]] = None
+
+class QueryResponse(PaginatedTarifariosResponse):
+    """Página de resultados de una consulta, con la expresión normalizada y su plan."""
+    expresion: str
+    plan: List[str]
 
 class StatsResponse(BaseModel):
     """Modelo para las estadísticas generales."""
@@ -41,9 +111,112 @@ class StatsResponse(BaseModel):
     tipos_count: Dict[str, int]
     tasa_promedio_mn: Optional[float]
     tasa_promedio_me: Optional[float]
+    dataset_version: Optional[str] = None
+
+class MetricStats(BaseModel):
+    """Estadísticas de una columna numérica dentro de un grupo."""
+    count: int
+    mean: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+
+class AggregateGroup(BaseModel):
+    """Un grupo del resultado agregado (una combinación de valores de group_by)."""
+    claves: Dict[str, Optional[str]]
+    total_registros: int
+    metricas: Dict[str, MetricStats]
+
+class AggregateStatsResponse(BaseModel):
+    """Modelo para las estadísticas agregadas desde el cubo."""
+    group_by: List[str]
+    grupos: List[AggregateGroup]
+    dataset_version: Optional[str] = None
+
+# Cuantil pedido en /stats/distribution (fracción entre 0 y 1)
+Quantile = Annotated[float, Field(ge=0, le=1)]
+
+class HistogramBin(BaseModel):
+    """Tramo del histograma: valores entre desde y hasta (ambos incluidos)."""
+    desde: float
+    hasta: float
+    count: int
+
+class DistributionGroup(BaseModel):
+    """Distribución de la columna en un grupo (una combinación de valores de group_by)."""
+    claves: Dict[str, Optional[str]]
+    count: int
+    min: Optional[float]
+    max: Optional[float]
+    cuantiles: Dict[str, Optional[float]]
+    histograma: List[HistogramBin]
+
+class DistributionResponse(BaseModel):
+    """Modelo para los histogramas y cuantiles precalculados de una columna numérica."""
+    columna: str
+    group_by: List[str]
+    grupos: List[DistributionGroup]
+    dataset_version: Optional[str] = None
+
+class HistorySnapshot(BaseModel):
+    """Un snapshot registrado en el historial, con sus cambios respecto del anterior."""
+    version: str
+    fecha_extraccion: Optional[str]
+    registrado_en: str
+    total_registros: int
+    altas: int
+    modificaciones: int
+    bajas: int
+
+class HistorySnapshotsResponse(BaseModel):
+    """Modelo con los snapshots del historial, del más antiguo al más reciente."""
+    snapshots: List[HistorySnapshot]
+
+class FieldChange(BaseModel):
+    """Valor de un campo en cada extremo del diff."""
+    antes: Optional[Union[str, float]] = None
+    despues: Optional[Union[str, float]] = None
+
+class RowDiff(BaseModel):
+    """Fila que cambió entre dos snapshots (alta, modificacion o baja)."""
+    id: str
+    tipo: str
+    fila: Dict[str, Any]
+    campos: Dict[str, FieldChange]
+
+class SnapshotDiffResponse(BaseModel):
+    """Modelo para el diff entre dos snapshots del historial."""
+    desde: str
+    hasta: str
+    total: int
+    altas: int
+    modificaciones: int
+    bajas: int
+    skip: int
+    limit: int
+    cambios: List[RowDiff]
+
+class RowHistoryEntry(BaseModel):
+    """Estado de una fila después de un snapshot en que cambió."""
+    version: str
+    fecha_extraccion: Optional[str]
+    registrado_en: str
+    tipo: str
+    campos: List[str]
+    valores: Optional[Dict[str, Any]]
+
+class RowHistoryResponse(BaseModel):
+    """Modelo para el historial de una fila."""
+    id: str
+    historial: List[RowHistoryEntry]
 
 class FilterOptionsResponse(BaseModel):
     """Modelo para las opciones de los filtros."""
     bancos: List[str]
     tipos: List[str]
     monedas: List[str]
+
+class SnapshotInfoResponse(BaseModel):
+    """Modelo con la versión del dataset servido."""
+    version: str
+    total_registros: int
+    loaded_at: str
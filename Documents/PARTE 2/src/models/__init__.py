@@ -6,7 +6,8 @@ from .tarifario import (
     TarifarioURL,
     BancoEnum,
     DownloadResult,
-    ScrapingResult
+    ScrapingResult,
+    BancoRefreshResult
 )
 
 __all__ = [
@@ -14,5 +15,6 @@ __all__ = [
     "TarifarioURL",
     "BancoEnum",
     "DownloadResult",
-    "ScrapingResult"
+    "ScrapingResult",
+    "BancoRefreshResult"
 ]
@@ -32,6 +32,7 @@ class TarifarioMetadata(BaseModel):
     fecha_descarga: datetime = Field(default_factory=datetime.now)
     tamaño_bytes: int
     hash_md5: Optional[str] = None
+    hash_sha256: Optional[str] = None
     tipo_producto: Optional[str] = None
     valido: bool = True
     error: Optional[str] = None
@@ -53,4 +54,13 @@ class DownloadResult(BaseModel):
     metadata: TarifarioMetadata
     ruta_archivo: str
     exito: bool
+    sin_cambios: bool = Field(False, description="El PDF es el mismo que ya estaba descargado (304 o mismo sha256)")
     error: Optional[str] = None
+
+
+class BancoRefreshResult(BaseModel):
+    """Resultado de scrapear y descargar un banco dentro de una actualización de todos"""
+    scraping: ScrapingResult
+    descargas: List[DownloadResult] = Field(default_factory=list)
+    duracion_descarga_segundos: float = 0.0
+    duracion_total_segundos: float = Field(0.0, description="Tiempo de reloj del banco (scraping + descarga)")
@@ -9,16 +9,24 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+# Importar la app en el proceso padre construye y publica el snapshot en el
+# store compartido antes de lanzar los workers: éstos sólo lo mapean en memoria.
 from src.api.data_viewer_api import app
 
 if __name__ == "__main__":
     # Obtener el puerto desde una variable de entorno o usar 8000 por defecto
     port = int(os.environ.get("PORT", 8000))
+
+    # Número de procesos worker (WEB_CONCURRENCY, como en gunicorn/uvicorn).
+    # Con un solo worker se mantiene el modo desarrollo con recarga automática.
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    reload = workers == 1 and os.environ.get("RELOAD", "1") != "0"
     
     uvicorn.run(
         "src.api.data_viewer_api:app", 
         host="0.0.0.0", 
         port=port, 
-        reload=True,
+        reload=reload,
+        workers=None if reload else workers,
         log_level="info"
     )
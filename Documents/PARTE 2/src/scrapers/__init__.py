@@ -7,6 +7,7 @@ from .bcp import BCPScraper
 from .interbank import InterbankScraper
 from .scotiabank import ScotiabankScraper
 from .banco_nacion import BancoNacionScraper
+from .scheduler import ScrapingScheduler, scrapers_registrados
 
 __all__ = [
     "BaseScraper",
@@ -15,4 +16,6 @@ __all__ = [
     "InterbankScraper",
     "ScotiabankScraper",
     "BancoNacionScraper",
+    "ScrapingScheduler",
+    "scrapers_registrados",
 ]
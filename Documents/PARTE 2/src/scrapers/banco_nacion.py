@@ -10,6 +10,8 @@ from ..models import TarifarioURL, BancoEnum
 class BancoNacionScraper(BaseScraper):
     """Scraper para Banco de la Nación"""
 
+    BANCO = BancoEnum.BANCO_NACION
+
     # PDFs conocidos
     URLS_DIRECTAS = [
         {
@@ -35,7 +37,7 @@ class BancoNacionScraper(BaseScraper):
     ]
 
     def __init__(self):
-        super().__init__(BancoEnum.BANCO_NACION)
+        super().__init__(self.BANCO)
 
     def obtener_urls(self) -> List[TarifarioURL]:
         """
@@ -1,6 +1,7 @@
 """
 Clase base para todos los scrapers
 """
+import time
 from abc import ABC, abstractmethod
 from typing import List, Optional
 import requests
@@ -8,11 +9,15 @@ from bs4 import BeautifulSoup
 from loguru import logger
 from ..models import TarifarioURL, BancoEnum
 from ..config import settings
+from ..utils.rate_limit import ESTADOS_REINTENTABLES, RATE_LIMITER, espera_reintento
 
 
 class BaseScraper(ABC):
     """Clase base abstracta para scrapers de bancos"""
 
+    # Banco que scrapea cada subclase (lo usa ScrapingScheduler para encontrarlas)
+    BANCO: BancoEnum
+
     def __init__(self, banco: BancoEnum):
         self.banco = banco
         self.session = requests.Session()
@@ -29,15 +34,29 @@ class BaseScraper(ABC):
         pass
 
     def _hacer_request(self, url: str, timeout: Optional[int] = None) -> requests.Response:
-        """Realiza un request HTTP con manejo de errores"""
+        """
+        Realiza un request HTTP con manejo de errores: espera su turno en el
+        límite por host y reintenta con backoff los errores transitorios
+        (conexión, timeout, 429/5xx) hasta settings.RETRY_ATTEMPTS veces
+        """
         timeout = timeout or settings.REQUEST_TIMEOUT
-        try:
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except requests.RequestException as e:
-            logger.error(f"Error al hacer request a {url}: {e}")
-            raise
+        for intento in range(1, settings.RETRY_ATTEMPTS + 1):
+            RATE_LIMITER.esperar(url)
+            try:
+                response = self.session.get(url, timeout=timeout)
+                response.raise_for_status()
+                return response
+            except requests.RequestException as e:
+                respuesta = getattr(e, "response", None)
+                reintentable = isinstance(e, (requests.ConnectionError, requests.Timeout)) or (
+                    respuesta is not None and respuesta.status_code in ESTADOS_REINTENTABLES
+                )
+                if not reintentable or intento == settings.RETRY_ATTEMPTS:
+                    logger.error(f"Error al hacer request a {url}: {e}")
+                    raise
+                espera = espera_reintento(intento, respuesta.headers.get("Retry-After") if respuesta is not None else None)
+                logger.warning(f"Reintentando {url} en {espera:.1f}s ({e})")
+                time.sleep(espera)
 
     def _parsear_html(self, html: str) -> BeautifulSoup:
         """Parsea HTML con BeautifulSoup"""
@@ -11,6 +11,8 @@ from ..models import TarifarioURL, BancoEnum
 class BBVAScraper(BaseScraper):
     """Scraper para BBVA Continental"""
 
+    BANCO = BancoEnum.BBVA
+
     # URLs base para scrapear
     URLS_BASE = [
         "https://www.bbva.pe/personas/personas-naturales-y-microempresas.html",
@@ -18,7 +20,7 @@ class BBVAScraper(BaseScraper):
     ]
 
     def __init__(self):
-        super().__init__(BancoEnum.BBVA)
+        super().__init__(self.BANCO)
 
     def obtener_urls(self) -> List[TarifarioURL]:
         """
@@ -11,10 +11,12 @@ from ..models import TarifarioURL, BancoEnum
 class BCPScraper(BaseScraper):
     """Scraper para BCP"""
 
+    BANCO = BancoEnum.BCP
+
     URL_BASE = "https://www.viabcp.com/tasasytarifas"
 
     def __init__(self):
-        super().__init__(BancoEnum.BCP)
+        super().__init__(self.BANCO)
 
     def obtener_urls(self) -> List[TarifarioURL]:
         """
@@ -0,0 +1,179 @@
+"""
+Navegador compartido (Playwright) para los scrapers que necesitan JavaScript.
+
+Un solo Chromium headless por proceso, con un único contexto, atiende a todos
+los scrapers (Interbank, Scotiabank). Corre en su propio event loop en un
+hilo de fondo, así los scrapers siguen siendo síncronos (ScrapingScheduler
+los ejecuta en hilos) y el navegador se lanza una vez aunque varios bancos
+scrapeen a la vez.
+
+- Imágenes, fuentes, hojas de estilo y multimedia se bloquean: para extraer
+  enlaces sólo hace falta el DOM.
+- En lugar de esperas fijas se espera un selector CSS.
+- Varias URLs se cargan en páginas paralelas del mismo contexto, respetando
+  RATE_LIMITER y settings.BROWSER_MAX_PAGES.
+
+Requiere: pip install playwright && playwright install chromium
+"""
+import asyncio
+import atexit
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+from loguru import logger
+
+from ..config import settings
+from ..utils.rate_limit import RATE_LIMITER
+
+try:
+    from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError, async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+    logger.warning("Playwright no está instalado. InterbankScraper y ScotiabankScraper no funcionarán.")
+
+# Recursos que no aportan nada al DOM
+RECURSOS_BLOQUEADOS = {"image", "font", "stylesheet", "media"}
+
+# User-Agent de un Chrome real (el de settings no incluye la versión del navegador)
+USER_AGENT_NAVEGADOR = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Oculta navigator.webdriver (algunos sitios bloquean navegadores automatizados)
+_SCRIPT_SIGILO = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+Extractor = Callable[["Page"], Awaitable[Any]]
+
+
+class BrowserEngine:
+    """
+    Chromium headless compartido con su event loop en un hilo propio.
+
+    `cargar(urls, esperar, extraer)` abre cada URL en una página del mismo
+    contexto, espera el selector `esperar` y retorna lo que devuelva
+    `extraer(page)`, una entrada por URL (la excepción si esa URL falló).
+    """
+
+    def __init__(self, max_paginas: Optional[int] = None, timeout: Optional[int] = None):
+        if not PLAYWRIGHT_AVAILABLE:
+            raise ImportError("Playwright no está instalado. Ejecuta: pip install playwright && playwright install chromium")
+
+        self.max_paginas = max_paginas or settings.BROWSER_MAX_PAGES
+        self.timeout_ms = (timeout or settings.REQUEST_TIMEOUT) * 1000
+
+        self._loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._loop.run_forever, name="browser-engine", daemon=True)
+        self._hilo.start()
+
+        self._playwright = None
+        self._browser = None
+        self._contexto = None
+        self._inicio_lock: Optional[asyncio.Lock] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+    async def _obtener_contexto(self):
+        """Lanza Chromium la primera vez que se necesita"""
+        if self._inicio_lock is None:
+            self._inicio_lock = asyncio.Lock()
+            self._semaforo = asyncio.Semaphore(self.max_paginas)
+
+        async with self._inicio_lock:
+            if self._contexto is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True,
+                    args=[
+                        "--no-sandbox",
+                        "--disable-dev-shm-usage",
+                        "--disable-blink-features=AutomationControlled",
+                    ]
+                )
+                self._contexto = await self._browser.new_context(user_agent=USER_AGENT_NAVEGADOR)
+                self._contexto.set_default_timeout(self.timeout_ms)
+                await self._contexto.add_init_script(_SCRIPT_SIGILO)
+                await self._contexto.route("**/*", self._filtrar_recurso)
+                logger.debug("Navegador compartido iniciado (Chromium headless)")
+        return self._contexto
+
+    @staticmethod
+    async def _filtrar_recurso(route):
+        if route.request.resource_type in RECURSOS_BLOQUEADOS:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _cargar_pagina(self, url: str, esperar: Optional[str], extraer: Extractor) -> Any:
+        contexto = await self._obtener_contexto()
+        await RATE_LIMITER.esperar_async(url)
+
+        async with self._semaforo:
+            page = await contexto.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded")
+                if esperar:
+                    try:
+                        await page.wait_for_selector(esperar, state="attached")
+                    except PlaywrightTimeoutError:
+                        # El extractor decide qué hacer con la página incompleta
+                        logger.warning(f"No apareció '{esperar}' en {url}")
+                return await extraer(page)
+            finally:
+                await page.close()
+
+    async def cargar_async(self, urls: List[str], esperar: Optional[str], extraer: Extractor) -> List[Any]:
+        """Carga `urls` en páginas paralelas (debe correr en el loop del motor)"""
+        return await asyncio.gather(
+            *(self._cargar_pagina(url, esperar, extraer) for url in urls),
+            return_exceptions=True
+        )
+
+    def cargar(self, urls: List[str], esperar: Optional[str], extraer: Extractor) -> List[Any]:
+        """Versión síncrona de cargar_async, para llamarla desde cualquier hilo"""
+        futuro = asyncio.run_coroutine_threadsafe(self.cargar_async(urls, esperar, extraer), self._loop)
+        return futuro.result()
+
+    async def _cerrar_async(self):
+        if self._contexto is not None:
+            await self._contexto.close()
+            await self._browser.close()
+            await self._playwright.stop()
+            self._contexto = self._browser = self._playwright = None
+            logger.debug("Navegador compartido cerrado")
+
+    def cerrar(self):
+        """Cierra el navegador y detiene el loop del motor"""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar_async(), self._loop).result(timeout=self.timeout_ms / 1000)
+        except Exception as e:
+            logger.warning(f"Error cerrando el navegador: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(timeout=5)
+        if not self._hilo.is_alive():
+            self._loop.close()
+
+
+_motor: Optional[BrowserEngine] = None
+_motor_lock = threading.Lock()
+
+
+def motor_compartido() -> BrowserEngine:
+    """El BrowserEngine del proceso (se crea la primera vez y se cierra al salir)"""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = BrowserEngine()
+            atexit.register(cerrar_motor)
+        return _motor
+
+
+def cerrar_motor():
+    """Cierra el navegador compartido, si se llegó a crear"""
+    global _motor
+    with _motor_lock:
+        motor, _motor = _motor, None
+    if motor is not None:
+        motor.cerrar()
@@ -0,0 +1,135 @@
+"""
+Actualización de todos los bancos en paralelo.
+
+ScrapingScheduler corre cada subclase de BaseScraper en su propio hilo (los
+scrapers son síncronos: requests o navegador) y, apenas un banco termina de
+scrapear, descarga sus PDFs con un AsyncPDFDownloader compartido. Un banco
+lento ya no retrasa a los demás: el tiempo total es el del banco más lento,
+no la suma. La cortesía con cada servidor la pone RATE_LIMITER (un token
+bucket por host) junto con los reintentos con backoff de _hacer_request y
+del downloader.
+
+Uso:
+    resultados = ScrapingScheduler().ejecutar()
+"""
+import asyncio
+import time
+from typing import Callable, List, Optional, Type
+
+from loguru import logger
+
+from ..models import BancoEnum, BancoRefreshResult, DownloadResult, ScrapingResult, TarifarioURL
+from ..utils.downloader import AsyncPDFDownloader
+from ..utils.metrics import DOWNLOAD_DURATION, SCRAPE_DURATION, SCRAPE_URLS, track_job
+from .base import BaseScraper
+
+
+def scrapers_registrados() -> List[Type[BaseScraper]]:
+    """Todas las subclases concretas de BaseScraper, en el orden de BancoEnum"""
+    pendientes = list(BaseScraper.__subclasses__())
+    por_banco = {}
+    while pendientes:
+        clase = pendientes.pop()
+        pendientes.extend(clase.__subclasses__())
+        if getattr(clase, "BANCO", None) is not None:
+            por_banco[clase.BANCO] = clase
+    return [por_banco[banco] for banco in BancoEnum if banco in por_banco]
+
+
+def _scrapear(scraper_class: Type[BaseScraper]) -> List[TarifarioURL]:
+    with scraper_class() as scraper:
+        return scraper.obtener_urls()
+
+
+class ScrapingScheduler:
+    """
+    Scrapea (y opcionalmente descarga) varios bancos a la vez.
+
+    `scrapers` por defecto son todos los registrados; con `descargar=False`
+    sólo se obtienen las URLs. `al_descargar(url, resultado)` se llama con
+    cada PDF apenas termina, como en AsyncPDFDownloader.descargar_todos.
+    """
+
+    def __init__(self,
+                 scrapers: Optional[List[Type[BaseScraper]]] = None,
+                 descargar: bool = True,
+                 al_descargar: Optional[Callable[[TarifarioURL, DownloadResult], None]] = None,
+                 **downloader_kwargs):
+        self.scrapers = scrapers or scrapers_registrados()
+        self.descargar = descargar
+        self.al_descargar = al_descargar
+        self.downloader_kwargs = downloader_kwargs
+        self.duracion_total = 0.0
+
+    async def ejecutar_async(self) -> List[BancoRefreshResult]:
+        """Corre todos los bancos y retorna un resultado por banco, en el orden de `scrapers`"""
+        inicio = time.perf_counter()
+        logger.info(f"Actualizando {len(self.scrapers)} bancos en paralelo")
+
+        if self.descargar:
+            async with AsyncPDFDownloader(**self.downloader_kwargs) as downloader:
+                resultados = await asyncio.gather(*(self._banco(c, downloader) for c in self.scrapers))
+        else:
+            resultados = await asyncio.gather(*(self._banco(c, None) for c in self.scrapers))
+
+        self.duracion_total = time.perf_counter() - inicio
+        self._registrar_resumen(resultados)
+        return list(resultados)
+
+    def ejecutar(self) -> List[BancoRefreshResult]:
+        """Versión síncrona de ejecutar_async para scripts"""
+        return asyncio.run(self.ejecutar_async())
+
+    async def _banco(self, scraper_class: Type[BaseScraper],
+                     downloader: Optional[AsyncPDFDownloader]) -> BancoRefreshResult:
+        """Scraping (en un hilo) y descarga de un banco; los errores quedan en el resultado"""
+        banco = scraper_class.BANCO
+        inicio = time.perf_counter()
+        urls: List[TarifarioURL] = []
+        errores: List[str] = []
+
+        try:
+            with track_job(SCRAPE_DURATION, banco.value):
+                urls = await asyncio.to_thread(_scrapear, scraper_class)
+            SCRAPE_URLS.inc(len(urls), banco=banco.value)
+            logger.info(f"{banco.value}: {len(urls)} URLs encontradas")
+        except Exception as e:
+            logger.error(f"Error scrapeando {banco.value}: {e}")
+            errores.append(str(e))
+
+        scraping = ScrapingResult(
+            banco=banco,
+            urls_encontradas=urls,
+            total_urls=len(urls),
+            duracion_segundos=time.perf_counter() - inicio,
+            exito=not errores,
+            errores=errores
+        )
+
+        descargas: List[DownloadResult] = []
+        inicio_descarga = time.perf_counter()
+        if downloader is not None and urls:
+            with track_job(DOWNLOAD_DURATION, banco.value):
+                descargas = await downloader.descargar_todos(urls, self.al_descargar)
+
+        return BancoRefreshResult(
+            scraping=scraping,
+            descargas=descargas,
+            duracion_descarga_segundos=time.perf_counter() - inicio_descarga if descargas else 0.0,
+            duracion_total_segundos=time.perf_counter() - inicio
+        )
+
+    def _registrar_resumen(self, resultados: List[BancoRefreshResult]):
+        """Tiempo de reloj por banco y total (el del más lento, no la suma)"""
+        logger.info("=" * 60)
+        logger.info("⏱️  TIEMPO POR BANCO")
+        for r in resultados:
+            exitosas = sum(d.exito for d in r.descargas)
+            logger.info(
+                f"  {r.scraping.banco.value:20s}: {r.duracion_total_segundos:7.1f}s "
+                f"(scraping {r.scraping.duracion_segundos:.1f}s, descarga {r.duracion_descarga_segundos:.1f}s) "
+                f"{exitosas}/{r.scraping.total_urls} PDFs"
+            )
+        suma = sum(r.duracion_total_segundos for r in resultados)
+        logger.info(f"  {'TOTAL':20s}: {self.duracion_total:7.1f}s (en serie habrían sido {suma:.1f}s)")
+        logger.info("=" * 60)
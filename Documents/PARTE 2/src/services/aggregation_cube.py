@@ -0,0 +1,122 @@
+"""
+Cubo de agregación precalculado para las estadísticas del visor.
+Se construye al cargar el snapshot con una celda por combinación de
+Banco × Tipo × Moneda × Periodicidad. Cada celda guarda, para cada columna
+numérica, el conteo de no nulos, la suma, el mínimo y el máximo, de modo que
+cualquier consulta filtrada por esas dimensiones se responde sumando celdas.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Dimensiones del cubo (columnas de baja cardinalidad)
+CUBE_DIMENSIONS = ["Banco", "Tipo", "Moneda", "Periodicidad"]
+
+# Métricas almacenadas por columna numérica y cómo se combinan entre celdas
+_ROLLUP = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+def _columnas_de_valores(metrics: List[str]) -> List[str]:
+    """Columnas numéricas de una celda: filas y count/sum/min/max por métrica."""
+    return ["filas"] + [f"{col}__{metrica}" for col in metrics for metrica in _ROLLUP]
+
+
+def _valor(v) -> Optional[float]:
+    return None if v is None or pd.isna(v) else float(v)
+
+
+class AggregationCube:
+    """Celdas pre-agregadas con count/sum/min/max por columna numérica."""
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 numeric: Dict[str, np.ndarray],
+                 cells: Optional[pd.DataFrame] = None):
+        """Agrega las filas de `df`, o adopta `cells` ya calculadas (p. ej. desde el store compartido)."""
+        self.dimensions = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+        self.metrics = list(numeric)
+
+        if cells is not None:
+            self.cells = cells
+            return
+        if df.empty or not self.dimensions:
+            self.cells = pd.DataFrame(columns=self.dimensions + ["filas"])
+            return
+
+        frame = pd.DataFrame({dim: df[dim].to_numpy(dtype=object) for dim in self.dimensions})
+        for col, values in numeric.items():
+            frame[col] = values
+
+        grouped = frame.groupby(self.dimensions, dropna=False, sort=False)
+        cells = grouped.size().rename("filas").to_frame()
+        if self.metrics:
+            agregados = grouped[self.metrics].agg(list(_ROLLUP))
+            agregados.columns = [f"{col}__{metrica}" for col, metrica in agregados.columns]
+            cells = cells.join(agregados)
+        self.cells = cells.reset_index()
+
+    # --- Serialización (store compartido) ---
+
+    def arrays(self) -> Tuple[List[List[Optional[str]]], np.ndarray]:
+        """Claves de cada celda (None para nulos) y matriz float64 con `filas` y las métricas."""
+        claves = self.cells[self.dimensions].astype(object)
+        claves = claves.where(claves.notna(), None).values.tolist()
+        valores = self.cells.reindex(columns=_columnas_de_valores(self.metrics)).to_numpy(dtype=np.float64)
+        return claves, valores
+
+    @classmethod
+    def from_arrays(cls,
+                    df: pd.DataFrame,
+                    numeric: Dict[str, np.ndarray],
+                    claves: List[List[Optional[str]]],
+                    valores: np.ndarray) -> "AggregationCube":
+        """Reconstruye el cubo desde lo que devolvió `arrays()`, sin recorrer filas."""
+        dimensions = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+        cells = pd.DataFrame(claves, columns=dimensions, dtype=object)
+        for i, col in enumerate(_columnas_de_valores(list(numeric))):
+            cells[col] = np.asarray(valores[:, i], dtype=np.float64)
+        return cls(df, numeric, cells=cells)
+
+    def query(self,
+              filters: Optional[Dict[str, Iterable[str]]] = None,
+              group_by: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Agrega las celdas que cumplen `filters` (valores permitidos por dimensión)
+        y las agrupa por `group_by`. Sin `group_by` devuelve un único grupo total.
+        """
+        cells = self.cells
+        for dim, valores in (filters or {}).items():
+            if valores:
+                cells = cells[cells[dim].isin(list(valores))]
+        if cells.empty:
+            return []
+
+        group_by = [dim for dim in (group_by or []) if dim in self.dimensions]
+        agregaciones = {"filas": "sum"}
+        for col in self.metrics:
+            for metrica, rollup in _ROLLUP.items():
+                agregaciones[f"{col}__{metrica}"] = rollup
+
+        if group_by:
+            totales = cells.groupby(group_by, dropna=False, sort=True).agg(agregaciones).reset_index()
+        else:
+            totales = cells.agg(agregaciones).to_frame().T
+
+        grupos = []
+        for registro in totales.to_dict(orient="records"):
+            metricas = {}
+            for col in self.metrics:
+                count = int(registro[f"{col}__count"])
+                metricas[col] = {
+                    "count": count,
+                    "mean": registro[f"{col}__sum"] / count if count else None,
+                    "min": _valor(registro[f"{col}__min"]),
+                    "max": _valor(registro[f"{col}__max"]),
+                }
+            grupos.append({
+                "claves": {dim: (None if pd.isna(registro[dim]) else str(registro[dim])) for dim in group_by},
+                "total_registros": int(registro["filas"]),
+                "metricas": metricas,
+            })
+        return grupos
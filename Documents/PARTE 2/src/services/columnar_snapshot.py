@@ -0,0 +1,140 @@
+"""
+Snapshot columnar tipado (Arrow/Feather) del dataset de tarifarios.
+
+El exportador lo escribe junto al CSV y el visor lo abre con memory-map al
+iniciar: las columnas de baja cardinalidad quedan como category y las tasas y
+montos como float64, en lugar de convertir todo el DataFrame a objetos Python.
+La conversión a valores JSON (None en lugar de NaN) ocurre sólo al serializar.
+
+Qué queda compartido entre procesos (páginas del mmap) y qué no:
+- float64 y texto (Producto_*, Concepto, Descripcion_Breve, Observaciones):
+  vistas del mmap; el texto queda respaldado por Arrow (dtype str de pyarrow).
+- category (sólo CATEGORY_COLUMNS, de pocos valores distintos): pandas copia
+  los códigos (int8/int16 por fila) y las categorías en cada proceso.
+
+Un archivo ilegible, de otra versión del CSV o de otro formato se ignora y el
+visor vuelve a parsear el CSV.
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.services.viewer_index import numeric_columns
+
+# Columnas de texto con pocos valores distintos: se guardan como diccionario/category.
+# Producto_Codigo y Producto_Nombre crecen con el dataset: quedan como texto Arrow.
+CATEGORY_COLUMNS = [
+    "Banco",
+    "Tipo",
+    "Moneda",
+    "Fecha_Vigencia",
+    "Fecha_Extraccion",
+    "Periodicidad",
+    "Oportunidad_Cobro",
+]
+
+# Clave en los metadatos del esquema con la versión (hash) del CSV de origen
+SOURCE_VERSION_KEY = b"source_version"
+
+# Clave y versión del formato de las columnas: subirla cuando cambien los tipos
+FORMAT_VERSION_KEY = b"format_version"
+COLUMNAR_FORMAT_VERSION = b"2"
+
+
+def tipar_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica los tipos del visor: float64 para Tasa_*/Monto_* (los textos como
+    "Libre" quedan nulos) y category con categorías ordenadas para CATEGORY_COLUMNS.
+    """
+    df = df.copy()
+    for col in numeric_columns(df.columns):
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype("float64")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            valores = df[col].astype(object).where(df[col].notna(), None)
+            categorias = sorted({str(v) for v in valores if v is not None})
+            df[col] = pd.Categorical(
+                [None if v is None else str(v) for v in valores], categories=categorias
+            )
+    return df
+
+
+def columnar_path_for(csv_path: Path) -> Path:
+    """Ruta del snapshot Feather que acompaña a un CSV."""
+    return csv_path.with_suffix(".feather")
+
+
+def write_columnar_snapshot(df: pd.DataFrame, path: Path, source_version: str) -> None:
+    """
+    Escribe el snapshot Feather v2 sin compresión (requisito para memory-map)
+    de forma atómica, registrando la versión del CSV de origen.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    df = tipar_dataset(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Las columnas numéricas se guardan con NaN y sin bitmap de nulos: así
+    # pandas puede usar directamente el buffer mapeado (sin copia) al leer
+    for col in numeric_columns(df.columns):
+        i = table.schema.get_field_index(col)
+        table = table.set_column(i, col, pa.array(df[col].to_numpy(), type=pa.float64(), from_pandas=False))
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_VERSION_KEY] = source_version.encode("utf-8")
+    metadata[FORMAT_VERSION_KEY] = COLUMNAR_FORMAT_VERSION
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def read_columnar_snapshot(path: Path, source_version: str) -> Optional[pd.DataFrame]:
+    """
+    Abre el snapshot con memory-map si existe, si pyarrow está instalado y si
+    corresponde a `source_version` y al formato actual. En cualquier otro caso
+    (también si el archivo está truncado o dañado) retorna None.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    if not path.exists():
+        return None
+
+    try:
+        table = feather.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        if metadata.get(SOURCE_VERSION_KEY, b"").decode("utf-8") != source_version:
+            return None
+        if metadata.get(FORMAT_VERSION_KEY) != COLUMNAR_FORMAT_VERSION:
+            return None
+        # split_blocks evita consolidar columnas: los float64 quedan como vistas
+        # del mmap; el texto se mantiene respaldado por Arrow (ver _tipo_texto)
+        return table.to_pandas(split_blocks=True, types_mapper=_tipo_texto)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Snapshot columnar ilegible ({path.name}), se ignora: {e}")
+        return None
+
+
+def _tipo_texto(tipo) -> Optional[pd.StringDtype]:
+    """
+    dtype str de pyarrow (nulos como NaN) para las columnas de texto: el
+    array de pandas envuelve los buffers del mmap en lugar de crear un objeto
+    Python por celda. Con pandas < 2.3 se deja la conversión por defecto.
+    """
+    import pyarrow as pa
+
+    if not (pa.types.is_string(tipo) or pa.types.is_large_string(tipo)):
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return None
@@ -0,0 +1,309 @@
+"""
+Histogramas precalculados de las columnas numéricas del visor.
+
+Al construir el snapshot se fijan, por columna, HISTOGRAM_BINS tramos finos con
+bordes en los cuantiles globales (tramos de igual cantidad de filas, que
+resuelven bien distribuciones sesgadas como las tasas) y se cuentan las filas
+de cada tramo en cada celda Banco × Tipo × Moneda × Periodicidad, igual que el
+cubo de agregación. Una consulta filtrada suma los conteos de las celdas que
+cumplen los filtros, sin volver a recorrer filas; los cuantiles se interpolan
+dentro del tramo que los contiene.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.services.aggregation_cube import CUBE_DIMENSIONS
+
+# Tramos finos por columna (los bordes repetidos se fusionan)
+HISTOGRAM_BINS = 64
+
+# Cuantiles por defecto de la respuesta
+DEFAULT_QUANTILES = [0.25, 0.5, 0.75, 0.9]
+
+# Arrays de cada columna que se persisten en el store compartido
+_ARRAYS_COLUMNA = ["bordes", "techos", "conteos", "minimos", "maximos"]
+
+
+def posiciones_de_bordes(n_valores: int, n_bins: int = HISTOGRAM_BINS) -> List[int]:
+    """Posiciones (en los valores no nulos ordenados) que se usan como bordes de tramo."""
+    if n_valores == 0:
+        return []
+    return sorted({round(k * (n_valores - 1) / n_bins) for k in range(n_bins + 1)})
+
+
+def nombre_cuantil(q: float) -> str:
+    """0.5 -> "p50", 0.975 -> "p97.5"."""
+    return f"p{q * 100:g}"
+
+
+class _Columna:
+    """Bordes de una columna y conteos por (celda, tramo)."""
+
+    def __init__(self, bordes: np.ndarray, techos: np.ndarray, conteos: np.ndarray,
+                 minimos: np.ndarray, maximos: np.ndarray):
+        self.bordes = bordes    # valor mínimo (global) de cada tramo
+        self.techos = techos    # valor máximo (global) de cada tramo
+        self.conteos = conteos  # (n_celdas, n_tramos)
+        self.minimos = minimos  # mínimo exacto por celda (NaN si la celda no tiene valores)
+        self.maximos = maximos
+
+
+class DistributionCube:
+    """Histogramas por celda del cubo, combinables para cualquier filtro de dimensiones."""
+
+    def __init__(self, dimensions: List[str], claves: pd.DataFrame, columnas: Dict[str, _Columna]):
+        self.dimensions = dimensions
+        self.claves = claves  # una fila por celda, columnas = dimensions
+        self.columnas = columnas
+
+    # --- Construcción ---
+
+    @classmethod
+    def from_frame(cls,
+                   df: pd.DataFrame,
+                   numeric: Dict[str, np.ndarray],
+                   bins: int = HISTOGRAM_BINS) -> "DistributionCube":
+        """Construye los histogramas desde el DataFrame del snapshot y sus arrays numéricos."""
+        dimensions = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+        if df.empty or not dimensions:
+            # Sin filas: cada columna numérica existe con cero tramos (las consultas dan [])
+            return cls.from_blocks(dimensions, {col: np.empty(0) for col in numeric}, [])
+
+        bordes = {}
+        for col, valores in numeric.items():
+            ordenados = np.sort(valores[~np.isnan(valores)])
+            bordes[col] = ordenados[posiciones_de_bordes(len(ordenados), bins)]
+
+        bloque = pd.DataFrame({dim: df[dim].to_numpy(dtype=object) for dim in dimensions})
+        for col, valores in numeric.items():
+            bloque[col] = valores
+        return cls.from_blocks(dimensions, bordes, [bloque])
+
+    @classmethod
+    def from_blocks(cls,
+                    dimensions: List[str],
+                    bordes: Dict[str, np.ndarray],
+                    bloques: Iterable[pd.DataFrame]) -> "DistributionCube":
+        """
+        Construye los histogramas con bordes ya calculados recorriendo bloques de
+        filas (columnas de dimensión + columnas numéricas float64), p. ej. leídos
+        de SQLite sin cargar la tabla completa.
+        """
+        acumulador = _Acumulador(bordes)
+        for bloque in bloques:
+            acumulador.add(bloque, dimensions)
+        claves = pd.DataFrame(list(acumulador.celdas), columns=dimensions, dtype=object)
+        return cls(dimensions, claves, acumulador.columnas())
+
+    # --- Serialización (tabla meta del backend SQLite) ---
+
+    def to_dict(self) -> Dict:
+        """Representación JSON compacta: los conteos como tripletas (celda, tramo, n)."""
+        columnas = {}
+        for col, datos in self.columnas.items():
+            celdas, tramos = np.nonzero(datos.conteos)
+            columnas[col] = {
+                "bordes": datos.bordes.tolist(),
+                "techos": datos.techos.tolist(),
+                "conteos": np.column_stack([celdas, tramos, datos.conteos[celdas, tramos]]).tolist(),
+                "minimos": [None if np.isnan(v) else float(v) for v in datos.minimos],
+                "maximos": [None if np.isnan(v) else float(v) for v in datos.maximos],
+            }
+        return {
+            "dimensions": self.dimensions,
+            "claves": self.keys(),
+            "columnas": columnas,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DistributionCube":
+        dimensions = data["dimensions"]
+        claves = pd.DataFrame(data["claves"], columns=dimensions, dtype=object)
+        columnas = {}
+        for col, datos in data["columnas"].items():
+            bordes = np.asarray(datos["bordes"], dtype=np.float64)
+            conteos = np.zeros((len(claves), len(bordes)), dtype=np.int64)
+            if datos["conteos"]:
+                triples = np.asarray(datos["conteos"], dtype=np.int64)
+                conteos[triples[:, 0], triples[:, 1]] = triples[:, 2]
+            columnas[col] = _Columna(
+                bordes,
+                np.asarray(datos["techos"], dtype=np.float64),
+                conteos,
+                np.array([np.nan if v is None else v for v in datos["minimos"]], dtype=np.float64),
+                np.array([np.nan if v is None else v for v in datos["maximos"]], dtype=np.float64),
+            )
+        return cls(dimensions, claves, columnas)
+
+    # --- Serialización (store compartido) ---
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays de cada columna, con nombre "<columna>__<array>"."""
+        return {
+            f"{col}__{nombre}": np.asarray(getattr(datos, nombre))
+            for col, datos in self.columnas.items() for nombre in _ARRAYS_COLUMNA
+        }
+
+    def keys(self) -> List[List[Optional[str]]]:
+        """Claves de cada celda (None para nulos), en el orden de los conteos."""
+        return self.claves.astype(object).where(self.claves.notna(), None).values.tolist()
+
+    @classmethod
+    def from_arrays(cls,
+                    dimensions: List[str],
+                    claves: List[List[Optional[str]]],
+                    arrays: Dict[str, np.ndarray]) -> "DistributionCube":
+        """Adopta las celdas y los arrays guardados por `keys()`/`arrays()` (pueden estar mapeados)."""
+        columnas = {}
+        for nombre in arrays:
+            col = nombre.rsplit("__", 1)[0]
+            if col not in columnas:
+                columnas[col] = _Columna(*(arrays[f"{col}__{campo}"] for campo in _ARRAYS_COLUMNA))
+        return cls(dimensions, pd.DataFrame(claves, columns=dimensions, dtype=object), columnas)
+
+    # --- Consultas ---
+
+    def query(self,
+              columna: str,
+              filters: Optional[Dict[str, Iterable[str]]] = None,
+              group_by: Optional[List[str]] = None,
+              bins: int = 20,
+              quantiles: Sequence[float] = DEFAULT_QUANTILES) -> List[Dict]:
+        """
+        Histograma (a lo sumo `bins` tramos) y cuantiles de `columna` para las
+        celdas que cumplen `filters`, agrupados por `group_by`. Lanza KeyError
+        si la columna no es numérica.
+        """
+        datos = self.columnas[columna]
+        mask = np.ones(len(self.claves), dtype=bool)
+        for dim, valores in (filters or {}).items():
+            if valores and dim in self.dimensions:
+                mask &= self.claves[dim].isin(list(valores)).to_numpy()
+        celdas = np.flatnonzero(mask)
+        if not len(celdas):
+            return []
+
+        group_by = [dim for dim in (group_by or []) if dim in self.dimensions]
+        if group_by:
+            seleccion = self.claves.iloc[celdas][group_by].reset_index(drop=True)
+            grupos = seleccion.groupby(group_by, dropna=False).indices
+            partes = [(clave if isinstance(clave, tuple) else (clave,), celdas[posiciones])
+                      for clave, posiciones in grupos.items()]
+            # Mismo orden que el cubo de agregación: por valor, nulos al final
+            partes.sort(key=lambda parte: [(pd.isna(v), "" if pd.isna(v) else str(v)) for v in parte[0]])
+        else:
+            partes = [((), celdas)]
+
+        resultado = []
+        for clave, celdas_grupo in partes:
+            conteos = datos.conteos[celdas_grupo].sum(axis=0)
+            total = int(conteos.sum())
+            minimo = np.nanmin(datos.minimos[celdas_grupo]) if total else None
+            maximo = np.nanmax(datos.maximos[celdas_grupo]) if total else None
+            resultado.append({
+                "claves": {dim: (None if pd.isna(v) else str(v)) for dim, v in zip(group_by, clave)},
+                "count": total,
+                "min": None if minimo is None else float(minimo),
+                "max": None if maximo is None else float(maximo),
+                "cuantiles": {
+                    nombre_cuantil(q): _cuantil(datos, conteos, q, minimo, maximo) for q in quantiles
+                },
+                "histograma": _tramos(datos, conteos, bins, minimo, maximo),
+            })
+        return resultado
+
+
+class _Acumulador:
+    """Suma conteos, mínimos y máximos por (celda, tramo) a partir de bloques de filas."""
+
+    def __init__(self, bordes: Dict[str, np.ndarray]):
+        self.bordes = bordes
+        self.celdas: Dict[tuple, int] = {}
+        self.conteos = {col: np.zeros((0, len(b)), dtype=np.int64) for col, b in bordes.items()}
+        self.techos = {col: np.full(len(b), -np.inf) for col, b in bordes.items()}
+        self.minimos = {col: np.empty(0) for col in bordes}
+        self.maximos = {col: np.empty(0) for col in bordes}
+
+    def _celdas(self, bloque: pd.DataFrame, dimensions: List[str]) -> np.ndarray:
+        """Id de celda de cada fila; agrega las combinaciones nuevas al final."""
+        grouped = bloque.groupby(dimensions, dropna=False, sort=False)
+        locales = grouped.ngroup().to_numpy()
+        ids = []
+        for clave in grouped.size().index:
+            clave = clave if isinstance(clave, tuple) else (clave,)
+            clave = tuple(None if pd.isna(v) else v for v in clave)
+            ids.append(self.celdas.setdefault(clave, len(self.celdas)))
+
+        for col in self.bordes:
+            nuevas = len(self.celdas) - len(self.minimos[col])
+            if nuevas > 0:
+                self.conteos[col] = np.vstack([self.conteos[col], np.zeros((nuevas, len(self.bordes[col])), dtype=np.int64)])
+                self.minimos[col] = np.concatenate([self.minimos[col], np.full(nuevas, np.inf)])
+                self.maximos[col] = np.concatenate([self.maximos[col], np.full(nuevas, -np.inf)])
+        return np.asarray(ids, dtype=np.int64)[locales]
+
+    def add(self, bloque: pd.DataFrame, dimensions: List[str]) -> None:
+        if bloque.empty:
+            return
+        celdas = self._celdas(bloque, dimensions)
+        for col, bordes in self.bordes.items():
+            if not len(bordes):
+                continue
+            valores = bloque[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            validos = ~np.isnan(valores)
+            v, c = valores[validos], celdas[validos]
+            # Tramo i = [bordes[i], bordes[i + 1]); el último contiene sólo al máximo
+            tramos = np.clip(np.searchsorted(bordes, v, side="right") - 1, 0, len(bordes) - 1)
+            np.add.at(self.conteos[col], (c, tramos), 1)
+            np.maximum.at(self.techos[col], tramos, v)
+            np.minimum.at(self.minimos[col], c, v)
+            np.maximum.at(self.maximos[col], c, v)
+
+    def columnas(self) -> Dict[str, _Columna]:
+        columnas = {}
+        for col, bordes in self.bordes.items():
+            # Tramos vacíos: el techo es el propio borde
+            techos = np.where(np.isinf(self.techos[col]), bordes, self.techos[col])
+            columnas[col] = _Columna(
+                bordes, techos, self.conteos[col],
+                np.where(np.isinf(self.minimos[col]), np.nan, self.minimos[col]),
+                np.where(np.isinf(self.maximos[col]), np.nan, self.maximos[col]),
+            )
+        return columnas
+
+
+def _cuantil(datos: _Columna, conteos: np.ndarray, q: float,
+             minimo: Optional[float], maximo: Optional[float]) -> Optional[float]:
+    """Cuantil interpolado linealmente entre el borde y el techo del tramo que lo contiene."""
+    total = conteos.sum()
+    if not total:
+        return None
+    objetivo = q * total
+    acumulados = np.cumsum(conteos)
+    i = int(np.searchsorted(acumulados, objetivo, side="left"))
+    i = min(i, len(conteos) - 1)
+    previos = acumulados[i] - conteos[i]
+    fraccion = (objetivo - previos) / conteos[i] if conteos[i] else 0.0
+    valor = datos.bordes[i] + fraccion * (datos.techos[i] - datos.bordes[i])
+    return float(min(max(valor, minimo), maximo))
+
+
+def _tramos(datos: _Columna, conteos: np.ndarray, bins: int,
+            minimo: Optional[float], maximo: Optional[float]) -> List[Dict]:
+    """Une tramos finos consecutivos (dentro del rango con datos) en a lo sumo `bins` tramos."""
+    ocupados = np.flatnonzero(conteos)
+    if not len(ocupados):
+        return []
+    inicio, fin = int(ocupados[0]), int(ocupados[-1]) + 1
+    cortes = np.unique(np.linspace(inicio, fin, min(bins, fin - inicio) + 1).round().astype(int))
+
+    tramos = []
+    for desde, hasta in zip(cortes[:-1], cortes[1:]):
+        tramos.append({
+            "desde": float(max(datos.bordes[desde], minimo)),
+            "hasta": float(min(datos.techos[hasta - 1], maximo)),
+            "count": int(conteos[desde:hasta].sum()),
+        })
+    return tramos
@@ -0,0 +1,163 @@
+"""
+Exportación en streaming de los datos filtrados del visor.
+Cada formato se genera por bloques de filas, de modo que nunca se arma el
+archivo completo en memoria y el worker empieza a enviar bytes de inmediato.
+Los encoders trabajan sobre bloques de DataFrame, así que sirven tanto para el
+snapshot en memoria como para filas leídas de SQLite.
+"""
+import io
+from abc import ABC, abstractmethod
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from src.services.viewer_index import numeric_columns
+
+# Filas por bloque (y por row group en Parquet)
+EXPORT_CHUNK_ROWS = 5000
+
+# Tipo MIME y extensión por formato
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _chunks(rows: np.ndarray, chunk_rows: int) -> Iterator[np.ndarray]:
+    for inicio in range(0, len(rows), chunk_rows):
+        yield rows[inicio:inicio + chunk_rows]
+
+
+class ExportEncoder(ABC):
+    """
+    Codifica bloques de filas (DataFrames con las mismas columnas) a bytes.
+    start() -> encode(bloque) por cada bloque -> finish().
+    """
+
+    def __init__(self, columns: List[str]):
+        self.columns = list(columns)
+
+    def start(self) -> bytes:
+        return b""
+
+    @abstractmethod
+    def encode(self, chunk: pd.DataFrame) -> bytes:
+        """Bytes de un bloque de filas."""
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CsvEncoder(ExportEncoder):
+    """CSV UTF-8 con BOM (para Excel), cabecera antes del primer bloque."""
+
+    def start(self) -> bytes:
+        return "\ufeff".encode("utf-8") + pd.DataFrame(columns=self.columns).to_csv(index=False).encode("utf-8")
+
+    def encode(self, chunk: pd.DataFrame) -> bytes:
+        return chunk.to_csv(index=False, header=False).encode("utf-8")
+
+
+class NdjsonEncoder(ExportEncoder):
+    """Un objeto JSON por línea; los nulos se emiten como null."""
+
+    def encode(self, chunk: pd.DataFrame) -> bytes:
+        if chunk.empty:
+            return b""
+        lineas = chunk.to_json(orient="records", lines=True, force_ascii=False)
+        return (lineas.rstrip("\n") + "\n").encode("utf-8")
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Sumidero de escritura que acumula bytes hasta que el generador los drena."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._posicion += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _arrow_schema(columns: List[str]):
+    import pyarrow as pa
+
+    numericas = set(numeric_columns(columns))
+    return pa.schema([
+        pa.field(col, pa.float64() if col in numericas else pa.string())
+        for col in columns
+    ])
+
+
+class ParquetEncoder(ExportEncoder):
+    """Parquet con un row group por bloque y un esquema fijo (tasas/montos como float64)."""
+
+    def start(self) -> bytes:
+        import pyarrow.parquet as pq
+
+        self._numericas = set(numeric_columns(self.columns))
+        self._schema = _arrow_schema(self.columns)
+        self._sink = _StreamBuffer()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+        return self._sink.drain()
+
+    def encode(self, chunk: pd.DataFrame) -> bytes:
+        import pyarrow as pa
+
+        arrays = [
+            pa.array(pd.to_numeric(chunk[col], errors="coerce"), type=pa.float64(), from_pandas=True)
+            if col in self._numericas else
+            pa.array([None if pd.isna(v) else str(v) for v in chunk[col]], type=pa.string())
+            for col in self.columns
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "parquet": ParquetEncoder}
+
+
+def encoder_for(formato: str, columns: List[str]) -> ExportEncoder:
+    if formato not in ENCODERS:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    return ENCODERS[formato](columns)
+
+
+def _iter_encoded(encoder: ExportEncoder, df: pd.DataFrame, rows: np.ndarray, chunk_rows: int) -> Iterator[bytes]:
+    yield encoder.start()
+    for bloque in _chunks(rows, chunk_rows):
+        yield encoder.encode(df.iloc[bloque])
+    yield encoder.finish()
+
+
+def parquet_disponible() -> bool:
+    """Indica si pyarrow está instalado (dependencia opcional para Parquet)."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_export(formato: str, df: pd.DataFrame, rows: np.ndarray) -> Iterator[bytes]:
+    """Selecciona el generador según el formato pedido."""
+    return _iter_encoded(encoder_for(formato, list(df.columns)), df, rows, EXPORT_CHUNK_ROWS)
@@ -0,0 +1,326 @@
+"""
+Historial de tarifarios entre corridas de extracción.
+
+Cada exportación del CSV registra un snapshot en una base SQLite de solo
+agregado. Por cada fila se guarda sólo lo que cambió respecto del snapshot
+anterior, indexado por su id estable (row_ids):
+- alta: la fila aparece (se guardan sus campos no nulos).
+- modificacion: cambió algún campo (se guardan sólo los campos nuevos).
+- baja: la fila desaparece (sin valores).
+
+El estado de una fila en un snapshot es la composición de sus cambios hasta
+ese snapshot, así que ni el diff entre dos snapshots ni el historial de una
+fila necesitan reconstruir copias completas del dataset. Fecha_Extraccion se
+guarda por snapshot y no por fila: si no, cada corrida cambiaría todas las filas.
+"""
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.services.row_ids import compute_row_ids
+
+# Base por defecto (VIEWER_HISTORY_PATH en la API)
+DEFAULT_HISTORY_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "history" / "tarifarios_historial.db"
+
+SNAPSHOTS_TABLE = "snapshots"
+CHANGES_TABLE = "cambios"
+CURRENT_TABLE = "vigente"
+
+# Columnas que no se versionan por fila
+HISTORY_IGNORED_COLUMNS = ["Fecha_Extraccion"]
+
+# Tipos de cambio
+ALTA = "alta"
+MODIFICACION = "modificacion"
+BAJA = "baja"
+
+# Ids por consulta al leer cambios de varias filas
+IDS_POR_CONSULTA = 500
+
+
+class UnknownSnapshotError(KeyError):
+    """La versión pedida no está registrada en el historial."""
+
+
+def aplicar(estado: Optional[Dict[str, Any]], tipo: str, valores: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Estado de una fila después de aplicar un cambio. Los campos nulos se
+    omiten también al modificar, igual que en las altas: así un campo que
+    vuelve a nulo deja el mismo estado que nunca haberlo tenido.
+    """
+    if tipo == ALTA:
+        return {col: v for col, v in valores.items() if v is not None}
+    if tipo == MODIFICACION:
+        return {col: v for col, v in {**(estado or {}), **valores}.items() if v is not None}
+    return None
+
+
+def _tipo_neto(antes: Optional[Dict], despues: Optional[Dict]) -> Optional[str]:
+    if antes is None and despues is None:
+        return None
+    if antes is None:
+        return ALTA
+    if despues is None:
+        return BAJA
+    return MODIFICACION if antes != despues else None
+
+
+def _campos_distintos(antes: Dict[str, Any], despues: Dict[str, Any]) -> List[str]:
+    return [col for col in dict.fromkeys([*antes, *despues]) if antes.get(col) != despues.get(col)]
+
+
+class HistoryStore:
+    """Base SQLite con los snapshots registrados y los cambios por fila."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {SNAPSHOTS_TABLE} (
+                id INTEGER PRIMARY KEY,
+                version TEXT NOT NULL UNIQUE,
+                fecha_extraccion TEXT,
+                registrado_en TEXT NOT NULL,
+                total_registros INTEGER NOT NULL,
+                altas INTEGER NOT NULL,
+                modificaciones INTEGER NOT NULL,
+                bajas INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+                row_id TEXT NOT NULL,
+                snapshot_id INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                valores TEXT
+            );
+            -- (row_id, snapshot_id): el historial de una fila es un rango contiguo del índice
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_{CHANGES_TABLE}_fila ON {CHANGES_TABLE}(row_id, snapshot_id);
+            CREATE INDEX IF NOT EXISTS ix_{CHANGES_TABLE}_snapshot ON {CHANGES_TABLE}(snapshot_id);
+            -- Huella de cada fila vigente: decide qué filas cambiaron sin leer sus valores
+            CREATE TABLE IF NOT EXISTS {CURRENT_TABLE} (
+                row_id TEXT PRIMARY KEY,
+                huella TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        return conn
+
+    # --- Escritura ---
+
+    def record(self, df: pd.DataFrame, version: str) -> Dict[str, Any]:
+        """
+        Registra `df` como snapshot `version` (p. ej. file_version del CSV)
+        escribiendo sólo las filas que cambiaron. Si la versión ya estaba
+        registrada no hace nada. Retorna el resumen del snapshot.
+        """
+        columnas = [col for col in df.columns if col not in HISTORY_IGNORED_COLUMNS]
+        ids = [str(row_id) for row_id in compute_row_ids(df)]
+        posicion = {row_id: i for i, row_id in enumerate(ids)}
+        huellas = pd.util.hash_pandas_object(df[columnas], index=False).map("{:016x}".format).tolist()
+
+        def filas(row_ids: List[str]) -> List[Dict[str, Any]]:
+            """Valores de las filas pedidas (None en lugar de NaN)."""
+            bloque = df.iloc[[posicion[row_id] for row_id in row_ids]]
+            valores = [bloque[col].to_numpy(dtype=object, na_value=None) for col in columnas]
+            return [dict(zip(columnas, fila)) for fila in zip(*valores)] if columnas else [{} for _ in row_ids]
+
+        fecha_extraccion = None
+        if "Fecha_Extraccion" in df.columns and df["Fecha_Extraccion"].notna().any():
+            fecha_extraccion = str(df["Fecha_Extraccion"].dropna().astype(str).max())
+
+        with closing(self._connect()) as conn:
+            existente = self._snapshot(conn, version)
+            if existente is not None:
+                return existente
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                vigentes = dict(conn.execute(f"SELECT row_id, huella FROM {CURRENT_TABLE}"))
+                nuevas = [row_id for row_id in ids if row_id not in vigentes]
+                distintas = [row_id for row_id in ids
+                             if row_id in vigentes and vigentes[row_id] != huellas[posicion[row_id]]]
+                bajas = [row_id for row_id in vigentes if row_id not in posicion]
+
+                cambios: List[Tuple[str, str, Optional[str]]] = []
+                for row_id, valores in zip(nuevas, filas(nuevas)):
+                    # En las altas se omiten los nulos (un campo ausente vale None)
+                    valores = {col: v for col, v in valores.items() if v is not None}
+                    cambios.append((row_id, ALTA, json.dumps(valores, ensure_ascii=False)))
+                anteriores = self._estados(conn, distintas)
+                modificadas = 0
+                for row_id, despues in zip(distintas, filas(distintas)):
+                    antes = anteriores.get(row_id) or {}
+                    delta = {col: despues.get(col) for col in _campos_distintos(antes, despues)}
+                    # Huella distinta con los mismos valores (p. ej. cambió el dtype): sólo se actualiza la huella
+                    if delta:
+                        cambios.append((row_id, MODIFICACION, json.dumps(delta, ensure_ascii=False)))
+                        modificadas += 1
+                for row_id in bajas:
+                    cambios.append((row_id, BAJA, None))
+
+                cursor = conn.execute(
+                    f"INSERT INTO {SNAPSHOTS_TABLE} (version, fecha_extraccion, registrado_en, total_registros, "
+                    f"altas, modificaciones, bajas) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (version, fecha_extraccion, datetime.now().isoformat(timespec="seconds"), len(ids),
+                     len(nuevas), modificadas, len(bajas)),
+                )
+                snapshot_id = cursor.lastrowid
+                conn.executemany(f"INSERT INTO {CHANGES_TABLE} (row_id, snapshot_id, tipo, valores) VALUES (?, ?, ?, ?)",
+                                 [(row_id, snapshot_id, tipo, datos) for row_id, tipo, datos in cambios])
+
+                conn.executemany(f"DELETE FROM {CURRENT_TABLE} WHERE row_id = ?", [(row_id,) for row_id in bajas])
+                conn.executemany(f"INSERT OR REPLACE INTO {CURRENT_TABLE} VALUES (?, ?)",
+                                 [(row_id, huellas[posicion[row_id]]) for row_id in nuevas + distintas])
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+            resumen = self._snapshot(conn, version)
+        logger.info(f"Historial: snapshot {version} registrado ({resumen['altas']} altas, "
+                    f"{resumen['modificaciones']} modificaciones, {resumen['bajas']} bajas)")
+        return resumen
+
+    # --- Lectura ---
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshots registrados, del más antiguo al más reciente."""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            return [self._publico(fila) for fila in conn.execute(f"SELECT * FROM {SNAPSHOTS_TABLE} ORDER BY id")]
+
+    def diff(self,
+             desde: str,
+             hasta: Optional[str] = None,
+             banco: Optional[Iterable[str]] = None,
+             skip: int = 0,
+             limit: int = 100) -> Dict[str, Any]:
+        """
+        Filas que difieren entre los snapshots `desde` y `hasta` (por defecto el
+        último), con los campos cambiados (antes/después). Sólo se leen los
+        cambios de las filas tocadas entre ambos snapshots.
+        """
+        with closing(self._connect()) as conn:
+            origen = self._snapshot_id(conn, desde)
+            destino = self._snapshot_id(conn, hasta) if hasta else self._ultimo_id(conn)
+            if destino is None:
+                raise UnknownSnapshotError("El historial está vacío")
+            menor, mayor = sorted((origen, destino))
+            tocadas = [row_id for (row_id,) in conn.execute(
+                f"SELECT DISTINCT row_id FROM {CHANGES_TABLE} WHERE snapshot_id > ? AND snapshot_id <= ? "
+                f"ORDER BY row_id", (menor, mayor))]
+            estados_origen = self._estados(conn, tocadas, hasta_id=origen)
+            estados_destino = self._estados(conn, tocadas, hasta_id=destino)
+            version_hasta = self._version(conn, destino)
+
+        bancos = set(banco) if banco else None
+        cambios = []
+        conteo = {ALTA: 0, MODIFICACION: 0, BAJA: 0}
+        for row_id in tocadas:
+            antes, despues = estados_origen.get(row_id), estados_destino.get(row_id)
+            tipo = _tipo_neto(antes, despues)
+            if tipo is None:
+                continue
+            fila = despues if despues is not None else antes
+            if bancos is not None and fila.get("Banco") not in bancos:
+                continue
+            conteo[tipo] += 1
+            campos = _campos_distintos(antes or {}, despues or {})
+            cambios.append({
+                "id": row_id,
+                "tipo": tipo,
+                "fila": fila,
+                "campos": {col: {"antes": (antes or {}).get(col), "despues": (despues or {}).get(col)}
+                           for col in campos},
+            })
+
+        return {
+            "desde": desde,
+            "hasta": version_hasta,
+            "total": len(cambios),
+            "altas": conteo[ALTA],
+            "modificaciones": conteo[MODIFICACION],
+            "bajas": conteo[BAJA],
+            "skip": skip,
+            "limit": limit,
+            "cambios": cambios[skip:skip + limit],
+        }
+
+    def row_history(self, row_id: str, campos: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Estado de la fila después de cada snapshot en que cambió (o None si el
+        id nunca se registró; los campos nulos se omiten). Con `campos`, los
+        valores se limitan a esas columnas.
+        """
+        with closing(self._connect()) as conn:
+            filas = conn.execute(
+                f"SELECT s.version, s.fecha_extraccion, s.registrado_en, c.tipo, c.valores "
+                f"FROM {CHANGES_TABLE} c JOIN {SNAPSHOTS_TABLE} s ON s.id = c.snapshot_id "
+                f"WHERE c.row_id = ? ORDER BY c.snapshot_id", (row_id,)).fetchall()
+        if not filas:
+            return None
+
+        historial = []
+        estado = None
+        for version, fecha_extraccion, registrado_en, tipo, valores in filas:
+            delta = json.loads(valores) if valores else None
+            estado = aplicar(estado, tipo, delta)
+            historial.append({
+                "version": version,
+                "fecha_extraccion": fecha_extraccion,
+                "registrado_en": registrado_en,
+                "tipo": tipo,
+                "campos": list(delta) if tipo == MODIFICACION else [],
+                "valores": None if estado is None else (
+                    {col: estado[col] for col in campos if col in estado} if campos else estado),
+            })
+        return {"id": row_id, "historial": historial}
+
+    # --- Auxiliares ---
+
+    def _estados(self, conn: sqlite3.Connection, row_ids: List[str],
+                 hasta_id: Optional[int] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Estado de cada fila componiendo sus cambios hasta el snapshot `hasta_id` (incluido)."""
+        estados: Dict[str, Optional[Dict[str, Any]]] = {}
+        limite = hasta_id if hasta_id is not None else -1
+        for i in range(0, len(row_ids), IDS_POR_CONSULTA):
+            lote = row_ids[i:i + IDS_POR_CONSULTA]
+            sql = (f"SELECT row_id, tipo, valores FROM {CHANGES_TABLE} "
+                   f"WHERE row_id IN ({', '.join('?' * len(lote))}) AND (? < 0 OR snapshot_id <= ?) "
+                   f"ORDER BY row_id, snapshot_id")
+            for row_id, tipo, valores in conn.execute(sql, [*lote, limite, limite]):
+                estados[row_id] = aplicar(estados.get(row_id), tipo, json.loads(valores) if valores else None)
+        return estados
+
+    @staticmethod
+    def _publico(fila: sqlite3.Row) -> Dict[str, Any]:
+        datos = dict(fila)
+        datos.pop("id", None)
+        return datos
+
+    def _snapshot(self, conn: sqlite3.Connection, version: str) -> Optional[Dict[str, Any]]:
+        conn.row_factory = sqlite3.Row
+        try:
+            fila = conn.execute(f"SELECT * FROM {SNAPSHOTS_TABLE} WHERE version = ?", (version,)).fetchone()
+        finally:
+            conn.row_factory = None
+        return self._publico(fila) if fila is not None else None
+
+    def _snapshot_id(self, conn: sqlite3.Connection, version: str) -> int:
+        fila = conn.execute(f"SELECT id FROM {SNAPSHOTS_TABLE} WHERE version = ?", (version,)).fetchone()
+        if fila is None:
+            raise UnknownSnapshotError(f"Snapshot no registrado: {version}")
+        return fila[0]
+
+    def _ultimo_id(self, conn: sqlite3.Connection) -> Optional[int]:
+        return conn.execute(f"SELECT MAX(id) FROM {SNAPSHOTS_TABLE}").fetchone()[0]
+
+    def _version(self, conn: sqlite3.Connection, snapshot_id: int) -> str:
+        return conn.execute(f"SELECT version FROM {SNAPSHOTS_TABLE} WHERE id = ?", (snapshot_id,)).fetchone()[0]
@@ -0,0 +1,77 @@
+"""
+Codificación JSON directa para las respuestas del visor.
+
+Las filas se arman columna por columna desde los arrays del snapshot (códigos
+de las categóricas, float64 de tasas y montos) y se codifican con orjson, sin
+pasar por `astype(object)`, `jsonable_encoder` ni la validación del
+response_model. Si orjson no está instalado se usa el módulo json estándar.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+# Campo con el id estable de la fila, siempre presente en los items
+ID_FIELD = "id"
+
+
+class InvalidFieldsError(ValueError):
+    """Se pidieron columnas que no existen en el dataset."""
+
+
+def dumps(data: Any) -> bytes:
+    """Serializa a JSON UTF-8 (NaN no está permitido: usar None)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def proyectar_campos(columns: Iterable[str], fields: Optional[List[str]]) -> List[str]:
+    """
+    Columnas a emitir para `fields` (admite valores separados por coma), en el
+    orden del dataset. Sin `fields` se emiten todas.
+    """
+    columns = list(columns)
+    if not fields:
+        return columns
+    pedidos = {campo.strip() for valor in fields for campo in valor.split(",") if campo.strip()}
+    pedidos.discard(ID_FIELD)
+    desconocidos = pedidos - set(columns)
+    if desconocidos:
+        raise InvalidFieldsError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    return [col for col in columns if col in pedidos]
+
+
+def _column_values(series: pd.Series, rows: np.ndarray) -> List[Any]:
+    """Valores JSON (None para nulos) de `series` en las posiciones `rows`."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Convertir sólo las categorías de la página, no la lista completa
+        codes = series.array.codes[rows]
+        presentes = codes >= 0
+        valores = np.full(len(codes), None, dtype=object)
+        valores[presentes] = series.array.categories.take(codes[presentes]).astype(str)
+        return valores.tolist()
+    if series.dtype == np.float64:
+        # NaN != NaN
+        return [v if v == v else None for v in series.to_numpy()[rows].tolist()]
+    # Tomar sólo las filas pedidas antes de convertir a objetos Python
+    return series.array.take(rows).to_numpy(dtype=object, na_value=None).tolist()
+
+
+def column_records(df: pd.DataFrame,
+                   rows: np.ndarray,
+                   columns: List[str],
+                   ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Registros de las filas `rows` con sólo `columns` (y el id primero, si se da)."""
+    nombres = list(columns)
+    columnas = [_column_values(df[col], rows) for col in columns]
+    if ids is not None:
+        nombres.insert(0, ID_FIELD)
+        columnas.insert(0, ids)
+    return [dict(zip(nombres, valores)) for valores in zip(*columnas)]
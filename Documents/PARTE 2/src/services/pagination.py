@@ -0,0 +1,43 @@
+"""
+Cursores opacos para la paginación por keyset del visor.
+Un cursor guarda la posición de la última fila entregada dentro del orden
+precalculado, junto con la versión del snapshot, el orden y una huella de los
+filtros, para poder validar que se reutiliza con la misma consulta.
+"""
+import base64
+import hashlib
+import json
+from typing import Any, Dict
+
+from src.services.response_cache import normalizar_params
+
+
+class InvalidCursorError(ValueError):
+    """El cursor no se puede decodificar o no corresponde a la consulta."""
+
+
+class ExpiredCursorError(InvalidCursorError):
+    """El cursor pertenece a un snapshot que ya no se está sirviendo."""
+
+
+def filters_fingerprint(filters: Dict[str, Any]) -> str:
+    """Huella corta de los filtros normalizados."""
+    return hashlib.sha1(repr(normalizar_params(filters)).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {e}") from e
+    posicion = payload.get("p") if isinstance(payload, dict) else None
+    # bool es subclase de int: True/False no son posiciones
+    if not isinstance(posicion, int) or isinstance(posicion, bool) or posicion < 0:
+        raise InvalidCursorError("Cursor inválido")
+    return payload
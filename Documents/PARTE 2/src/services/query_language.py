@@ -0,0 +1,252 @@
+"""
+Lenguaje de expresiones de filtro para el visor.
+
+Ejemplos:
+    banco IN ("BCP", "Interbank") AND tipo = "COMISION"
+    monto_fijo_mn BETWEEN 5 AND 20 OR (tasa_porcentaje_mn >= 30 AND moneda != "ME")
+    monto_maximo_me IS NOT NULL AND NOT concepto CONTAINS "tarjeta"
+
+- Columnas: cualquier columna del dataset, sin distinguir mayúsculas.
+- Comparaciones: = != <> < <= > >=, BETWEEN a AND b, [NOT] IN (...),
+  IS [NOT] NULL y CONTAINS (búsqueda de texto sin tildes, por prefijo).
+- Conectores: AND, OR, NOT y paréntesis (AND tiene más precedencia que OR).
+
+El parser produce un árbol de tuplas que luego se normaliza (AND/OR aplanados,
+hijos ordenados y sin duplicados): dos expresiones equivalentes escritas de
+distinta forma tienen el mismo texto normalizado y comparten plan.
+"""
+import json
+import re
+from typing import Any, Iterable, List, Tuple, Union
+
+from src.services.text_index import tokenizar
+
+# Nodos del árbol:
+#   ("and", (hijos...)), ("or", (hijos...)), ("not", hijo)
+#   ("cmp", columna, operador, valor)
+#   ("in", columna, (valores...))
+#   ("null", columna)
+#   ("contains", columna, texto)
+Node = Tuple[Any, ...]
+Value = Union[str, float]
+
+KEYWORDS = {"AND", "OR", "NOT", "IN", "IS", "NULL", "BETWEEN", "CONTAINS"}
+COMPARISON_OPERATORS = {"=", "!=", "<", "<=", ">", ">="}
+
+# Longitud máxima de la expresión (evita planes gigantes)
+MAX_EXPRESSION_LENGTH = 4000
+
+# Niveles máximos de paréntesis y NOT anidados (el parser es recursivo)
+MAX_NESTING_DEPTH = 64
+
+_TOKEN_RE = re.compile(r"""
+    (?P<espacio>\s+)
+  | (?P<numero>-?\d+(?:\.\d+)?)
+  | (?P<texto>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<nombre>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<operador><=|>=|!=|<>|=|<|>)
+  | (?P<simbolo>[(),])
+""", re.VERBOSE)
+
+
+class QuerySyntaxError(ValueError):
+    """La expresión no es válida (sintaxis, columna o tipo de valor)."""
+
+
+def _tokenizar(expresion: str) -> List[Tuple[str, Any, int]]:
+    tokens = []
+    posicion = 0
+    while posicion < len(expresion):
+        match = _TOKEN_RE.match(expresion, posicion)
+        if match is None:
+            raise QuerySyntaxError(f"Carácter inesperado en la posición {posicion}: {expresion[posicion]!r}")
+        tipo, texto = match.lastgroup, match.group()
+        if tipo == "numero":
+            tokens.append(("valor", float(texto), posicion))
+        elif tipo == "texto":
+            contenido = re.sub(r"\\(.)", r"\1", texto[1:-1])
+            tokens.append(("valor", contenido, posicion))
+        elif tipo == "nombre":
+            palabra = texto.upper()
+            tokens.append(("clave", palabra, posicion) if palabra in KEYWORDS else ("nombre", texto, posicion))
+        elif tipo == "operador":
+            tokens.append(("operador", "!=" if texto == "<>" else texto, posicion))
+        elif tipo == "simbolo":
+            tokens.append((texto, texto, posicion))
+        posicion = match.end()
+    tokens.append(("fin", None, len(expresion)))
+    return tokens
+
+
+class _Parser:
+    """Parser descendente recursivo: or -> and -> not -> primario."""
+
+    def __init__(self, expresion: str, columns: Iterable[str]):
+        self.tokens = _tokenizar(expresion)
+        self.i = 0
+        self.profundidad = 0
+        self.columnas = {col.lower(): col for col in columns}
+
+    def _actual(self) -> Tuple[str, Any, int]:
+        return self.tokens[self.i]
+
+    def _es(self, tipo: str, valor: Any = None) -> bool:
+        token = self._actual()
+        return token[0] == tipo and (valor is None or token[1] == valor)
+
+    def _consumir(self, tipo: str, valor: Any = None) -> Tuple[str, Any, int]:
+        if not self._es(tipo, valor):
+            esperado = valor or tipo
+            token = self._actual()
+            encontrado = "fin de la expresión" if token[0] == "fin" else repr(token[1])
+            raise QuerySyntaxError(f"Se esperaba {esperado} en la posición {token[2]}, se encontró {encontrado}")
+        token = self._actual()
+        self.i += 1
+        return token
+
+    def _anidar(self):
+        """Entra a un nivel de paréntesis o NOT; falla si se pasa del máximo."""
+        self.profundidad += 1
+        if self.profundidad > MAX_NESTING_DEPTH:
+            raise QuerySyntaxError(
+                f"La expresión supera {MAX_NESTING_DEPTH} niveles de anidamiento en la posición {self._actual()[2]}"
+            )
+
+    def parse(self) -> Node:
+        nodo = self._or()
+        self._consumir("fin")
+        return nodo
+
+    def _or(self) -> Node:
+        hijos = [self._and()]
+        while self._es("clave", "OR"):
+            self.i += 1
+            hijos.append(self._and())
+        return hijos[0] if len(hijos) == 1 else ("or", tuple(hijos))
+
+    def _and(self) -> Node:
+        hijos = [self._not()]
+        while self._es("clave", "AND"):
+            self.i += 1
+            hijos.append(self._not())
+        return hijos[0] if len(hijos) == 1 else ("and", tuple(hijos))
+
+    def _not(self) -> Node:
+        if self._es("clave", "NOT"):
+            self.i += 1
+            self._anidar()
+            nodo = ("not", self._not())
+            self.profundidad -= 1
+            return nodo
+        return self._primario()
+
+    def _primario(self) -> Node:
+        if self._es("("):
+            self.i += 1
+            self._anidar()
+            nodo = self._or()
+            self._consumir(")")
+            self.profundidad -= 1
+            return nodo
+
+        _, nombre, posicion = self._consumir("nombre")
+        columna = self.columnas.get(nombre.lower())
+        if columna is None:
+            raise QuerySyntaxError(f"Columna desconocida en la posición {posicion}: {nombre}")
+
+        if self._es("operador"):
+            operador = self._consumir("operador")[1]
+            return ("cmp", columna, operador, self._valor())
+        if self._es("clave", "BETWEEN"):
+            self.i += 1
+            minimo = self._valor()
+            self._consumir("clave", "AND")
+            maximo = self._valor()
+            return ("and", (("cmp", columna, ">=", minimo), ("cmp", columna, "<=", maximo)))
+        if self._es("clave", "IS"):
+            self.i += 1
+            negado = self._es("clave", "NOT")
+            if negado:
+                self.i += 1
+            self._consumir("clave", "NULL")
+            return ("not", ("null", columna)) if negado else ("null", columna)
+        if self._es("clave", "CONTAINS"):
+            self.i += 1
+            texto = self._valor()
+            if not isinstance(texto, str):
+                raise QuerySyntaxError(f"CONTAINS requiere un texto ({columna})")
+            if not tokenizar(texto):
+                # Sólo palabras vacías o símbolos: la búsqueda no tendría términos
+                raise QuerySyntaxError(f"CONTAINS {_literal(texto)} no tiene términos buscables ({columna})")
+            return ("contains", columna, texto)
+
+        negado = self._es("clave", "NOT")
+        if negado:
+            self.i += 1
+        if self._es("clave", "IN"):
+            self.i += 1
+            self._consumir("(")
+            valores = [self._valor()]
+            while self._es(","):
+                self.i += 1
+                valores.append(self._valor())
+            self._consumir(")")
+            nodo = ("in", columna, tuple(valores))
+            return ("not", nodo) if negado else nodo
+
+        token = self._actual()
+        raise QuerySyntaxError(f"Se esperaba un operador después de {columna} en la posición {token[2]}")
+
+    def _valor(self) -> Value:
+        return self._consumir("valor")[1]
+
+
+def normalizar(nodo: Node) -> Node:
+    """Aplana AND/OR anidados, elimina duplicados, ordena los hijos y simplifica NOT NOT."""
+    tipo = nodo[0]
+    if tipo in ("and", "or"):
+        hijos = []
+        for hijo in (normalizar(h) for h in nodo[1]):
+            hijos.extend(hijo[1] if hijo[0] == tipo else [hijo])
+        unicos = {to_text(h): h for h in hijos}
+        if len(unicos) == 1:
+            return next(iter(unicos.values()))
+        return (tipo, tuple(unicos[clave] for clave in sorted(unicos)))
+    if tipo == "not":
+        hijo = normalizar(nodo[1])
+        return hijo[1] if hijo[0] == "not" else ("not", hijo)
+    if tipo == "in":
+        valores = sorted(set(nodo[2]), key=lambda v: (isinstance(v, str), v))
+        if len(valores) == 1:
+            return ("cmp", nodo[1], "=", valores[0])
+        return ("in", nodo[1], tuple(valores))
+    return nodo
+
+
+def _literal(valor: Value) -> str:
+    return json.dumps(valor, ensure_ascii=False) if isinstance(valor, str) else repr(float(valor))
+
+
+def to_text(nodo: Node) -> str:
+    """Representación textual canónica (sirve de clave del plan)."""
+    tipo = nodo[0]
+    if tipo in ("and", "or"):
+        return "(" + f" {tipo.upper()} ".join(to_text(h) for h in nodo[1]) + ")"
+    if tipo == "not":
+        return f"NOT {to_text(nodo[1])}"
+    if tipo == "cmp":
+        return f"{nodo[1]} {nodo[2]} {_literal(nodo[3])}"
+    if tipo == "in":
+        return f"{nodo[1]} IN (" + ", ".join(_literal(v) for v in nodo[2]) + ")"
+    if tipo == "null":
+        return f"{nodo[1]} IS NULL"
+    return f"{nodo[1]} CONTAINS {_literal(nodo[2])}"
+
+
+def parse_expression(expresion: str, columns: Iterable[str]) -> Node:
+    """Parsea y normaliza una expresión contra las columnas del dataset."""
+    if not expresion or not expresion.strip():
+        raise QuerySyntaxError("La expresión está vacía")
+    if len(expresion) > MAX_EXPRESSION_LENGTH:
+        raise QuerySyntaxError(f"La expresión supera {MAX_EXPRESSION_LENGTH} caracteres")
+    return normalizar(_Parser(expresion, columns).parse())
@@ -0,0 +1,335 @@
+"""
+Compilación y caché de planes para las expresiones de filtro del visor.
+
+Cada expresión normalizada se compila una vez por snapshot en un árbol de
+predicados vectorizados sobre los arrays del índice (bitmaps y códigos de las
+categóricas, float64 de tasas y montos, listas invertidas del texto). En un AND
+los hijos se evalúan del más selectivo al menos selectivo y cada uno sólo
+revisa las filas que sobrevivieron a los anteriores.
+"""
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.query_language import Node, QuerySyntaxError, parse_expression, to_text
+from src.services.text_index import TEXT_COLUMNS
+from src.services.viewer_snapshot import ViewerSnapshot
+
+# Planes guardados (por versión del snapshot y expresión normalizada)
+PLAN_CACHE_SIZE = 128
+
+_COMPARADORES = {
+    "=": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _filtrar(candidatos: Optional[np.ndarray], mask: np.ndarray) -> np.ndarray:
+    """Filas de `candidatos` (o de todas, si es None) que cumplen `mask`."""
+    if candidatos is None:
+        return np.flatnonzero(mask)
+    return candidatos[mask[candidatos]]
+
+
+class _Estadisticas:
+    """Valores ordenados y conteos por columna de un snapshot, para estimar selectividad."""
+
+    def __init__(self, snap: ViewerSnapshot):
+        self.snap = snap
+        self._ordenados: Dict[str, np.ndarray] = {}
+        self._conteos: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def ordenados(self, columna: str) -> np.ndarray:
+        """Valores no nulos de una columna numérica, ordenados."""
+        with self._lock:
+            if columna not in self._ordenados:
+                valores = self.snap.index.numeric[columna]
+                self._ordenados[columna] = np.sort(valores[~np.isnan(valores)])
+            return self._ordenados[columna]
+
+    def conteos(self, columna: str, codes: np.ndarray) -> np.ndarray:
+        """Filas por código categórico (posición 0 = nulos)."""
+        with self._lock:
+            if columna not in self._conteos:
+                self._conteos[columna] = np.bincount(np.asarray(codes) + 1)
+            return self._conteos[columna]
+
+
+class _Predicado(ABC):
+    """Nodo compilado: `estimacion` es el número esperado de filas que cumplen."""
+
+    estimacion: int = 0
+    descripcion: str = ""
+
+    @abstractmethod
+    def evaluate(self, candidatos: Optional[np.ndarray]) -> np.ndarray:
+        """Filas de `candidatos` (o de todas, si es None) que cumplen el nodo."""
+
+    def explain(self) -> List[str]:
+        return [f"{self.descripcion} (~{self.estimacion} filas)"]
+
+
+class _Numerico(_Predicado):
+    """Comparación sobre un array float64 (los nulos nunca cumplen)."""
+
+    def __init__(self, valores: np.ndarray, operador: str, valor: float, estimacion: int, descripcion: str):
+        self.valores, self.operador, self.valor = valores, operador, valor
+        self.estimacion, self.descripcion = estimacion, descripcion
+
+    def evaluate(self, candidatos):
+        valores = self.valores if candidatos is None else self.valores[candidatos]
+        with np.errstate(invalid="ignore"):
+            mask = _COMPARADORES[self.operador](valores, self.valor) & ~np.isnan(valores)
+        return np.flatnonzero(mask) if candidatos is None else candidatos[mask]
+
+
+class _Nulo(_Predicado):
+    def __init__(self, nulos, estimacion: int, descripcion: str):
+        self.nulos = nulos  # función que devuelve la máscara de nulos (se calcula al evaluar)
+        self.estimacion, self.descripcion = estimacion, descripcion
+
+    def evaluate(self, candidatos):
+        return _filtrar(candidatos, self.nulos())
+
+
+class _Codigos(_Predicado):
+    """Pertenencia de códigos categóricos a un conjunto (los nulos tienen código -1)."""
+
+    def __init__(self, codes: np.ndarray, permitidos: np.ndarray, estimacion: int, descripcion: str):
+        self.codes, self.permitidos = codes, permitidos
+        self.estimacion, self.descripcion = estimacion, descripcion
+
+    def evaluate(self, candidatos):
+        codes = self.codes if candidatos is None else self.codes[candidatos]
+        mask = np.isin(codes, self.permitidos)
+        return np.flatnonzero(mask) if candidatos is None else candidatos[mask]
+
+
+class _Mascara(_Predicado):
+    """Predicado genérico sobre columnas de texto sin índice (máscara perezosa)."""
+
+    def __init__(self, calcular, estimacion: int, descripcion: str):
+        self.calcular = calcular
+        self.estimacion, self.descripcion = estimacion, descripcion
+
+    def evaluate(self, candidatos):
+        return _filtrar(candidatos, self.calcular())
+
+
+class _Filas(_Predicado):
+    """Conjunto de filas ya resuelto (búsqueda en el índice invertido)."""
+
+    def __init__(self, filas: np.ndarray, descripcion: str):
+        self.filas = filas
+        self.estimacion, self.descripcion = len(filas), descripcion
+
+    def evaluate(self, candidatos):
+        if candidatos is None:
+            return self.filas
+        return np.intersect1d(candidatos, self.filas, assume_unique=True)
+
+
+class _And(_Predicado):
+    def __init__(self, hijos: List[_Predicado]):
+        # El más selectivo primero: los siguientes sólo revisan sus sobrevivientes
+        self.hijos = sorted(hijos, key=lambda h: h.estimacion)
+        self.estimacion = self.hijos[0].estimacion
+
+    def evaluate(self, candidatos):
+        for hijo in self.hijos:
+            candidatos = hijo.evaluate(candidatos)
+            if not len(candidatos):
+                break
+        return candidatos
+
+    def explain(self):
+        return ["AND"] + ["  " + linea for hijo in self.hijos for linea in hijo.explain()]
+
+
+class _Or(_Predicado):
+    def __init__(self, hijos: List[_Predicado], n_rows: int):
+        self.hijos = sorted(hijos, key=lambda h: h.estimacion)
+        self.estimacion = min(n_rows, sum(h.estimacion for h in self.hijos))
+
+    def evaluate(self, candidatos):
+        resultado = self.hijos[0].evaluate(candidatos)
+        for hijo in self.hijos[1:]:
+            resultado = np.union1d(resultado, hijo.evaluate(candidatos))
+        return resultado
+
+    def explain(self):
+        return [f"OR (~{self.estimacion} filas)"] + ["  " + linea for hijo in self.hijos for linea in hijo.explain()]
+
+
+class _Not(_Predicado):
+    def __init__(self, hijo: _Predicado, n_rows: int):
+        self.hijo, self.n_rows = hijo, n_rows
+        self.estimacion = n_rows - hijo.estimacion
+
+    def evaluate(self, candidatos):
+        base = np.arange(self.n_rows) if candidatos is None else candidatos
+        return np.setdiff1d(base, self.hijo.evaluate(candidatos), assume_unique=True)
+
+    def explain(self):
+        return [f"NOT (~{self.estimacion} filas)"] + ["  " + linea for linea in self.hijo.explain()]
+
+
+class QueryPlan:
+    """Plan compilado de una expresión para un snapshot concreto."""
+
+    def __init__(self, snap: ViewerSnapshot, arbol: Node, estadisticas: _Estadisticas):
+        self.snap = snap
+        self.expresion = to_text(arbol)
+        self._estadisticas = estadisticas
+        self.raiz = self._compilar(arbol)
+
+    def evaluate(self) -> np.ndarray:
+        """Posiciones de fila (en orden natural) que cumplen la expresión."""
+        if not self.snap.index.n_rows:
+            return np.empty(0, dtype=np.int64)
+        return np.asarray(self.raiz.evaluate(None), dtype=np.int64)
+
+    def explain(self) -> List[str]:
+        return self.raiz.explain()
+
+    # --- Compilación ---
+
+    def _categorias(self, columna: str) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """Códigos y categorías de la columna, si es categórica."""
+        index, df = self.snap.index, self.snap.df
+        if columna in index.codes:
+            return index.codes[columna], index.categories[columna]
+        if hasattr(df[columna], "cat"):
+            return df[columna].array.codes, [str(c) for c in df[columna].array.categories]
+        return None
+
+    def _compilar(self, nodo: Node) -> _Predicado:
+        tipo = nodo[0]
+        n_rows = self.snap.index.n_rows
+        if tipo == "and":
+            return _And([self._compilar(h) for h in nodo[1]])
+        if tipo == "or":
+            return _Or([self._compilar(h) for h in nodo[1]], n_rows)
+        if tipo == "not":
+            return _Not(self._compilar(nodo[1]), n_rows)
+
+        columna = nodo[1]
+        descripcion = to_text(nodo)
+        if tipo == "contains":
+            if columna not in TEXT_COLUMNS:
+                raise QuerySyntaxError(f"CONTAINS sólo se admite en {', '.join(TEXT_COLUMNS)}")
+            return _Filas(self.snap.text_index.search(nodo[2], [columna]), descripcion)
+
+        if columna in self.snap.index.numeric:
+            return self._compilar_numerico(nodo, descripcion)
+        return self._compilar_texto(nodo, descripcion)
+
+    def _compilar_numerico(self, nodo: Node, descripcion: str) -> _Predicado:
+        tipo, columna = nodo[0], nodo[1]
+        valores = self.snap.index.numeric[columna]
+        ordenados = self._estadisticas.ordenados(columna)
+        n_rows = self.snap.index.n_rows
+
+        if tipo == "null":
+            return _Nulo(lambda: np.isnan(valores), n_rows - len(ordenados), descripcion)
+
+        literales = [nodo[3]] if tipo == "cmp" else list(nodo[2])
+        if any(isinstance(v, str) for v in literales):
+            raise QuerySyntaxError(f"{columna} es numérica: compare con números")
+
+        if tipo == "in":
+            hijos = [self._compilar_numerico(("cmp", columna, "=", v), f"{columna} = {v!r}") for v in literales]
+            return _Or(hijos, n_rows)
+
+        operador, valor = nodo[2], float(nodo[3])
+        # Estimación exacta con búsqueda binaria sobre los valores ordenados
+        izquierda = np.searchsorted(ordenados, valor, side="left")
+        derecha = np.searchsorted(ordenados, valor, side="right")
+        estimacion = {
+            "=": derecha - izquierda,
+            "!=": len(ordenados) - (derecha - izquierda),
+            "<": izquierda,
+            "<=": derecha,
+            ">": len(ordenados) - derecha,
+            ">=": len(ordenados) - izquierda,
+        }[operador]
+        return _Numerico(valores, operador, valor, int(estimacion), descripcion)
+
+    def _compilar_texto(self, nodo: Node, descripcion: str) -> _Predicado:
+        tipo, columna = nodo[0], nodo[1]
+        n_rows = self.snap.index.n_rows
+        categorias = self._categorias(columna)
+        serie = self.snap.df[columna]
+
+        if tipo == "null":
+            if categorias is not None:
+                codes, _ = categorias
+                conteos = self._estadisticas.conteos(columna, codes)
+                return _Codigos(codes, np.array([-1]), int(conteos[0]), descripcion)
+            return _Mascara(lambda: serie.isna().to_numpy(), n_rows // 2, descripcion)
+
+        operador = nodo[2] if tipo == "cmp" else "in"
+        if operador not in ("=", "!=", "in"):
+            raise QuerySyntaxError(f"{columna} no es numérica: sólo admite =, !=, IN, IS NULL o CONTAINS")
+        literales = [nodo[3]] if tipo == "cmp" else list(nodo[2])
+        literales = [v if isinstance(v, str) else f"{v:g}" for v in literales]
+
+        if categorias is not None:
+            codes, valores = categorias
+            posicion = {valor: i for i, valor in enumerate(valores)}
+            permitidos = np.array(sorted({posicion[v] for v in literales if v in posicion}), dtype=np.int64)
+            conteos = self._estadisticas.conteos(columna, codes)
+            coincidencias = int(conteos[permitidos + 1].sum()) if len(permitidos) else 0
+            if operador == "!=":
+                # Distinto: cualquier otro valor no nulo
+                permitidos = np.setdiff1d(np.arange(len(valores)), permitidos)
+                coincidencias = n_rows - int(conteos[0]) - coincidencias
+            return _Codigos(codes, permitidos, coincidencias, descripcion)
+
+        if operador == "!=":
+            return _Mascara(lambda: (serie.notna() & (serie != literales[0])).to_numpy(), n_rows // 2, descripcion)
+        return _Mascara(lambda: serie.isin(literales).to_numpy(), n_rows // 2, descripcion)
+
+
+class QueryPlanner:
+    """Caché LRU de planes compilados, segura entre hilos."""
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._planes: "OrderedDict[Tuple[str, str], QueryPlan]" = OrderedDict()
+        self._estadisticas: Dict[str, _Estadisticas] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, snap: ViewerSnapshot, expresion: str) -> QueryPlan:
+        """Plan de `expresion` para `snap` (lanza QuerySyntaxError si no es válida)."""
+        arbol = parse_expression(expresion, snap.df.columns)
+        clave = (snap.version, to_text(arbol))
+        with self._lock:
+            plan = self._planes.get(clave)
+            if plan is not None:
+                self._planes.move_to_end(clave)
+                self.hits += 1
+                return plan
+            self.misses += 1
+            # Las estadísticas de versiones anteriores ya no se usan
+            if snap.version not in self._estadisticas:
+                self._estadisticas = {snap.version: _Estadisticas(snap)}
+            estadisticas = self._estadisticas[snap.version]
+
+        plan = QueryPlan(snap, arbol, estadisticas)
+        with self._lock:
+            self._planes[clave] = plan
+            self._planes.move_to_end(clave)
+            while len(self._planes) > self.maxsize:
+                self._planes.popitem(last=False)
+        return plan
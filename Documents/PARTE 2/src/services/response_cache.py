@@ -0,0 +1,148 @@
+"""
+Caché LRU de respuestas serializadas para la API del visor.
+Las claves incluyen la versión del snapshot, así que un dataset nuevo nunca
+sirve respuestas viejas; las entradas antiguas se desalojan por LRU.
+
+Cada entrada guarda también sus variantes comprimidas (gzip, y brotli si está
+instalado), generadas la primera vez que un cliente las acepta.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, Any], ...]]
+
+# Por debajo de este tamaño comprimir no compensa
+COMPRESS_MIN_BYTES = 1024
+
+# Codificaciones soportadas, en orden de preferencia
+_COMPRESSORS = {"gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)}
+if brotli is not None:
+    _COMPRESSORS = {"br": lambda body: brotli.compress(body, quality=5), **_COMPRESSORS}
+
+
+class CachedResponse:
+    """Cuerpo JSON ya serializado junto con su ETag fuerte y sus variantes comprimidas."""
+
+    __slots__ = ("body", "etag", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._variants: Dict[str, Tuple[bytes, str]] = {}
+
+    def variant(self, encoding: Optional[str]) -> Tuple[bytes, str]:
+        """
+        Cuerpo y ETag para `encoding` (None = sin comprimir). Cada
+        representación tiene su propio ETag fuerte, como exige RFC 9110.
+        """
+        if encoding is None:
+            return self.body, self.etag
+        variante = self._variants.get(encoding)
+        if variante is None:
+            # Si dos hilos la calculan a la vez el resultado es idéntico
+            variante = (_COMPRESSORS[encoding](self.body), self.etag[:-1] + "-" + encoding + '"')
+            self._variants[encoding] = variante
+        return variante
+
+
+def negociar_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """
+    Elige la codificación de contenido según Accept-Encoding (respetando q=0)
+    o None si el cuerpo es chico o el cliente no acepta ninguna soportada.
+    """
+    if not accept_encoding or size < COMPRESS_MIN_BYTES:
+        return None
+    aceptadas: Dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre.strip().lower()] = q
+    for encoding in _COMPRESSORS:
+        if aceptadas.get(encoding, aceptadas.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def normalizar_params(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Normaliza los parámetros de consulta para usarlos como clave:
+    descarta vacíos, ordena por nombre y ordena/deduplica los multivalor.
+    """
+    normalizados = []
+    for nombre, valor in sorted(params.items()):
+        if valor is None or valor == "" or valor == []:
+            continue
+        if isinstance(valor, (list, tuple, set)):
+            valor = tuple(sorted(set(valor)))
+        normalizados.append((nombre, valor))
+    return tuple(normalizados)
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara un If-None-Match con el ETag (comparación débil, RFC 9110)."""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidatos:
+        return True
+    return any((c[2:] if c.startswith("W/") else c) == etag for c in candidatos)
+
+
+class ResponseCache:
+    """LRU acotado por número de entradas y seguro entre hilos."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(endpoint: str, version: str, params: Dict[str, Any]) -> CacheKey:
+        return endpoint, version, normalizar_params(params)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: CacheKey, body: bytes) -> CachedResponse:
+        entry = CachedResponse(body)
+        if self.maxsize <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self, keep_versions: Iterable[str] = ()) -> None:
+        """Elimina las entradas, salvo las de las versiones indicadas."""
+        keep = set(keep_versions)
+        with self._lock:
+            for key in [k for k in self._entries if k[1] not in keep]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
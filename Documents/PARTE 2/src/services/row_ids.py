@@ -0,0 +1,102 @@
+"""
+Identificadores estables de fila para el visor.
+El id es un hash de (Banco, Producto_Codigo, Concepto, Moneda): la misma
+fila recibe el mismo id en cada snapshot. Cuando varias filas comparten esos
+cuatro campos (p. ej. tramos de una misma tasa) se les agrega un hash del
+resto de sus campos, así el id no depende del orden de las filas y una fila
+nueva en el grupo no cambia el id de las demás. Sólo las filas idénticas en
+todo se distinguen además por su ordinal ("-1", "-2", ...).
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.viewer_index import numeric_columns
+
+# Campos que identifican una fila
+ROW_ID_COLUMNS = ["Banco", "Producto_Codigo", "Concepto", "Moneda"]
+
+# Campos que no distinguen filas con la misma clave (cambian en cada corrida)
+ROW_ID_IGNORED_COLUMNS = ["Fecha_Extraccion"]
+
+# Largo (hex) de row_key y del hash de contenido que desempata claves repetidas
+ROW_KEY_LENGTH = 16
+CONTENT_KEY_LENGTH = 8
+
+
+def _hash(partes: List[str], largo: int) -> str:
+    return hashlib.sha1("\x1f".join(partes).encode("utf-8")).hexdigest()[:largo]
+
+
+def row_key(valores) -> str:
+    """Hash de los valores de ROW_ID_COLUMNS de una fila (el id sin desempate)."""
+    return _hash(["" if v is None or pd.isna(v) else str(v).strip() for v in valores], ROW_KEY_LENGTH)
+
+
+def content_key(valores) -> str:
+    """Hash de los valores de content_columns de una fila (desempate de claves repetidas)."""
+    partes = []
+    for v in valores:
+        if v is None or pd.isna(v):
+            partes.append("")
+        elif isinstance(v, (float, np.floating)):
+            partes.append(repr(float(v)))
+        else:
+            partes.append(str(v).strip())
+    return _hash(partes, CONTENT_KEY_LENGTH)
+
+
+def content_columns(columns: List[str]) -> List[str]:
+    """Columnas que entran en el hash de contenido, en el orden del dataset."""
+    return [col for col in columns if col not in ROW_ID_COLUMNS and col not in ROW_ID_IGNORED_COLUMNS]
+
+
+def compute_row_ids(df: pd.DataFrame) -> np.ndarray:
+    """Calcula el id de cada fila en el orden del DataFrame."""
+    if df.empty:
+        return np.empty(0, dtype="U1")
+
+    columnas = [df[col] if col in df.columns else pd.Series([None] * len(df)) for col in ROW_ID_COLUMNS]
+    claves = [row_key(valores) for valores in zip(*columnas)]
+    repetidas = np.flatnonzero(pd.Series(claves).duplicated(keep=False).to_numpy())
+    if not len(repetidas):
+        return np.asarray(claves, dtype="U")
+
+    # Claves repetidas: hash del resto de los campos, con los Tasa_*/Monto_*
+    # como números (igual que los ve el visor)
+    bloque = df.iloc[repetidas]
+    numericas = set(numeric_columns(df.columns))
+    valores = [
+        (pd.to_numeric(bloque[col], errors="coerce") if col in numericas else bloque[col])
+        .to_numpy(dtype=object, na_value=None)
+        for col in content_columns(list(df.columns))
+    ]
+    filas = zip(*valores) if valores else [()] * len(repetidas)
+    desempates = [f"{claves[i]}-{content_key(fila)}" for i, fila in zip(repetidas, filas)]
+
+    # Filas idénticas en todo: ordinal de aparición dentro del desempate
+    ordinal = pd.Series(desempates).groupby(desempates, sort=False).cumcount().to_numpy()
+    ids = list(claves)
+    for i, desempate, n in zip(repetidas, desempates, ordinal):
+        ids[i] = desempate if n == 0 else f"{desempate}-{n}"
+    return np.asarray(ids, dtype="U")
+
+
+class RowIdIndex:
+    """Ids por posición de fila y diccionario id -> posición para búsquedas O(1)."""
+
+    def __init__(self, df: pd.DataFrame, ids: Optional[np.ndarray] = None):
+        self.ids = ids if ids is not None else compute_row_ids(df)
+        self._posiciones: Dict[str, int] = {str(row_id): i for i, row_id in enumerate(self.ids)}
+
+    def position(self, row_id: str) -> Optional[int]:
+        """Posición de la fila con ese id, o None si no existe en el snapshot."""
+        return self._posiciones.get(row_id)
+
+    def positions(self, row_ids: List[str]) -> List[Optional[int]]:
+        return [self._posiciones.get(row_id) for row_id in row_ids]
+
+    def ids_for(self, rows: np.ndarray) -> List[str]:
+        return [str(row_id) for row_id in self.ids[rows]]
@@ -0,0 +1,261 @@
+"""
+Índice de similitud para encontrar la "misma" comisión o tasa en otros bancos.
+
+Cada texto distinto (Banco + Concepto + Descripcion_Breve) se representa como
+un vector TF-IDF de sus términos, tokenizados igual que en la búsqueda de texto
+(sin tildes ni palabras vacías). Cada columna se normaliza por su propio largo
+y se pondera (más peso para el Concepto), y el idf no suaviza los términos
+comunes: las coincidencias en términos raros deciden el orden. Las filas que repiten el mismo texto
+en un banco comparten vector, así que el costo depende de cuántos textos
+distintos hay y no del número de filas.
+
+Al construir el snapshot se calculan, para cada texto y cada banco, los textos
+más parecidos (similitud coseno), de modo que la consulta por id es una
+lectura directa. Las consultas de texto libre se resuelven recorriendo sólo
+las listas invertidas de sus términos.
+"""
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.services.text_index import tokenizar
+from src.services.viewer_index import ViewerIndex
+
+# Columnas que describen la comisión y su peso en el vector
+SIMILARITY_COLUMNS = {"Concepto": 2.0, "Descripcion_Breve": 1.0}
+
+# Vecinos precalculados por fila y banco
+SIMILARITY_TOP_K = 10
+
+# Similitud mínima para considerar dos filas equivalentes
+SIMILARITY_MIN_SCORE = 0.15
+
+# Arrays que se persisten en el store compartido
+SIMILARITY_ARRAYS = [
+    "idf", "term_offsets", "term_units", "term_weights",
+    "unit_banks", "unit_rows", "row_units", "neighbors", "scores",
+]
+
+
+class SimilarityIndex:
+    """
+    Vectores TF-IDF por texto distinto ("unidad"), guardados como listas
+    invertidas término -> unidades, más la tabla de vecinos
+    `neighbors[unidad, banco, k]` (-1 si no hay más).
+
+    - row_units: unidad de cada fila.
+    - unit_rows: fila representativa (la primera) de cada unidad.
+    - unit_banks: código de banco de cada unidad.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 index: ViewerIndex,
+                 terms: Optional[List[str]] = None,
+                 arrays: Optional[Dict[str, np.ndarray]] = None):
+        """Construye el índice desde `df`, o adopta `terms`/`arrays` ya calculados."""
+        self.n_rows = len(df)
+        self.bancos = index.categories.get("Banco", [""])
+
+        if arrays is not None:
+            self._adoptar(terms or [], arrays)
+        else:
+            self._build(df, index)
+            self._term_ids = {term: i for i, term in enumerate(self.terms)}
+
+    @classmethod
+    def from_arrays(cls,
+                    bancos: List[str],
+                    terms: List[str],
+                    arrays: Dict[str, np.ndarray]) -> "SimilarityIndex":
+        """Adopta un índice ya calculado sin el DataFrame (p. ej. leído de la base SQLite)."""
+        indice = cls.__new__(cls)
+        indice.n_rows = len(arrays["row_units"])
+        indice.bancos = bancos
+        indice._adoptar(terms, arrays)
+        return indice
+
+    def _adoptar(self, terms: List[str], arrays: Dict[str, np.ndarray]) -> None:
+        self.terms = terms
+        for nombre in SIMILARITY_ARRAYS:
+            setattr(self, nombre, arrays[nombre])
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+
+    # --- Construcción ---
+
+    def _units(self, df: pd.DataFrame, index: ViewerIndex) -> List[List[Tuple[float, Dict[str, int]]]]:
+        """
+        Agrupa las filas por texto distinto y devuelve, por unidad, el peso y
+        la frecuencia de términos de cada columna con texto.
+        """
+        if "Banco" in index.codes:
+            bank_codes = np.asarray(index.codes["Banco"], dtype=np.int64)
+        else:
+            bank_codes = np.zeros(self.n_rows, dtype=np.int64)
+
+        claves = [bank_codes]
+        tokens_por_columna = []
+        for col, peso in SIMILARITY_COLUMNS.items():
+            if col not in df.columns:
+                continue
+            # Tokenizar sólo los textos distintos
+            codes, uniques = pd.factorize(df[col])
+            claves.append(codes.astype(np.int64))
+            tokens_por_columna.append((peso, [tokenizar(value) for value in uniques]))
+
+        units, self.unit_rows, self.row_units = np.unique(
+            np.stack(claves, axis=1), axis=0, return_index=True, return_inverse=True
+        )
+        self.unit_rows = self.unit_rows.astype(np.int64)
+        self.row_units = self.row_units.reshape(-1).astype(np.int32)
+        self.unit_banks = units[:, 0].astype(np.int32)
+
+        campos_por_unidad = []
+        for unidad in units:
+            campos = []
+            for (peso, tokens), code in zip(tokens_por_columna, unidad[1:]):
+                if code < 0 or not tokens[code]:
+                    continue
+                tf: Dict[str, int] = {}
+                for token in tokens[code]:
+                    tf[token] = tf.get(token, 0) + 1
+                campos.append((peso, tf))
+            campos_por_unidad.append(campos)
+        return campos_por_unidad
+
+    def _build(self, df: pd.DataFrame, index: ViewerIndex) -> None:
+        campos_por_unidad = self._units(df, index)
+        n_units = len(campos_por_unidad)
+        self.terms = sorted({token for campos in campos_por_unidad for _, tf in campos for token in tf})
+        term_ids = {term: i for i, term in enumerate(self.terms)}
+
+        # Frecuencia de documento: unidades que tienen el término en alguna columna.
+        # Un término presente en todas las unidades no aporta (idf 0) y los raros pesan más.
+        document_freq = np.zeros(len(self.terms), dtype=np.int64)
+        for campos in campos_por_unidad:
+            for term in {term_ids[t] for _, tf in campos for t in tf}:
+                document_freq[term] += 1
+        self.idf = np.log((1 + n_units) / (1 + document_freq)).astype(np.float32)
+
+        # Vector de cada unidad: el de cada columna normalizado por su propio
+        # largo y ponderado por el peso de la columna, así un texto largo o con
+        # términos raros ajenos a la consulta en una columna no diluye lo que
+        # coincide en la otra. Luego norma L2 = 1 por unidad.
+        vectores: List[Dict[int, float]] = []
+        for campos in campos_por_unidad:
+            vector: Dict[int, float] = {}
+            for peso, tf in campos:
+                columna = {term_ids[t]: (1 + math.log(n)) * float(self.idf[term_ids[t]]) for t, n in tf.items()}
+                norma = math.sqrt(sum(v ** 2 for v in columna.values()))
+                if not norma:
+                    continue
+                for term, v in columna.items():
+                    vector[term] = vector.get(term, 0.0) + peso * v / norma
+            norma = math.sqrt(sum(v ** 2 for v in vector.values()))
+            vectores.append({term: v / norma for term, v in vector.items()} if norma else {})
+
+        unit_ptr = np.zeros(n_units + 1, dtype=np.int64)
+        np.cumsum([len(vector) for vector in vectores], out=unit_ptr[1:])
+        unit_terms = np.fromiter((t for vector in vectores for t in vector), dtype=np.int64, count=unit_ptr[-1])
+        pesos = np.fromiter((v for vector in vectores for v in vector.values()), dtype=np.float64, count=unit_ptr[-1])
+        unidades = np.repeat(np.arange(n_units), np.diff(unit_ptr))
+
+        # Representación por términos (listas invertidas) ordenada por unidad
+        orden = np.lexsort((unidades, unit_terms))
+        self.term_offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(unit_terms, minlength=len(self.terms)), out=self.term_offsets[1:])
+        self.term_units = unidades[orden].astype(np.int32)
+        self.term_weights = pesos[orden].astype(np.float32)
+
+        self.neighbors = np.full((n_units, len(self.bancos), SIMILARITY_TOP_K), -1, dtype=np.int32)
+        self.scores = np.zeros((n_units, len(self.bancos), SIMILARITY_TOP_K), dtype=np.float32)
+        for unidad in range(n_units):
+            inicio, fin = unit_ptr[unidad], unit_ptr[unidad + 1]
+            vector = dict(zip(unit_terms[inicio:fin].tolist(), pesos[inicio:fin].tolist()))
+            candidatos, similitudes = self._score(vector)
+            otras = candidatos != unidad
+            self._top_by_bank(candidatos[otras], similitudes[otras], SIMILARITY_TOP_K,
+                              self.neighbors[unidad], self.scores[unidad])
+
+    # --- Consulta ---
+
+    def _score(self, vector: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Similitud coseno del vector contra las unidades que comparten algún término."""
+        if not vector:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        partes, contribuciones = [], []
+        for term, peso in vector.items():
+            inicio, fin = self.term_offsets[term], self.term_offsets[term + 1]
+            partes.append(self.term_units[inicio:fin])
+            contribuciones.append(self.term_weights[inicio:fin] * peso)
+        candidatos, inversa = np.unique(np.concatenate(partes), return_inverse=True)
+        similitudes = np.bincount(inversa, weights=np.concatenate(contribuciones))
+        return candidatos, similitudes
+
+    def _top_by_bank(self,
+                     candidatos: np.ndarray,
+                     similitudes: np.ndarray,
+                     k: int,
+                     neighbors: np.ndarray,
+                     scores: np.ndarray) -> None:
+        """Escribe en neighbors/scores[banco] los k candidatos más similares de cada banco."""
+        validos = similitudes >= SIMILARITY_MIN_SCORE
+        candidatos, similitudes = candidatos[validos], similitudes[validos]
+        bancos = self.unit_banks[candidatos]
+        for banco in np.unique(bancos):
+            if banco < 0:
+                continue
+            propios = bancos == banco
+            unidades, valores = candidatos[propios], similitudes[propios]
+            # Mayor similitud primero; a igual similitud, la unidad anterior
+            orden = np.lexsort((unidades, -valores))[:k]
+            neighbors[banco, :len(orden)] = unidades[orden]
+            scores[banco, :len(orden)] = valores[orden]
+
+    def _por_banco(self, neighbors: np.ndarray, scores: np.ndarray) -> Dict[str, List[Tuple[int, float]]]:
+        """Traduce unidades a su fila representativa: {banco: [(fila, similitud), ...]}."""
+        resultado = {}
+        for code, banco in enumerate(self.bancos):
+            vecinos = [
+                (int(self.unit_rows[unidad]), float(score))
+                for unidad, score in zip(neighbors[code], scores[code]) if unidad >= 0
+            ]
+            if vecinos:
+                resultado[banco] = vecinos
+        return resultado
+
+    def similar_to_row(self, row: int, k: int) -> Dict[str, List[Tuple[int, float]]]:
+        """Vecinos precalculados de una fila: {banco: [(fila, similitud), ...]}."""
+        unidad = self.row_units[row]
+        return self._por_banco(self.neighbors[unidad, :, :k], self.scores[unidad, :, :k])
+
+    def similar_to_text(self, texto: str, k: int) -> Dict[str, List[Tuple[int, float]]]:
+        """Filas más parecidas a un texto libre, agrupadas por banco."""
+        tf: Dict[int, float] = {}
+        for token in tokenizar(texto):
+            # Un término desconocido se resuelve con el primero del vocabulario que lo tenga de prefijo
+            term = self._term_ids.get(token)
+            if term is None:
+                i = bisect_left(self.terms, token)
+                if i == len(self.terms) or not self.terms[i].startswith(token):
+                    continue
+                term = i
+            tf[term] = tf.get(term, 0.0) + 1.0
+
+        vector = {term: (1 + math.log(n)) * float(self.idf[term]) for term, n in tf.items()}
+        norma = math.sqrt(sum(peso ** 2 for peso in vector.values()))
+        if not norma:
+            return {}
+        vector = {term: peso / norma for term, peso in vector.items()}
+
+        neighbors = np.full((len(self.bancos), k), -1, dtype=np.int32)
+        scores = np.zeros((len(self.bancos), k), dtype=np.float32)
+        self._top_by_bank(*self._score(vector), k, neighbors, scores)
+        return self._por_banco(neighbors, scores)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays del índice, para guardarlos en el store compartido."""
+        return {nombre: np.asarray(getattr(self, nombre)) for nombre in SIMILARITY_ARRAYS}
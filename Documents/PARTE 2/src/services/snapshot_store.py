@@ -0,0 +1,293 @@
+"""
+Store compartido de snapshots del visor en disco.
+
+Cada versión del dataset se materializa una sola vez en un directorio con:
+- dataset.feather: el DataFrame tipado (Feather v2 sin compresión).
+- *.npy: códigos categóricos, bitmaps, postings del índice de texto, ids de
+  fila, el índice de similitud entre bancos y los cubos de agregación y de
+  distribución.
+- meta.json: versión del formato, categorías, vocabularios y claves de celda.
+
+Todos los workers de uvicorn abren esos archivos con memory-map en modo solo
+lectura, así que el sistema operativo comparte las mismas páginas físicas entre
+procesos y sólo el primer proceso paga el costo de construir los índices.
+
+En la raíz, current.json apunta a la última versión publicada. Un solo worker
+(el que tiene el bloqueo de publicador) vigila el CSV y publica; los demás sólo
+siguen current.json y adjuntan lo publicado.
+"""
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueos entre procesos, cada worker publica por su cuenta
+    fcntl = None
+
+from src.services.aggregation_cube import AggregationCube
+from src.services.columnar_snapshot import read_columnar_snapshot, write_columnar_snapshot
+from src.services.distribution_cube import DistributionCube
+from src.services.row_ids import RowIdIndex
+from src.services.similarity_index import SIMILARITY_ARRAYS, SimilarityIndex
+from src.services.text_index import TextIndex
+from src.services.viewer_index import ViewerIndex
+from src.services.viewer_snapshot import FileSignature, ViewerSnapshot
+
+DATASET_FILE = "dataset.feather"
+ROW_IDS_FILE = "row_ids.npy"
+CUBE_FILE = "cube.npy"
+META_FILE = "meta.json"
+
+# En la raíz: versión publicada y bloqueos entre procesos
+CURRENT_FILE = "current.json"
+BUILD_LOCK_FILE = ".build.lock"
+LEADER_LOCK_FILE = ".leader.lock"
+
+# Versión del formato en disco: subirla cuando cambien los archivos o arrays
+# que se guardan. Un directorio con otra versión se reconstruye.
+STORE_FORMAT_VERSION = 5
+
+
+class SnapshotStore:
+    """Directorio raíz con un subdirectorio inmutable por versión del dataset."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._leader: Optional[IO] = None
+
+    def path_for(self, version: str) -> Path:
+        return self.root / version
+
+    # --- Coordinación entre procesos ---
+
+    @contextmanager
+    def build_lock(self) -> Iterator[None]:
+        """
+        Bloqueo exclusivo entre procesos para construir y publicar una versión:
+        el primero la construye y los demás, al obtenerlo, ya la encuentran.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / BUILD_LOCK_FILE, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lead(self) -> bool:
+        """
+        True si este proceso es el publicador (vigila el CSV y publica las
+        versiones nuevas). El bloqueo dura lo que el proceso: si el publicador
+        termina, otro worker toma su lugar en la siguiente llamada.
+        """
+        if self._leader is not None or fcntl is None:
+            return True
+        self.root.mkdir(parents=True, exist_ok=True)
+        f = open(self.root / LEADER_LOCK_FILE, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._leader = f
+        return True
+
+    def set_current(self, version: str, signature: Optional[FileSignature]) -> None:
+        """Registra `version` como la última publicada (escritura atómica)."""
+        tmp = self.root / f"{CURRENT_FILE}.tmp-{os.getpid()}"
+        tmp.write_text(json.dumps({"version": version, "signature": signature}), encoding="utf-8")
+        os.replace(tmp, self.root / CURRENT_FILE)
+
+    def current(self) -> Optional[Tuple[str, Optional[FileSignature]]]:
+        """(versión, firma del CSV) de la última versión publicada, o None."""
+        try:
+            data = json.loads((self.root / CURRENT_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        signature = data.get("signature")
+        return data["version"], tuple(signature) if signature else None
+
+    # --- Lectura ---
+
+    def load(self, version: str, signature: Optional[FileSignature] = None) -> Optional[ViewerSnapshot]:
+        """Adjunta el snapshot de `version` desde disco, o None si no está completo o es de otro formato."""
+        partes = self._abrir(version)
+        if partes is None:
+            return None
+        df, meta = partes["df"], partes["meta"]
+
+        index = ViewerIndex(df, codes=partes["codes"], categories=meta["categorical"], bitmaps=partes["bitmaps"])
+        text_index = TextIndex(df, postings=partes["postings"])
+        row_ids = RowIdIndex(df, ids=partes["ids"])
+        similarity = SimilarityIndex(df, index, terms=meta["similarity_terms"], arrays=partes["similarity"])
+        cube = AggregationCube.from_arrays(df, index.numeric, meta["cube_keys"], partes["cube"])
+        distribution = DistributionCube.from_arrays(meta["distribution_dimensions"], meta["distribution_keys"],
+                                                    partes["distribution"])
+        return ViewerSnapshot(df, version=version, signature=signature, index=index,
+                              text_index=text_index, row_ids=row_ids, similarity=similarity,
+                              cube=cube, distribution=distribution)
+
+    def _abrir(self, version: str, avisar: bool = True) -> Optional[Dict[str, Any]]:
+        """Mapea los archivos de `version` (None si falta alguno, es ilegible o de otro formato)."""
+        directorio = self.path_for(version)
+        meta_path = directorio / META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("format_version") != STORE_FORMAT_VERSION:
+                if avisar:
+                    logger.warning(f"Store de snapshot {version} con formato {meta.get('format_version')} "
+                                   f"(actual {STORE_FORMAT_VERSION}), se reconstruye")
+                return None
+            df = read_columnar_snapshot(directorio / DATASET_FILE, source_version=version)
+            if df is None:
+                return None
+
+            codes: Dict[str, np.ndarray] = {}
+            bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+            for col, categorias in meta["categorical"].items():
+                codes[col] = np.load(directorio / f"codes__{col}.npy", mmap_mode="r")
+                matriz = np.load(directorio / f"bitmaps__{col}.npy", mmap_mode="r")
+                bitmaps[col] = {valor: matriz[i] for i, valor in enumerate(categorias)}
+
+            postings: Dict[str, Dict[str, np.ndarray]] = {}
+            for col, vocab in meta["text"].items():
+                offsets = np.load(directorio / f"text_offsets__{col}.npy", mmap_mode="r")
+                filas = np.load(directorio / f"text_rows__{col}.npy", mmap_mode="r")
+                postings[col] = {
+                    termino: filas[offsets[i]:offsets[i + 1]] for i, termino in enumerate(vocab)
+                }
+
+            ids = np.load(directorio / ROW_IDS_FILE, mmap_mode="r")
+            similarity = {
+                nombre: np.load(directorio / f"similarity__{nombre}.npy", mmap_mode="r")
+                for nombre in SIMILARITY_ARRAYS
+            }
+            cube = np.load(directorio / CUBE_FILE, mmap_mode="r")
+            distribution = {
+                nombre: np.load(directorio / f"distribution__{nombre}.npy", mmap_mode="r")
+                for nombre in meta["distribution_arrays"]
+            }
+        except (OSError, ValueError, KeyError) as e:
+            if avisar:
+                logger.warning(f"Store de snapshot {version} ilegible, se reconstruye: {e}")
+            return None
+        return {
+            "df": df, "meta": meta, "codes": codes, "bitmaps": bitmaps, "postings": postings,
+            "ids": ids, "similarity": similarity, "cube": cube, "distribution": distribution,
+        }
+
+    # --- Escritura ---
+
+    def save(self, snapshot: ViewerSnapshot) -> None:
+        """
+        Escribe el snapshot en un directorio temporal y lo publica con un rename
+        atómico. Si otro proceso lo publicó primero, se descarta esta copia; un
+        directorio de otro formato o ilegible se reemplaza.
+        """
+        destino = self.path_for(snapshot.version)
+        if self._abrir(snapshot.version, avisar=False) is not None:
+            return
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"{snapshot.version}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+
+        try:
+            write_columnar_snapshot(snapshot.df, tmp / DATASET_FILE, source_version=snapshot.version)
+
+            index = snapshot.index
+            categorical: Dict[str, List[str]] = {}
+            for col, codes in index.codes.items():
+                categorias = index.categories[col]
+                categorical[col] = categorias
+                np.save(tmp / f"codes__{col}.npy", np.asarray(codes))
+                matriz = np.stack([index.bitmaps[col][valor] for valor in categorias]) if categorias \
+                    else np.empty((0, (index.n_rows + 7) // 8), dtype=np.uint8)
+                np.save(tmp / f"bitmaps__{col}.npy", matriz)
+
+            text: Dict[str, List[str]] = {}
+            for col, vocab in snapshot.text_index.vocab.items():
+                postings = snapshot.text_index.postings[col]
+                text[col] = vocab
+                longitudes = [len(postings[termino]) for termino in vocab]
+                offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+                np.cumsum(longitudes, out=offsets[1:])
+                filas = np.concatenate([postings[t] for t in vocab]) if vocab else np.empty(0, dtype=np.int64)
+                np.save(tmp / f"text_offsets__{col}.npy", offsets)
+                np.save(tmp / f"text_rows__{col}.npy", filas.astype(np.int64))
+
+            np.save(tmp / ROW_IDS_FILE, np.asarray(snapshot.row_ids.ids))
+            for nombre, array in snapshot.similarity.arrays().items():
+                np.save(tmp / f"similarity__{nombre}.npy", array)
+
+            cube_keys, cube_values = snapshot.cube.arrays()
+            np.save(tmp / CUBE_FILE, cube_values)
+            distribution_arrays = snapshot.distribution.arrays()
+            for nombre, array in distribution_arrays.items():
+                np.save(tmp / f"distribution__{nombre}.npy", array)
+
+            # meta.json se escribe al final: su presencia marca el snapshot como completo
+            meta = {
+                "format_version": STORE_FORMAT_VERSION,
+                "version": snapshot.version,
+                "n_rows": index.n_rows,
+                "categorical": categorical,
+                "text": text,
+                "similarity_terms": snapshot.similarity.terms,
+                "cube_keys": cube_keys,
+                "distribution_dimensions": snapshot.distribution.dimensions,
+                "distribution_keys": snapshot.distribution.keys(),
+                "distribution_arrays": list(distribution_arrays),
+            }
+            (tmp / META_FILE).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+            self._retirar(snapshot.version)
+            os.rename(tmp, destino)
+            logger.info(f"Snapshot {snapshot.version} publicado en {destino}")
+        except OSError:
+            # Otro worker lo publicó antes (destino ya existe) o el disco falló
+            shutil.rmtree(tmp, ignore_errors=True)
+            if self._abrir(snapshot.version, avisar=False) is None:
+                raise
+
+    def _retirar(self, version: str) -> None:
+        """
+        Aparta el directorio de `version` si existe pero no es utilizable. Se
+        renombra antes de borrarlo: los procesos que lo tengan mapeado siguen
+        funcionando y el nombre queda libre para el rename atómico.
+        """
+        destino = self.path_for(version)
+        if not destino.exists() or self._abrir(version, avisar=False) is not None:
+            return
+        viejo = self.root / f"{version}.old-{os.getpid()}"
+        try:
+            os.rename(destino, viejo)
+        except OSError:
+            # Otro worker ya lo apartó
+            return
+        shutil.rmtree(viejo, ignore_errors=True)
+
+    def prune(self, keep_version: str) -> None:
+        """
+        Borra las versiones anteriores. Los procesos que aún las tengan mapeadas
+        siguen funcionando en POSIX; en Windows el borrado falla y se ignora.
+        """
+        if not self.root.exists():
+            return
+        for directorio in self.root.iterdir():
+            if directorio.is_dir() and directorio.name != keep_version \
+                    and ".tmp-" not in directorio.name and ".old-" not in directorio.name:
+                shutil.rmtree(directorio, ignore_errors=True)
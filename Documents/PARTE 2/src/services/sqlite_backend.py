@@ -0,0 +1,1015 @@
+"""
+Backend SQLite del visor de tarifarios.
+
+Alternativa al snapshot en memoria para datasets de decenas de millones de
+filas: el CSV se carga una vez (por bloques) en una base SQLite con índices
+por columna de filtro y orden, una tabla FTS5 para la búsqueda de texto y una
+tabla `meta` con las estadísticas y opciones de filtro precalculadas (más un
+cubo por Banco × Tipo × Moneda × Periodicidad para las agregaciones, los
+histogramas por celda de las columnas numéricas y el índice de similitud
+entre bancos). El visor la consulta con un pool de conexiones aiosqlite de
+solo lectura, así que la memoria del proceso depende del tamaño de página y de
+la caché de SQLite, no del número de filas.
+
+Las respuestas tienen la misma forma que las de ViewerService: mismos ids de
+fila, mismos filtros (la tabla FTS5 guarda los términos de text_index.tokenizar,
+así que tildes, palabras vacías y prefijos se tratan igual), nulos al final al
+ordenar y empates por posición de fila.
+"""
+import asyncio
+import io
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.services.aggregation_cube import CUBE_DIMENSIONS
+from src.services.columnar_snapshot import tipar_dataset
+from src.services.distribution_cube import (
+    DEFAULT_QUANTILES,
+    HISTOGRAM_BINS,
+    DistributionCube,
+    posiciones_de_bordes,
+)
+from src.services.exporter import EXPORT_CHUNK_ROWS, encoder_for
+from src.services.json_encoding import ID_FIELD, InvalidFieldsError, proyectar_campos
+from src.services.pagination import (
+    ExpiredCursorError,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    filters_fingerprint,
+)
+from src.services.query_language import Node, QuerySyntaxError, parse_expression, to_text
+from src.services.row_ids import ROW_ID_COLUMNS, ROW_KEY_LENGTH, content_columns, content_key, row_key
+from src.services.similarity_index import SIMILARITY_COLUMNS, SimilarityIndex
+from src.services.text_index import TEXT_COLUMNS, tokenizar
+from src.services.viewer_backend import DatasetView, ViewerBackend
+from src.services.viewer_index import ViewerIndex, numeric_columns
+from src.services.viewer_service import filas_comparacion
+from src.services.viewer_snapshot import file_version
+
+TABLE = "tarifarios"
+FTS_TABLE = "tarifarios_fts"
+CUBE_TABLE = "cubo"
+SIMILARITY_TABLE = "similitud"
+META_TABLE = "meta"
+
+# Columnas ordenables con índice: las que el visor muestra en la tabla. El orden
+# descendente usa el índice simple (en SQLite los nulos ya quedan al final) y el
+# ascendente uno sobre ((col IS NULL), col) para dejar los nulos al final.
+SORT_INDEX_COLUMNS = [
+    "Banco", "Producto_Nombre", "Concepto", "Tipo", "Moneda",
+    "Tasa_Porcentaje_MN", "Tasa_Porcentaje_ME", "Monto_Fijo_MN", "Monto_Fijo_ME",
+]
+
+# Versión del esquema: si cambia, la base se reconstruye aunque el CSV sea el mismo
+SCHEMA_VERSION = 5
+
+# Filas por bloque al cargar el CSV
+BUILD_CHUNK_ROWS = 100_000
+
+# Conexiones de lectura abiertas por proceso
+SQLITE_POOL_SIZE = 4
+
+# Memoria por conexión: páginas en caché (KiB, valor negativo) y ventana de mmap (bytes)
+SQLITE_CACHE_KIB = 32 * 1024
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+# Expresiones de /query ya compiladas a SQL
+SQL_CACHE_SIZE = 128
+
+_OPERADORES_SQL = {"=": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+CategoricalFilter = Optional[Union[str, List[str]]]
+
+
+def sqlite_path(database_url: str, base_dir: Path) -> Path:
+    """
+    Ruta del archivo de una URL SQLite (`sqlite:///rel.db`, `sqlite+aiosqlite:////abs.db`).
+    Las rutas relativas se resuelven contra `base_dir`.
+    """
+    esquema, separador, ruta = database_url.partition(":///")
+    if not separador or not esquema.split("+")[0] == "sqlite":
+        raise ValueError(f"DATABASE_URL no es una URL SQLite: {database_url}")
+    path = Path(ruta)
+    return path if path.is_absolute() else (base_dir / path).resolve()
+
+
+def _ident(columna: str) -> str:
+    """Nombre de columna entre comillas dobles para SQL."""
+    return '"' + columna.replace('"', '""') + '"'
+
+
+# --- Construcción de la base ---
+
+def read_meta(db_path: Path) -> Dict[str, Any]:
+    """Metadatos de la base (valores JSON), o {} si no existe o está incompleta."""
+    if not db_path.exists():
+        return {}
+    try:
+        conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            filas = conn.execute(f"SELECT clave, valor FROM {META_TABLE}").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+    return {clave: json.loads(valor) for clave, valor in filas}
+
+
+def read_similarity(db_path: Path, meta: Dict[str, Any]) -> Optional[SimilarityIndex]:
+    """Índice de similitud guardado en la base, o None si la base no lo tiene."""
+    if not meta.get("similarity_banks"):
+        return None
+    conn = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        filas = conn.execute(f"SELECT nombre, datos FROM {SIMILARITY_TABLE}").fetchall()
+    finally:
+        conn.close()
+    arrays = {nombre: np.load(io.BytesIO(datos)) for nombre, datos in filas}
+    return SimilarityIndex.from_arrays(meta["similarity_banks"], meta["similarity_terms"], arrays)
+
+
+def _leer_bloques(csv_path: Path, chunk_rows: int):
+    """Bloques del CSV con los tipos del visor: float64 en Tasa_*/Monto_*, texto en el resto."""
+    columnas = list(pd.read_csv(csv_path, nrows=0).columns)
+    numericas = numeric_columns(columnas)
+    dtype = {col: str for col in columnas if col not in numericas}
+    for bloque in pd.read_csv(csv_path, chunksize=chunk_rows, dtype=dtype):
+        for col in numericas:
+            bloque[col] = pd.to_numeric(bloque[col], errors='coerce').astype("float64")
+        yield bloque
+
+
+def _registros(bloque: pd.DataFrame, columnas: List[str]) -> List[tuple]:
+    """
+    Filas ("clave:hash de contenido", valores...) con None en lugar de NaN. El
+    id definitivo se arma después de cargar todo, cuando se sabe qué claves se repiten.
+    """
+    valores = {col: bloque[col].to_numpy(dtype=object, na_value=None) for col in columnas}
+    vacia = [None] * len(bloque)
+    claves = [row_key(fila) for fila in zip(*(valores.get(col, vacia) for col in ROW_ID_COLUMNS))]
+    contenido = content_columns(columnas)
+    huellas = ([content_key(fila) for fila in zip(*(valores[col] for col in contenido))] if contenido
+               else [content_key(())] * len(bloque))
+    return list(zip((f"{c}:{h}" for c, h in zip(claves, huellas)), *(valores[col] for col in columnas)))
+
+
+def _terminos(bloque: pd.DataFrame, columnas: List[str], primera_fila: int) -> List[tuple]:
+    """
+    Filas (rowid, términos de cada columna) para la tabla FTS5: el texto ya
+    pasado por tokenizar, igual que lo indexa TextIndex.
+    """
+    textos = []
+    for col in columnas:
+        codes, uniques = pd.factorize(bloque[col])
+        terminos = [" ".join(tokenizar(valor)) for valor in uniques]
+        textos.append([terminos[c] if c >= 0 else None for c in codes])
+    return list(zip(range(primera_fila, primera_fila + len(bloque)), *textos))
+
+
+def _precalcular(conn: sqlite3.Connection, columnas: List[str]) -> Dict[str, Any]:
+    """Opciones de filtro y estadísticas generales (las mismas que calcula ViewerService)."""
+    def distintos(col: str) -> List[str]:
+        if col not in columnas:
+            return []
+        return [v for (v,) in conn.execute(
+            f"SELECT DISTINCT {_ident(col)} FROM {TABLE} WHERE {_ident(col)} IS NOT NULL ORDER BY 1")]
+
+    def promedio(col: str) -> Optional[float]:
+        if col not in columnas:
+            return None
+        valor = conn.execute(f"SELECT AVG({_ident(col)}) FROM {TABLE}").fetchone()[0]
+        return round(valor, 2) if valor is not None else None
+
+    total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    bancos = distintos("Banco")
+    tipos_count = {}
+    if "Tipo" in columnas:
+        tipos_count = dict(conn.execute(
+            f'SELECT "Tipo", COUNT(*) FROM {TABLE} WHERE "Tipo" IS NOT NULL '
+            f'GROUP BY "Tipo" ORDER BY COUNT(*) DESC, "Tipo"').fetchall())
+
+    return {
+        "filters": {"bancos": bancos, "tipos": distintos("Tipo"), "monedas": distintos("Moneda")},
+        "stats": {
+            "total_registros": total,
+            "bancos_count": len(bancos),
+            "tipos_count": tipos_count,
+            "tasa_promedio_mn": promedio("Tasa_Porcentaje_MN"),
+            "tasa_promedio_me": promedio("Tasa_Porcentaje_ME"),
+        },
+    }
+
+
+def _histogramas(conn: sqlite3.Connection, columnas: List[str], chunk_rows: int) -> DistributionCube:
+    """
+    Histogramas por celda (los mismos que DistributionCube.from_frame): bordes
+    con una consulta de ventana por columna y conteos recorriendo la tabla por
+    bloques.
+    """
+    dimensiones = [dim for dim in CUBE_DIMENSIONS if dim in columnas]
+    numericas = numeric_columns(columnas)
+    bordes = {}
+    for col in numericas:
+        c = _ident(col)
+        n_valores = conn.execute(f"SELECT COUNT({c}) FROM {TABLE}").fetchone()[0]
+        posiciones = posiciones_de_bordes(n_valores, HISTOGRAM_BINS)
+        filas = conn.execute(
+            f"SELECT v FROM (SELECT {c} AS v, ROW_NUMBER() OVER (ORDER BY {c}) - 1 AS pos "
+            f"FROM {TABLE} WHERE {c} IS NOT NULL) WHERE pos IN ({', '.join(map(str, posiciones)) or 'NULL'}) "
+            f"ORDER BY pos"
+        ).fetchall()
+        bordes[col] = np.array([v for (v,) in filas], dtype=np.float64)
+
+    def bloques():
+        cursor = conn.execute(f"SELECT {', '.join(map(_ident, dimensiones + numericas))} FROM {TABLE}")
+        while filas := cursor.fetchmany(chunk_rows):
+            yield pd.DataFrame.from_records(filas, columns=dimensiones + numericas)
+
+    return DistributionCube.from_blocks(dimensiones, bordes, bloques())
+
+
+def _similitud(conn: sqlite3.Connection, columnas: List[str]) -> Optional[SimilarityIndex]:
+    """
+    Índice de similitud (el mismo que arma el snapshot en memoria), desde
+    Banco y las columnas de texto que usa; las filas van en orden de rowid.
+    """
+    leidas = [col for col in ["Banco", *SIMILARITY_COLUMNS] if col in columnas]
+    if not any(col in SIMILARITY_COLUMNS for col in leidas):
+        return None
+    filas = conn.execute(f"SELECT {', '.join(map(_ident, leidas))} FROM {TABLE} ORDER BY rowid").fetchall()
+    df = tipar_dataset(pd.DataFrame.from_records(filas, columns=leidas))
+    return SimilarityIndex(df, ViewerIndex(df))
+
+
+def build_database(csv_path: Path, db_path: Path, chunk_rows: int = BUILD_CHUNK_ROWS, force: bool = False) -> str:
+    """
+    Carga el CSV en la base SQLite si cambió su versión (o con `force`) y
+    devuelve la versión servida. La base se arma en un archivo temporal y se
+    publica con un rename atómico: las conexiones abiertas siguen leyendo la
+    versión anterior hasta que se cierran.
+    """
+    version = file_version(csv_path)
+    meta = read_meta(db_path)
+    if not force and meta.get("source_version") == version and meta.get("schema_version") == SCHEMA_VERSION:
+        return version
+
+    inicio = datetime.now()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix(db_path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+
+        columnas = list(pd.read_csv(csv_path, nrows=0).columns)
+        numericas = numeric_columns(columnas)
+        definiciones = ", ".join(
+            f"{_ident(col)} {'REAL' if col in numericas else 'TEXT'}" for col in columnas
+        )
+        conn.execute(f"CREATE TABLE {TABLE} (row_id TEXT NOT NULL, {definiciones})")
+        insertar = f"INSERT INTO {TABLE} VALUES ({', '.join('?' * (len(columnas) + 1))})"
+
+        # Texto: FTS5 sin contenido propio con los términos de tokenizar (sin
+        # tildes ni palabras vacías) e índices de prefijo
+        texto = [col for col in TEXT_COLUMNS if col in columnas]
+        if texto:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"{', '.join(_ident(col) for col in texto)}, content='', "
+                f"tokenize='unicode61', prefix='2 3 4')"
+            )
+        insertar_texto = (f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(_ident(col) for col in texto)}) "
+                          f"VALUES ({', '.join('?' * (len(texto) + 1))})")
+
+        # rowid = posición de la fila en el CSV + 1
+        filas_cargadas = 0
+        for bloque in _leer_bloques(csv_path, chunk_rows):
+            conn.executemany(insertar, _registros(bloque, columnas))
+            if texto:
+                conn.executemany(insertar_texto, _terminos(bloque, texto, filas_cargadas + 1))
+            filas_cargadas += len(bloque)
+
+        # Ids únicos (igual que compute_row_ids): la clave sola si no se repite;
+        # si no, clave-hash de contenido, más el ordinal entre filas idénticas
+        conn.execute(f"""
+            UPDATE {TABLE} SET row_id = o.id
+            FROM (SELECT rowid AS fila,
+                         CASE WHEN COUNT(*) OVER (PARTITION BY substr(row_id, 1, {ROW_KEY_LENGTH})) = 1
+                              THEN substr(row_id, 1, {ROW_KEY_LENGTH})
+                              ELSE replace(row_id, ':', '-') || CASE n WHEN 0 THEN '' ELSE '-' || n END
+                         END AS id
+                  FROM (SELECT rowid, row_id, ROW_NUMBER() OVER (PARTITION BY row_id ORDER BY rowid) - 1 AS n
+                        FROM {TABLE})) AS o
+            WHERE {TABLE}.rowid = o.fila
+        """)
+        conn.execute(f"CREATE UNIQUE INDEX ix_{TABLE}_row_id ON {TABLE}(row_id)")
+
+        # Índices de filtro (igualdad y rangos) y de orden
+        simples = CUBE_DIMENSIONS + ["Producto_Codigo"] + numericas + SORT_INDEX_COLUMNS
+        for col in [col for col in dict.fromkeys(simples) if col in columnas]:
+            conn.execute(f"CREATE INDEX {_ident('ix_' + col)} ON {TABLE}({_ident(col)})")
+        for col in [col for col in SORT_INDEX_COLUMNS if col in columnas]:
+            conn.execute(f"CREATE INDEX {_ident('ix_orden_' + col)} ON {TABLE}(({_ident(col)} IS NULL), {_ident(col)})")
+
+        # Cubo de agregación: una fila por combinación de dimensiones (como AggregationCube)
+        dimensiones = [_ident(dim) for dim in CUBE_DIMENSIONS if dim in columnas]
+        if dimensiones:
+            metricas = "".join(
+                f", COUNT({c}), SUM({c}), MIN({c}), MAX({c})" for c in map(_ident, numericas)
+            )
+            nombres = "".join(
+                f", {_ident(col + '__' + m)}" for col in numericas for m in ("count", "sum", "min", "max")
+            )
+            conn.execute(f"CREATE TABLE {CUBE_TABLE} ({', '.join(dimensiones)}, filas{nombres})")
+            conn.execute(f"INSERT INTO {CUBE_TABLE} SELECT {', '.join(dimensiones)}, COUNT(*){metricas} "
+                         f"FROM {TABLE} GROUP BY {', '.join(dimensiones)}")
+
+        distribucion = _histogramas(conn, columnas, chunk_rows) if dimensiones else None
+
+        # Similitud entre bancos: arrays como .npy en una tabla, vocabulario en meta
+        similitud = _similitud(conn, columnas)
+        conn.execute(f"CREATE TABLE {SIMILARITY_TABLE} (nombre TEXT PRIMARY KEY, datos BLOB NOT NULL)")
+        if similitud is not None:
+            for nombre, array in similitud.arrays().items():
+                buffer = io.BytesIO()
+                np.save(buffer, array)
+                conn.execute(f"INSERT INTO {SIMILARITY_TABLE} VALUES (?, ?)", (nombre, buffer.getvalue()))
+
+        conn.execute("ANALYZE")
+
+        meta = {
+            "source_version": version,
+            "schema_version": SCHEMA_VERSION,
+            "columns": columnas,
+            "text_columns": texto,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            **_precalcular(conn, columnas),
+            "distribution": distribucion.to_dict() if distribucion is not None else None,
+            "similarity_banks": similitud.bancos if similitud is not None else None,
+            "similarity_terms": similitud.terms if similitud is not None else None,
+        }
+        conn.execute(f"CREATE TABLE {META_TABLE} (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        conn.executemany(f"INSERT INTO {META_TABLE} VALUES (?, ?)",
+                         [(clave, json.dumps(valor, ensure_ascii=False)) for clave, valor in meta.items()])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    segundos = (datetime.now() - inicio).total_seconds()
+    logger.info(f"Base SQLite {db_path.name} construida: {meta['stats']['total_registros']} registros "
+                f"(versión {version}, {segundos:.1f}s)")
+    return version
+
+
+# --- Traducción de filtros a SQL ---
+
+def _fts_match(query: Optional[str], columnas: List[str]) -> Optional[str]:
+    """
+    Consulta FTS5 equivalente a TextIndex.search: cada término (sin tildes ni
+    palabras vacías) debe aparecer por prefijo en alguna de `columnas`.
+    None si la consulta no tiene términos útiles: ese filtro no restringe.
+    """
+    terminos = tokenizar(query)
+    if not terminos:
+        return None
+    filtro = "{" + " ".join(columnas) + "}"
+    return " AND ".join(f'{filtro} : "{termino}"*' for termino in terminos)
+
+
+# Condición de texto: el parámetro es la consulta de _fts_match
+_TEXTO_SQL = f"rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)"
+
+
+class _Consulta:
+    """Condiciones WHERE con sus parámetros, acumuladas con AND."""
+
+    def __init__(self):
+        self.condiciones: List[str] = []
+        self.params: List[Any] = []
+
+    def agregar(self, condicion: str, *params: Any) -> None:
+        self.condiciones.append(condicion)
+        self.params.extend(params)
+
+    @property
+    def where(self) -> str:
+        return " WHERE " + " AND ".join(self.condiciones) if self.condiciones else ""
+
+
+class _TraductorExpresion:
+    """Compila el árbol de query_language a una condición SQL con parámetros."""
+
+    def __init__(self, numericas: List[str], texto: List[str]):
+        self.numericas = set(numericas)
+        self.texto = texto
+
+    def traducir(self, nodo: Node) -> Tuple[str, List[Any]]:
+        tipo = nodo[0]
+        if tipo in ("and", "or"):
+            partes = [self.traducir(h) for h in nodo[1]]
+            sql = "(" + f" {tipo.upper()} ".join(p[0] for p in partes) + ")"
+            return sql, [param for p in partes for param in p[1]]
+        if tipo == "not":
+            # Complemento: las filas donde el hijo es NULL (comparaciones con nulos) también cumplen
+            sql, params = self.traducir(nodo[1])
+            return f"NOT COALESCE({sql}, 0)", params
+
+        columna = _ident(nodo[1])
+        if tipo == "contains":
+            if nodo[1] not in self.texto:
+                raise QuerySyntaxError(f"CONTAINS sólo se admite en {', '.join(self.texto)}")
+            return _TEXTO_SQL, [_fts_match(nodo[2], [nodo[1]])]
+        if tipo == "null":
+            return f"{columna} IS NULL", []
+
+        literales = [nodo[3]] if tipo == "cmp" else list(nodo[2])
+        operador = nodo[2] if tipo == "cmp" else "in"
+        if nodo[1] in self.numericas:
+            if any(isinstance(v, str) for v in literales):
+                raise QuerySyntaxError(f"{nodo[1]} es numérica: compare con números")
+            literales = [float(v) for v in literales]
+        else:
+            if operador not in ("=", "!=", "in"):
+                raise QuerySyntaxError(f"{nodo[1]} no es numérica: sólo admite =, !=, IN, IS NULL o CONTAINS")
+            literales = [v if isinstance(v, str) else f"{v:g}" for v in literales]
+
+        if operador == "in":
+            return f"{columna} IN ({', '.join('?' * len(literales))})", literales
+        return f"{columna} {_OPERADORES_SQL[operador]} ?", literales
+
+
+# --- Pool de conexiones ---
+
+class _ConnectionPool:
+    """Conexiones aiosqlite de solo lectura sobre un archivo de base concreto."""
+
+    def __init__(self, db_path: Path, size: int):
+        self.db_path = db_path
+        self.size = size
+        self._libres: "asyncio.Queue" = asyncio.Queue()
+        self._cerrado = False
+
+    async def _conectar(self):
+        import aiosqlite
+
+        uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        conn = await aiosqlite.connect(uri, uri=True)
+        await conn.execute("PRAGMA query_only = 1")
+        await conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+        await conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+        return conn
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            self._libres.put_nowait(await self._conectar())
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self._libres.get()
+        try:
+            yield conn
+        finally:
+            if self._cerrado:
+                await conn.close()
+            else:
+                self._libres.put_nowait(conn)
+
+    async def dedicated(self):
+        """
+        Conexión propia, fuera del pool, para lecturas largas (exportaciones):
+        un cliente lento no retiene una de las conexiones que usan las demás
+        rutas. Quien la pide la cierra.
+        """
+        return await self._conectar()
+
+    async def close(self) -> None:
+        """Cierra las conexiones libres; las que están en uso se cierran al devolverse."""
+        self._cerrado = True
+        while not self._libres.empty():
+            await self._libres.get_nowait().close()
+
+
+class _VersionServida:
+    """
+    Lo que sirve una versión de la base: metadatos, pool, histogramas y
+    similitud, publicados juntos. Las vistas abiertas la retienen: al
+    reemplazarla, su pool se cierra cuando termina la última.
+    """
+
+    def __init__(self, meta: Dict[str, Any], pool: _ConnectionPool, similarity: Optional[SimilarityIndex]):
+        self.meta = meta
+        self.pool = pool
+        self.similarity = similarity
+        self.distribution = DistributionCube.from_dict(meta["distribution"]) if meta.get("distribution") else None
+        self.loaded_at = datetime.now()
+        self._vistas = 0
+        self._retirada = False
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("source_version", "empty")
+
+    def tomar(self) -> None:
+        self._vistas += 1
+
+    async def soltar(self) -> None:
+        self._vistas -= 1
+        if self._retirada and self._vistas == 0:
+            await self.pool.close()
+
+    async def retirar(self) -> None:
+        self._retirada = True
+        if self._vistas == 0:
+            await self.pool.close()
+
+
+class SQLiteViewerBackend(ViewerBackend):
+    """
+    Mismas consultas que ViewerService, resueltas con SQL sobre la base
+    construida desde el CSV. Cada vista retiene la versión publicada al
+    abrirse (metadatos y pool); una recarga publica una base y un pool nuevos
+    sin cortar los requests en curso.
+    """
+
+    def __init__(self, csv_path: Path, db_path: Path, pool_size: int = SQLITE_POOL_SIZE):
+        self.csv_path = csv_path
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._actual: Optional[_VersionServida] = None
+        self._reload_lock = asyncio.Lock()
+        self._sql_cache: "OrderedDict[Tuple[str, str], Tuple[str, List[Any], str]]" = OrderedDict()
+
+    # --- Ciclo de vida ---
+
+    async def open(self) -> None:
+        """Construye la base si falta o está desactualizada y abre el pool."""
+        await self.reload()
+
+    async def close(self) -> None:
+        if self._actual is not None:
+            await self._actual.retirar()
+            self._actual = None
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Reconstruye la base si cambió el CSV y publica un pool nuevo.
+        Retorna True si cambió la versión servida.
+        """
+        async with self._reload_lock:
+            if self.csv_path.exists():
+                try:
+                    await asyncio.to_thread(build_database, self.csv_path, self.db_path, force=force)
+                except Exception as e:
+                    logger.error(f"Error construyendo {self.db_path} desde {self.csv_path}: {e}")
+                    if self._actual is not None:
+                        return False
+                    raise
+            elif not self.db_path.exists():
+                raise FileNotFoundError(f"No existe {self.csv_path} ni la base {self.db_path}")
+
+            meta = await asyncio.to_thread(read_meta, self.db_path)
+            if self._actual is not None and not force and meta.get("source_version") == self.version:
+                return False
+
+            similarity = await asyncio.to_thread(read_similarity, self.db_path, meta)
+            pool = _ConnectionPool(self.db_path, self.pool_size)
+            await pool.open()
+            anterior, self._actual = self._actual, _VersionServida(meta, pool, similarity)
+            self._sql_cache.clear()
+            if anterior is not None:
+                await anterior.retirar()
+            logger.info(f"Backend SQLite sirviendo la versión {self.version} "
+                        f"({meta['stats']['total_registros']} registros)")
+            return True
+
+    @property
+    def version(self) -> str:
+        return self._actual.version if self._actual is not None else "empty"
+
+    def info(self) -> Dict:
+        actual = self._actual
+        if actual is None:
+            return {"version": "empty", "total_registros": 0, "loaded_at": None}
+        return {
+            "version": actual.version,
+            "total_registros": actual.meta.get("stats", {}).get("total_registros", 0),
+            "loaded_at": actual.loaded_at.isoformat(timespec="seconds"),
+        }
+
+    @asynccontextmanager
+    async def view(self) -> AsyncIterator["SQLiteView"]:
+        actual = self._actual
+        if actual is None:
+            raise RuntimeError("El backend SQLite no está abierto")
+        actual.tomar()
+        try:
+            yield SQLiteView(self, actual)
+        finally:
+            await actual.soltar()
+
+
+class SQLiteView(DatasetView):
+    """Consultas SQL sobre la versión de la base que retiene la vista."""
+
+    def __init__(self, backend: SQLiteViewerBackend, servida: _VersionServida):
+        self.backend = backend
+        self.servida = servida
+        self.meta = servida.meta
+        self.version = servida.version
+
+    @property
+    def columns(self) -> List[str]:
+        return self.meta.get("columns", [])
+
+    async def _fetchall(self, sql: str, params: List[Any]) -> List[tuple]:
+        async with self.servida.pool.connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    # --- Consultas ---
+
+    async def get_filter_options(self) -> Dict[str, List[str]]:
+        return self.meta["filters"]
+
+    async def get_stats(self) -> Dict:
+        return dict(self.meta["stats"])
+
+    async def get_distribution(self,
+                               columna: str,
+                               group_by: Optional[List[str]] = None,
+                               bins: int = 20,
+                               quantiles: Optional[List[float]] = None,
+                               **filters: CategoricalFilter) -> Dict:
+        """Como ViewerService.get_distribution, con los histogramas guardados en meta."""
+        distribution = self.servida.distribution
+        if distribution is None or columna not in distribution.columnas:
+            raise InvalidFieldsError(f"Columna no numérica: {columna}")
+        filtros = {
+            dim: [valores] if isinstance(valores, str) else valores
+            for dim, valores in filters.items() if valores
+        }
+        group_by = group_by or []
+        return {
+            "columna": columna,
+            "group_by": group_by,
+            "grupos": distribution.query(columna, filtros, group_by, bins, quantiles or DEFAULT_QUANTILES),
+        }
+
+    async def get_aggregate_stats(self, group_by: Optional[List[str]] = None, **filters: CategoricalFilter) -> Dict:
+        """Como ViewerService.get_aggregate_stats: agrega filas de la tabla cubo, no de tarifarios."""
+        dimensiones = [dim for dim in CUBE_DIMENSIONS if dim in self.columns]
+        group_by = [dim for dim in (group_by or []) if dim in dimensiones]
+        numericas = numeric_columns(self.columns)
+        if not dimensiones:
+            return {"group_by": [], "grupos": []}
+
+        consulta = _Consulta()
+        for dim, valores in filters.items():
+            if valores and dim in dimensiones:
+                valores = [valores] if isinstance(valores, str) else list(valores)
+                consulta.agregar(f"{_ident(dim)} IN ({', '.join('?' * len(valores))})", *valores)
+
+        metricas = "".join(
+            f", SUM({_ident(col + '__count')}), SUM({_ident(col + '__sum')}), "
+            f"MIN({_ident(col + '__min')}), MAX({_ident(col + '__max')})"
+            for col in numericas
+        )
+        claves = [_ident(dim) for dim in group_by]
+        sql = f"SELECT {''.join(c + ', ' for c in claves)}SUM(filas){metricas} FROM {CUBE_TABLE}{consulta.where}"
+        if claves:
+            sql += f" GROUP BY {', '.join(claves)} ORDER BY " + ", ".join(f"{c} IS NULL, {c}" for c in claves)
+
+        grupos = []
+        for fila in await self._fetchall(sql, consulta.params):
+            total = fila[len(group_by)]
+            if not total:
+                continue
+            valores = fila[len(group_by) + 1:]
+            metricas_grupo = {}
+            for i, col in enumerate(numericas):
+                count, suma, minimo, maximo = valores[4 * i:4 * i + 4]
+                metricas_grupo[col] = {
+                    "count": count,
+                    "mean": suma / count if count else None,
+                    "min": minimo,
+                    "max": maximo,
+                }
+            grupos.append({
+                "claves": dict(zip(group_by, fila[:len(group_by)])),
+                "total_registros": total,
+                "metricas": metricas_grupo,
+            })
+        return {"group_by": group_by, "grupos": grupos}
+
+    def _filtros_sql(self,
+                     banco: CategoricalFilter = None,
+                     tipo: CategoricalFilter = None,
+                     moneda: CategoricalFilter = None,
+                     producto: Optional[str] = None,
+                     concepto: Optional[str] = None,
+                     q: Optional[str] = None,
+                     tasa_mn_gte: Optional[float] = None,
+                     tasa_mn_lte: Optional[float] = None,
+                     tasa_me_gte: Optional[float] = None,
+                     tasa_me_lte: Optional[float] = None) -> _Consulta:
+        """Los mismos filtros que ViewerService._get_filtered_bitmap, como condiciones SQL."""
+        consulta = _Consulta()
+        for columna, valores in (("Banco", banco), ("Tipo", tipo), ("Moneda", moneda)):
+            if valores:
+                valores = [valores] if isinstance(valores, str) else list(valores)
+                consulta.agregar(f"{_ident(columna)} IN ({', '.join('?' * len(valores))})", *valores)
+
+        for columna, gte, lte in (("Tasa_Porcentaje_MN", tasa_mn_gte, tasa_mn_lte),
+                                  ("Tasa_Porcentaje_ME", tasa_me_gte, tasa_me_lte)):
+            if gte is not None:
+                consulta.agregar(f"{_ident(columna)} >= ?", gte)
+            if lte is not None:
+                consulta.agregar(f"{_ident(columna)} <= ?", lte)
+
+        texto = self.meta.get("text_columns", [])
+        for query, columnas in ((producto, ["Producto_Nombre"]), (concepto, ["Concepto"]), (q, texto)):
+            columnas = [col for col in columnas if col in texto]
+            match = _fts_match(query, columnas) if columnas else None
+            if match is not None:
+                consulta.agregar(_TEXTO_SQL, match)
+        return consulta
+
+    def _orden_sql(self, sort_by: Optional[str], ascending: bool) -> str:
+        """ORDER BY con nulos al final y empates por posición de fila (como ViewerIndex.sort_order)."""
+        if not sort_by:
+            return " ORDER BY rowid"
+        columna = _ident(sort_by)
+        if ascending:
+            return f" ORDER BY {columna} IS NULL, {columna}, rowid"
+        return f" ORDER BY {columna} DESC, rowid"
+
+    def _items(self, filas: List[tuple], columnas: List[str]) -> List[Dict]:
+        """Filas (row_id, columnas...) a items con el id primero."""
+        nombres = [ID_FIELD] + columnas
+        return [dict(zip(nombres, fila)) for fila in filas]
+
+    def _select(self, columnas: List[str], extra: str = "") -> str:
+        return f"SELECT {', '.join(['row_id', *map(_ident, columnas)])}{extra} FROM {TABLE}"
+
+    async def get_tarifarios(self,
+                             skip: int = 0,
+                             limit: int = 20,
+                             cursor: Optional[str] = None,
+                             sort_by: Optional[str] = None,
+                             sort_order: str = 'asc',
+                             fields: Optional[List[str]] = None,
+                             **filters) -> Dict:
+        """
+        Como ViewerService.get_tarifarios. El cursor guarda el valor de orden y
+        el rowid de la última fila entregada, así que la página siguiente es una
+        búsqueda por índice (keyset) en lugar de un OFFSET.
+        """
+        vacio = {"total_items": 0, "items": [], "total_pages": 0, "current_page": 1, "next_cursor": None}
+        columnas = proyectar_campos(self.columns, fields)  # campos inválidos -> InvalidFieldsError
+        if not (sort_by and sort_by in self.columns):
+            sort_by = None
+        ascending = sort_order == 'asc'
+        huella = filters_fingerprint(filters)
+
+        consulta = self._filtros_sql(**filters)
+        estado = None
+        if cursor:
+            estado = decode_cursor(cursor)
+            if estado.get("v") != self.version:
+                raise ExpiredCursorError("El dataset cambió; vuelva a pedir la primera página")
+            if estado.get("s") != (sort_by or "") or estado.get("o") != sort_order or estado.get("f") != huella:
+                raise InvalidCursorError("El cursor no corresponde a estos filtros u orden")
+
+        if consulta.condiciones:
+            total_items = (await self._fetchall(f"SELECT COUNT(*) FROM {TABLE}{consulta.where}", consulta.params))[0][0]
+        else:
+            total_items = self.meta["stats"]["total_registros"]
+        if total_items == 0:
+            return vacio
+        total_pages = (total_items + limit - 1) // limit
+
+        pagina = _Consulta()
+        pagina.condiciones, pagina.params = list(consulta.condiciones), list(consulta.params)
+        if estado is not None:
+            self._despues_de(pagina, sort_by, ascending, estado)
+        extra = f", rowid, {_ident(sort_by)}" if sort_by else ", rowid, NULL"
+        sql = self._select(columnas, extra) + pagina.where + self._orden_sql(sort_by, ascending) + " LIMIT ?"
+        params = pagina.params + [limit + 1]
+        if estado is None:
+            sql += " OFFSET ?"
+            params.append(skip)
+        filas = await self._fetchall(sql, params)
+
+        hay_mas = len(filas) > limit
+        filas = filas[:limit]
+        next_cursor = None
+        if hay_mas:
+            ultima = filas[-1]
+            next_cursor = encode_cursor({
+                "v": self.version, "s": sort_by or "", "o": sort_order, "f": huella,
+                "p": ultima[-2], "k": ultima[-1],
+            })
+
+        return {
+            "total_items": total_items,
+            "items": self._items([fila[:-2] for fila in filas], columnas),
+            "total_pages": total_pages,
+            "current_page": None if estado is not None else (skip // limit) + 1,
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    def _despues_de(consulta: _Consulta, sort_by: Optional[str], ascending: bool, estado: Dict) -> None:
+        """Condición keyset: filas posteriores a (valor, rowid) en el orden de _orden_sql."""
+        ultima_fila = estado["p"]
+        if not sort_by:
+            consulta.agregar("rowid > ?", ultima_fila)
+            return
+        columna = _ident(sort_by)
+        valor = estado.get("k")
+        if valor is None:
+            # La última fila ya era nula: quedan los nulos siguientes
+            consulta.agregar(f"({columna} IS NULL AND rowid > ?)", ultima_fila)
+            return
+        mayor = ">" if ascending else "<"
+        consulta.agregar(
+            f"({columna} IS NULL OR {columna} {mayor} ? OR ({columna} = ? AND rowid > ?))",
+            valor, valor, ultima_fila,
+        )
+
+    async def get_tarifario(self, row_id: str) -> Optional[Dict]:
+        filas = await self._fetchall(self._select(self.columns) + " WHERE row_id = ?", [row_id])
+        return self._items(filas, self.columns)[0] if filas else None
+
+    async def compare(self, row_ids: List[str]) -> Dict:
+        """Como ViewerService.compare, leyendo las filas por el índice de row_id."""
+        pedidos = list(dict.fromkeys(row_ids))
+        filas = await self._fetchall(
+            self._select(self.columns) + f" WHERE row_id IN ({', '.join('?' * len(pedidos))})", pedidos
+        ) if pedidos else []
+        por_id = {item[ID_FIELD]: item for item in self._items(filas, self.columns)}
+        items = [por_id[row_id] for row_id in pedidos if row_id in por_id]
+        return {
+            "ids": [item[ID_FIELD] for item in items],
+            "no_encontrados": [row_id for row_id in pedidos if row_id not in por_id],
+            "items": items,
+            "filas": filas_comparacion(items, self.columns, numeric_columns(self.columns)),
+        }
+
+    async def get_equivalentes(self,
+                               row_id: Optional[str] = None,
+                               q: Optional[str] = None,
+                               k: int = 3,
+                               bancos: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Como ViewerService.get_equivalentes, con el índice de similitud guardado
+        en la base: las posiciones del índice son rowid - 1.
+        """
+        similarity = self.servida.similarity
+        if row_id is not None:
+            filas = await self._fetchall(f"SELECT rowid FROM {TABLE} WHERE row_id = ?", [row_id])
+            if not filas:
+                return None
+            vecinos = similarity.similar_to_row(filas[0][0] - 1, k) if similarity is not None else {}
+        elif similarity is not None:
+            vecinos = await asyncio.to_thread(similarity.similar_to_text, q or "", k)
+        else:
+            vecinos = {}
+        vecinos = {banco: filas for banco, filas in vecinos.items() if not bancos or banco in bancos}
+
+        rowids = [fila + 1 for filas in vecinos.values() for fila, _ in filas]
+        leidas = await self._fetchall(
+            self._select(self.columns, ", rowid") + f" WHERE rowid IN ({', '.join('?' * len(rowids))})", rowids
+        ) if rowids else []
+        por_rowid = {fila[-1]: item for fila, item in zip(leidas, self._items([f[:-1] for f in leidas], self.columns))}
+
+        grupos = []
+        for banco, filas in vecinos.items():
+            items = []
+            for fila, score in filas:
+                item = dict(por_rowid[fila + 1])
+                item["similitud"] = round(score, 4)
+                items.append(item)
+            grupos.append({"banco": banco, "items": items})
+
+        return {"id": row_id, "q": q if row_id is None else None, "bancos": grupos}
+
+    def _compilar_expresion(self, where: str) -> Tuple[str, List[Any], str]:
+        """(condición SQL, parámetros, expresión normalizada), cacheada por expresión normalizada."""
+        arbol = parse_expression(where, self.columns)
+        expresion = to_text(arbol)
+        cache = self.backend._sql_cache
+        clave = (self.version, expresion)
+        compilada = cache.get(clave)
+        if compilada is None:
+            traductor = _TraductorExpresion(numeric_columns(self.columns), self.meta.get("text_columns", []))
+            sql, params = traductor.traducir(arbol)
+            compilada = (sql, params, expresion)
+            cache[clave] = compilada
+            while len(cache) > SQL_CACHE_SIZE:
+                cache.popitem(last=False)
+        cache.move_to_end(clave)
+        return compilada
+
+    async def query_tarifarios(self,
+                               where: str,
+                               skip: int = 0,
+                               limit: int = 20,
+                               sort_by: Optional[str] = None,
+                               sort_order: str = 'asc',
+                               fields: Optional[List[str]] = None) -> Dict:
+        """
+        Como ViewerService.query_tarifarios; el plan es el EXPLAIN QUERY PLAN
+        de SQLite para la condición compilada.
+        """
+        condicion, params, expresion = self._compilar_expresion(where)
+        columnas = proyectar_campos(self.columns, fields)  # campos inválidos -> InvalidFieldsError
+        if not (sort_by and sort_by in self.columns):
+            sort_by = None
+
+        where_sql = f" WHERE {condicion}"
+        total_items = (await self._fetchall(f"SELECT COUNT(*) FROM {TABLE}{where_sql}", params))[0][0]
+        filas = await self._fetchall(
+            self._select(columnas) + where_sql + self._orden_sql(sort_by, sort_order == 'asc') + " LIMIT ? OFFSET ?",
+            params + [limit, skip],
+        ) if total_items else []
+        plan = await self._fetchall(f"EXPLAIN QUERY PLAN SELECT rowid FROM {TABLE}{where_sql}", params)
+
+        # Sangría según el nodo padre, como en el plan del backend en memoria
+        profundidad = {0: -1}
+        lineas = []
+        for nodo, padre, _, detalle in plan:
+            profundidad[nodo] = profundidad.get(padre, -1) + 1
+            lineas.append("  " * profundidad[nodo] + detalle)
+
+        return {
+            "total_items": total_items,
+            "items": self._items(filas, columnas),
+            "total_pages": (total_items + limit - 1) // limit,
+            "current_page": (skip // limit) + 1,
+            "expresion": expresion,
+            "plan": lineas,
+        }
+
+    async def export(self,
+                     formato: str,
+                     sort_by: Optional[str] = None,
+                     sort_order: str = 'asc',
+                     **filters) -> AsyncIterator[bytes]:
+        """
+        Exporta las filas filtradas leyendo el cursor por bloques de
+        EXPORT_CHUNK_ROWS, con una conexión dedicada: la respuesta dura lo que
+        tarde el cliente en recibirla y no debe ocupar el pool. La conexión se
+        abre acá y se comprueba que lea la versión de la vista; si una recarga
+        ya reemplazó el archivo, ExpiredCursorError.
+        """
+        if not (sort_by and sort_by in self.columns):
+            sort_by = None
+        columnas = self.columns
+        encoder = encoder_for(formato, columnas)
+        consulta = self._filtros_sql(**filters)
+        sql = (f"SELECT {', '.join(map(_ident, columnas))} FROM {TABLE}"
+               + consulta.where + self._orden_sql(sort_by, sort_order == 'asc'))
+
+        conn = await self.servida.pool.dedicated()
+        try:
+            async with conn.execute(f"SELECT valor FROM {META_TABLE} WHERE clave = 'source_version'") as cursor:
+                fila = await cursor.fetchone()
+            if fila is None or json.loads(fila[0]) != self.version:
+                raise ExpiredCursorError("El dataset cambió; vuelva a pedir la exportación")
+        except BaseException:
+            await conn.close()
+            raise
+
+        async def bloques() -> AsyncIterator[bytes]:
+            try:
+                yield encoder.start()
+                async with conn.execute(sql, consulta.params) as cursor:
+                    while True:
+                        filas = await cursor.fetchmany(EXPORT_CHUNK_ROWS)
+                        if not filas:
+                            break
+                        yield encoder.encode(pd.DataFrame.from_records(filas, columns=columnas))
+                yield encoder.finish()
+            finally:
+                await conn.close()
+
+        return bloques()
@@ -0,0 +1,118 @@
+"""
+Índice invertido para la búsqueda de texto del visor.
+Normaliza el texto en español (minúsculas, sin tildes ni diéresis, ñ -> n)
+y resuelve cada término de la búsqueda por prefijo contra un vocabulario ordenado.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto indexadas
+TEXT_COLUMNS = ["Producto_Nombre", "Concepto", "Descripcion_Breve"]
+
+# Palabras vacías que no aportan al filtrado por prefijo ("de" coincidiría con "débito")
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "o", "para", "por", "se", "su", "sus", "u", "un", "una", "y",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Pasa a minúsculas y elimina tildes/diacríticos ("Crédito" -> "credito")."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    """Divide un texto normalizado en términos, descartando palabras vacías."""
+    if not texto:
+        return []
+    return [t for t in _TOKEN_RE.findall(normalizar_texto(str(texto))) if t not in STOPWORDS]
+
+
+class TextIndex:
+    """
+    Índice invertido término -> posiciones de fila, uno por columna.
+
+    Cada término de la consulta debe coincidir (por prefijo) con algún término
+    de la fila; los términos se combinan con AND.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 columns: Iterable[str] = TEXT_COLUMNS,
+                 postings: Optional[Dict[str, Dict[str, np.ndarray]]] = None):
+        """Indexa `columns` de `df`, o adopta `postings` ya calculados."""
+        self.n_rows = len(df)
+        self.vocab: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+
+        if postings is not None:
+            self.postings = postings
+            self.vocab = {col: sorted(terminos) for col, terminos in postings.items()}
+            return
+
+        for col in columns:
+            if col in df.columns:
+                self._index_column(col, df[col])
+
+    def _index_column(self, col: str, values: pd.Series) -> None:
+        # Tokenizar sólo los valores distintos; los nombres de producto se repiten mucho
+        codes, uniques = pd.factorize(values)
+
+        # Agrupar las posiciones de fila por código una sola vez
+        orden = np.argsort(codes, kind="stable")
+        limites = np.searchsorted(codes[orden], np.arange(len(uniques) + 1))
+
+        partes: Dict[str, List[np.ndarray]] = {}
+        for code, value in enumerate(uniques):
+            filas = orden[limites[code]:limites[code + 1]]
+            for token in set(tokenizar(value)):
+                partes.setdefault(token, []).append(filas)
+
+        self.postings[col] = {
+            token: np.sort(np.concatenate(lista)).astype(np.int64)
+            for token, lista in partes.items()
+        }
+        self.vocab[col] = sorted(self.postings[col])
+
+    def _prefix_rows(self, col: str, prefijo: str) -> np.ndarray:
+        """Filas con algún término de `col` que empieza por `prefijo`."""
+        vocab = self.vocab.get(col, [])
+        postings = self.postings.get(col, {})
+        partes = []
+        i = bisect_left(vocab, prefijo)
+        while i < len(vocab) and vocab[i].startswith(prefijo):
+            partes.append(postings[vocab[i]])
+            i += 1
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        if len(partes) == 1:
+            return partes[0]
+        return np.unique(np.concatenate(partes))
+
+    def search(self, query: str, columns: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        Devuelve las posiciones de fila (ordenadas) que cumplen la consulta en
+        cualquiera de `columns`, o None si la consulta no tiene términos útiles
+        (sólo palabras vacías o símbolos, p. ej. "de"): ese filtro no restringe.
+        """
+        terminos = tokenizar(query)
+        if not terminos:
+            return None
+
+        columns = list(columns)
+        resultado: Optional[np.ndarray] = None
+        for termino in terminos:
+            partes = [self._prefix_rows(col, termino) for col in columns]
+            filas = partes[0] if len(partes) == 1 else np.unique(np.concatenate(partes))
+            resultado = filas if resultado is None else np.intersect1d(resultado, filas, assume_unique=True)
+            if not len(resultado):
+                break
+        return resultado
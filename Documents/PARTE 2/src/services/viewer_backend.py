@@ -0,0 +1,116 @@
+"""
+Interfaz común de los backends del visor: el snapshot en memoria
+(ViewerService) y la base SQLite (SQLiteViewerBackend).
+
+El router sólo conoce esta interfaz. Cada request abre una vista fijada a una
+versión del dataset y hace todas sus consultas sobre ella:
+
+    async with backend.view() as vista:
+        data = await vista.get_tarifarios(...)
+        data["dataset_version"] = vista.version
+
+Así la versión que se informa (y con la que se cachea la respuesta) es la que
+resolvió la consulta, aunque una recarga publique otra mientras tanto.
+"""
+from abc import ABC, abstractmethod
+from typing import AsyncContextManager, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+
+class DatasetView(ABC):
+    """Consultas sobre una versión concreta del dataset (`version`)."""
+
+    version: str
+
+    @abstractmethod
+    async def get_filter_options(self) -> Dict[str, List[str]]:
+        """Valores únicos de Banco, Tipo y Moneda para los controles de filtro."""
+
+    @abstractmethod
+    async def get_stats(self) -> Dict:
+        """Estadísticas generales del dataset."""
+
+    @abstractmethod
+    async def get_aggregate_stats(self, group_by: Optional[List[str]] = None, **filters) -> Dict:
+        """count/mean/min/max por columna numérica, filtrando y agrupando por dimensiones del cubo."""
+
+    @abstractmethod
+    async def get_distribution(self,
+                               columna: str,
+                               group_by: Optional[List[str]] = None,
+                               bins: int = 20,
+                               quantiles: Optional[List[float]] = None,
+                               **filters) -> Dict:
+        """Histograma y cuantiles de una columna numérica. InvalidFieldsError si no lo es."""
+
+    @abstractmethod
+    async def get_tarifarios(self,
+                             skip: int = 0,
+                             limit: int = 20,
+                             cursor: Optional[str] = None,
+                             sort_by: Optional[str] = None,
+                             sort_order: str = 'asc',
+                             fields: Optional[List[str]] = None,
+                             **filters) -> Dict:
+        """Página filtrada y ordenada, por offset o por cursor (ver ViewerService.get_tarifarios)."""
+
+    @abstractmethod
+    async def get_tarifario(self, row_id: str) -> Optional[Dict]:
+        """Fila por su id estable; None si no existe."""
+
+    @abstractmethod
+    async def compare(self, row_ids: List[str]) -> Dict:
+        """Filas pedidas alineadas por atributo, más los ids que no existen."""
+
+    @abstractmethod
+    async def get_equivalentes(self,
+                               row_id: Optional[str] = None,
+                               q: Optional[str] = None,
+                               k: int = 3,
+                               bancos: Optional[List[str]] = None) -> Optional[Dict]:
+        """Filas equivalentes por banco a una fila o a un texto libre; None si `row_id` no existe."""
+
+    @abstractmethod
+    async def query_tarifarios(self,
+                               where: str,
+                               skip: int = 0,
+                               limit: int = 20,
+                               sort_by: Optional[str] = None,
+                               sort_order: str = 'asc',
+                               fields: Optional[List[str]] = None) -> Dict:
+        """Filtra con una expresión de query_language. QuerySyntaxError si no es válida."""
+
+    @abstractmethod
+    async def export(self,
+                     formato: str,
+                     sort_by: Optional[str] = None,
+                     sort_order: str = 'asc',
+                     **filters) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+        """
+        Bytes del archivo exportado, por bloques. Lo que fija la versión se
+        toma antes de devolver el iterador: el envío puede seguir después de
+        cerrar la vista.
+        """
+
+
+class ViewerBackend(ABC):
+    """Ciclo de vida del dataset servido y apertura de vistas."""
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Prepara el dataset (y la recarga en caliente, si corresponde)."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Libera conexiones e hilos."""
+
+    @abstractmethod
+    async def reload(self, force: bool = False) -> bool:
+        """Publica la versión actual del CSV. True si cambió la versión servida."""
+
+    @abstractmethod
+    def info(self) -> Dict:
+        """Versión, filas y hora de carga del dataset servido."""
+
+    @abstractmethod
+    def view(self) -> AsyncContextManager[DatasetView]:
+        """Vista fijada a la versión vigente, válida hasta salir del contexto."""
@@ -0,0 +1,164 @@
+"""
+Índices en memoria para el visor de datos.
+Se construyen una sola vez al cargar el CSV y permiten resolver los filtros
+como intersecciones de bitmaps, sin copiar el DataFrame en cada request.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Columnas de baja cardinalidad indexadas con códigos + bitmaps por valor
+CATEGORICAL_COLUMNS = ["Banco", "Tipo", "Moneda"]
+
+# Prefijos de las columnas numéricas del dataset (tasas y montos),
+# convertidas a float una sola vez
+NUMERIC_PREFIXES = ("Tasa_", "Monto_")
+
+
+def numeric_columns(columns: Iterable[str]) -> List[str]:
+    """Columnas numéricas (Tasa_*/Monto_*) en el orden en que aparecen."""
+    return [col for col in columns if col.startswith(NUMERIC_PREFIXES)]
+
+
+class ViewerIndex:
+    """
+    Índice de filtrado sobre un DataFrame inmutable.
+
+    - codes: códigos categóricos (int32, -1 para nulos) por columna.
+    - bitmaps: un bitmap empaquetado (np.packbits) por cada valor distinto.
+    - numeric: arrays float64 pre-convertidos para las columnas de tasa y monto.
+    - órdenes de clasificación por columna (permutación + rango), calculados
+      la primera vez que se piden y reutilizados durante toda la vida del snapshot.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 codes: Optional[Dict[str, np.ndarray]] = None,
+                 categories: Optional[Dict[str, List[str]]] = None,
+                 bitmaps: Optional[Dict[str, Dict[str, np.ndarray]]] = None):
+        """
+        Construye el índice desde `df`, o lo adjunta a arrays ya calculados
+        (`codes`/`categories`/`bitmaps`, p. ej. mapeados desde el store compartido).
+        """
+        self._df = df
+        self._sort_orders: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray]] = {}
+        self._sort_lock = threading.Lock()
+        self.n_rows = len(df)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self.numeric: Dict[str, np.ndarray] = {}
+
+        if codes is not None:
+            self.codes, self.categories, self.bitmaps = codes, categories or {}, bitmaps or {}
+
+        for col in CATEGORICAL_COLUMNS:
+            if col not in df.columns or col in self.codes:
+                continue
+            codes, uniques = pd.factorize(df[col])
+            codes = codes.astype(np.int32)
+            self.codes[col] = codes
+            self.categories[col] = [str(value) for value in uniques]
+            self.bitmaps[col] = {
+                str(value): np.packbits(codes == i)
+                for i, value in enumerate(uniques)
+            }
+
+        # Si la columna ya es float64 (snapshot tipado) esto es una vista, no una copia
+        for col in numeric_columns(df.columns):
+            self.numeric[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+
+    # --- Construcción de bitmaps ---
+
+    def all_rows(self) -> np.ndarray:
+        """Bitmap con todas las filas activas."""
+        return np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def none_rows(self) -> np.ndarray:
+        """Bitmap vacío."""
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def from_mask(self, mask: np.ndarray) -> np.ndarray:
+        """Empaqueta una máscara booleana como bitmap."""
+        return np.packbits(np.asarray(mask, dtype=bool))
+
+    def from_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Bitmap con las posiciones de fila indicadas."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def match(self, column: str, values: Union[str, Iterable[str]]) -> np.ndarray:
+        """Bitmap de las filas cuyo valor en `column` está en `values` (unión)."""
+        if isinstance(values, str):
+            values = [values]
+
+        bitmaps = self.bitmaps.get(column, {})
+        result = self.none_rows()
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def range(self, column: str, gte: Optional[float] = None, lte: Optional[float] = None) -> np.ndarray:
+        """Bitmap de las filas con `gte <= column <= lte` (los nulos nunca coinciden)."""
+        values = self.numeric[column]
+        mask = ~np.isnan(values)
+        if gte is not None:
+            mask &= values >= gte
+        if lte is not None:
+            mask &= values <= lte
+        return self.from_mask(mask)
+
+    # --- Resolución ---
+
+    def to_mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """Desempaqueta un bitmap a máscara booleana de longitud n_rows."""
+        return np.unpackbits(bitmap, count=self.n_rows).view(bool)
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        """Posiciones (iloc) de las filas activas en el bitmap."""
+        return np.flatnonzero(self.to_mask(bitmap))
+
+    def count(self, bitmap: np.ndarray) -> int:
+        """Número de filas activas en el bitmap."""
+        return int(np.unpackbits(bitmap, count=self.n_rows).sum())
+
+    # --- Órdenes precalculados ---
+
+    def _sort_entry(self, column: Optional[str], ascending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        key = (column or "", ascending)
+        entry = self._sort_orders.get(key)
+        if entry is not None:
+            return entry
+
+        with self._sort_lock:
+            entry = self._sort_orders.get(key)
+            if entry is None:
+                if not column:
+                    # Sin columna: orden natural del archivo
+                    order = np.arange(self.n_rows, dtype=np.int64)
+                else:
+                    if column in self.numeric:
+                        keys = pd.Series(self.numeric[column])
+                    else:
+                        keys = self._df[column].reset_index(drop=True)
+                    # Estable: los empates quedan ordenados por posición de fila
+                    order = keys.sort_values(
+                        ascending=ascending, kind='stable', na_position='last'
+                    ).index.to_numpy(dtype=np.int64)
+                rank = np.empty_like(order)
+                rank[order] = np.arange(self.n_rows, dtype=np.int64)
+                entry = (order, rank)
+                self._sort_orders[key] = entry
+        return entry
+
+    def sort_order(self, column: Optional[str], ascending: bool = True) -> np.ndarray:
+        """Permutación de todas las filas ordenadas por `column` (nulos al final)."""
+        return self._sort_entry(column, ascending)[0]
+
+    def sort_rank(self, column: Optional[str], ascending: bool = True) -> np.ndarray:
+        """Posición de cada fila dentro de `sort_order(column, ascending)`."""
+        return self._sort_entry(column, ascending)[1]
@@ -1,38 +1,231 @@
 """
 Servicio para manejar la lógica de negocio del visor de datos.
 Carga y procesa el DataFrame de Pandas.
+
+Los datos viven en un ViewerSnapshot inmutable. Al recargar se construye un
+snapshot nuevo (con sus índices) y se reemplaza la referencia de forma atómica;
+los requests en curso terminan sobre el snapshot que tomaron al empezar.
+
+ViewerService es el backend en memoria de la interfaz de viewer_backend: cada
+vista fija un snapshot y resuelve sus consultas en un hilo aparte.
 """
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional
-from fastapi.encoders import jsonable_encoder
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from loguru import logger
 
-class ViewerService:
-    def __init__(self, csv_path: Path):
-        self.df = self._load_data(csv_path)
+from src.services.distribution_cube import DEFAULT_QUANTILES
+from src.services.exporter import iter_export
+from src.services.json_encoding import InvalidFieldsError, column_records, proyectar_campos
+from src.services.pagination import (
+    ExpiredCursorError,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    filters_fingerprint,
+)
+from src.services.query_planner import QueryPlanner
+from src.services.text_index import TEXT_COLUMNS
+from src.services.snapshot_store import SnapshotStore
+from src.services.viewer_backend import DatasetView, ViewerBackend
+from src.services.viewer_snapshot import ViewerSnapshot, file_signature, file_version
 
-    def _load_data(self, csv_path: Path) -> pd.DataFrame:
-        """Carga los datos desde el archivo CSV a un DataFrame de Pandas."""
-        if not csv_path.exists():
-            return pd.DataFrame()
-        
-        df = pd.read_csv(csv_path)
-        return df.astype(object).where(pd.notna(df), None)
+# Un filtro categórico acepta un valor o varios (unión)
+CategoricalFilter = Optional[Union[str, List[str]]]
+
+# Consultas paginadas por cursor cuya máscara y total se conservan
+CURSOR_CACHE_SIZE = 32
+
+
+def filas_comparacion(items: List[Dict], columns: Iterable[str], numericas: Iterable[str]) -> List[Dict]:
+    """
+    Una fila por atributo con el valor de cada item; en las columnas numéricas
+    `mejor` marca el valor más bajo (el más conveniente para el cliente).
+    """
+    numericas = set(numericas)
+    filas = []
+    for atributo in columns:
+        if atributo == "Producto_Codigo":
+            continue
+        valores = [item.get(atributo) for item in items]
+        fila = {"atributo": atributo, "valores": valores, "mejor": None}
+        if atributo in numericas:
+            numericos = [(v, i) for i, v in enumerate(valores) if v is not None]
+            if len(numericos) > 1:
+                fila["mejor"] = min(numericos)[1]
+        filas.append(fila)
+    return filas
+
+
+class ViewerService(ViewerBackend):
+    def __init__(self, csv_path: Path, store_root: Optional[Path] = None, reload_interval: float = 0.0):
+        """
+        `store_root` activa el store compartido: los snapshots se materializan en
+        disco una vez por versión y todos los procesos los abren con memory-map.
+        `reload_interval` son los segundos entre revisiones del CSV una vez
+        abierto el servicio (0 desactiva la recarga en caliente).
+        """
+        self.csv_path = csv_path
+        self.store = SnapshotStore(store_root) if store_root else None
+        self.reload_interval = reload_interval
+        self._snapshot = self._build_snapshot()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watcher = threading.Event()
+        self.query_planner = QueryPlanner()
+        # (versión, huella de filtros) -> (máscara, total) de las consultas paginadas por cursor
+        self._cursor_cache: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, int]]" = OrderedDict()
+        self._cursor_lock = threading.Lock()
+
+    # --- Snapshot y recarga ---
+
+    @property
+    def snapshot(self) -> ViewerSnapshot:
+        """Snapshot vigente. Cada request debe tomarlo una sola vez al inicio."""
+        return self._snapshot
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._snapshot.df
+
+    async def open(self) -> None:
+        """El snapshot ya se cargó al crear el servicio: sólo arranca el watcher."""
+        self.start_watcher(self.reload_interval)
+
+    async def close(self) -> None:
+        self.stop_watcher()
+
+    def info(self) -> Dict:
+        return self._snapshot.info()
+
+    @asynccontextmanager
+    async def view(self) -> AsyncIterator["SnapshotView"]:
+        yield SnapshotView(self, self._snapshot)
+
+    def _build_snapshot(self) -> ViewerSnapshot:
+        """Adjunta el snapshot desde el store compartido o lo construye (y lo publica)."""
+        if self.store is None or file_signature(self.csv_path) is None:
+            return ViewerSnapshot.from_csv(self.csv_path)
+
+        # Un solo proceso construye cada versión: los demás esperan el bloqueo
+        # y al obtenerlo ya la encuentran publicada
+        with self.store.build_lock():
+            signature = file_signature(self.csv_path)
+            compartido = self.store.load(file_version(self.csv_path), signature)
+            if compartido is None:
+                snapshot = ViewerSnapshot.from_csv(self.csv_path)
+                try:
+                    self.store.save(snapshot)
+                    self.store.prune(keep_version=snapshot.version)
+                except (OSError, ImportError) as e:
+                    logger.warning(f"No se pudo publicar el snapshot en el store compartido: {e}")
+                    return snapshot
+                # Reabrir desde disco para que este proceso también use las páginas compartidas
+                compartido = self.store.load(snapshot.version, snapshot.signature) or snapshot
+            try:
+                self.store.set_current(compartido.version, compartido.signature)
+            except OSError as e:
+                logger.warning(f"No se pudo registrar la versión publicada: {e}")
+        return compartido
+
+    async def reload(self, force: bool = False) -> bool:
+        return await asyncio.to_thread(self.reload_now, force)
+
+    def reload_now(self, force: bool = False) -> bool:
+        """
+        Construye un snapshot nuevo desde el CSV y lo publica si cambió la versión.
+        Retorna True si se reemplazó el snapshot.
+        """
+        with self._reload_lock:
+            try:
+                nuevo = self._build_snapshot()
+            except Exception as e:
+                logger.error(f"Error recargando {self.csv_path}: {e}")
+                return False
+            return self._reemplazar(nuevo, force)
+
+    def _adjuntar_publicado(self) -> bool:
+        """Adjunta la versión que publicó otro worker, si es distinta de la vigente."""
+        actual = self.store.current()
+        if actual is None or actual[0] == self._snapshot.version:
+            return False
+        with self._reload_lock:
+            nuevo = self.store.load(*actual)
+            if nuevo is None:
+                return False
+            return self._reemplazar(nuevo)
+
+    def _reemplazar(self, nuevo: ViewerSnapshot, force: bool = False) -> bool:
+        """Publica `nuevo` como snapshot vigente (llamar con `_reload_lock` tomado)."""
+        if not force and nuevo.version == self._snapshot.version:
+            # Mismo contenido: sólo actualizar la firma para no volver a leerlo
+            self._snapshot.signature = nuevo.signature
+            return False
 
-    def get_filter_options(self) -> Dict[str, List[str]]:
+        anterior = self._snapshot.version
+        self._snapshot = nuevo
+        logger.info(f"Dataset recargado: {anterior} -> {nuevo.version} ({len(nuevo.df)} registros)")
+        return True
+
+    def start_watcher(self, interval: float = 5.0) -> None:
+        """
+        Inicia un hilo que vigila el CSV y recarga cuando cambia. Con store
+        compartido sólo el worker publicador vigila el CSV; el resto sigue la
+        versión que éste publica.
+        """
+        if self._watcher is not None or interval <= 0:
+            return
+        self._stop_watcher.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="viewer-csv-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Detiene el hilo de vigilancia."""
+        if self._watcher is None:
+            return
+        self._stop_watcher.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        ultima_firma = file_signature(self.csv_path)
+        while not self._stop_watcher.wait(interval):
+            if self.store is not None and not self.store.lead():
+                # Otro worker vigila el CSV y publica: aquí sólo se adjunta lo publicado
+                self._adjuntar_publicado()
+                continue
+            firma = file_signature(self.csv_path)
+            # Recargar sólo cuando el archivo cambió y ya no se está escribiendo
+            # (misma firma en dos lecturas consecutivas)
+            if firma is not None and firma != self._snapshot.signature and firma == ultima_firma:
+                self.reload_now()
+            ultima_firma = firma
+
+    # --- Consultas ---
+
+    def get_filter_options(self, snapshot: Optional[ViewerSnapshot] = None) -> Dict[str, List[str]]:
         """Obtiene los valores únicos para los controles de filtro."""
-        if self.df.empty:
+        snap = snapshot or self.snapshot
+        if snap.df.empty:
             return {"bancos": [], "tipos": [], "monedas": []}
 
         return {
-            "bancos": sorted(self.df["Banco"].dropna().unique().tolist()),
-            "tipos": sorted(self.df["Tipo"].dropna().unique().tolist()),
-            "monedas": sorted(self.df["Moneda"].dropna().unique().tolist()),
+            "bancos": sorted(snap.df["Banco"].dropna().unique().tolist()),
+            "tipos": sorted(snap.df["Tipo"].dropna().unique().tolist()),
+            "monedas": sorted(snap.df["Moneda"].dropna().unique().tolist()),
         }
 
-    def get_stats(self) -> Dict:
+    def get_stats(self, snapshot: Optional[ViewerSnapshot] = None) -> Dict:
         """Calcula estadísticas generales del dataset."""
-        if self.df.empty:
+        snap = snapshot or self.snapshot
+        if snap.df.empty:
             return {
                 "total_registros": 0,
                 "bancos_count": 0,
@@ -41,92 +234,463 @@ class ViewerService:
                 "tasa_promedio_me": 0,
             }
 
-        tasa_promedio_mn = pd.to_numeric(self.df["Tasa_Porcentaje_MN"], errors='coerce').dropna().mean()
-        tasa_promedio_me = pd.to_numeric(self.df["Tasa_Porcentaje_ME"], errors='coerce').dropna().mean()
+        # Todo sale del cubo precalculado: no se recorre ninguna fila
+        por_tipo = snap.cube.query(group_by=["Tipo"])
+        por_banco = snap.cube.query(group_by=["Banco"])
+        total = snap.cube.query()[0]
+        tasa_promedio_mn = total["metricas"]["Tasa_Porcentaje_MN"]["mean"]
+        tasa_promedio_me = total["metricas"]["Tasa_Porcentaje_ME"]["mean"]
 
+        tipos_count = {
+            g["claves"]["Tipo"]: g["total_registros"]
+            for g in sorted(por_tipo, key=lambda g: -g["total_registros"])
+            if g["claves"]["Tipo"] is not None
+        }
+
+        return {
+            "total_registros": total["total_registros"],
+            "bancos_count": sum(1 for g in por_banco if g["claves"]["Banco"] is not None),
+            "tipos_count": tipos_count,
+            "tasa_promedio_mn": round(tasa_promedio_mn, 2) if tasa_promedio_mn is not None else None,
+            "tasa_promedio_me": round(tasa_promedio_me, 2) if tasa_promedio_me is not None else None,
+        }
+
+    def get_aggregate_stats(self,
+                            snapshot: Optional[ViewerSnapshot] = None,
+                            group_by: Optional[List[str]] = None,
+                            **filters: CategoricalFilter) -> Dict:
+        """
+        Estadísticas (count/mean/min/max por columna numérica) para los filtros
+        de dimensión dados, agregando celdas del cubo en lugar de filas.
+        `filters` usa los nombres de columna del cubo (Banco, Tipo, Moneda, Periodicidad).
+        """
+        snap = snapshot or self.snapshot
+        filtros = {
+            dim: [valores] if isinstance(valores, str) else valores
+            for dim, valores in filters.items() if valores
+        }
+        group_by = group_by or []
         return {
-            "total_registros": len(self.df),
-            "bancos_count": self.df["Banco"].nunique(),
-            "tipos_count": self.df["Tipo"].value_counts().to_dict(),
-            "tasa_promedio_mn": round(tasa_promedio_mn, 2) if pd.notna(tasa_promedio_mn) else None,
-            "tasa_promedio_me": round(tasa_promedio_me, 2) if pd.notna(tasa_promedio_me) else None,
+            "group_by": group_by,
+            "grupos": snap.cube.query(filtros, group_by),
+        }
+
+    def get_distribution(self,
+                         columna: str,
+                         snapshot: Optional[ViewerSnapshot] = None,
+                         group_by: Optional[List[str]] = None,
+                         bins: int = 20,
+                         quantiles: Optional[List[float]] = None,
+                         **filters: CategoricalFilter) -> Dict:
+        """
+        Histograma y cuantiles de una columna Tasa_*/Monto_*, sumando los
+        histogramas precalculados de las celdas que cumplen los filtros.
+        Lanza InvalidFieldsError si la columna no es numérica.
+        """
+        snap = snapshot or self.snapshot
+        if columna not in snap.index.numeric:
+            raise InvalidFieldsError(f"Columna no numérica: {columna}")
+        filtros = {
+            dim: [valores] if isinstance(valores, str) else valores
+            for dim, valores in filters.items() if valores
+        }
+        group_by = group_by or []
+        return {
+            "columna": columna,
+            "group_by": group_by,
+            "grupos": snap.distribution.query(columna, filtros, group_by, bins, quantiles or DEFAULT_QUANTILES),
         }
 
     def _get_filtered_df(self, 
-                         banco: Optional[str] = None,
-                         tipo: Optional[str] = None,
-                         moneda: Optional[str] = None,
+                         banco: CategoricalFilter = None,
+                         tipo: CategoricalFilter = None,
+                         moneda: CategoricalFilter = None,
                          producto: Optional[str] = None,
                          concepto: Optional[str] = None,
+                         q: Optional[str] = None,
                          tasa_mn_gte: Optional[float] = None,
                          tasa_mn_lte: Optional[float] = None,
                          tasa_me_gte: Optional[float] = None,
                          tasa_me_lte: Optional[float] = None,
                          sort_by: Optional[str] = None,
-                         sort_order: str = 'asc') -> pd.DataFrame:
+                         sort_order: str = 'asc',
+                         snapshot: Optional[ViewerSnapshot] = None) -> pd.DataFrame:
         
-        if self.df.empty:
+        snap = snapshot or self.snapshot
+        if snap.df.empty:
             return pd.DataFrame()
 
-        filtered_df = self.df.copy()
+        rows = self._get_sorted_rows(
+            snap,
+            banco=banco, tipo=tipo, moneda=moneda,
+            producto=producto, concepto=concepto, q=q,
+            tasa_mn_gte=tasa_mn_gte, tasa_mn_lte=tasa_mn_lte,
+            tasa_me_gte=tasa_me_gte, tasa_me_lte=tasa_me_lte,
+            sort_by=sort_by, sort_order=sort_order,
+        )
+        return snap.df.iloc[rows]
+
+    def get_rows(self, snapshot: Optional[ViewerSnapshot] = None, **kwargs) -> np.ndarray:
+        """Posiciones de fila filtradas y ordenadas, sin materializar el DataFrame."""
+        snap = snapshot or self.snapshot
+        if snap.df.empty:
+            return np.empty(0, dtype=np.int64)
+        return self._get_sorted_rows(snap, **kwargs)
 
-        # Convertir columnas de tasa a numérico para filtros y ordenamiento
-        for col in ['Tasa_Porcentaje_MN', 'Tasa_Porcentaje_ME']:
-            filtered_df[col] = pd.to_numeric(filtered_df[col], errors='coerce')
+    def _get_sorted_rows(self, snap: ViewerSnapshot,
+                         sort_by: Optional[str] = None,
+                         sort_order: str = 'asc',
+                         **filters) -> np.ndarray:
+        """Posiciones de fila filtradas y ordenadas dentro del snapshot."""
+        rows = self._get_filtered_rows(snap, **filters)
+
+        # Ordenar (las tasas se ordenan con sus valores numéricos pre-convertidos)
+        if sort_by and sort_by in snap.df.columns:
+            rows = self._sort_rows(snap, rows, sort_by, sort_order == 'asc')
+        return rows
+
+    def _get_filtered_rows(self, snap: ViewerSnapshot, **filters) -> np.ndarray:
+        """Resuelve los filtros a posiciones de fila (en orden natural)."""
+        return snap.index.rows(self._get_filtered_bitmap(snap, **filters))
 
-        # Aplicar filtros de texto
+    def _get_filtered_bitmap(self, snap: ViewerSnapshot,
+                             banco: CategoricalFilter = None,
+                             tipo: CategoricalFilter = None,
+                             moneda: CategoricalFilter = None,
+                             producto: Optional[str] = None,
+                             concepto: Optional[str] = None,
+                             q: Optional[str] = None,
+                             tasa_mn_gte: Optional[float] = None,
+                             tasa_mn_lte: Optional[float] = None,
+                             tasa_me_gte: Optional[float] = None,
+                             tasa_me_lte: Optional[float] = None) -> np.ndarray:
+        """Resuelve los filtros a un bitmap intersectando los bitmaps del índice."""
+        index = snap.index
+        bitmap = index.all_rows()
+
+        # Filtros categóricos (uno o varios valores por columna)
         if banco:
-            filtered_df = filtered_df[filtered_df["Banco"] == banco]
+            bitmap &= index.match("Banco", banco)
         if tipo:
-            filtered_df = filtered_df[filtered_df["Tipo"] == tipo]
+            bitmap &= index.match("Tipo", tipo)
         if moneda:
-            filtered_df = filtered_df[filtered_df["Moneda"] == moneda]
-        if producto:
-            filtered_df = filtered_df[filtered_df["Producto_Nombre"].str.contains(producto, case=False, na=False)]
-        if concepto:
-            filtered_df = filtered_df[filtered_df["Concepto"].str.contains(concepto, case=False, na=False)]
-        
-        # Aplicar filtros numéricos
-        if tasa_mn_gte is not None:
-            filtered_df = filtered_df[filtered_df['Tasa_Porcentaje_MN'] >= tasa_mn_gte]
-        if tasa_mn_lte is not None:
-            filtered_df = filtered_df[filtered_df['Tasa_Porcentaje_MN'] <= tasa_mn_lte]
-        if tasa_me_gte is not None:
-            filtered_df = filtered_df[filtered_df['Tasa_Porcentaje_ME'] >= tasa_me_gte]
-        if tasa_me_lte is not None:
-            filtered_df = filtered_df[filtered_df['Tasa_Porcentaje_ME'] <= tasa_me_lte]
-
-        # Ordenar
-        if sort_by and sort_by in filtered_df.columns:
-            ascending = sort_order == 'asc'
-            filtered_df = filtered_df.sort_values(by=sort_by, ascending=ascending)
-        
-        return filtered_df
+            bitmap &= index.match("Moneda", moneda)
+
+        # Filtros numéricos
+        if tasa_mn_gte is not None or tasa_mn_lte is not None:
+            bitmap &= index.range("Tasa_Porcentaje_MN", tasa_mn_gte, tasa_mn_lte)
+        if tasa_me_gte is not None or tasa_me_lte is not None:
+            bitmap &= index.range("Tasa_Porcentaje_ME", tasa_me_gte, tasa_me_lte)
+
+        # Filtros de texto resueltos con el índice invertido (sin tildes, por prefijo)
+        for query, columns in ((producto, ["Producto_Nombre"]),
+                               (concepto, ["Concepto"]),
+                               (q, TEXT_COLUMNS)):
+            if query:
+                text_rows = snap.text_index.search(query, columns)
+                if text_rows is not None:
+                    bitmap &= index.from_rows(text_rows)
+
+        return bitmap
+
+    def _sort_rows(self, snap: ViewerSnapshot, rows: np.ndarray, sort_by: str, ascending: bool) -> np.ndarray:
+        """
+        Ordena posiciones de fila con el orden precalculado de la columna
+        (nulos al final, empates por posición de fila).
+        """
+        index = snap.index
+        if len(rows) * 16 < index.n_rows:
+            # Pocas filas: ordenar por su rango global
+            rank = index.sort_rank(sort_by, ascending)
+            return rows[np.argsort(rank[rows], kind='stable')]
+
+        # Muchas filas: recorrer la permutación global quedándose con las filtradas
+        order = index.sort_order(sort_by, ascending)
+        mask = np.zeros(index.n_rows, dtype=bool)
+        mask[rows] = True
+        return order[mask[order]]
+
+    def _page_after(self, order: np.ndarray, mask: np.ndarray, start: int, limit: int) -> np.ndarray:
+        """
+        Posiciones (dentro de `order`) de las siguientes `limit + 1` filas que
+        cumplen `mask` a partir de `start`. El costo depende del tamaño de
+        página y de la selectividad, no del total de filas.
+        """
+        encontradas = []
+        faltan = limit + 1
+        bloque = max(4 * (limit + 1), 1024)
+        pos = start
+        while pos < len(order) and faltan > 0:
+            candidatas = order[pos:pos + bloque]
+            hits = np.flatnonzero(mask[candidatas])[:faltan] + pos
+            encontradas.append(hits)
+            faltan -= len(hits)
+            pos += bloque
+        if not encontradas:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(encontradas)
+
+    def _cursor_mask(self, snap: ViewerSnapshot, huella: str,
+                     bitmap: Optional[np.ndarray] = None, **filters) -> Tuple[np.ndarray, int]:
+        """
+        Máscara y total de los filtros de una consulta paginada por cursor,
+        cacheados por (versión, huella): las páginas siguientes no vuelven a
+        resolver los filtros ni a recorrer todas las filas. `bitmap` evita
+        recalcularlos cuando quien llama ya los resolvió (primera página).
+        """
+        clave = (snap.version, huella)
+        with self._cursor_lock:
+            entrada = self._cursor_cache.get(clave)
+            if entrada is not None:
+                self._cursor_cache.move_to_end(clave)
+                return entrada
+
+        if bitmap is None:
+            bitmap = self._get_filtered_bitmap(snap, **filters)
+        entrada = (snap.index.to_mask(bitmap), snap.index.count(bitmap))
+        with self._cursor_lock:
+            self._cursor_cache[clave] = entrada
+            self._cursor_cache.move_to_end(clave)
+            while len(self._cursor_cache) > CURSOR_CACHE_SIZE:
+                self._cursor_cache.popitem(last=False)
+        return entrada
+
+    @staticmethod
+    def _serialize_rows(snap: ViewerSnapshot, rows: np.ndarray, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Registros JSON-compatibles (None en lugar de NaN) de las filas `rows`,
+        armados desde los arrays de cada columna. `fields` limita las columnas.
+        """
+        columnas = proyectar_campos(snap.df.columns, fields)
+        return column_records(snap.df, rows, columnas, ids=snap.row_ids.ids_for(rows))
 
     def get_tarifarios(self, 
                        skip: int = 0, 
                        limit: int = 20, 
-                       **kwargs) -> Dict:
-        """Filtra, ordena y pagina los datos del DataFrame."""
-        
-        filtered_df = self._get_filtered_df(**kwargs)
+                       snapshot: Optional[ViewerSnapshot] = None,
+                       cursor: Optional[str] = None,
+                       sort_by: Optional[str] = None,
+                       sort_order: str = 'asc',
+                       fields: Optional[List[str]] = None,
+                       **filters) -> Dict:
+        """
+        Filtra, ordena y pagina los datos del DataFrame.
 
-        if filtered_df is None or filtered_df.empty:
-            return {"total_items": 0, "items": [], "total_pages": 0, "current_page": 1}
+        Con `cursor` se usa paginación por keyset: se continúa justo después de
+        la última fila de la página anterior dentro del orden precalculado, así
+        que cualquier página cuesta O(limit): la máscara y el total de los
+        filtros se resuelven una vez y quedan cacheados por (versión, filtros).
+        `next_cursor` es None en la última página.
+        `fields` proyecta los items a esas columnas (el id siempre se incluye).
+        """
+        snap = snapshot or self.snapshot
+        vacio = {"total_items": 0, "items": [], "total_pages": 0, "current_page": 1, "next_cursor": None}
+        if snap.df.empty:
+            return vacio
 
-        total_items = len(filtered_df)
-        total_pages = (total_items + limit - 1) // limit
-        current_page = (skip // limit) + 1
+        index = snap.index
+        proyectar_campos(snap.df.columns, fields)  # campos inválidos -> InvalidFieldsError
+        if not (sort_by and sort_by in snap.df.columns):
+            sort_by = None
+        ascending = sort_order == 'asc'
+        huella = filters_fingerprint(filters)
+
+        if cursor:
+            estado = decode_cursor(cursor)
+            if estado.get("v") != snap.version:
+                raise ExpiredCursorError("El dataset cambió; vuelva a pedir la primera página")
+            if estado.get("s") != (sort_by or "") or estado.get("o") != sort_order or estado.get("f") != huella:
+                raise InvalidCursorError("El cursor no corresponde a estos filtros u orden")
+            start = estado["p"] + 1
+            current_page = None
+        else:
+            start = None
+            current_page = (skip // limit) + 1
 
-        # Paginar
-        paginated_df = filtered_df.iloc[skip:skip + limit]
+        if start is not None:
+            mascara, total_items = self._cursor_mask(snap, huella, **filters)
+            if total_items == 0:
+                return vacio
+            order = index.sort_order(sort_by, ascending)
+            posiciones = self._page_after(order, mascara, start, limit)
+            page_rows = order[posiciones[:limit]]
+            hay_mas = len(posiciones) > limit
+            ultima_pos = int(posiciones[limit - 1]) if hay_mas else None
+        else:
+            bitmap = self._get_filtered_bitmap(snap, **filters)
+            total_items = index.count(bitmap)
+            if total_items == 0:
+                return vacio
+            rows = index.rows(bitmap)
+            if sort_by:
+                rows = self._sort_rows(snap, rows, sort_by, ascending)
+            page_rows = rows[skip:skip + limit]
+            hay_mas = skip + limit < total_items
+            ultima_pos = int(index.sort_rank(sort_by, ascending)[page_rows[-1]]) if hay_mas and len(page_rows) else None
+            if ultima_pos is not None:
+                # Deja lista la máscara para las páginas siguientes
+                self._cursor_mask(snap, huella, bitmap=bitmap)
+        total_pages = (total_items + limit - 1) // limit
 
-        # Limpieza final y explícita para asegurar compatibilidad con JSON
-        paginated_df = paginated_df.astype(object).where(pd.notna(paginated_df), None)
+        next_cursor = None
+        if ultima_pos is not None:
+            next_cursor = encode_cursor({
+                "v": snap.version, "s": sort_by or "", "o": sort_order, "f": huella, "p": ultima_pos,
+            })
 
+        # Paginar: sólo se materializan las filas de la página
         return {
             "total_items": total_items,
-            "items": jsonable_encoder(paginated_df.to_dict(orient="records")),
+            "items": self._serialize_rows(snap, page_rows, fields),
             "total_pages": total_pages,
-            "current_page": current_page
-        }
\ No newline at end of file
+            "current_page": current_page,
+            "next_cursor": next_cursor,
+        }
+
+    def get_tarifario(self, row_id: str, snapshot: Optional[ViewerSnapshot] = None) -> Optional[Dict]:
+        """Busca una fila por su id estable (O(1)); None si no existe."""
+        snap = snapshot or self.snapshot
+        posicion = snap.row_ids.position(row_id)
+        if posicion is None:
+            return None
+        return self._serialize_rows(snap, np.array([posicion]))[0]
+
+    def compare(self, row_ids: List[str], snapshot: Optional[ViewerSnapshot] = None) -> Dict:
+        """
+        Compara varias filas (normalmente de bancos distintos) alineadas por
+        atributo: una fila del resultado por columna, un valor por id pedido.
+        """
+        snap = snapshot or self.snapshot
+        # Conservar el orden pedido y descartar repetidos
+        pedidos = list(dict.fromkeys(row_ids))
+        posiciones = snap.row_ids.positions(pedidos)
+        encontrados = [(row_id, pos) for row_id, pos in zip(pedidos, posiciones) if pos is not None]
+        no_encontrados = [row_id for row_id, pos in zip(pedidos, posiciones) if pos is None]
+
+        items = self._serialize_rows(snap, np.array([pos for _, pos in encontrados], dtype=np.int64))
+        return {
+            "ids": [row_id for row_id, _ in encontrados],
+            "no_encontrados": no_encontrados,
+            "items": items,
+            "filas": filas_comparacion(items, snap.df.columns, snap.index.numeric),
+        }
+
+    def get_equivalentes(self,
+                         row_id: Optional[str] = None,
+                         q: Optional[str] = None,
+                         k: int = 3,
+                         bancos: Optional[List[str]] = None,
+                         snapshot: Optional[ViewerSnapshot] = None) -> Optional[Dict]:
+        """
+        Filas equivalentes por banco, a partir de una fila (`row_id`, vecinos
+        precalculados) o de un texto libre (`q`). None si `row_id` no existe.
+        """
+        snap = snapshot or self.snapshot
+        if row_id is not None:
+            posicion = snap.row_ids.position(row_id)
+            if posicion is None:
+                return None
+            vecinos = snap.similarity.similar_to_row(posicion, k)
+        else:
+            vecinos = snap.similarity.similar_to_text(q or "", k)
+
+        grupos = []
+        for banco, filas in vecinos.items():
+            if bancos and banco not in bancos:
+                continue
+            items = self._serialize_rows(snap, np.array([fila for fila, _ in filas], dtype=np.int64))
+            for item, (_, score) in zip(items, filas):
+                item["similitud"] = round(score, 4)
+            grupos.append({"banco": banco, "items": items})
+
+        return {"id": row_id, "q": q if row_id is None else None, "bancos": grupos}
+
+    def query_tarifarios(self,
+                         where: str,
+                         skip: int = 0,
+                         limit: int = 20,
+                         sort_by: Optional[str] = None,
+                         sort_order: str = 'asc',
+                         fields: Optional[List[str]] = None,
+                         snapshot: Optional[ViewerSnapshot] = None) -> Dict:
+        """
+        Filtra con una expresión (ver query_language) y pagina el resultado.
+        El plan compilado se reutiliza para la misma expresión normalizada.
+        Lanza QuerySyntaxError si la expresión no es válida.
+        """
+        snap = snapshot or self.snapshot
+        plan = self.query_planner.plan(snap, where)
+        proyectar_campos(snap.df.columns, fields)  # campos inválidos -> InvalidFieldsError
+
+        rows = plan.evaluate()
+        if sort_by and sort_by in snap.df.columns and len(rows):
+            rows = self._sort_rows(snap, rows, sort_by, sort_order == 'asc')
+
+        total_items = len(rows)
+        page_rows = rows[skip:skip + limit]
+        return {
+            "total_items": total_items,
+            "items": self._serialize_rows(snap, page_rows, fields),
+            "total_pages": (total_items + limit - 1) // limit,
+            "current_page": (skip // limit) + 1,
+            "expresion": plan.expresion,
+            "plan": plan.explain(),
+        }
+
+
+class SnapshotView(DatasetView):
+    """Vista de ViewerService fijada a un snapshot; cada consulta corre en un hilo."""
+
+    def __init__(self, service: ViewerService, snapshot: ViewerSnapshot):
+        self.service = service
+        self.snapshot = snapshot
+        self.version = snapshot.version
+
+    async def get_filter_options(self) -> Dict[str, List[str]]:
+        return await asyncio.to_thread(self.service.get_filter_options, snapshot=self.snapshot)
+
+    async def get_stats(self) -> Dict:
+        return await asyncio.to_thread(self.service.get_stats, snapshot=self.snapshot)
+
+    async def get_aggregate_stats(self, group_by: Optional[List[str]] = None, **filters) -> Dict:
+        return await asyncio.to_thread(self.service.get_aggregate_stats, snapshot=self.snapshot,
+                                       group_by=group_by, **filters)
+
+    async def get_distribution(self,
+                               columna: str,
+                               group_by: Optional[List[str]] = None,
+                               bins: int = 20,
+                               quantiles: Optional[List[float]] = None,
+                               **filters) -> Dict:
+        return await asyncio.to_thread(self.service.get_distribution, columna, snapshot=self.snapshot,
+                                       group_by=group_by, bins=bins, quantiles=quantiles, **filters)
+
+    async def get_tarifarios(self, **params) -> Dict:
+        return await asyncio.to_thread(self.service.get_tarifarios, snapshot=self.snapshot, **params)
+
+    async def get_tarifario(self, row_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.service.get_tarifario, row_id, snapshot=self.snapshot)
+
+    async def compare(self, row_ids: List[str]) -> Dict:
+        return await asyncio.to_thread(self.service.compare, row_ids, snapshot=self.snapshot)
+
+    async def get_equivalentes(self,
+                               row_id: Optional[str] = None,
+                               q: Optional[str] = None,
+                               k: int = 3,
+                               bancos: Optional[List[str]] = None) -> Optional[Dict]:
+        return await asyncio.to_thread(self.service.get_equivalentes, row_id=row_id, q=q, k=k, bancos=bancos,
+                                       snapshot=self.snapshot)
+
+    async def query_tarifarios(self, where: str, **params) -> Dict:
+        return await asyncio.to_thread(self.service.query_tarifarios, where, snapshot=self.snapshot, **params)
+
+    async def export(self,
+                     formato: str,
+                     sort_by: Optional[str] = None,
+                     sort_order: str = 'asc',
+                     **filters) -> Iterator[bytes]:
+        """Las filas se resuelven acá; los bloques se codifican a medida que se envían."""
+        rows = await asyncio.to_thread(self.service.get_rows, snapshot=self.snapshot,
+                                       sort_by=sort_by, sort_order=sort_order, **filters)
+        return iter_export(formato, self.snapshot.df, rows)
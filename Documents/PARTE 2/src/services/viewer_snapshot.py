@@ -0,0 +1,92 @@
+"""
+Snapshot inmutable del dataset del visor.
+Agrupa el DataFrame con todos sus índices y una versión derivada del contenido
+del CSV, para que cada request trabaje de principio a fin sobre la misma versión.
+"""
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from src.services.aggregation_cube import AggregationCube
+from src.services.distribution_cube import DistributionCube
+from src.services.columnar_snapshot import columnar_path_for, read_columnar_snapshot, tipar_dataset
+from src.services.row_ids import RowIdIndex
+from src.services.similarity_index import SimilarityIndex
+from src.services.text_index import TEXT_COLUMNS, TextIndex
+from src.services.viewer_index import ViewerIndex
+
+# Firma barata del archivo fuente (mtime en ns, tamaño) para detectar cambios
+FileSignature = Tuple[int, int]
+
+
+def file_signature(path: Path) -> Optional[FileSignature]:
+    """Devuelve (mtime_ns, tamaño) del archivo o None si no existe."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_version(path: Path) -> str:
+    """Versión del dataset: prefijo del sha256 del contenido del archivo."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()[:12]
+
+
+class ViewerSnapshot:
+    """DataFrame de solo lectura más sus índices, identificado por `version`."""
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 version: str,
+                 signature: Optional[FileSignature] = None,
+                 index: Optional[ViewerIndex] = None,
+                 text_index: Optional[TextIndex] = None,
+                 row_ids: Optional[RowIdIndex] = None,
+                 similarity: Optional[SimilarityIndex] = None,
+                 cube: Optional[AggregationCube] = None,
+                 distribution: Optional[DistributionCube] = None):
+        """Construye los índices que no se pasen (los del store compartido llegan ya calculados)."""
+        self.df = df
+        self.version = version
+        self.signature = signature
+        self.loaded_at = datetime.now()
+        self.index = index or ViewerIndex(df)
+        self.text_index = text_index or TextIndex(df, TEXT_COLUMNS)
+        self.row_ids = row_ids or RowIdIndex(df)
+        self.similarity = similarity or SimilarityIndex(df, self.index)
+        self.cube = cube if cube is not None else AggregationCube(df, self.index.numeric)
+        self.distribution = (distribution if distribution is not None
+                             else DistributionCube.from_frame(df, self.index.numeric))
+
+    @classmethod
+    def from_csv(cls, csv_path: Path) -> "ViewerSnapshot":
+        """
+        Carga el dataset y construye todos los índices. Usa el snapshot Feather
+        (memory-map) cuando corresponde a la versión actual del CSV; si no,
+        parsea el CSV y le aplica los mismos tipos.
+        """
+        signature = file_signature(csv_path)
+        if signature is None:
+            return cls(pd.DataFrame(), version="empty")
+
+        version = file_version(csv_path)
+        df = read_columnar_snapshot(columnar_path_for(csv_path), source_version=version)
+        if df is None:
+            df = tipar_dataset(pd.read_csv(csv_path))
+        return cls(df, version=version, signature=signature)
+
+    def info(self) -> dict:
+        """Resumen del snapshot para respuestas de la API."""
+        return {
+            "version": self.version,
+            "total_registros": len(self.df),
+            "loaded_at": self.loaded_at.isoformat(timespec="seconds"),
+        }
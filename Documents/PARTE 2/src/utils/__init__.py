@@ -1,7 +1,9 @@
 """
 Utilidades del proyecto
 """
-from .downloader import PDFDownloader
+from .download_manifest import DownloadManifest
+from .downloader import AsyncPDFDownloader, PDFDownloader, descargar_en_paralelo
 from .logger import setup_logger
+from .raw_store import RawPDFStore
 
-__all__ = ["PDFDownloader", "setup_logger"]
+__all__ = ["AsyncPDFDownloader", "DownloadManifest", "PDFDownloader", "RawPDFStore", "descargar_en_paralelo", "setup_logger"]
@@ -0,0 +1,256 @@
+"""
+Manifiesto persistente de descargas para re-descargas condicionales.
+
+Por cada URL guarda los validadores HTTP (ETag, Last-Modified), el tamaño y
+los hashes del último PDF descargado, y el nombre reservado para ella en
+data/raw (es el índice URL/nombre del RawPDFStore). Con eso:
+
+- los downloaders envían If-None-Match / If-Modified-Since y un 304 evita
+  bajar el archivo de nuevo;
+- si el servidor no soporta validadores, el sha256 calculado durante la
+  descarga indica si el contenido realmente cambió;
+- las etapas posteriores (conversión a PNG, OCR) registran el sha256 que
+  procesaron y se saltan los PDFs que no cambiaron desde entonces. Un PDF
+  procesado antes de existir el manifiesto no tiene etapa registrada: los
+  scripts mantienen su criterio anterior (salida ya generada) y lo adoptan
+  con marcar_etapa().
+
+El manifiesto vive en la carpeta de los PDFs (data/raw/manifest_descargas.json)
+y las rutas se guardan relativas a ella ("BCP/tarifario.pdf"), igual que las
+ven los scripts.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+MANIFEST_FILE = "manifest_descargas.json"
+
+# Etapas posteriores a la descarga que consultan el manifiesto
+ETAPA_PNG = "png"
+ETAPA_OCR = "ocr"
+
+
+class DownloadManifest:
+    """
+    Manifiesto {url: entrada} guardado como JSON.
+
+    Cada entrada tiene: ruta, etag, last_modified, tamaño_bytes, sha256,
+    hash_md5, fecha_descarga, fecha_verificacion, sin_cambios (resultado de
+    la última verificación) y etapas ({etapa: sha256 procesado}).
+    Es seguro usarlo desde varios hilos; `guardar()` escribe de forma atómica.
+
+    Dos índices en memoria (ruta -> URLs y sha256 -> URLs) se actualizan en
+    cada escritura, así que reservar un nombre o buscar duplicados no recorre
+    todas las entradas.
+    """
+
+    def __init__(self, carpeta: Path):
+        self.carpeta = Path(carpeta)
+        self.path = self.carpeta / MANIFEST_FILE
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, Dict] = self._cargar()
+        # Conjuntos ordenados (dict con valores None): conservan el orden de alta
+        self._urls_por_ruta: Dict[str, Dict[str, None]] = {}
+        self._urls_por_sha: Dict[str, Dict[str, None]] = {}
+        for url in self._entradas:
+            self._indexar(url)
+        self._modificado = False
+
+    def _cargar(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("urls", {})
+        except (OSError, ValueError) as e:
+            # Un manifiesto corrupto sólo implica volver a descargar todo
+            logger.warning(f"⚠️ Manifiesto de descargas ilegible ({self.path}): {e}")
+            return {}
+
+    def guardar(self):
+        """Escribe el manifiesto si hubo cambios (archivo temporal + os.replace)."""
+        with self._lock:
+            if not self._modificado:
+                return
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            temporal = self.path.with_suffix(".json.tmp")
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump({"urls": self._entradas}, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, self.path)
+            self._modificado = False
+
+    def _indexar(self, url: str):
+        entrada = self._entradas[url]
+        if entrada.get("ruta"):
+            self._urls_por_ruta.setdefault(entrada["ruta"], {})[url] = None
+        if entrada.get("sha256"):
+            self._urls_por_sha.setdefault(entrada["sha256"], {})[url] = None
+
+    def _desindexar(self, url: str):
+        entrada = self._entradas.get(url, {})
+        for indice, clave in ((self._urls_por_ruta, entrada.get("ruta")), (self._urls_por_sha, entrada.get("sha256"))):
+            urls = indice.get(clave)
+            if urls is not None:
+                urls.pop(url, None)
+                if not urls:
+                    del indice[clave]
+
+    def _otras_urls(self, clave: str, url: str) -> Iterable[str]:
+        """URLs distintas de `url` que tienen reservado el nombre `clave`"""
+        return (otra for otra in self._urls_por_ruta.get(clave, ()) if otra != url)
+
+    def _clave_ruta(self, ruta: Path) -> str:
+        """Ruta relativa a la carpeta del manifiesto, con "/" como separador."""
+        ruta = Path(ruta)
+        try:
+            return ruta.resolve().relative_to(self.carpeta.resolve()).as_posix()
+        except ValueError:
+            return ruta.as_posix()
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            entrada = self._entradas.get(url)
+            return dict(entrada) if entrada else None
+
+    def reservar_ruta(self, url: str, preferida: Path, alternativa: Path) -> Path:
+        """
+        Nombre de `url` en data/raw: el que ya tenía o `preferida`, salvo
+        que otra URL la use; en ese caso `alternativa`.
+        """
+        with self._lock:
+            entrada = self._entradas.setdefault(url, {"etapas": {}})
+            clave = entrada.get("ruta")
+            # Manifiestos anteriores podían tener dos URLs con el mismo nombre
+            if clave is None or any(otra < url for otra in self._otras_urls(clave, url)):
+                clave = self._clave_ruta(preferida)
+                if any(True for _ in self._otras_urls(clave, url)):
+                    clave = self._clave_ruta(alternativa)
+                self._desindexar(url)
+                entrada["ruta"] = clave
+                self._indexar(url)
+                self._modificado = True
+        return self.carpeta / clave
+
+    def cabeceras_condicionales(self, url: str) -> Dict[str, str]:
+        """
+        If-None-Match / If-Modified-Since para `url`. El llamador debe
+        comprobar antes que el contenido registrado sigue en disco (si no,
+        un 304 lo dejaría sin archivo).
+        """
+        entrada = self.get(url)
+        if not entrada or not entrada.get("sha256"):
+            return {}
+
+        cabeceras = {}
+        if entrada.get("etag"):
+            cabeceras["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = entrada["last_modified"]
+        return cabeceras
+
+    def registrar_descarga(self, url: str, ruta: Path, tamaño_bytes: int, sha256: str, hash_md5: str,
+                           etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """
+        Registra un archivo recién descargado. Retorna True si el contenido es
+        el mismo que ya estaba registrado (el servidor no soporta validadores
+        o no los respetó) para que el llamador lo marque como sin cambios.
+        """
+        ahora = datetime.now().isoformat()
+        clave = self._clave_ruta(ruta)
+        with self._lock:
+            anterior = self._entradas.get(url, {})
+            sin_cambios = anterior.get("sha256") == sha256
+            self._desindexar(url)
+            self._entradas[url] = {
+                "ruta": clave,
+                "etag": etag,
+                "last_modified": last_modified,
+                "tamaño_bytes": tamaño_bytes,
+                "sha256": sha256,
+                "hash_md5": hash_md5,
+                "fecha_descarga": anterior.get("fecha_descarga") if sin_cambios else ahora,
+                "fecha_verificacion": ahora,
+                "sin_cambios": sin_cambios,
+                # Se conservan: si el contenido cambió ya no coinciden con sha256
+                # y etapa_desactualizada() lo detecta
+                "etapas": anterior.get("etapas", {}),
+            }
+            self._indexar(url)
+            self._modificado = True
+        return sin_cambios
+
+    def registrar_sin_cambios(self, url: str, etag: Optional[str] = None,
+                              last_modified: Optional[str] = None) -> Dict:
+        """Registra una respuesta 304 y retorna la entrada vigente."""
+        with self._lock:
+            entrada = self._entradas[url]
+            # El servidor puede renovar los validadores junto con el 304
+            if etag:
+                entrada["etag"] = etag
+            if last_modified:
+                entrada["last_modified"] = last_modified
+            entrada["fecha_verificacion"] = datetime.now().isoformat()
+            entrada["sin_cambios"] = True
+            self._modificado = True
+            return dict(entrada)
+
+    def _entradas_de_ruta(self, ruta: Path) -> List[Dict]:
+        return [self._entradas[url] for url in self._urls_por_ruta.get(self._clave_ruta(ruta), ())]
+
+    def etapa_desactualizada(self, ruta: Path, etapa: str) -> bool:
+        """
+        True si `etapa` procesó el PDF en `ruta` pero su contenido cambió
+        desde entonces (hay que volver a procesarlo).
+        """
+        with self._lock:
+            return any(
+                e.get("etapas", {}).get(etapa) not in (None, e.get("sha256"))
+                for e in self._entradas_de_ruta(ruta)
+            )
+
+    def _rutas_con_sha(self, sha256: Optional[str], en_disco: bool = False) -> List[str]:
+        rutas = sorted({self._entradas[url]["ruta"] for url in self._urls_por_sha.get(sha256, ())})
+        return [r for r in rutas if (self.carpeta / r).exists()] if en_disco else rutas
+
+    def es_canonica(self, ruta: Path) -> bool:
+        """
+        True si `ruta` es el nombre que representa a su contenido: el primero
+        (en orden) de los nombres con el mismo sha256 que siguen en disco (un
+        script que mueve los PDFs procesados no deja huérfanos a los demás).
+        Un PDF que no está en el manifiesto es canónico de sí mismo.
+        """
+        with self._lock:
+            entradas = [e for e in self._entradas_de_ruta(ruta) if e.get("sha256")]
+            if not entradas:
+                return True
+            rutas = self._rutas_con_sha(entradas[0]["sha256"], en_disco=True)
+            return not rutas or rutas[0] == self._clave_ruta(ruta)
+
+    def duplicados(self, ruta: Path) -> List[str]:
+        """Otros nombres (relativos a data/raw) con el mismo contenido que `ruta`"""
+        clave = self._clave_ruta(ruta)
+        with self._lock:
+            shas = {e.get("sha256") for e in self._entradas_de_ruta(ruta)}
+            return [r for sha in shas for r in self._rutas_con_sha(sha) if r != clave]
+
+    def marcar_etapa(self, ruta: Path, etapa: str):
+        """Registra que `etapa` procesó el contenido actual del PDF en `ruta`."""
+        with self._lock:
+            for entrada in self._entradas_de_ruta(ruta):
+                etapas = entrada.setdefault("etapas", {})
+                if etapas.get(etapa) != entrada.get("sha256"):
+                    etapas[etapa] = entrada.get("sha256")
+                    self._modificado = True
+
+    def sin_cambios(self) -> List[str]:
+        """Rutas cuya última verificación no encontró cambios."""
+        with self._lock:
+            return sorted({e["ruta"] for e in self._entradas.values() if e.get("sin_cambios")})
+
+    def __len__(self) -> int:
+        return len(self._entradas)
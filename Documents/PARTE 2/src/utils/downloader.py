@@ -1,20 +1,285 @@
 """
 Utilidades para descargar PDFs
 """
+import asyncio
 import hashlib
+import json
+import re
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import requests
 from loguru import logger
 from ..models import TarifarioURL, TarifarioMetadata, DownloadResult
 from ..config import settings
+from .metrics import DOWNLOAD_BYTES, DOWNLOAD_FILES
+from .rate_limit import ESTADOS_REINTENTABLES, RATE_LIMITER, espera_reintento
+from .raw_store import RawPDFStore, generar_nombre_archivo
+
+try:
+    import aiohttp
+except ImportError:  # sólo lo necesita AsyncPDFDownloader
+    aiohttp = None
+
+# Tamaño de los bloques que se escriben a disco: ~1/64 del archivo, entre estos límites
+CHUNK_MIN = 64 * 1024
+CHUNK_MAX = 1024 * 1024
+
+# Bytes del inicio y del final que mira verificar_pdf
+_VENTANA_VERIFICACION = 1024
+
+# Los PDFs ya vienen comprimidos; sin gzip, Content-Length y Range cuentan bytes del archivo
+_CABECERAS_DESCARGA = {"Accept-Encoding": "identity"}
+
+
+class PDFInvalidoError(ValueError):
+    """El archivo descargado no es un PDF completo"""
+
+
+class _Reintentar(Exception):
+    """El .part no corresponde al archivo del servidor: se descartó y hay que pedirlo entero"""
+
+
+def tamaño_bloque(tamaño_total: Optional[int]) -> int:
+    """Bloques más grandes para archivos grandes: menos escrituras sin retener el archivo en memoria"""
+    if not tamaño_total:
+        return CHUNK_MIN
+    return max(CHUNK_MIN, min(CHUNK_MAX, tamaño_total // 64))
+
+
+def verificar_pdf(ruta: Path, tamaño_esperado: Optional[int] = None):
+    """
+    Lanza PDFInvalidoError si `ruta` no es un PDF completo: tamaño distinto
+    del anunciado, sin cabecera %PDF- (p. ej. una página HTML de error) o
+    sin el startxref / %%EOF con que termina todo PDF (archivo truncado).
+    """
+    tamaño = ruta.stat().st_size
+    if tamaño_esperado is not None and tamaño != tamaño_esperado:
+        raise PDFInvalidoError(f"PDF inválido: {tamaño:,} bytes, se esperaban {tamaño_esperado:,}")
+    with open(ruta, "rb") as f:
+        inicio = f.read(_VENTANA_VERIFICACION)
+        f.seek(max(0, tamaño - _VENTANA_VERIFICACION))
+        final = f.read()
+    if b"%PDF-" not in inicio:
+        raise PDFInvalidoError("PDF inválido: no empieza con %PDF-")
+    if b"startxref" not in final or b"%%EOF" not in final:
+        raise PDFInvalidoError("PDF inválido: no termina con startxref / %%EOF (truncado)")
+
+
+def _content_range(valor: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(inicio, total) de una cabecera Content-Range "bytes 100-999/1000" """
+    coincidencia = re.match(r"bytes (\d+)-\d+/(\d+|\*)", valor or "")
+    if not coincidencia:
+        return None, None
+    total = coincidencia.group(2)
+    return int(coincidencia.group(1)), (int(total) if total != "*" else None)
+
+
+class _Hashes:
+    """MD5 y SHA-256 calculados sobre los bloques a medida que se escriben"""
+
+    def __init__(self):
+        self.md5 = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+        self.tamaño = 0
+
+    def update(self, chunk: bytes):
+        self.md5.update(chunk)
+        self.sha256.update(chunk)
+        self.tamaño += len(chunk)
+
+
+def _validadores(cabeceras) -> Dict[str, Optional[str]]:
+    """ETag y Last-Modified de una respuesta (requests o aiohttp)"""
+    return {"etag": cabeceras.get("ETag"), "last_modified": cabeceras.get("Last-Modified")}
+
+
+class _Parcial:
+    """
+    Descarga en curso de una URL: su archivo .part, los hashes de lo ya
+    escrito y el validador (ETag fuerte o Last-Modified) para retomarla con
+    Range + If-Range. El validador se guarda junto al .part, así que una
+    descarga cortada también se retoma en la siguiente ejecución; sin
+    validador no se puede saber si el resto es del mismo archivo y se
+    empieza de cero.
+    """
+
+    def __init__(self, store: RawPDFStore, url: str):
+        self.ruta = store.parcial(url)
+        self._meta = self.ruta.with_suffix(".json")
+        self.hashes = _Hashes()
+        self.total: Optional[int] = None
+        self.transferidos = 0
+        self.validador: Optional[str] = None
+
+        if self.ruta.exists() and self._meta.exists():
+            try:
+                self.validador = json.loads(self._meta.read_text(encoding="utf-8")).get("validador")
+            except (OSError, ValueError):
+                self.validador = None
+        if self.validador:
+            # Lo ya descargado entra en los hashes antes de seguir
+            with open(self.ruta, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_MAX), b""):
+                    self.hashes.update(chunk)
+        else:
+            self.descartar()
+
+    def reanudable(self) -> bool:
+        return bool(self.validador) and self.hashes.tamaño > 0
+
+    def cabeceras(self) -> Dict[str, str]:
+        """Range + If-Range si hay algo que retomar"""
+        if not self.reanudable():
+            return {}
+        return {"Range": f"bytes={self.hashes.tamaño}-", "If-Range": self.validador}
+
+    def abrir(self, status: int, cabeceras):
+        """Prepara el .part según la respuesta (206 continúa, 200 empieza de cero) y lo abre"""
+        if status == 206:
+            inicio, self.total = _content_range(cabeceras.get("Content-Range"))
+            if inicio != self.hashes.tamaño:
+                self.descartar()
+                raise _Reintentar(f"el servidor respondió desde el byte {inicio}")
+            modo = "ab"
+        else:
+            # Sin Range, o el archivo cambió desde el corte (If-Range no coincidió)
+            self.hashes = _Hashes()
+            largo = cabeceras.get("Content-Length")
+            codificado = cabeceras.get("Content-Encoding", "identity") != "identity"
+            self.total = int(largo) if largo and not codificado else None
+            etag = cabeceras.get("ETag")
+            self.validador = etag if etag and not etag.startswith("W/") else cabeceras.get("Last-Modified")
+            modo = "wb"
+
+        if self.validador:
+            self._meta.write_text(json.dumps({"validador": self.validador}), encoding="utf-8")
+        return open(self.ruta, modo)
+
+    def escribir(self, f, chunk: bytes):
+        f.write(chunk)
+        self.hashes.update(chunk)
+        self.transferidos += len(chunk)
+
+    def verificar(self):
+        """verificar_pdf antes de publicar; un PDF inválido se descarta"""
+        try:
+            verificar_pdf(self.ruta, self.total)
+        except PDFInvalidoError:
+            self.descartar()
+            raise
+
+    def descartar(self):
+        self.ruta.unlink(missing_ok=True)
+        self._meta.unlink(missing_ok=True)
+        self.hashes = _Hashes()
+        self.validador = None
+
+
+def _resultado_exitoso(tarifario_url: TarifarioURL, ruta: Path, tamaño_bytes: int,
+                       hash_md5: Optional[str], hash_sha256: Optional[str],
+                       sin_cambios: bool = False, bytes_transferidos: int = 0) -> DownloadResult:
+    metadata = TarifarioMetadata(
+        banco=tarifario_url.banco,
+        nombre_archivo=ruta.name,
+        url_origen=tarifario_url.url,
+        tamaño_bytes=tamaño_bytes,
+        hash_md5=hash_md5,
+        hash_sha256=hash_sha256,
+        tipo_producto=tarifario_url.tipo_producto,
+        valido=True
+    )
+
+    if sin_cambios:
+        logger.info(f"♻️  Sin cambios: {ruta.name}")
+    else:
+        logger.success(f"✅ Descargado: {ruta.name} ({metadata.tamaño_bytes:,} bytes)")
+    DOWNLOAD_FILES.inc(banco=tarifario_url.banco.value, resultado="sin_cambios" if sin_cambios else "ok")
+    if bytes_transferidos:
+        DOWNLOAD_BYTES.inc(bytes_transferidos, banco=tarifario_url.banco.value)
+
+    return DownloadResult(
+        metadata=metadata,
+        ruta_archivo=str(ruta),
+        exito=True,
+        sin_cambios=sin_cambios
+    )
+
+
+def _resultado_304(store: RawPDFStore, tarifario_url: TarifarioURL, ruta: Path, parcial: _Parcial,
+                   cabeceras) -> DownloadResult:
+    """Resultado de un 304: el contenido es el blob registrado en el manifiesto"""
+    parcial.descartar()
+    entrada = store.manifest.registrar_sin_cambios(tarifario_url.url, **_validadores(cabeceras))
+    store.publicar(store.ruta_blob(entrada["sha256"]), ruta)
+    return _resultado_exitoso(
+        tarifario_url, ruta, entrada["tamaño_bytes"], entrada.get("hash_md5"), entrada.get("sha256"),
+        sin_cambios=True,
+    )
+
+
+def _registrar_descarga(store: RawPDFStore, tarifario_url: TarifarioURL, ruta: Path, parcial: _Parcial,
+                        cabeceras) -> DownloadResult:
+    """Verifica el .part completo, lo pasa a su blob, lo registra y arma el resultado"""
+    parcial.verificar()
+    hashes = parcial.hashes
+    hash_md5 = hashes.md5.hexdigest()
+    hash_sha256 = hashes.sha256.hexdigest()
+    store.guardar(parcial.ruta, hash_sha256, ruta)
+    parcial.descartar()
+    sin_cambios = store.manifest.registrar_descarga(
+        tarifario_url.url, ruta, hashes.tamaño, hash_sha256, hash_md5, **_validadores(cabeceras)
+    )
+    return _resultado_exitoso(tarifario_url, ruta, hashes.tamaño, hash_md5, hash_sha256, sin_cambios,
+                              parcial.transferidos)
+
+
+def _avisar_reintento(ruta: Path, parcial: _Parcial, error: Exception, espera: float):
+    if parcial.reanudable():
+        logger.warning(f"↪️  Retomando {ruta.name} desde {parcial.hashes.tamaño:,} bytes en {espera:.1f}s ({error})")
+    else:
+        logger.warning(f"↪️  Reintentando {ruta.name} en {espera:.1f}s ({error})")
+
+
+def _resultado_fallido(tarifario_url: TarifarioURL, error: Exception) -> DownloadResult:
+    logger.error(f"❌ Error descargando {tarifario_url.url}: {error}")
+    DOWNLOAD_FILES.inc(banco=tarifario_url.banco.value, resultado="error")
+    return DownloadResult(
+        metadata=TarifarioMetadata(
+            banco=tarifario_url.banco,
+            nombre_archivo="",
+            url_origen=tarifario_url.url,
+            tamaño_bytes=0,
+            valido=False,
+            error=str(error)
+        ),
+        ruta_archivo="",
+        exito=False,
+        error=str(error)
+    )
 
 
 class PDFDownloader:
-    """Clase para descargar PDFs de tarifarios"""
+    """
+    Clase para descargar PDFs de tarifarios.
+
+    Los PDFs se guardan en el RawPDFStore (un blob por sha256 y un nombre
+    por URL). Las descargas son condicionales: con los validadores guardados
+    en el manifiesto (ETag / Last-Modified) un PDF que no cambió responde
+    304 y no se vuelve a bajar.
 
-    def __init__(self, carpeta_base: Optional[Path] = None):
+    El cuerpo se escribe en un .part que sólo se publica (rename atómico)
+    después de verificar_pdf. Cada request respeta el límite por host de
+    RATE_LIMITER; los cortes de conexión, timeouts y respuestas 429/5xx se
+    reintentan con backoff hasta settings.RETRY_ATTEMPTS veces (retomando
+    con Range lo ya descargado), y una descarga que aun así no terminó se
+    retoma en la próxima ejecución.
+    """
+
+    def __init__(self, carpeta_base: Optional[Path] = None, store: Optional[RawPDFStore] = None):
         self.carpeta_base = carpeta_base or settings.TARIFARIOS_DIR
+        self.store = store or RawPDFStore(self.carpeta_base)
+        self.manifest = self.store.manifest
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': settings.USER_AGENT
@@ -24,88 +289,70 @@ class PDFDownloader:
         """
         Descarga un PDF y retorna resultado con metadata
         """
+        parcial = None
         try:
-            # Crear carpeta del banco si no existe
-            carpeta_banco = self.carpeta_base / tarifario_url.banco.value.replace(" ", "_")
-            carpeta_banco.mkdir(parents=True, exist_ok=True)
-
-            # Generar nombre de archivo
-            nombre_archivo = self._generar_nombre_archivo(tarifario_url)
-            ruta_completa = carpeta_banco / nombre_archivo
+            ruta_completa = self.store.ruta_para(tarifario_url)
+            parcial = _Parcial(self.store, tarifario_url.url)
 
             # Descargar
             logger.info(f"Descargando: {tarifario_url.texto}")
-            response = self.session.get(
-                tarifario_url.url,
-                timeout=settings.REQUEST_TIMEOUT,
-                stream=True
-            )
-            response.raise_for_status()
-
-            # Guardar archivo
-            with open(ruta_completa, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            # Calcular hash MD5
-            hash_md5 = self._calcular_md5(ruta_completa)
-
-            # Crear metadata
-            metadata = TarifarioMetadata(
-                banco=tarifario_url.banco,
-                nombre_archivo=nombre_archivo,
-                url_origen=tarifario_url.url,
-                tamaño_bytes=ruta_completa.stat().st_size,
-                hash_md5=hash_md5,
-                tipo_producto=tarifario_url.tipo_producto,
-                valido=True
-            )
+            for intento in range(1, settings.RETRY_ATTEMPTS + 1):
+                RATE_LIMITER.esperar(tarifario_url.url)
+                try:
+                    resultado = self._transferir(tarifario_url, ruta_completa, parcial)
+                    break
+                except _Reintentar as e:
+                    if intento == settings.RETRY_ATTEMPTS:
+                        raise
+                    espera = espera_reintento(intento)
+                    logger.warning(f"↪️  {ruta_completa.name}: {e}, se pide completo en {espera:.1f}s")
+                    time.sleep(espera)
+                except (requests.ConnectionError, requests.Timeout, requests.HTTPError,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    respuesta = getattr(e, "response", None)
+                    if intento == settings.RETRY_ATTEMPTS or (
+                            isinstance(e, requests.HTTPError) and respuesta.status_code not in ESTADOS_REINTENTABLES):
+                        raise
+                    espera = espera_reintento(intento, respuesta.headers.get("Retry-After") if respuesta is not None else None)
+                    _avisar_reintento(ruta_completa, parcial, e, espera)
+                    time.sleep(espera)
 
-            logger.success(f"✅ Descargado: {nombre_archivo} ({metadata.tamaño_bytes:,} bytes)")
-
-            return DownloadResult(
-                metadata=metadata,
-                ruta_archivo=str(ruta_completa),
-                exito=True
-            )
+            self.manifest.guardar()
+            return resultado
 
         except Exception as e:
-            logger.error(f"❌ Error descargando {tarifario_url.url}: {e}")
-            return DownloadResult(
-                metadata=TarifarioMetadata(
-                    banco=tarifario_url.banco,
-                    nombre_archivo="",
-                    url_origen=tarifario_url.url,
-                    tamaño_bytes=0,
-                    valido=False,
-                    error=str(e)
-                ),
-                ruta_archivo="",
-                exito=False,
-                error=str(e)
-            )
-
-    def _generar_nombre_archivo(self, tarifario_url: TarifarioURL) -> str:
-        """Genera nombre de archivo limpio"""
-        # Extraer nombre del URL
-        nombre_base = tarifario_url.url.split('/')[-1]
+            if parcial is not None and not parcial.reanudable():
+                parcial.descartar()
+            return _resultado_fallido(tarifario_url, e)
 
-        # Si no termina en .pdf, usar texto del enlace
-        if not nombre_base.endswith('.pdf'):
-            nombre_base = tarifario_url.texto.replace(' ', '_').replace('/', '_') + '.pdf'
+    def _transferir(self, tarifario_url: TarifarioURL, ruta: Path, parcial: _Parcial) -> DownloadResult:
+        """Un intento: pide el PDF (o lo que falta del .part) y lo escribe calculando los hashes"""
+        response = self.session.get(
+            tarifario_url.url,
+            timeout=settings.REQUEST_TIMEOUT,
+            stream=True,
+            headers={**_CABECERAS_DESCARGA,
+                     **self.store.cabeceras_condicionales(tarifario_url.url),
+                     **parcial.cabeceras()}
+        )
+        with response:
+            if response.status_code == 304:
+                return _resultado_304(self.store, tarifario_url, ruta, parcial, response.headers)
+            if response.status_code == 416:
+                parcial.descartar()
+                raise _Reintentar("rango no satisfacible")
+            response.raise_for_status()
 
-        # Limpiar caracteres especiales
-        nombre_limpio = "".join(c for c in nombre_base if c.isalnum() or c in '._-')
+            # Guardar archivo y calcular los hashes mientras llegan los bloques
+            with parcial.abrir(response.status_code, response.headers) as f:
+                for chunk in response.iter_content(chunk_size=tamaño_bloque(parcial.total)):
+                    parcial.escribir(f, chunk)
 
-        return nombre_limpio
+            return _registrar_descarga(self.store, tarifario_url, ruta, parcial, response.headers)
 
-    def _calcular_md5(self, ruta: Path) -> str:
-        """Calcula hash MD5 de un archivo"""
-        hash_md5 = hashlib.md5()
-        with open(ruta, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+    def _generar_nombre_archivo(self, tarifario_url: TarifarioURL) -> str:
+        """Genera nombre de archivo limpio"""
+        return generar_nombre_archivo(tarifario_url)
 
     def cerrar(self):
         """Cierra la sesión"""
@@ -116,3 +363,173 @@ class PDFDownloader:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.cerrar()
+
+
+class AsyncPDFDownloader:
+    """
+    Descarga concurrente de PDFs con aiohttp.
+
+    Una sola sesión con conexiones keep-alive reutilizadas, a lo sumo
+    `max_concurrencia` descargas en curso y `max_por_host` conexiones por
+    host. Cada cuerpo se escribe a disco por bloques a medida que llega y
+    el resultado es el mismo DownloadResult que PDFDownloader.descargar,
+    incluidos el RawPDFStore, las descargas condicionales y la escritura
+    atómica y reanudable. El trabajo de disco que no es escribir un bloque
+    (rehashear un .part, verificar el PDF, moverlo a su blob, publicar el
+    nombre y guardar el manifiesto) corre en un hilo para no frenar las
+    demás descargas.
+
+    Uso:
+        async with AsyncPDFDownloader() as downloader:
+            resultados = await downloader.descargar_todos(urls)
+    """
+
+    def __init__(self,
+                 carpeta_base: Optional[Path] = None,
+                 max_concurrencia: Optional[int] = None,
+                 max_por_host: Optional[int] = None,
+                 store: Optional[RawPDFStore] = None):
+        self.carpeta_base = carpeta_base or settings.TARIFARIOS_DIR
+        self.store = store or RawPDFStore(self.carpeta_base)
+        self.manifest = self.store.manifest
+        self.max_concurrencia = max_concurrencia or settings.DOWNLOAD_CONCURRENCY
+        self.max_por_host = max_por_host or settings.DOWNLOAD_PER_HOST
+        self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+        # La misma URL repetida en la lista no se descarga dos veces a la vez
+        self._locks_archivo: Dict[Path, asyncio.Lock] = {}
+        self._session = None
+
+    async def abrir(self):
+        """Crea la sesión si todavía no existe"""
+        if aiohttp is None:
+            raise ImportError("AsyncPDFDownloader requiere aiohttp (pip install aiohttp)")
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrencia,
+                limit_per_host=self.max_por_host,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': settings.USER_AGENT},
+                # Sin límite total: un PDF grande puede tardar; sí por conexión y por lectura
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=settings.REQUEST_TIMEOUT,
+                    sock_read=settings.REQUEST_TIMEOUT,
+                ),
+            )
+        return self
+
+    async def descargar(self, tarifario_url: TarifarioURL) -> DownloadResult:
+        """
+        Descarga un PDF y retorna resultado con metadata
+        """
+        await self.abrir()
+        parcial = None
+        errores_reintentables = (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError,
+                                 aiohttp.ClientResponseError, asyncio.TimeoutError)
+        try:
+            ruta_completa = await asyncio.to_thread(self.store.ruta_para, tarifario_url)
+            lock = self._locks_archivo.setdefault(ruta_completa, asyncio.Lock())
+
+            async with lock:
+                # Retomar un .part implica leerlo entero para sus hashes
+                parcial = await asyncio.to_thread(_Parcial, self.store, tarifario_url.url)
+                for intento in range(1, settings.RETRY_ATTEMPTS + 1):
+                    # El turno del host se espera fuera del semáforo: un banco lento
+                    # no ocupa los cupos de descarga de los demás
+                    await RATE_LIMITER.esperar_async(tarifario_url.url)
+                    try:
+                        async with self._semaforo:
+                            logger.info(f"Descargando: {tarifario_url.texto}")
+                            return await self._transferir(tarifario_url, ruta_completa, parcial)
+                    except _Reintentar as e:
+                        if intento == settings.RETRY_ATTEMPTS:
+                            raise
+                        espera = espera_reintento(intento)
+                        logger.warning(f"↪️  {ruta_completa.name}: {e}, se pide completo en {espera:.1f}s")
+                        await asyncio.sleep(espera)
+                    except errores_reintentables as e:
+                        estado = getattr(e, "status", None)
+                        if intento == settings.RETRY_ATTEMPTS or (
+                                isinstance(e, aiohttp.ClientResponseError) and estado not in ESTADOS_REINTENTABLES):
+                            raise
+                        cabeceras = getattr(e, "headers", None) or {}
+                        espera = espera_reintento(intento, cabeceras.get("Retry-After"))
+                        _avisar_reintento(ruta_completa, parcial, e, espera)
+                        await asyncio.sleep(espera)
+
+        except Exception as e:
+            if parcial is not None and not parcial.reanudable():
+                await asyncio.to_thread(parcial.descartar)
+            return _resultado_fallido(tarifario_url, e)
+
+    async def _transferir(self, tarifario_url: TarifarioURL, ruta: Path, parcial: _Parcial) -> DownloadResult:
+        """Un intento: pide el PDF (o lo que falta del .part) y lo escribe calculando los hashes"""
+        condicionales = await asyncio.to_thread(self.store.cabeceras_condicionales, tarifario_url.url)
+        cabeceras = {**_CABECERAS_DESCARGA, **condicionales, **parcial.cabeceras()}
+        async with self._session.get(tarifario_url.url, headers=cabeceras) as response:
+            if response.status == 304:
+                return await asyncio.to_thread(_resultado_304, self.store, tarifario_url, ruta, parcial,
+                                               response.headers)
+            if response.status == 416:
+                await asyncio.to_thread(parcial.descartar)
+                raise _Reintentar("rango no satisfacible")
+            response.raise_for_status()
+
+            # Guardar archivo y calcular los hashes mientras llegan los bloques
+            f = await asyncio.to_thread(parcial.abrir, response.status, response.headers)
+            with f:
+                async for chunk in response.content.iter_chunked(tamaño_bloque(parcial.total)):
+                    parcial.escribir(f, chunk)
+
+            return await asyncio.to_thread(_registrar_descarga, self.store, tarifario_url, ruta, parcial,
+                                           response.headers)
+
+    async def descargar_todos(
+        self,
+        urls: List[TarifarioURL],
+        al_terminar: Optional[Callable[[TarifarioURL, DownloadResult], None]] = None,
+    ) -> List[DownloadResult]:
+        """
+        Descarga todas las URLs en paralelo (respetando los límites) y retorna
+        los resultados en el mismo orden que `urls`. `al_terminar` se llama
+        con cada resultado apenas termina su descarga (p. ej. para mostrar progreso).
+        """
+        async def una(url: TarifarioURL) -> DownloadResult:
+            resultado = await self.descargar(url)
+            if al_terminar is not None:
+                al_terminar(url, resultado)
+            return resultado
+
+        try:
+            return list(await asyncio.gather(*(una(url) for url in urls)))
+        finally:
+            await asyncio.to_thread(self.manifest.guardar)
+
+    async def cerrar(self):
+        """Cierra la sesión y sus conexiones"""
+        await asyncio.to_thread(self.manifest.guardar)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.abrir()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.cerrar()
+
+
+def descargar_en_paralelo(
+    urls: List[TarifarioURL],
+    al_terminar: Optional[Callable[[TarifarioURL, DownloadResult], None]] = None,
+    **kwargs,
+) -> List[DownloadResult]:
+    """Versión síncrona de AsyncPDFDownloader.descargar_todos para scripts"""
+    async def _descargar() -> List[DownloadResult]:
+        async with AsyncPDFDownloader(**kwargs) as downloader:
+            return await downloader.descargar_todos(urls, al_terminar)
+
+    return asyncio.run(_descargar())
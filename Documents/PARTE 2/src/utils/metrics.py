@@ -0,0 +1,256 @@
+"""
+Métricas del proceso en formato de texto de Prometheus (versión 0.0.4).
+
+Registro mínimo de contadores, gauges e histogramas con etiquetas, más
+métricas calculadas al momento del scrape (filas del dataset, aciertos de la
+caché) a partir de funciones. Los valores son del proceso: con varios workers
+de uvicorn, Prometheus debe scrapear cada uno o agregarlos por instancia.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets por defecto (segundos) de las latencias HTTP
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets (bytes) del tamaño de las respuestas
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Buckets (segundos) de los trabajos de scraping y descarga
+JOB_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(str(valor))}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if math.isnan(valor):
+        return "NaN"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica(ABC):
+    """Base: nombre, ayuda, nombres de etiqueta y un valor por combinación de etiquetas."""
+
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _clave(self, valores: Dict[str, str]) -> LabelValues:
+        if set(valores) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre}: etiquetas esperadas {self.etiquetas}, recibidas {tuple(valores)}")
+        return tuple(str(valores[nombre]) for nombre in self.etiquetas)
+
+    @abstractmethod
+    def muestras(self) -> List[str]:
+        """Líneas de muestra (sin HELP/TYPE) en formato de texto de Prometheus."""
+
+    def render(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas.extend(self.muestras())
+        return "\n".join(lineas)
+
+
+class Counter(_Metrica):
+    """Contador monótono."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[LabelValues, float] = {}
+
+    def inc(self, cantidad: float = 1.0, **etiquetas: str) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + cantidad
+
+    def value(self, **etiquetas: str) -> float:
+        return self._valores.get(self._clave(etiquetas), 0.0)
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}" for clave, v in valores]
+
+
+class Gauge(_Metrica):
+    """Valor que sube y baja (p. ej. requests en curso)."""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[LabelValues, float] = {}
+
+    def set(self, valor: float, **etiquetas: str) -> None:
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def inc(self, cantidad: float = 1.0, **etiquetas: str) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + cantidad
+
+    def dec(self, cantidad: float = 1.0, **etiquetas: str) -> None:
+        self.inc(-cantidad, **etiquetas)
+
+    def value(self, **etiquetas: str) -> float:
+        return self._valores.get(self._clave(etiquetas), 0.0)
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}" for clave, v in valores]
+
+
+class Histogram(_Metrica):
+    """Histograma acumulado con buckets fijos, suma y conteo por combinación de etiquetas."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # por clave: [conteos por bucket (no acumulados)..., +Inf], suma
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, valor: float, **etiquetas: str) -> None:
+        clave = self._clave(etiquetas)
+        posicion = len(self.buckets)
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                posicion = i
+                break
+        with self._lock:
+            conteos, suma = self._series.setdefault(clave, ([0] * (len(self.buckets) + 1), [0.0]))
+            conteos[posicion] += 1
+            suma[0] += valor
+
+    @contextmanager
+    def time(self, **etiquetas: str) -> Iterator[None]:
+        """Observa la duración del bloque en segundos."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **etiquetas)
+
+    def count(self, **etiquetas: str) -> int:
+        serie = self._series.get(self._clave(etiquetas))
+        return sum(serie[0]) if serie else 0
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            series = [(clave, list(conteos), suma[0]) for clave, (conteos, suma) in self._series.items()]
+        lineas = []
+        for clave, conteos, suma in series:
+            acumulado = 0
+            for limite, n in zip((*self.buckets, math.inf), conteos):
+                acumulado += n
+                le = 'le="' + _numero(limite) + '"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+class FunctionMetric(_Metrica):
+    """Métrica calculada al renderizar: `funcion` devuelve {valores de etiqueta: valor}."""
+
+    def __init__(self, nombre: str, ayuda: str, tipo: str, funcion: Callable[[], Dict[LabelValues, float]],
+                 etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.tipo = tipo
+        self.funcion = funcion
+
+    def muestras(self) -> List[str]:
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}"
+                for clave, v in self.funcion().items()]
+
+
+class Registry:
+    """Conjunto de métricas que se exponen juntas en /metrics."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metrica: _Metrica) -> _Metrica:
+        """Registra la métrica; si ya existe una con el mismo nombre, la reemplaza."""
+        with self._lock:
+            self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def get(self, nombre: str) -> Optional[_Metrica]:
+        return self._metricas.get(nombre)
+
+    def render(self) -> str:
+        with self._lock:
+            metricas = list(self._metricas.values())
+        bloques = []
+        for metrica in metricas:
+            try:
+                bloques.append(metrica.render())
+            except Exception:
+                # Una función que falla (p. ej. dataset aún sin cargar) no tumba el scrape
+                continue
+        return "\n".join(bloques) + "\n"
+
+
+# Registro global del proceso
+REGISTRY = Registry()
+
+# --- Trabajos de scraping y descarga (src/api/main.py, scripts) ---
+
+SCRAPE_DURATION = REGISTRY.register(Histogram(
+    "scrape_job_duration_seconds", "Duración de la obtención de URLs de un banco",
+    ("banco", "resultado"), buckets=JOB_BUCKETS,
+))
+SCRAPE_URLS = REGISTRY.register(Counter(
+    "scrape_urls_found_total", "URLs de PDFs encontradas por banco", ("banco",),
+))
+DOWNLOAD_DURATION = REGISTRY.register(Histogram(
+    "download_job_duration_seconds", "Duración de la descarga de todos los PDFs de un banco",
+    ("banco", "resultado"), buckets=JOB_BUCKETS,
+))
+DOWNLOAD_FILES = REGISTRY.register(Counter(
+    "download_files_total", "PDFs descargados por banco y resultado", ("banco", "resultado"),
+))
+DOWNLOAD_BYTES = REGISTRY.register(Counter(
+    "download_bytes_total", "Bytes de PDFs descargados por banco", ("banco",),
+))
+
+
+@contextmanager
+def track_job(histograma: Histogram, banco: str) -> Iterator[None]:
+    """Observa la duración de un trabajo con resultado "ok" o "error" según termine."""
+    inicio = time.perf_counter()
+    resultado = "error"
+    try:
+        yield
+        resultado = "ok"
+    finally:
+        histograma.observe(time.perf_counter() - inicio, banco=banco, resultado=resultado)
@@ -0,0 +1,98 @@
+"""
+Cortesía con los servidores de los bancos: límite de requests por host y
+reintentos con backoff.
+
+Cada host tiene un token bucket que se recarga a razón de un token cada
+settings.DELAY_BETWEEN_REQUESTS segundos, con ráfagas de hasta
+settings.DOWNLOAD_PER_HOST requests. El limitador es uno solo por proceso
+(RATE_LIMITER) y lo comparten los scrapers (hilos, requests) y las descargas
+(asyncio, aiohttp), así que scrapear y descargar a la vez del mismo banco no
+duplica la carga sobre su servidor.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from ..config import settings
+
+# Respuestas que vale la pena reintentar (límite de tasa y errores transitorios)
+ESTADOS_REINTENTABLES = {408, 429, 500, 502, 503, 504}
+
+# Tope de espera entre reintentos (segundos)
+MAX_ESPERA_REINTENTO = 60.0
+
+
+class TokenBucket:
+    """
+    Token bucket que reserva turnos: `reservar()` descuenta un token y
+    retorna cuántos segundos hay que esperar para usarlo. Así el mismo
+    bucket sirve para hilos (time.sleep) y corrutinas (asyncio.sleep).
+    """
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self) -> float:
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            self._tokens -= 1
+            # Con tokens negativos el turno reservado está en el futuro
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.tasa
+
+
+class HostRateLimiter:
+    """Un TokenBucket por host, creado la primera vez que se le hace un request"""
+
+    def __init__(self, intervalo: Optional[float] = None, rafaga: Optional[int] = None):
+        self.intervalo = settings.DELAY_BETWEEN_REQUESTS if intervalo is None else intervalo
+        self.rafaga = rafaga or settings.DOWNLOAD_PER_HOST
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _espera(self, url: str) -> float:
+        if self.intervalo <= 0:
+            return 0.0
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(1.0 / self.intervalo, self.rafaga)
+        return bucket.reservar()
+
+    def esperar(self, url: str):
+        """Bloquea el hilo hasta que haya turno para el host de `url`"""
+        espera = self._espera(url)
+        if espera:
+            time.sleep(espera)
+
+    async def esperar_async(self, url: str):
+        """Como esperar(), sin bloquear el event loop"""
+        espera = self._espera(url)
+        if espera:
+            await asyncio.sleep(espera)
+
+
+def espera_reintento(intento: int, retry_after: Optional[str] = None) -> float:
+    """
+    Segundos antes del reintento número `intento` (1, 2, ...): backoff
+    exponencial desde settings.DELAY_BETWEEN_REQUESTS con jitter, o el
+    Retry-After del servidor si pide más.
+    """
+    base = max(settings.DELAY_BETWEEN_REQUESTS, 0.1) * 2 ** (intento - 1)
+    espera = base + random.uniform(0, base / 2)
+    if retry_after and retry_after.strip().isdigit():
+        espera = max(espera, float(retry_after))
+    return min(espera, MAX_ESPERA_REINTENTO)
+
+
+# Limitador compartido por todo el proceso
+RATE_LIMITER = HostRateLimiter()
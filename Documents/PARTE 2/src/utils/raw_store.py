@@ -0,0 +1,168 @@
+"""
+Almacén de PDFs originales direccionado por contenido.
+
+Cada PDF se guarda una sola vez en data/raw/blobs/{sha[:2]}/{sha}.pdf. Sobre
+los blobs hay dos índices, ambos en el manifiesto de descargas:
+
+- URL -> sha256 (la entrada de cada URL);
+- nombre -> URL: la ruta legible data/raw/{banco}/{nombre}.pdf que se
+  reserva para cada URL. Dos URLs distintas nunca comparten nombre (la
+  segunda recibe un sufijo), así que un PDF ya no pisa a otro que se llame
+  igual.
+
+Los nombres son enlaces duros al blob, de modo que los scripts que recorren
+data/raw/{banco}/ siguen funcionando sin duplicar espacio. Varios nombres
+con el mismo sha256 son el mismo documento: las etapas de PNG y OCR procesan
+sólo el nombre canónico (ver DownloadManifest.es_canonica).
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from ..models import TarifarioURL
+from .download_manifest import DownloadManifest
+
+BLOBS_DIR = "blobs"
+
+
+def generar_nombre_archivo(tarifario_url: TarifarioURL) -> str:
+    """Genera nombre de archivo limpio"""
+    # Extraer nombre del URL
+    nombre_base = tarifario_url.url.split('/')[-1]
+
+    # Si no termina en .pdf, usar texto del enlace
+    if not nombre_base.endswith('.pdf'):
+        nombre_base = tarifario_url.texto.replace(' ', '_').replace('/', '_') + '.pdf'
+
+    # Limpiar caracteres especiales
+    nombre_limpio = "".join(c for c in nombre_base if c.isalnum() or c in '._-')
+
+    return nombre_limpio
+
+
+def es_blob(carpeta: Path, ruta: Path) -> bool:
+    """True si `ruta` está dentro del almacén de blobs de `carpeta`"""
+    try:
+        return Path(ruta).relative_to(carpeta).parts[:1] == (BLOBS_DIR,)
+    except ValueError:
+        return False
+
+
+def _mismo_contenido(a: Path, b: Path) -> bool:
+    """Compara tamaños y, sólo si coinciden, el sha256 leído por bloques"""
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    return _sha256(a) == _sha256(b)
+
+
+def _sha256(ruta: Path) -> str:
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def copiar_salida_a_duplicados(manifest: DownloadManifest, pdf: Path, salida: Path, carpeta_salida: Path, etapa: str):
+    """
+    Copia `salida` (lo que `etapa` generó para `pdf` en carpeta_salida/{banco}/)
+    a los nombres con el mismo contenido en otros bancos y registra la etapa
+    para ellos. Dentro del mismo banco el documento ya está representado una vez.
+    """
+    salida = Path(salida)
+    if not salida.exists():
+        return
+    for duplicado in manifest.duplicados(pdf):
+        duplicado = Path(duplicado)
+        if duplicado.parent.name == Path(pdf).parent.name:
+            continue
+        destino = Path(carpeta_salida) / duplicado.parent.name / f"{duplicado.stem}{salida.suffix}"
+        if not destino.exists() or not _mismo_contenido(destino, salida):
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(salida, destino)
+            logger.debug(f"Copiado a duplicado: {destino}")
+        manifest.marcar_etapa(manifest.carpeta / duplicado, etapa)
+
+
+class RawPDFStore:
+    """
+    data/raw como almacén por sha256 más índice de nombres y URLs.
+
+    Flujo de una descarga: `ruta_para()` reserva el nombre de la URL,
+    el cuerpo se escribe en `parcial()` calculando el sha256 y `guardar()`
+    lo mueve a su blob (o lo descarta si ese contenido ya estaba) y publica
+    el nombre.
+    """
+
+    def __init__(self, carpeta: Path, manifest: Optional[DownloadManifest] = None):
+        self.carpeta = Path(carpeta)
+        self.blobs = self.carpeta / BLOBS_DIR
+        self.manifest = manifest or DownloadManifest(self.carpeta)
+
+    def ruta_blob(self, sha256: str) -> Path:
+        return self.blobs / sha256[:2] / f"{sha256}.pdf"
+
+    def ruta_para(self, tarifario_url: TarifarioURL) -> Path:
+        """Nombre reservado para la URL: el de siempre o uno nuevo que no choque con otra URL"""
+        carpeta_banco = self.carpeta / tarifario_url.banco.value.replace(" ", "_")
+        carpeta_banco.mkdir(parents=True, exist_ok=True)
+
+        preferida = carpeta_banco / generar_nombre_archivo(tarifario_url)
+        sufijo = hashlib.sha1(tarifario_url.url.encode("utf-8")).hexdigest()[:8]
+        alternativa = preferida.with_name(f"{preferida.stem}_{sufijo}{preferida.suffix}")
+        return self.manifest.reservar_ruta(tarifario_url.url, preferida, alternativa)
+
+    def parcial(self, url: str) -> Path:
+        """
+        Archivo .part de `url` (en el mismo disco que los blobs, para poder
+        renombrarlo). Es siempre el mismo para una URL: una descarga cortada
+        se retoma desde ahí.
+        """
+        carpeta = self.blobs / "tmp"
+        carpeta.mkdir(parents=True, exist_ok=True)
+        return carpeta / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.part"
+
+    def blob_vigente(self, url: str) -> Optional[Path]:
+        """Blob del último contenido registrado para `url`, si sigue en disco"""
+        entrada = self.manifest.get(url)
+        if not entrada or not entrada.get("sha256"):
+            return None
+        blob = self.ruta_blob(entrada["sha256"])
+        if not blob.exists() or blob.stat().st_size != entrada.get("tamaño_bytes"):
+            return None
+        return blob
+
+    def cabeceras_condicionales(self, url: str):
+        """Validadores de `url`, sólo si su blob sigue en disco (un 304 no lo traería)"""
+        blob = self.blob_vigente(url)
+        return self.manifest.cabeceras_condicionales(url) if blob else {}
+
+    def guardar(self, temporal: Path, sha256: str, ruta: Path) -> Path:
+        """Mueve `temporal` a su blob (si el contenido es nuevo) y publica `ruta` apuntando a él"""
+        blob = self.ruta_blob(sha256)
+        if blob.exists():
+            temporal.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temporal, blob)
+        self.publicar(blob, ruta)
+        return blob
+
+    def publicar(self, blob: Path, ruta: Path):
+        """Deja `ruta` como enlace duro a `blob` (copia si el sistema de archivos no los soporta)"""
+        ruta = Path(ruta)
+        if ruta.exists() and os.path.samefile(ruta, blob):
+            return
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        provisoria = ruta.with_name(f".{ruta.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            os.link(blob, provisoria)
+        except OSError:
+            shutil.copyfile(blob, provisoria)
+        # Reemplazo atómico: nunca queda un nombre a medio escribir
+        os.replace(provisoria, ruta)
@@ -0,0 +1,55 @@
+"""
+Fixtures compartidas: una copia del CSV de salida en un directorio temporal
+(los snapshots Feather y las bases SQLite se escriben junto a ella) y los dos
+backends del visor sobre ese mismo archivo.
+"""
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.sqlite_backend import SQLiteViewerBackend
+from src.services.viewer_service import ViewerService
+
+CSV_ORIGEN = Path(__file__).parent.parent / "data" / "output" / "tarifarios_bancarios.csv"
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    destino = tmp_path / "tarifarios_bancarios.csv"
+    shutil.copy(CSV_ORIGEN, destino)
+    return destino
+
+
+@pytest.fixture
+def loop():
+    """Event loop propio por prueba (las conexiones aiosqlite quedan ligadas a él)."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def consultar(loop, backend, metodo: str, *args, **kwargs):
+    """Abre una vista del backend y ejecuta una de sus consultas."""
+    async def _consultar():
+        async with backend.view() as vista:
+            return await getattr(vista, metodo)(*args, **kwargs)
+
+    return loop.run_until_complete(_consultar())
+
+
+@pytest.fixture
+def servicio(csv_path):
+    return ViewerService(csv_path)
+
+
+@pytest.fixture
+def sqlite(csv_path, loop):
+    backend = SQLiteViewerBackend(csv_path=csv_path, db_path=csv_path.with_suffix(".db"), pool_size=2)
+    loop.run_until_complete(backend.open())
+    yield backend
+    loop.run_until_complete(backend.close())
@@ -0,0 +1,38 @@
+"""
+Búsqueda de texto sin términos buscables (sólo palabras vacías o símbolos)
+"""
+import pytest
+
+from src.services.query_language import QuerySyntaxError, parse_expression
+from tests.conftest import consultar
+
+
+@pytest.mark.parametrize("filtro", [{"concepto": "de"}, {"producto": " "}, {"q": "de la"}, {"producto": "?!"}])
+def test_filtro_sin_terminos_no_restringe(servicio, sqlite, loop, filtro):
+    total = len(servicio.df)
+    assert servicio.get_tarifarios(**filtro)["total_items"] == total
+    assert consultar(loop, sqlite, "get_tarifarios", **filtro)["total_items"] == total
+
+
+def test_contains_sin_terminos_es_error_de_sintaxis(servicio, sqlite, loop):
+    with pytest.raises(QuerySyntaxError):
+        parse_expression('Concepto CONTAINS "de la"', servicio.df.columns)
+    with pytest.raises(QuerySyntaxError):
+        servicio.query_tarifarios('Concepto CONTAINS "el"')
+    with pytest.raises(QuerySyntaxError):
+        consultar(loop, sqlite, "query_tarifarios", 'Concepto CONTAINS "el"')
+
+
+def test_filtro_con_palabras_vacias_usa_los_demas_terminos(servicio, sqlite, loop):
+    con_vacias = servicio.get_tarifarios(concepto="disposición de efectivo")["total_items"]
+    assert con_vacias == servicio.get_tarifarios(concepto="disposición efectivo")["total_items"] > 0
+    assert consultar(loop, sqlite, "get_tarifarios", concepto="disposición de efectivo")["total_items"] == con_vacias
+
+
+@pytest.mark.parametrize("q", ["s", "de s", "tarj", "efect"])
+def test_prefijos_cortos_igual_en_ambos_backends(servicio, sqlite, loop, q):
+    """La tabla FTS guarda los términos de tokenizar: un prefijo no coincide con palabras vacías."""
+    memoria = servicio.get_tarifarios(q=q, limit=len(servicio.df), fields=["id"])
+    base = consultar(loop, sqlite, "get_tarifarios", q=q, limit=len(servicio.df), fields=["id"])
+    assert base["total_items"] == memoria["total_items"]
+    assert [item["id"] for item in base["items"]] == [item["id"] for item in memoria["items"]]
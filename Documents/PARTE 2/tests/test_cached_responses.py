@@ -0,0 +1,53 @@
+"""
+Caché de respuestas con ETag / 304
+"""
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.api.endpoints.cached_responses import VERSION_HEADER, cached_json_response_async, response_cache
+
+
+class _Respuesta(BaseModel):
+    version: str
+
+
+def _app(construidas):
+    app = FastAPI()
+
+    @app.get("/datos")
+    async def datos(request: Request, version: str = "v1", n: int = 0):
+        async def build():
+            construidas.append((version, n))
+            return {"version": version}
+
+        return await cached_json_response_async(request, "datos", version, {"n": n}, _Respuesta, build)
+
+    return TestClient(app)
+
+
+def test_etag_y_304():
+    response_cache.clear()
+    construidas = []
+    cliente = _app(construidas)
+
+    primera = cliente.get("/datos")
+    assert primera.status_code == 200 and primera.json() == {"version": "v1"}
+    assert primera.headers[VERSION_HEADER] == "v1"
+    etag = primera.headers["ETag"]
+
+    revalidada = cliente.get("/datos", headers={"If-None-Match": etag})
+    assert revalidada.status_code == 304 and revalidada.content == b""
+    assert cliente.get("/datos").json() == {"version": "v1"}
+    assert construidas == [("v1", 0)]
+
+    # Otra versión u otros parámetros son otra entrada
+    nueva = cliente.get("/datos", params={"version": "v2"}, headers={"If-None-Match": etag})
+    assert nueva.status_code == 200 and nueva.headers["ETag"] != etag
+    cliente.get("/datos", params={"n": 1})
+    assert construidas == [("v1", 0), ("v2", 0), ("v1", 1)]
+
+    response_cache.clear(keep_versions=["v2"])
+    cliente.get("/datos")
+    cliente.get("/datos", params={"version": "v2"})
+    assert construidas[3:] == [("v1", 0)]
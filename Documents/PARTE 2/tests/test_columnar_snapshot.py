@@ -0,0 +1,46 @@
+"""
+Snapshot columnar (Feather) junto al CSV
+"""
+import pandas as pd
+
+from src.services.columnar_snapshot import (
+    CATEGORY_COLUMNS,
+    columnar_path_for,
+    read_columnar_snapshot,
+    write_columnar_snapshot,
+)
+from src.services.viewer_snapshot import ViewerSnapshot, file_version
+
+
+def _escribir(csv_path):
+    version = file_version(csv_path)
+    write_columnar_snapshot(pd.read_csv(csv_path), columnar_path_for(csv_path), source_version=version)
+    return version
+
+
+def test_feather_truncado_vuelve_al_csv(csv_path):
+    version = _escribir(csv_path)
+    feather = columnar_path_for(csv_path)
+    datos = feather.read_bytes()
+    feather.write_bytes(datos[:len(datos) // 2])
+
+    assert read_columnar_snapshot(feather, source_version=version) is None
+    snapshot = ViewerSnapshot.from_csv(csv_path)
+    assert len(snapshot.df) == len(pd.read_csv(csv_path))
+
+    feather.write_bytes(b"no es un archivo feather")
+    assert read_columnar_snapshot(feather, source_version=version) is None
+
+
+def test_productos_quedan_como_texto_arrow(csv_path):
+    version = _escribir(csv_path)
+    df = read_columnar_snapshot(columnar_path_for(csv_path), source_version=version)
+    assert "Producto_Codigo" not in CATEGORY_COLUMNS and "Producto_Nombre" not in CATEGORY_COLUMNS
+    for col in ("Producto_Codigo", "Producto_Nombre", "Concepto"):
+        assert df[col].dtype.storage == "pyarrow"
+    assert isinstance(df["Banco"].dtype, pd.CategoricalDtype)
+
+
+def test_version_distinta_se_ignora(csv_path):
+    _escribir(csv_path)
+    assert read_columnar_snapshot(columnar_path_for(csv_path), source_version="otra") is None
@@ -0,0 +1,59 @@
+"""
+Cubo de agregación e histogramas precalculados, contra pandas y en los dos backends
+"""
+import pytest
+
+from src.services.sqlite_backend import SQLiteViewerBackend
+from src.services.viewer_service import ViewerService
+from tests.conftest import consultar
+
+
+def _redondeado(agregados):
+    """Los promedios sólo difieren en el orden de la suma entre backends"""
+    for grupo in agregados["grupos"]:
+        for metricas in grupo["metricas"].values():
+            if metricas["mean"] is not None:
+                metricas["mean"] = round(metricas["mean"], 9)
+    return agregados
+
+
+def test_agregados_como_pandas(servicio, sqlite, loop):
+    memoria = servicio.get_aggregate_stats(group_by=["Banco"], Tipo=["COMISION", "TASA"])
+    base = consultar(loop, sqlite, "get_aggregate_stats", group_by=["Banco"], Tipo=["COMISION", "TASA"])
+    assert _redondeado(base) == _redondeado(memoria)
+
+    df = servicio.df
+    esperado = df[df["Tipo"].isin(["COMISION", "TASA"])].groupby("Banco")["Monto_Fijo_MN"]
+    for grupo in memoria["grupos"]:
+        serie = esperado.get_group(grupo["claves"]["Banco"])
+        metricas = grupo["metricas"]["Monto_Fijo_MN"]
+        assert grupo["total_registros"] == len(serie)
+        assert metricas["count"] == serie.count()
+        if metricas["count"]:
+            assert metricas["mean"] == pytest.approx(serie.mean())
+            assert (metricas["min"], metricas["max"]) == (serie.min(), serie.max())
+
+
+def test_histograma_cuenta_los_valores_no_nulos(servicio, sqlite, loop):
+    memoria = servicio.get_distribution("Tasa_Porcentaje_MN", group_by=["Banco"], bins=10)
+    assert consultar(loop, sqlite, "get_distribution", "Tasa_Porcentaje_MN", group_by=["Banco"], bins=10) == memoria
+
+    conteos = servicio.df.groupby("Banco")["Tasa_Porcentaje_MN"].count()
+    for grupo in memoria["grupos"]:
+        assert grupo["count"] == conteos[grupo["claves"]["Banco"]]
+
+
+def test_dataset_vacio(csv_path, loop):
+    csv_path.write_text(csv_path.read_text(encoding="utf-8").splitlines()[0] + "\n", encoding="utf-8")
+    servicio = ViewerService(csv_path)
+    assert servicio.get_stats()["total_registros"] == 0
+    assert servicio.get_distribution("Tasa_Porcentaje_MN")["grupos"] == []
+    assert servicio.get_aggregate_stats()["grupos"] == []
+
+    sqlite = SQLiteViewerBackend(csv_path=csv_path, db_path=csv_path.with_suffix(".db"), pool_size=1)
+    loop.run_until_complete(sqlite.open())
+    try:
+        assert consultar(loop, sqlite, "get_distribution", "Tasa_Porcentaje_MN")["grupos"] == []
+        assert consultar(loop, sqlite, "get_tarifarios")["total_items"] == 0
+    finally:
+        loop.run_until_complete(sqlite.close())
@@ -0,0 +1,71 @@
+"""
+Manifiesto de descargas: nombres reservados y duplicados por contenido
+"""
+import json
+
+from src.utils.download_manifest import ETAPA_OCR, MANIFEST_FILE, DownloadManifest
+from src.utils.raw_store import copiar_salida_a_duplicados
+
+
+def _descargar(manifest, url, ruta, sha):
+    (manifest.carpeta / ruta).parent.mkdir(parents=True, exist_ok=True)
+    (manifest.carpeta / ruta).write_bytes(sha.encode())
+    manifest.registrar_descarga(url, manifest.carpeta / ruta, 1, sha, "md5")
+
+
+def test_reservar_ruta_no_repite_nombres(tmp_path):
+    manifest = DownloadManifest(tmp_path)
+    preferida, alternativa = tmp_path / "BCP" / "a.pdf", tmp_path / "BCP" / "a_1.pdf"
+    assert manifest.reservar_ruta("http://x/1/a.pdf", preferida, alternativa) == preferida
+    assert manifest.reservar_ruta("http://x/2/a.pdf", preferida, alternativa) == alternativa
+    # Una URL conserva su nombre en las siguientes corridas
+    assert manifest.reservar_ruta("http://x/1/a.pdf", preferida, alternativa) == preferida
+
+
+def test_nombre_compartido_de_un_manifiesto_anterior(tmp_path):
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps({"urls": {
+        "http://x/b": {"ruta": "BCP/a.pdf", "etapas": {}},
+        "http://x/a": {"ruta": "BCP/a.pdf", "etapas": {}},
+    }}), encoding="utf-8")
+    manifest = DownloadManifest(tmp_path)
+    preferida, alternativa = tmp_path / "BCP" / "a.pdf", tmp_path / "BCP" / "a_1.pdf"
+    # La primera URL (en orden) se queda con el nombre; la otra pasa a la alternativa
+    assert manifest.reservar_ruta("http://x/a", preferida, alternativa) == preferida
+    assert manifest.reservar_ruta("http://x/b", preferida, alternativa) == alternativa
+
+
+def test_duplicados_siguen_los_cambios_de_contenido(tmp_path):
+    manifest = DownloadManifest(tmp_path)
+    _descargar(manifest, "http://bcp/a", "BCP/a.pdf", "s1")
+    _descargar(manifest, "http://ibk/a", "Interbank/a.pdf", "s1")
+    assert manifest.duplicados(tmp_path / "BCP" / "a.pdf") == ["Interbank/a.pdf"]
+    assert manifest.es_canonica(tmp_path / "BCP" / "a.pdf")
+    assert not manifest.es_canonica(tmp_path / "Interbank" / "a.pdf")
+
+    _descargar(manifest, "http://ibk/a", "Interbank/a.pdf", "s2")
+    assert manifest.duplicados(tmp_path / "BCP" / "a.pdf") == []
+    assert manifest.es_canonica(tmp_path / "Interbank" / "a.pdf")
+
+    # Los índices se reconstruyen al leer el manifiesto guardado
+    manifest.guardar()
+    assert DownloadManifest(tmp_path).duplicados(tmp_path / "Interbank" / "a.pdf") == []
+
+
+def test_copiar_salida_a_duplicados(tmp_path):
+    raw, ocr = tmp_path / "raw", tmp_path / "ocr"
+    manifest = DownloadManifest(raw)
+    _descargar(manifest, "http://bcp/a", "BCP/a.pdf", "s1")
+    _descargar(manifest, "http://ibk/a", "Interbank/b.pdf", "s1")
+    salida = ocr / "BCP" / "a.md"
+    salida.parent.mkdir(parents=True)
+    salida.write_text("tabla", encoding="utf-8")
+
+    copiar_salida_a_duplicados(manifest, raw / "BCP" / "a.pdf", salida, ocr, ETAPA_OCR)
+    destino = ocr / "Interbank" / "b.md"
+    assert destino.read_text(encoding="utf-8") == "tabla"
+    assert not manifest.etapa_desactualizada(raw / "Interbank" / "b.pdf", ETAPA_OCR)
+
+    # Mismo tamaño, distinto contenido: se vuelve a copiar
+    destino.write_text("TABLA", encoding="utf-8")
+    copiar_salida_a_duplicados(manifest, raw / "BCP" / "a.pdf", salida, ocr, ETAPA_OCR)
+    assert destino.read_text(encoding="utf-8") == "tabla"
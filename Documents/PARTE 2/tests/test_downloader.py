@@ -0,0 +1,125 @@
+"""
+Descargas asíncronas: condicionales, reanudables y verificadas, contra un servidor local
+"""
+import hashlib
+import json
+
+import pytest
+from aiohttp import web
+
+from src.models import TarifarioURL
+from src.models.tarifario import BancoEnum
+from src.utils import downloader as modulo
+from src.utils.downloader import AsyncPDFDownloader
+from src.utils.rate_limit import RATE_LIMITER
+from src.utils.raw_store import RawPDFStore
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 1200 + b"\nstartxref\n0\n%%EOF\n"
+ETAG = '"v1"'
+
+
+class _Servidor:
+    """Sirve PDF con ETag, 304 y Range; `rango_erroneo` responde un 206 desde otro byte"""
+
+    def __init__(self, loop, cuerpo=PDF):
+        self.loop = loop
+        self.cuerpo = cuerpo
+        self.pedidos = []
+        self.rango_erroneo = 0
+        app = web.Application()
+        app.router.add_get("/tarifario.pdf", self._responder)
+        self.runner = web.AppRunner(app)
+        loop.run_until_complete(self.runner.setup())
+        self.site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        loop.run_until_complete(self.site.start())
+        self.url = f"http://127.0.0.1:{self.site._server.sockets[0].getsockname()[1]}/tarifario.pdf"
+
+    async def _responder(self, request):
+        self.pedidos.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        rango = request.headers.get("Range")
+        if rango and request.headers.get("If-Range") == ETAG:
+            inicio = int(rango.split("=")[1].rstrip("-"))
+            if self.rango_erroneo:
+                self.rango_erroneo -= 1
+                inicio = 0
+            return web.Response(status=206, body=self.cuerpo[inicio:], headers={
+                "ETag": ETAG, "Content-Range": f"bytes {inicio}-{len(self.cuerpo) - 1}/{len(self.cuerpo)}"})
+        return web.Response(body=self.cuerpo, headers={"ETag": ETAG})
+
+    def cerrar(self):
+        self.loop.run_until_complete(self.runner.cleanup())
+
+
+@pytest.fixture
+def servidor(loop, monkeypatch):
+    monkeypatch.setattr(RATE_LIMITER, "intervalo", 0)
+    servidor = _Servidor(loop)
+    yield servidor
+    servidor.cerrar()
+
+
+def _descargar(loop, carpeta, url):
+    async def descargar():
+        async with AsyncPDFDownloader(carpeta) as downloader:
+            return (await downloader.descargar_todos([url]))[0]
+
+    return loop.run_until_complete(descargar())
+
+
+def _parcial_cortado(carpeta, servidor):
+    """.part con los primeros 100 kB y su validador, como lo deja una descarga cortada"""
+    parcial = RawPDFStore(carpeta).parcial(servidor.url)
+    parcial.write_bytes(PDF[:100_000])
+    parcial.with_suffix(".json").write_text(json.dumps({"validador": ETAG}), encoding="utf-8")
+    return parcial
+
+
+def _tarifario(servidor):
+    return TarifarioURL(banco=BancoEnum.BCP, url=servidor.url, texto="Tarifario", tipo_producto="tarjetas")
+
+
+def test_descarga_y_luego_304(servidor, loop, tmp_path):
+    primera = _descargar(loop, tmp_path, _tarifario(servidor))
+    assert primera.exito and not primera.sin_cambios
+    assert primera.metadata.hash_sha256 == hashlib.sha256(PDF).hexdigest()
+    assert (tmp_path / "BCP" / "tarifario.pdf").read_bytes() == PDF
+
+    segunda = _descargar(loop, tmp_path, _tarifario(servidor))
+    assert segunda.exito and segunda.sin_cambios
+    assert servidor.pedidos[-1]["If-None-Match"] == ETAG
+    assert (tmp_path / "BCP" / "tarifario.pdf").read_bytes() == PDF
+
+
+def test_retoma_un_parcial(servidor, loop, tmp_path):
+    parcial = _parcial_cortado(tmp_path, servidor)
+
+    resultado = _descargar(loop, tmp_path, _tarifario(servidor))
+    assert resultado.exito
+    assert servidor.pedidos[0]["Range"] == "bytes=100000-"
+    assert resultado.metadata.hash_sha256 == hashlib.sha256(PDF).hexdigest()
+    assert not parcial.exists()
+
+
+def test_rango_erroneo_espera_antes_de_pedir_completo(servidor, loop, tmp_path, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(modulo, "espera_reintento", lambda intento, retry_after=None: esperas.append(intento) or 0)
+    parcial = _parcial_cortado(tmp_path, servidor)
+    servidor.rango_erroneo = 1
+
+    resultado = _descargar(loop, tmp_path, _tarifario(servidor))
+    assert resultado.exito and esperas == [1]
+    assert "Range" not in servidor.pedidos[-1]
+    assert resultado.metadata.hash_sha256 == hashlib.sha256(PDF).hexdigest()
+
+
+def test_pdf_truncado_no_se_publica(loop, tmp_path, monkeypatch):
+    monkeypatch.setattr(RATE_LIMITER, "intervalo", 0)
+    servidor = _Servidor(loop, cuerpo=PDF[:-20])
+    try:
+        resultado = _descargar(loop, tmp_path, _tarifario(servidor))
+    finally:
+        servidor.cerrar()
+    assert not resultado.exito and "truncado" in resultado.error
+    assert not (tmp_path / "BCP" / "tarifario.pdf").exists()
@@ -0,0 +1,41 @@
+"""
+Exportación por bloques en CSV, NDJSON y Parquet
+"""
+import io
+import json
+
+import pandas as pd
+
+from src.services import exporter
+from src.services.exporter import iter_export
+
+
+def _exportar(servicio, formato, **filtros) -> bytes:
+    rows = servicio.get_rows(**filtros)
+    return b"".join(iter_export(formato, servicio.df, rows))
+
+
+def test_formatos_con_varios_bloques(servicio, monkeypatch):
+    monkeypatch.setattr(exporter, "EXPORT_CHUNK_ROWS", 100)
+    rows = servicio.get_rows(banco="BBVA_Continental")
+    assert len(rows) > 100
+
+    csv = _exportar(servicio, "csv", banco="BBVA_Continental")
+    assert csv.startswith("﻿".encode("utf-8"))
+    leido = pd.read_csv(io.BytesIO(csv), encoding="utf-8-sig")
+    assert list(leido.columns) == list(servicio.df.columns)
+    assert len(leido) == len(rows) and set(leido["Banco"]) == {"BBVA_Continental"}
+
+    lineas = _exportar(servicio, "ndjson", banco="BBVA_Continental").decode("utf-8").splitlines()
+    assert len(lineas) == len(rows)
+    assert json.loads(lineas[0])["Banco"] == "BBVA_Continental"
+
+    parquet = pd.read_parquet(io.BytesIO(_exportar(servicio, "parquet", banco="BBVA_Continental")))
+    assert len(parquet) == len(rows)
+    assert str(parquet["Tasa_Porcentaje_MN"].dtype) == "float64"
+
+
+def test_exportacion_vacia_tiene_cabecera(servicio):
+    csv = _exportar(servicio, "csv", banco="No existe")
+    assert pd.read_csv(io.BytesIO(csv), encoding="utf-8-sig").empty
+    assert _exportar(servicio, "ndjson", banco="No existe") == b""
@@ -0,0 +1,30 @@
+"""
+Filtros del visor (índices de bitmaps y SQL) contra pandas
+"""
+import numpy as np
+import pytest
+
+from tests.conftest import consultar
+
+CASOS = [
+    ({"banco": "BCP"}, lambda df: df["Banco"] == "BCP"),
+    ({"banco": ["BCP", "Scotiabank"], "moneda": "MN"},
+     lambda df: df["Banco"].isin(["BCP", "Scotiabank"]) & (df["Moneda"] == "MN")),
+    ({"tipo": ["TASA"], "tasa_mn_gte": 10, "tasa_mn_lte": 50},
+     lambda df: (df["Tipo"] == "TASA") & df["Tasa_Porcentaje_MN"].between(10, 50)),
+    ({"tasa_me_lte": 5}, lambda df: df["Tasa_Porcentaje_ME"] <= 5),
+    ({"banco": "No existe"}, lambda df: df["Banco"] == "No existe"),
+]
+
+
+@pytest.mark.parametrize("filtros, mascara", CASOS)
+def test_filtros_como_pandas(servicio, sqlite, loop, filtros, mascara):
+    df = servicio.df
+    todos = [item["id"] for item in servicio.get_tarifarios(limit=len(df), fields=["id"])["items"]]
+    esperados = [todos[i] for i in np.flatnonzero(mascara(df).fillna(False).to_numpy(dtype=bool))]
+
+    memoria = servicio.get_tarifarios(limit=len(df), fields=["id"], **filtros)
+    base = consultar(loop, sqlite, "get_tarifarios", limit=len(df), fields=["id"], **filtros)
+    assert [item["id"] for item in memoria["items"]] == esperados
+    assert [item["id"] for item in base["items"]] == esperados
+    assert memoria["total_items"] == base["total_items"] == len(esperados)
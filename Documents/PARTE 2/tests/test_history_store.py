@@ -0,0 +1,33 @@
+"""
+Historial de snapshots: campos que vuelven a nulo
+"""
+import pandas as pd
+
+from src.services.history_store import HistoryStore
+from src.services.row_ids import compute_row_ids
+
+
+def test_campo_que_vuelve_a_nulo(csv_path, tmp_path):
+    df = pd.read_csv(csv_path).head(50)
+    ids = compute_row_ids(df)
+    # Una fila de clave única: su id no depende del contenido
+    fila = next(i for i, row_id in enumerate(ids) if "-" not in row_id)
+    row_id = ids[fila]
+
+    versiones = []
+    for valor in (None, "nota", None):
+        version = df.copy()
+        version.loc[fila, "Observaciones"] = valor
+        versiones.append(version)
+
+    historial = HistoryStore(tmp_path / "historial.db")
+    for numero, version in enumerate(versiones, 1):
+        resumen = historial.record(version, f"v{numero}")
+    assert (resumen["altas"], resumen["modificaciones"], resumen["bajas"]) == (0, 1, 0)
+
+    cambios = historial.row_history(row_id)["historial"]
+    assert [c["campos"] for c in cambios[1:]] == [["Observaciones"], ["Observaciones"]]
+    assert all(None not in c["valores"].values() for c in cambios)
+    assert "Observaciones" not in cambios[-1]["valores"]
+    assert cambios[-1]["valores"] == cambios[0]["valores"]
+    assert historial.row_history(row_id, campos=["Observaciones"])["historial"][-1]["valores"] == {}
@@ -0,0 +1,21 @@
+"""
+Registros JSON por columna
+"""
+import numpy as np
+import pandas as pd
+
+from src.services.json_encoding import column_records
+
+
+def test_categorias_sin_convertir_la_lista_completa():
+    df = pd.DataFrame({
+        "Banco": pd.Categorical(["BCP", None, "Interbank", "BCP"], categories=["BCP", "Interbank", "Otro"]),
+        "Tasa": [1.5, np.nan, 2.0, None],
+    })
+    registros = column_records(df, np.array([3, 1, 2]), ["Banco", "Tasa"], ids=["x", "y", "z"])
+    assert registros == [
+        {"id": "x", "Banco": "BCP", "Tasa": None},
+        {"id": "y", "Banco": None, "Tasa": None},
+        {"id": "z", "Banco": "Interbank", "Tasa": 2.0},
+    ]
+    assert column_records(df, np.array([], dtype=np.int64), ["Banco"]) == []
@@ -0,0 +1,60 @@
+"""
+Paginación por offset y por cursor, en los dos backends
+"""
+import pytest
+
+from src.services.pagination import ExpiredCursorError, InvalidCursorError, decode_cursor, encode_cursor
+from tests.conftest import consultar
+
+FILTROS = {"banco": ["BCP", "Interbank"]}
+
+
+def _ids(pagina):
+    return [item["id"] for item in pagina["items"]]
+
+
+def _por_cursor(obtener, limit, **params):
+    ids, cursor = [], None
+    while True:
+        pagina = obtener(limit=limit, cursor=cursor, **params)
+        ids += _ids(pagina)
+        cursor = pagina["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("orden", [
+    {},
+    {"sort_by": "Tasa_Porcentaje_MN"},
+    {"sort_by": "Tasa_Porcentaje_MN", "sort_order": "desc"},
+    {"sort_by": "Concepto"},
+])
+def test_cursor_recorre_lo_mismo_que_offset(servicio, sqlite, loop, orden):
+    total = servicio.get_tarifarios(limit=1, **FILTROS, **orden)["total_items"]
+    por_offset = _ids(servicio.get_tarifarios(limit=total, **FILTROS, **orden))
+    por_paginas = [i for skip in range(0, total, 37)
+                   for i in _ids(servicio.get_tarifarios(skip=skip, limit=37, **FILTROS, **orden))]
+    assert por_paginas == por_offset
+
+    assert _por_cursor(servicio.get_tarifarios, 37, **FILTROS, **orden) == por_offset
+    assert _por_cursor(lambda **kw: consultar(loop, sqlite, "get_tarifarios", **kw), 37, **FILTROS, **orden) == por_offset
+
+
+@pytest.mark.parametrize("posicion", [-3, True, "1", None])
+def test_cursor_con_posicion_falsa(servicio, sqlite, loop, posicion):
+    for obtener in (servicio.get_tarifarios, lambda **kw: consultar(loop, sqlite, "get_tarifarios", **kw)):
+        estado = decode_cursor(obtener(limit=5)["next_cursor"])
+        estado["p"] = posicion
+        with pytest.raises(InvalidCursorError):
+            obtener(limit=5, cursor=encode_cursor(estado))
+
+
+def test_cursor_de_otros_filtros_o_de_otra_version(servicio, sqlite, loop):
+    for obtener in (servicio.get_tarifarios, lambda **kw: consultar(loop, sqlite, "get_tarifarios", **kw)):
+        cursor = obtener(limit=5, **FILTROS)["next_cursor"]
+        with pytest.raises(InvalidCursorError):
+            obtener(limit=5, cursor=cursor, banco="BCP")
+        estado = decode_cursor(cursor)
+        estado["v"] = "otra"
+        with pytest.raises(ExpiredCursorError):
+            obtener(limit=5, cursor=encode_cursor(estado), **FILTROS)
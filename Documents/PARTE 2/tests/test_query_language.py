@@ -0,0 +1,24 @@
+"""
+Pruebas del lenguaje de expresiones de filtro
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.query_language import MAX_NESTING_DEPTH, QuerySyntaxError, parse_expression
+
+COLUMNAS = ["banco", "tipo", "monto_fijo_mn"]
+
+
+def test_anidamiento_excesivo_es_error_de_sintaxis():
+    for expresion in ('(' * 400 + 'tipo = "TASA"' + ')' * 400, 'NOT ' * 400 + 'tipo = "TASA"'):
+        with pytest.raises(QuerySyntaxError):
+            parse_expression(expresion, COLUMNAS)
+
+
+def test_anidamiento_dentro_del_limite():
+    n = MAX_NESTING_DEPTH
+    assert parse_expression('(' * n + 'tipo = "TASA"' + ')' * n, COLUMNAS) == ("cmp", "tipo", "=", "TASA")
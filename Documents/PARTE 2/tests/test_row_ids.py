@@ -0,0 +1,48 @@
+"""
+Ids estables de fila e historial entre corridas
+"""
+import pandas as pd
+
+from src.services.history_store import HistoryStore
+from src.services.row_ids import ROW_ID_COLUMNS, compute_row_ids
+from tests.conftest import consultar
+
+
+def _grupo_repetido(df):
+    """Posiciones de la clave repetida más grande (p. ej. los tramos de una tasa)."""
+    tamanos = df.groupby(ROW_ID_COLUMNS, dropna=False).size()
+    clave = tamanos.idxmax()
+    mascara = (df[ROW_ID_COLUMNS].fillna("") == pd.Series(clave, index=ROW_ID_COLUMNS).fillna("")).all(axis=1)
+    return list(mascara[mascara].index)
+
+
+def test_ids_no_dependen_del_orden(csv_path):
+    df = pd.read_csv(csv_path)
+    mezclado = df.sample(frac=1, random_state=7)
+    ids = compute_row_ids(df)
+    # Las filas idénticas en todo son intercambiables: basta con el mismo conjunto de ids
+    assert sorted(compute_row_ids(mezclado)) == sorted(ids)
+    assert len(set(ids)) == len(df)
+
+
+def test_fila_insertada_en_un_grupo_es_una_sola_alta(csv_path, tmp_path):
+    df = pd.read_csv(csv_path)
+    grupo = _grupo_repetido(df)
+    assert len(grupo) >= 3
+
+    nueva = df.loc[[grupo[0]]].copy()
+    nueva["Observaciones"] = "tramo nuevo"
+    medio = df.index.get_loc(grupo[1])
+    siguiente = pd.concat([df.iloc[:medio], nueva, df.iloc[medio:]], ignore_index=True)
+
+    historial = HistoryStore(tmp_path / "historial.db")
+    historial.record(df, "v1")
+    resumen = historial.record(siguiente, "v2")
+    assert (resumen["altas"], resumen["modificaciones"], resumen["bajas"]) == (1, 0, 0)
+
+
+def test_ids_iguales_en_ambos_backends(servicio, sqlite, loop):
+    total = len(servicio.df)
+    memoria = servicio.get_tarifarios(skip=0, limit=total)
+    base = consultar(loop, sqlite, "get_tarifarios", skip=0, limit=total)
+    assert [item["id"] for item in base["items"]] == [item["id"] for item in memoria["items"]]
@@ -0,0 +1,22 @@
+"""
+Equivalencias entre bancos (índice de similitud)
+"""
+import pytest
+
+
+def _conceptos(servicio, resultado, banco):
+    return [servicio.df.iloc[fila]["Concepto"] for fila, _ in resultado.get(banco, [])]
+
+
+def test_disposicion_de_efectivo_prioriza_terminos_raros(servicio):
+    similarity = servicio.snapshot.similarity
+    resultado = similarity.similar_to_text("disposicion de efectivo", 5)
+
+    assert _conceptos(servicio, resultado, "Banco_de_la_Nación")[0] != "CONVERSIÓN DE MONEDA"
+    assert "Disposición de Efectivo" in _conceptos(servicio, resultado, "BCP")[0]
+
+
+@pytest.mark.parametrize("texto", ["disposicion de efectivo", "disposición efectivo", "DISPOSICIÓN DEL EFECTIVO"])
+def test_consulta_tokenizada_como_la_busqueda_de_texto(servicio, texto):
+    similarity = servicio.snapshot.similarity
+    assert similarity.similar_to_text(texto, 3) == similarity.similar_to_text("disposicion efectivo", 3)
@@ -0,0 +1,52 @@
+"""
+Store compartido de snapshots entre workers
+"""
+import numpy as np
+
+from src.services.aggregation_cube import AggregationCube
+from src.services.distribution_cube import DistributionCube
+from src.services.viewer_service import ViewerService
+
+
+def _sin_reconstruir(monkeypatch):
+    """Falla si algún cubo se calcula desde las filas en vez de adjuntarse."""
+    def prohibido(*args, **kwargs):
+        raise AssertionError("el cubo se reconstruyó en lugar de adjuntarse")
+    original = AggregationCube.__init__
+
+    def adjuntar(self, df, numeric, cells=None):
+        if cells is None:
+            prohibido()
+        original(self, df, numeric, cells)
+    monkeypatch.setattr(AggregationCube, "__init__", adjuntar)
+    monkeypatch.setattr(DistributionCube, "from_frame", classmethod(prohibido))
+
+
+def test_segundo_worker_adjunta_los_cubos(csv_path, tmp_path, monkeypatch):
+    publicador = ViewerService(csv_path, store_root=tmp_path / "store")
+    _sin_reconstruir(monkeypatch)
+    worker = ViewerService(csv_path, store_root=tmp_path / "store")
+
+    assert worker.snapshot.version == publicador.snapshot.version
+    filtros = {"Banco": ["BCP", "Interbank"]}
+    assert worker.snapshot.cube.query(filtros, ["Tipo"]) == publicador.snapshot.cube.query(filtros, ["Tipo"])
+    columna = publicador.snapshot.cube.metrics[0]
+    assert worker.snapshot.distribution.query(columna, filtros, ["Banco"]) == \
+        publicador.snapshot.distribution.query(columna, filtros, ["Banco"])
+    for nombre, array in publicador.snapshot.distribution.arrays().items():
+        np.testing.assert_array_equal(worker.snapshot.distribution.arrays()[nombre], array)
+
+
+def test_seguidor_adjunta_la_version_publicada(csv_path, tmp_path):
+    publicador = ViewerService(csv_path, store_root=tmp_path / "store")
+    seguidor = ViewerService(csv_path, store_root=tmp_path / "store")
+    assert publicador.store.lead()
+    assert not seguidor.store.lead()
+
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write(csv_path.read_text(encoding="utf-8").splitlines()[1] + "\n")
+    assert publicador.reload_now()
+
+    assert seguidor._adjuntar_publicado()
+    assert seguidor.snapshot.version == publicador.snapshot.version
+    assert len(seguidor.snapshot.df) == len(publicador.snapshot.df)
@@ -0,0 +1,57 @@
+"""
+Los dos backends detrás de la misma interfaz: mismas respuestas y la versión
+de la vista que resolvió cada consulta
+"""
+import pytest
+
+from src.services.pagination import ExpiredCursorError
+from tests.conftest import consultar
+
+
+def test_equivalentes_iguales_en_ambos_backends(servicio, sqlite, loop):
+    fila = servicio.get_tarifarios(banco="BCP", concepto="disposición efectivo", limit=1)["items"][0]
+    for params in ({"row_id": fila["id"]}, {"q": "disposición de efectivo"}, {"q": "seguro", "bancos": ["BBVA_Continental"]}):
+        memoria = loop.run_until_complete(_en_memoria(servicio, "get_equivalentes", k=3, **params))
+        base = consultar(loop, sqlite, "get_equivalentes", k=3, **params)
+        assert base == memoria
+        assert base["bancos"]
+    assert consultar(loop, sqlite, "get_equivalentes", row_id="no-existe") is None
+
+
+def test_solo_el_id(servicio, sqlite, loop):
+    memoria = servicio.get_tarifarios(limit=5, fields=["id"])
+    base = consultar(loop, sqlite, "get_tarifarios", limit=5, fields=["id"])
+    assert base["items"] == memoria["items"]
+    assert list(base["items"][0]) == ["id"]
+
+
+def test_la_vista_conserva_su_version_tras_una_recarga(csv_path, sqlite, loop):
+    async def recargar_durante_la_vista():
+        async with sqlite.view() as vista:
+            with open(csv_path, "a", encoding="utf-8") as f:
+                f.write(csv_path.read_text(encoding="utf-8").splitlines()[1] + "\n")
+            assert await sqlite.reload()
+            pagina = await vista.get_tarifarios(limit=1)
+            return vista.version, pagina
+
+    anterior = sqlite.version
+    version, pagina = loop.run_until_complete(recargar_durante_la_vista())
+    assert version == anterior != sqlite.version
+    assert pagina["total_items"] == sqlite.info()["total_registros"] - 1
+
+
+def test_exportacion_de_una_version_reemplazada_expira(csv_path, sqlite, loop):
+    async def exportar_tras_recargar():
+        async with sqlite.view() as vista:
+            with open(csv_path, "a", encoding="utf-8") as f:
+                f.write(csv_path.read_text(encoding="utf-8").splitlines()[1] + "\n")
+            await sqlite.reload()
+            await vista.export("csv")
+
+    with pytest.raises(ExpiredCursorError):
+        loop.run_until_complete(exportar_tras_recargar())
+
+
+async def _en_memoria(servicio, metodo, **kwargs):
+    async with servicio.view() as vista:
+        return await getattr(vista, metodo)(**kwargs)